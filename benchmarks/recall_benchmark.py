@@ -0,0 +1,154 @@
+import argparse
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from tests.fake_chroma import fake_embed
+from benchmarks.synthetic_repo import LANGUAGE_EXTENSIONS, generate_synthetic_repo
+from chunker_src.chunk_and_vectorise import _read_and_split
+from chunker_src.embedding_transform import (
+    QUANTIZATIONS,
+    decode_embeddings,
+    encode_embeddings,
+    fit_embedding_transform,
+    project_embeddings,
+)
+
+
+def _top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ matrix.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def _perturb(text: str, rng: random.Random) -> str:
+    words = text.split()
+    kept = [word for word in words if rng.random() > 0.3]
+    return " ".join(kept or words)
+
+
+def measure_recall(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    dims: list[int | None],
+    k: int,
+    sample_size: int,
+) -> list[dict]:
+    """
+    Measure recall@k and memory of every dimension and quantization setting.
+
+    Recall is measured against exact search over the full float32 vectors.
+
+    Args:
+        vectors (np.ndarray): The chunk embeddings.
+        queries (np.ndarray): The query embeddings.
+        dims (list[int | None]): Dimensions to keep; None keeps all.
+        k (int): Number of results per query.
+        sample_size (int): Number of vectors the transforms are fitted on.
+
+    Returns:
+        list[dict]: One row per setting with recall and memory figures.
+    """
+    truth = _top_k(vectors, queries, k)
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+    rows = []
+    for dim in dims:
+        for quantization in QUANTIZATIONS:
+            transform = fit_embedding_transform(sample=sample, dim=dim, quantization=quantization)
+            codes = encode_embeddings(transform, vectors)
+            found = _top_k(
+                decode_embeddings(transform, codes), project_embeddings(transform, queries), k
+            )
+            recall = np.mean(
+                [len(set(truth[i]) & set(found[i])) / k for i in range(len(queries))]
+            )
+            bytes_per_vector = codes.itemsize * codes.shape[1]
+            rows.append(
+                {
+                    "dim": codes.shape[1],
+                    "quantization": quantization,
+                    f"recall_at_{k}": round(float(recall), 4),
+                    "bytes_per_vector": bytes_per_vector,
+                    "mb_per_million_vectors": round(bytes_per_vector * 1e6 / 2**20, 1),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    """
+    Report the recall@k vs. memory trade-off of embedding transforms on a sample repo.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--file-size", type=int, default=4000)
+    parser.add_argument("--languages", type=str, default="python=0.6,js=0.3,go=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dims", type=str, default="all,256,128,64")
+    parser.add_argument("--sample-size", type=int, default=2000)
+    parser.add_argument(
+        "--real-embeddings",
+        action="store_true",
+        help="Embed with Chroma's default model instead of the offline hashing embedder",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    language_mix = {}
+    for item in args.languages.split(","):
+        language, _, weight = item.partition("=")
+        language_mix[language.strip()] = float(weight) if weight else 1.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        generate_synthetic_repo(
+            root=root,
+            file_count=args.files,
+            file_size=args.file_size,
+            language_mix=language_mix,
+            seed=args.seed,
+        )
+        chunks = []
+        for language, extension in LANGUAGE_EXTENSIONS.items():
+            for path in sorted(root.glob(f"src/**/*.{extension}")):
+                chunks.extend(_read_and_split(str(path), language))
+
+    rng = random.Random(args.seed)
+    query_texts = [_perturb(rng.choice(chunks), rng) for _ in range(args.queries)]
+    if args.real_embeddings:
+        from chunker_src.embeddings import embed_texts
+
+        vectors, queries = embed_texts(chunks), embed_texts(query_texts)
+    else:
+        vectors, queries = fake_embed(chunks), fake_embed(query_texts)
+
+    dims = [None if dim == "all" else int(dim) for dim in args.dims.split(",")]
+    report = {
+        "params": {
+            "files": args.files,
+            "chunks": len(chunks),
+            "queries": args.queries,
+            "k": args.k,
+            "sample_size": args.sample_size,
+            "real_embeddings": args.real_embeddings,
+        },
+        "results": measure_recall(
+            vectors=vectors,
+            queries=queries,
+            dims=[dim for dim in dims if dim is None or dim <= vectors.shape[1]],
+            k=args.k,
+            sample_size=args.sample_size,
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from tests.fake_chroma import FakeAsyncClient, make_fake_client_factory
+from benchmarks.synthetic_repo import LANGUAGE_EXTENSIONS, generate_synthetic_repo
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.query_chunks import query_chunks_core
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+QUERIES = [
+    "database connection setup",
+    "where is the session token validated",
+    "parse the request config",
+    "cache the query result",
+    "metrics handler for the server",
+    "build the vector index",
+    "user schema response",
+    "client chunk parser",
+]
+
+HIGHER_IS_BETTER = {"files_per_second", "chunks_per_second"}
+LOWER_IS_BETTER = {"peak_rss_mb", "query_p50_ms", "query_p99_ms"}
+
+
+def _parse_language_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        language, _, weight = item.partition("=")
+        mix[language.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run(args: argparse.Namespace, root: Path) -> dict:
+    repo = generate_synthetic_repo(
+        root=root,
+        file_count=args.files,
+        file_size=args.file_size,
+        language_mix=_parse_language_mix(args.languages),
+        seed=args.seed,
+    )
+    logger = logging.getLogger("benchmarks")
+    client = FakeAsyncClient()
+
+    with mock.patch("chromadb.AsyncHttpClient", make_fake_client_factory(client)):
+        started = time.perf_counter()
+        for language, count in repo.files_by_language.items():
+            if not count:
+                continue
+            config = chunker_model.ChunkAndVectoriseConfig(
+                chroma_host="fake",
+                chroma_port=0,
+                collection_name="benchmark",
+                max_batch_size=args.max_batch_size,
+                language=language,
+                state_dir=root.parent / "state",
+            )
+            error = await chunk_and_vectorise_core(
+                project_dir=root,
+                pattern=f"src/**/*.{LANGUAGE_EXTENSIONS[language]}",
+                config=config,
+                logger_instance=logger,
+            )
+            if error is not None:
+                raise RuntimeError(error.message)
+        ingest_seconds = time.perf_counter() - started
+
+        num_chunks = await client.collections["benchmark"].count()
+        query_config = chunker_model.QueryChunksConfig(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="benchmark",
+            n_results=args.n_results,
+            rerank=args.rerank,
+        )
+        latencies = []
+        for idx in range(args.queries):
+            query_started = time.perf_counter()
+            await query_chunks_core(
+                query_text=QUERIES[idx % len(QUERIES)],
+                config=query_config,
+                logger=logger,
+                n_results=args.n_results,
+            )
+            latencies.append((time.perf_counter() - query_started) * 1000)
+
+    return {
+        "params": {
+            "files": args.files,
+            "file_size": args.file_size,
+            "languages": args.languages,
+            "seed": args.seed,
+            "queries": args.queries,
+            "n_results": args.n_results,
+            "max_batch_size": args.max_batch_size,
+            "rerank": args.rerank,
+        },
+        "results": {
+            "files_per_second": args.files / ingest_seconds,
+            "chunks_per_second": num_chunks / ingest_seconds,
+            "peak_rss_mb": _peak_rss_mb(),
+            "query_p50_ms": statistics.median(latencies),
+            "query_p99_ms": _percentile(latencies, 0.99),
+        },
+        "totals": {
+            "bytes": repo.total_bytes,
+            "chunks": num_chunks,
+            "ingest_seconds": ingest_seconds,
+        },
+    }
+
+
+def compare_to_baseline(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        results (dict[str, float]): The measured results.
+        baseline (dict[str, float]): The baseline results.
+        tolerance (float): Allowed relative regression (e.g. 0.2 for 20%).
+
+    Returns:
+        list[str]: A description of every metric that regressed.
+    """
+    regressions = []
+    for metric, expected in baseline.items():
+        actual = results.get(metric)
+        if actual is None or not expected:
+            continue
+        if metric in HIGHER_IS_BETTER and actual < expected * (1 - tolerance):
+            regressions.append(f"{metric}: {actual:.2f} < baseline {expected:.2f}")
+        if metric in LOWER_IS_BETTER and actual > expected * (1 + tolerance):
+            regressions.append(f"{metric}: {actual:.2f} > baseline {expected:.2f}")
+    return regressions
+
+
+def main() -> None:
+    """
+    Run the indexing and query benchmarks and compare them against a baseline.
+
+    Exits with status 1 if any metric regressed beyond the tolerance.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--file-size", type=int, default=4000)
+    parser.add_argument("--languages", type=str, default="python=0.6,js=0.3,go=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--rerank", action="store_true", help="Rerank query results")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("benchmarks").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = asyncio.run(_run(args=args, root=Path(tmp) / "repo"))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline.")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("params") != report["params"]:
+        print("Baseline was recorded with different parameters; skipping comparison.")
+        return
+
+    regressions = compare_to_baseline(
+        results=report["results"],
+        baseline=baseline["results"],
+        tolerance=args.tolerance,
+    )
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"- {regression}")
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = [
+    "user",
+    "session",
+    "token",
+    "database",
+    "connection",
+    "request",
+    "response",
+    "cache",
+    "config",
+    "parser",
+    "index",
+    "vector",
+    "chunk",
+    "query",
+    "result",
+    "handler",
+    "client",
+    "server",
+    "metrics",
+    "schema",
+]
+
+LANGUAGE_EXTENSIONS = {
+    "python": "py",
+    "js": "js",
+    "go": "go",
+    "rust": "rs",
+}
+
+
+@dataclass
+class SyntheticRepo:
+    """
+    A generated repository and the files written per language.
+
+    Args:
+        root (Path): The root directory of the repository.
+        files_by_language (dict[str, int]): Number of files per language.
+        total_bytes (int): Total size of all generated files.
+    """
+
+    root: Path
+    files_by_language: dict[str, int]
+    total_bytes: int
+
+
+def _name(rng: random.Random) -> str:
+    return "_".join(rng.sample(WORDS, 2))
+
+
+def _python_unit(rng: random.Random) -> str:
+    name = _name(rng)
+    args = ", ".join(rng.sample(WORDS, 2))
+    return (
+        f"def {name}({args}):\n"
+        f'    """Return the {name.replace("_", " ")} for the given {args}."""\n'
+        f"    if {args.split(', ')[0]} is None:\n"
+        f"        return None\n"
+        f"    return {{'{name}': [{args}]}}\n"
+    )
+
+
+def _js_unit(rng: random.Random) -> str:
+    name = _name(rng)
+    args = ", ".join(rng.sample(WORDS, 2))
+    return (
+        f"function {name}({args}) {{\n"
+        f"  // Build the {name.replace('_', ' ')}\n"
+        f"  if (!{args.split(', ')[0]}) {{ return null; }}\n"
+        f"  return {{ {name}: [{args}] }};\n"
+        f"}}\n"
+    )
+
+
+def _go_unit(rng: random.Random) -> str:
+    name = _name(rng).title().replace("_", "")
+    arg = rng.choice(WORDS)
+    return (
+        f"func {name}({arg} string) (string, error) {{\n"
+        f'\tif {arg} == "" {{\n'
+        f'\t\treturn "", errors.New("empty {arg}")\n'
+        f"\t}}\n"
+        f"\treturn {arg}, nil\n"
+        f"}}\n"
+    )
+
+
+def _rust_unit(rng: random.Random) -> str:
+    name = _name(rng)
+    arg = rng.choice(WORDS)
+    return (
+        f"pub fn {name}({arg}: &str) -> Option<String> {{\n"
+        f"    if {arg}.is_empty() {{\n"
+        f"        return None;\n"
+        f"    }}\n"
+        f"    Some({arg}.to_string())\n"
+        f"}}\n"
+    )
+
+
+_UNIT_GENERATORS = {
+    "python": _python_unit,
+    "js": _js_unit,
+    "go": _go_unit,
+    "rust": _rust_unit,
+}
+
+
+def _generate_file(rng: random.Random, language: str, target_bytes: int) -> str:
+    units = []
+    size = 0
+    while size < target_bytes:
+        unit = _UNIT_GENERATORS[language](rng)
+        units.append(unit)
+        size += len(unit) + 1
+    return "\n".join(units)
+
+
+def generate_synthetic_repo(
+    root: Path,
+    file_count: int,
+    file_size: int,
+    language_mix: dict[str, float],
+    seed: int = 0,
+    files_per_dir: int = 50,
+) -> SyntheticRepo:
+    """
+    Generate a reproducible synthetic source repository.
+
+    Files are written to `src/pkg_<n>/module_<m>.<ext>`, with languages drawn
+    according to `language_mix` and sizes jittered around `file_size`.
+
+    Args:
+        root (Path): The directory to write the repository to.
+        file_count (int): The number of files to generate.
+        file_size (int): The approximate size of each file in bytes.
+        language_mix (dict[str, float]): Relative weight of each language.
+        seed (int): Seed of the random generator.
+        files_per_dir (int): Number of files per package directory.
+
+    Returns:
+        SyntheticRepo: Description of the generated repository.
+    """
+    unknown = set(language_mix) - set(LANGUAGE_EXTENSIONS)
+    if unknown:
+        raise ValueError(f"Unsupported languages: {', '.join(sorted(unknown))}")
+
+    rng = random.Random(seed)
+    languages = list(language_mix)
+    weights = [language_mix[language] for language in languages]
+    files_by_language = {language: 0 for language in languages}
+    total_bytes = 0
+
+    for idx in range(file_count):
+        language = rng.choices(languages, weights=weights)[0]
+        package_dir = root / "src" / f"pkg_{idx // files_per_dir}"
+        package_dir.mkdir(parents=True, exist_ok=True)
+        target = max(64, int(file_size * rng.uniform(0.5, 1.5)))
+        content = _generate_file(rng=rng, language=language, target_bytes=target)
+        path = package_dir / f"module_{idx}.{LANGUAGE_EXTENSIONS[language]}"
+        path.write_text(content, encoding="utf-8")
+        files_by_language[language] += 1
+        total_bytes += len(content.encode("utf-8"))
+
+    return SyntheticRepo(
+        root=root, files_by_language=files_by_language, total_bytes=total_bytes
+    )
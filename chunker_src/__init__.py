@@ -1 +1,15 @@
-from .cli import app
+def __getattr__(name: str):
+    """
+    Load the Typer app on first access so importing the package stays cheap.
+
+    Args:
+        name (str): The attribute being looked up.
+
+    Returns:
+        typer.Typer: The CLI app when `name` is 'app'.
+    """
+    if name == "app":
+        from chunker_src.cli import app
+
+        return app
+    raise AttributeError(f"module 'chunker_src' has no attribute {name!r}")
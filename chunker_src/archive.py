@@ -0,0 +1,363 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Union
+import numpy as np
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import _with_retry
+from chunker_src.clients import connect_client
+from chunker_src.embeddings import shared_embedding_function
+from chunker_src.sharding import ShardedCollection
+from chunker_src.storage import StorageCollection
+
+ARCHIVE_MAGIC = b"CHUNKARC"
+ARCHIVE_VERSION = 1
+EXPORT_BLOCK_SIZE = 1000
+IMPORT_CONCURRENCY = 4
+COMPRESSION_LEVEL = 1
+
+_UINT32 = struct.Struct("<I")
+_BLOCK_HEADER = struct.Struct("<II")
+
+
+def _encode_block(
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict],
+    embeddings: np.ndarray,
+) -> bytes:
+    """
+    Encode and compress a block of records.
+
+    The payload is the length of a JSON array of ids, documents and metadata,
+    the array, and the float32 embedding matrix in row order.
+
+    Args:
+        ids (list[str]): Ids of the records.
+        documents (list[str]): Their documents.
+        metadatas (list[dict]): Their metadata.
+        embeddings (np.ndarray): Their embeddings, one row each.
+
+    Returns:
+        bytes: The block, with its header.
+    """
+    columns = json.dumps([ids, documents, metadatas], separators=(",", ":")).encode()
+    vectors = np.ascontiguousarray(embeddings, dtype="<f4").tobytes()
+    payload = zlib.compress(
+        _UINT32.pack(len(columns)) + columns + vectors, COMPRESSION_LEVEL
+    )
+    return _BLOCK_HEADER.pack(len(payload), len(ids)) + payload
+
+
+def _read_block(
+    f: BinaryIO,
+) -> tuple[list[str], list[str], list[dict], np.ndarray] | int:
+    """
+    Read and decode the next block of an archive.
+
+    Args:
+        f (BinaryIO): The archive, positioned at a block.
+
+    Returns:
+        tuple[list[str], list[str], list[dict], np.ndarray] | int: The ids,
+        documents, metadata and embeddings of the block, or the record count
+        of the archive's trailer once all blocks are read.
+
+    Raises:
+        ValueError: If the archive is truncated or corrupt.
+    """
+    header = f.read(_BLOCK_HEADER.size)
+    if len(header) < _BLOCK_HEADER.size:
+        raise ValueError("Archive is truncated: the trailer is missing.")
+    size, rows = _BLOCK_HEADER.unpack(header)
+    if size == 0:
+        return rows
+    compressed = f.read(size)
+    if len(compressed) < size:
+        raise ValueError("Archive is truncated inside a block.")
+    try:
+        payload = zlib.decompress(compressed)
+    except zlib.error as e:
+        raise ValueError(f"Archive block is corrupt: {e}") from e
+    (columns_size,) = _UINT32.unpack_from(payload)
+    columns_end = _UINT32.size + columns_size
+    ids, documents, metadatas = json.loads(payload[_UINT32.size : columns_end])
+    vectors = np.frombuffer(payload, dtype="<f4", offset=columns_end)
+    if len(ids) != rows or (rows and len(vectors) % rows):
+        raise ValueError("Archive block does not match its header.")
+    return ids, documents, metadatas, vectors.reshape(rows, -1) if rows else vectors
+
+
+def _read_archive_header(f: BinaryIO) -> dict:
+    """
+    Read and check the header of an archive.
+
+    Args:
+        f (BinaryIO): The archive, at its start.
+
+    Returns:
+        dict: The header fields.
+
+    Raises:
+        ValueError: If the file is not an archive of a supported version.
+    """
+    if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+        raise ValueError("Not a chunker archive.")
+    version_and_size = f.read(2 * _UINT32.size)
+    if len(version_and_size) < 2 * _UINT32.size:
+        raise ValueError("Archive is truncated in its header.")
+    version, size = struct.unpack("<II", version_and_size)
+    if version != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version {version}.")
+    return json.loads(f.read(size))
+
+
+def _write_archive_header(f: BinaryIO, header: dict) -> None:
+    encoded = json.dumps(header).encode()
+    f.write(ARCHIVE_MAGIC + struct.pack("<II", ARCHIVE_VERSION, len(encoded)) + encoded)
+
+
+async def _export_pages(
+    collection: StorageCollection,
+    block_size: int,
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> AsyncIterator[dict]:
+    """
+    Page through every record of a collection, shard by shard.
+
+    Args:
+        collection (StorageCollection): The collection.
+        block_size (int): Records per page.
+        retry_policy (chunker_model.RetryPolicy): Retry policy for Chroma calls.
+        logger (logging.Logger): Logger instance.
+
+    Yields:
+        dict: Pages of ids, documents, metadata and embeddings.
+    """
+    sources = (
+        collection.shards if isinstance(collection, ShardedCollection) else [collection]
+    )
+    for source in sources:
+        offset = 0
+        while True:
+            page = await _with_retry(
+                "get",
+                lambda: source.get(
+                    limit=block_size,
+                    offset=offset,
+                    include=["documents", "metadatas", "embeddings"],
+                ),
+                retry_policy,
+                logger,
+            )
+            if not page["ids"]:
+                break
+            yield page
+            offset += len(page["ids"])
+
+
+def _write_page(f: BinaryIO, page: dict) -> None:
+    f.write(
+        _encode_block(
+            ids=list(page["ids"]),
+            documents=list(page["documents"]),
+            metadatas=list(page["metadatas"]),
+            embeddings=np.asarray(page["embeddings"], dtype=np.float32),
+        )
+    )
+
+
+async def export_collection_core(
+    chroma_host: str,
+    chroma_port: int,
+    collection_name: str,
+    output: Path,
+    logger: logging.Logger,
+    chroma_endpoints: list[str] | None = None,
+    local_store: Path | None = None,
+    block_size: int = EXPORT_BLOCK_SIZE,
+    retry_policy: chunker_model.RetryPolicy | None = None,
+) -> Union[int, chunker_model.ChromaDBError, chunker_model.ArchiveError]:
+    """
+    Export a collection's ids, embeddings, documents and metadata to an archive.
+
+    Records are read `block_size` at a time and written as zlib-compressed
+    blocks; the next page is fetched while the previous one is compressed, so
+    at most two pages are held in memory. The archive is written under a
+    temporary name and renamed once complete.
+
+    Args:
+        chroma_host (str): ChromaDB host.
+        chroma_port (int): ChromaDB port.
+        collection_name (str): The collection to export.
+        output (Path): The archive to write.
+        logger (logging.Logger): Logger instance.
+        chroma_endpoints (list[str] | None): 'host:port' endpoints of a sharded
+            collection.
+        local_store (Path | None): Directory of a local store holding the
+            collection, used instead of Chroma.
+        block_size (int): Records per block.
+        retry_policy (chunker_model.RetryPolicy | None): Retry policy for Chroma calls.
+
+    Returns:
+        Union[int, ...]: The number of records exported, or an error object.
+    """
+    retry_policy = retry_policy or chunker_model.RetryPolicy()
+    try:
+        client = await connect_client(
+            chroma_host=chroma_host,
+            chroma_port=chroma_port,
+            chroma_endpoints=chroma_endpoints,
+            local_store=local_store,
+        )
+        collection = await client.get_collection(collection_name)
+    except Exception as e:
+        return chunker_model.ChromaDBError(message=f"Failed to get the collection: {e}")
+
+    partial = output.with_name(output.name + ".part")
+    total = 0
+    try:
+        with open(partial, "wb") as f:
+            _write_archive_header(f, {"collection": collection_name})
+            writing = None
+            async for page in _export_pages(collection, block_size, retry_policy, logger):
+                if writing is not None:
+                    await writing
+                writing = asyncio.create_task(asyncio.to_thread(_write_page, f, page))
+                total += len(page["ids"])
+                logger.info(f"Exported {total} records.")
+            if writing is not None:
+                await writing
+            f.write(_BLOCK_HEADER.pack(0, total))
+        os.replace(partial, output)
+    except OSError as e:
+        partial.unlink(missing_ok=True)
+        return chunker_model.ArchiveError(message=f"Could not write {output}: {e}")
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        return chunker_model.ChromaDBError(message=f"Export failed: {e}")
+    return total
+
+
+async def import_collection_core(
+    chroma_host: str,
+    chroma_port: int,
+    collection_name: str,
+    archive: Path,
+    logger: logging.Logger,
+    chroma_endpoints: list[str] | None = None,
+    local_store: Path | None = None,
+    batch_size: int | None = None,
+    concurrency: int = IMPORT_CONCURRENCY,
+    retry_policy: chunker_model.RetryPolicy | None = None,
+) -> Union[int, chunker_model.ChromaDBError, chunker_model.ArchiveError]:
+    """
+    Import an archive into a collection, with its stored embeddings.
+
+    Nothing is re-embedded. Blocks are decoded in a thread and uploaded by
+    `concurrency` workers through a queue of `concurrency` blocks, which bounds
+    memory. Records whose ids are already in the collection are left as they are.
+
+    Args:
+        chroma_host (str): ChromaDB host.
+        chroma_port (int): ChromaDB port.
+        collection_name (str): The collection to import into; created if missing.
+        archive (Path): The archive to read.
+        logger (logging.Logger): Logger instance.
+        chroma_endpoints (list[str] | None): 'host:port' endpoints of a sharded
+            collection.
+        local_store (Path | None): Directory of a local store to import into,
+            used instead of Chroma.
+        batch_size (int | None): Records per collection.add(); defaults to the
+            server's max batch size.
+        concurrency (int): Concurrent collection.add() calls.
+        retry_policy (chunker_model.RetryPolicy | None): Retry policy for Chroma calls.
+
+    Returns:
+        Union[int, ...]: The number of records imported, or an error object.
+    """
+    retry_policy = retry_policy or chunker_model.RetryPolicy()
+    concurrency = max(1, concurrency)
+    try:
+        f = open(archive, "rb")
+    except OSError as e:
+        return chunker_model.ArchiveError(message=f"Could not open {archive}: {e}")
+    with f:
+        try:
+            header = _read_archive_header(f)
+        except ValueError as e:
+            return chunker_model.ArchiveError(message=f"{archive}: {e}")
+        try:
+            client = await connect_client(
+                chroma_host=chroma_host,
+                chroma_port=chroma_port,
+                chroma_endpoints=chroma_endpoints,
+                local_store=local_store,
+            )
+            collection = await client.get_or_create_collection(
+                collection_name, embedding_function=shared_embedding_function()
+            )
+            if batch_size is None:
+                batch_size = await client.get_max_batch_size()
+        except Exception as e:
+            return chunker_model.ChromaDBError(
+                message=f"Failed to get/create the collection: {e}"
+            )
+        logger.info(
+            f"Importing collection {header.get('collection')!r} into {collection_name!r}."
+        )
+
+        queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=concurrency)
+        imported = 0
+
+        async def read_blocks() -> None:
+            rows = 0
+            while True:
+                block = await asyncio.to_thread(_read_block, f)
+                if isinstance(block, int):
+                    if block != rows:
+                        raise ValueError(
+                            f"Archive holds {rows} records, its trailer says {block}."
+                        )
+                    break
+                rows += len(block[0])
+                await queue.put(block)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def upload_blocks() -> None:
+            nonlocal imported
+            while (block := await queue.get()) is not None:
+                ids, documents, metadatas, vectors = block
+                for start in range(0, len(ids), batch_size):
+                    end = start + batch_size
+                    await _with_retry(
+                        "upsert",
+                        lambda: collection.upsert(
+                            ids=ids[start:end],
+                            documents=documents[start:end],
+                            metadatas=metadatas[start:end],
+                            embeddings=vectors[start:end],
+                        ),
+                        retry_policy,
+                        logger,
+                    )
+                imported += len(ids)
+                logger.info(f"Imported {imported} records.")
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                reader = group.create_task(read_blocks())
+                for _ in range(concurrency):
+                    group.create_task(upload_blocks())
+        except ExceptionGroup as errors:
+            error = errors.exceptions[0]
+            if reader.done() and not reader.cancelled() and reader.exception() is error:
+                return chunker_model.ArchiveError(message=f"{archive}: {error}")
+            return chunker_model.ChromaDBError(message=f"Import failed: {error}")
+    return imported
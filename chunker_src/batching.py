@@ -0,0 +1,196 @@
+import bisect
+import httpx
+from chromadb import errors as chroma_errors
+from chunker_src import model as chunker_model
+from chunker_src.metrics import set_gauge
+
+GROW_AFTER_SUCCESSES = 3
+
+
+def new_batch_controller(
+    initial_batch_size: int,
+    server_max_batch_size: int | None,
+    max_concurrency: int,
+    target_latency: float,
+    adaptive: bool,
+    max_batch_tokens: int | None = None,
+) -> chunker_model.AdaptiveBatchController:
+    """
+    Create a batch controller bounded by the server's reported max batch size.
+
+    Args:
+        initial_batch_size (int): Batch size to start from.
+        server_max_batch_size (int | None): Max batch size reported by the server.
+        max_concurrency (int): Upper bound on concurrent collection.add() calls.
+        target_latency (float): Latency in seconds below which the controller grows.
+        adaptive (bool): When False, the batch size and concurrency stay fixed.
+        max_batch_tokens (int | None): Cap on the total tokens of a batch.
+
+    Returns:
+        chunker_model.AdaptiveBatchController: The controller.
+    """
+    ceiling = server_max_batch_size or max(initial_batch_size, 1)
+    batch_size = max(1, min(initial_batch_size, ceiling))
+    controller = chunker_model.AdaptiveBatchController(
+        batch_size=batch_size,
+        concurrency=1,
+        min_batch_size=1,
+        max_batch_size=ceiling if adaptive else batch_size,
+        max_concurrency=max(1, max_concurrency) if adaptive else 1,
+        target_latency=target_latency,
+        adaptive=adaptive,
+        max_batch_tokens=max_batch_tokens,
+    )
+    _publish(controller)
+    return controller
+
+
+def cut_batch(
+    controller: chunker_model.AdaptiveBatchController,
+    start: int,
+    end: int,
+    token_offsets: list[int] | None = None,
+) -> int:
+    """
+    Find the end of the next batch of pending chunks.
+
+    The batch holds at most `controller.batch_size` chunks and, when token
+    counts are known, at most `controller.max_batch_tokens` tokens. It always
+    holds at least one chunk.
+
+    Args:
+        controller (chunker_model.AdaptiveBatchController): The controller.
+        start (int): Index of the first pending chunk.
+        end (int): Index after the last pending chunk of this range.
+        token_offsets (list[int] | None): Running token totals, where
+            `token_offsets[i]` is the number of tokens before chunk `i`.
+
+    Returns:
+        int: Index after the last chunk of the batch.
+    """
+    cut = min(end, start + controller.batch_size)
+    if controller.max_batch_tokens is None or token_offsets is None:
+        return cut
+    limit = token_offsets[start] + controller.max_batch_tokens
+    fits = bisect.bisect_right(token_offsets, limit, lo=start + 1, hi=cut + 1) - 1
+    return max(start + 1, fits)
+
+
+def _publish(controller: chunker_model.AdaptiveBatchController) -> None:
+    """
+    Publish the controller's current values as gauges.
+
+    Args:
+        controller (chunker_model.AdaptiveBatchController): The controller.
+    """
+    set_gauge("chunker_batch_size", controller.batch_size)
+    set_gauge("chunker_add_concurrency", controller.concurrency)
+
+
+def classify_chroma_error(error: BaseException) -> str:
+    """
+    Classify a failed collection.add() call for the batch controller.
+
+    Args:
+        error (BaseException): The raised error.
+
+    Returns:
+        str: 'too_large' for 413s and batch size errors, 'timeout' for timeouts,
+        'overloaded' for 5xx and rate limits, or 'other'.
+    """
+    status = None
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    elif isinstance(error, chroma_errors.ChromaError):
+        status = error.code()
+
+    message = str(error).lower()
+    if (
+        isinstance(error, chroma_errors.BatchSizeExceededError)
+        or status == 413
+        or "too large" in message
+        or "batch size" in message
+    ):
+        return "too_large"
+    if isinstance(error, (TimeoutError, httpx.TimeoutException)) or "timed out" in message:
+        return "timeout"
+    if (
+        isinstance(error, chroma_errors.RateLimitError)
+        or (status is not None and (status >= 500 or status == 429))
+    ):
+        return "overloaded"
+    return "other"
+
+
+def is_chroma_error(error: BaseException) -> bool:
+    """
+    Check whether an error was raised by a Chroma call rather than by chunker.
+
+    Args:
+        error (BaseException): The raised error.
+
+    Returns:
+        bool: True for Chroma errors, HTTP errors, connection errors and
+        timeouts.
+    """
+    return isinstance(
+        error,
+        (chroma_errors.ChromaError, httpx.HTTPError, ConnectionError, TimeoutError),
+    )
+
+
+def record_batch_success(
+    controller: chunker_model.AdaptiveBatchController, latency: float
+) -> None:
+    """
+    Grow batch size, then concurrency, after a run of fast batches.
+
+    Args:
+        controller (chunker_model.AdaptiveBatchController): The controller.
+        latency (float): Duration of the successful collection.add() call.
+    """
+    if not controller.adaptive:
+        return
+
+    if latency > controller.target_latency:
+        controller.successes = 0
+        if controller.concurrency > 1:
+            controller.concurrency -= 1
+            _publish(controller)
+        return
+
+    controller.successes += 1
+    if controller.successes < GROW_AFTER_SUCCESSES:
+        return
+
+    controller.successes = 0
+    if latency < controller.target_latency / 2 and controller.batch_size < controller.max_batch_size:
+        controller.batch_size = min(controller.max_batch_size, controller.batch_size * 2)
+    elif controller.concurrency < controller.max_concurrency:
+        controller.concurrency += 1
+    _publish(controller)
+
+
+def record_batch_failure(
+    controller: chunker_model.AdaptiveBatchController, error_kind: str, batch_size: int
+) -> None:
+    """
+    Back off batch size and concurrency after a failed batch.
+
+    A batch rejected as too large also lowers the ceiling below its size, so
+    the controller never grows back into the rejected size.
+
+    Args:
+        controller (chunker_model.AdaptiveBatchController): The controller.
+        error_kind (str): The result of `classify_chroma_error`.
+        batch_size (int): Size of the failed batch.
+    """
+    controller.failures += 1
+    controller.successes = 0
+    if error_kind == "too_large":
+        controller.max_batch_size = max(controller.min_batch_size, batch_size // 2)
+        controller.batch_size = min(controller.batch_size, controller.max_batch_size)
+    elif error_kind in ("timeout", "overloaded") and controller.adaptive:
+        controller.batch_size = max(controller.min_batch_size, controller.batch_size // 2)
+        controller.concurrency = max(1, controller.concurrency // 2)
+    _publish(controller)
@@ -1,16 +1,73 @@
 import asyncio
+import json
 import pathspec
 import logging
 import os
+import random
+import time
 import uuid
+from collections import deque
 from pathlib import Path
 from chromadb.api.models.AsyncCollection import AsyncCollection
 from langchain_text_splitters import RecursiveCharacterTextSplitter, Language
-import chromadb
-from typing import Union
+from typing import Awaitable, Callable, TypeVar, Union
 from chunker_src import model as chunker_model
+from chunker_src.clients import get_client
+from chunker_src.dedup import (
+    aliases_of,
+    canonical_metadata,
+    chunk_fingerprint,
+    close_dedup_index,
+    commit_dedup_index,
+    find_canonical,
+    open_dedup_index,
+    register_alias,
+    register_canonical,
+    remove_path,
+)
+from chunker_src import embeddings
+from chunker_src.embeddings import shared_embedding_function
+from chunker_src.embedding_transform import (
+    decode_embeddings,
+    encode_embeddings,
+    fit_embedding_transform,
+    load_embedding_transform,
+    save_embedding_transform,
+)
+from chunker_src.file_selection import compile_file_selector, walk_selected_files
+from chunker_src.ordering import FILE_ORDERS, file_sizes, order_files
+from chunker_src.profiling import FILE_FRAME_PREFIX, profile_frame
+from chunker_src.scheduling import fair_slot, path_turn
+from chunker_src.snapshot import refresh_snapshot
+from chunker_src.symbols import (
+    close_symbol_index,
+    extract_symbols,
+    line_offsets,
+    open_symbol_index,
+    replace_symbols,
+)
+from chunker_src.tokens import count_tokens, load_tokenizer, token_length_function
+from chunker_src.batching import (
+    classify_chroma_error,
+    is_chroma_error,
+    cut_batch,
+    new_batch_controller,
+    record_batch_failure,
+    record_batch_success,
+)
+from chunker_src.journal import (
+    close_run_journal,
+    default_state_dir,
+    is_file_completed,
+    mark_collection_updated,
+    open_run_journal,
+    record_journal_event,
+    run_fingerprint,
+)
+from chunker_src.metrics import inc_counter, set_gauge, time_chroma_call, time_stage
 
 PathLike = Union[str, Path]
+T = TypeVar("T")
 
 
 def _validate_glob_pattern(pattern: str) -> Union[None, ValueError]:
@@ -34,6 +91,36 @@ def _validate_glob_pattern(pattern: str) -> Union[None, ValueError]:
     return None
 
 
+def _validate_patterns(
+    patterns: list[str], exclude: list[str]
+) -> Union[None, ValueError]:
+    """
+    Validate the include and exclude glob patterns of a run.
+
+    Include patterns are checked with `_validate_glob_pattern`; exclude patterns
+    only select files to leave out, so they may be recursive.
+
+    Args:
+        patterns (list[str]): The include patterns.
+        exclude (list[str]): The exclude patterns.
+
+    Returns:
+        Union[None, ValueError]: None if the patterns are valid, or a ValueError if not.
+    """
+    if not patterns:
+        return ValueError("At least one file pattern is required.")
+    for pattern in patterns:
+        error = _validate_glob_pattern(pattern)
+        if error:
+            return error
+    for pattern in exclude:
+        if ".." in pattern:
+            return ValueError(
+                "Exclude pattern must not contain parent directory traversal ('..')."
+            )
+    return None
+
+
 def _get_uuid() -> str:
     return uuid.uuid4().hex
 
@@ -55,188 +142,837 @@ async def _expand_and_validate_path(path: PathLike, absolute: bool = False) -> s
     return str(expanded)
 
 
-async def _remove_existing_chunks(
-    collection, collection_lock, full_path_str: str
-) -> int:
+async def _with_retry(
+    operation: str,
+    call: Callable[[], Awaitable[T]],
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> T:
+    """
+    Run a Chroma call, retrying failures with exponential backoff and jitter.
+
+    Args:
+        operation (str): Name of the Chroma operation, for logs and metrics.
+        call (Callable[[], Awaitable[T]]): Factory returning a fresh awaitable per attempt.
+        retry_policy (chunker_model.RetryPolicy): Number of attempts and backoff.
+        logger (logging.Logger): Logger instance.
+
+    Returns:
+        T: The result of the call.
+
+    Raises:
+        Exception: The last error once all attempts have failed.
+    """
+    attempt = 1
+    while True:
+        try:
+            with time_chroma_call(operation):
+                return await call()
+        except Exception as e:
+            if attempt >= retry_policy.max_retries:
+                raise
+            delay = retry_policy.base_delay * 2 ** (attempt - 1)
+            delay *= random.uniform(0.8, 1.2)
+            logger.warning(
+                f"Chroma {operation} failed (attempt {attempt}/{retry_policy.max_retries}): {e}. "
+                f"Retrying in {delay:.2f}s."
+            )
+            inc_counter("chunker_chroma_retries_total", labels={"operation": operation})
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def _get_existing_chunk_ids(
+    collection,
+    full_path_str: str,
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> list[str]:
+    """
+    Get the ids of the chunks already stored for the file.
+
+    Args:
+        collection: The ChromaDB collection object.
+        full_path_str (str): Path of the file as stored in the chunk metadata.
+        retry_policy (chunker_model.RetryPolicy): Retry policy for the Chroma call.
+        logger (logging.Logger): Logger instance.
+
+    Returns:
+        list[str]: Ids of the existing chunks.
+    """
+    existing = await _with_retry(
+        operation="get",
+        call=lambda: collection.get(
+            where={"path": full_path_str}, include=["metadatas"]
+        ),
+        retry_policy=retry_policy,
+        logger=logger,
+    )
+    return list(existing.get("ids") or [])
+
+
+async def _delete_chunks(
+    collection,
+    ids: list[str],
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> None:
     """
-    Remove existing chunks for the file from the collection.
+    Delete chunks from the collection by id.
 
     Args:
         collection: The ChromaDB collection object.
-        collection_lock: Asyncio lock for collection operations.
+        ids (list[str]): Ids of the chunks to delete.
+        retry_policy (chunker_model.RetryPolicy): Retry policy for the Chroma call.
+        logger (logging.Logger): Logger instance.
+    """
+    if not ids:
+        return
+    await _with_retry(
+        operation="delete",
+        call=lambda: collection.delete(ids=ids),
+        retry_policy=retry_policy,
+        logger=logger,
+    )
+
+
+def _read_source(full_path_str: str) -> tuple[bytes, str]:
+    """
+    Read and decode a file, blocking the calling thread.
+
+    Args:
         full_path_str (str): Absolute file path.
 
     Returns:
-        int: Number of existing chunks removed.
+        tuple[bytes, str]: The contents of the file and its text.
     """
-    async with collection_lock:
-        existing = await collection.get(
-            where={"path": full_path_str},
-            include=["metadatas"],
-        )
-        num_existing_chunks = len(existing["ids"]) if "ids" in existing else 0
+    with time_stage("read"):
+        with open(full_path_str, "rb") as f:
+            data = f.read()
+        code = data.decode("utf-8")
+    inc_counter("chunker_bytes_read_total", value=len(data))
+    return data, code
+
+
+def _split_code(
+    code: str,
+    language: str,
+    token_splitter: chunker_model.TokenSplitter | None = None,
+) -> list[str]:
+    """
+    Split source code into chunks, blocking the calling thread.
 
-        if num_existing_chunks:
-            await collection.delete(where={"path": full_path_str})
+    Args:
+        code (str): The source code.
+        language (str): Programming language for chunking.
+        token_splitter (chunker_model.TokenSplitter | None): Token budget of the
+            chunks; when None, chunks are sized in characters.
 
-    return num_existing_chunks
+    Returns:
+        list[str]: List of text chunks.
+    """
+    with time_stage("split"):
+        if token_splitter is None:
+            splitter = RecursiveCharacterTextSplitter.from_language(
+                getattr(Language, language.upper())
+            )
+        else:
+            splitter = RecursiveCharacterTextSplitter.from_language(
+                getattr(Language, language.upper()),
+                chunk_size=token_splitter.chunk_tokens,
+                chunk_overlap=token_splitter.chunk_overlap_tokens,
+                length_function=token_length_function(token_splitter.tokenizer),
+            )
+        return splitter.split_text(code)
 
 
-async def _read_and_chunk_file(
-    full_path_str: str, semaphore: asyncio.Semaphore, language: str, logger
+def _read_and_split(
+    full_path_str: str,
+    language: str,
+    token_splitter: chunker_model.TokenSplitter | None = None,
 ) -> list[str]:
     """
-    Read the file and split it into chunks.
+    Read a file and split it into chunks, blocking the calling thread.
+
+    Args:
+        full_path_str (str): Absolute file path.
+        language (str): Programming language for chunking.
+        token_splitter (chunker_model.TokenSplitter | None): Token budget of the
+            chunks; when None, chunks are sized in characters.
+
+    Returns:
+        list[str]: List of text chunks.
+    """
+    _, code = _read_source(full_path_str)
+    return _split_code(code, language, token_splitter)
+
+
+def _chunk_line_ranges(data: bytes, chunks: list[str]) -> list[tuple[int, int]]:
+    """
+    Locate each chunk in the file and return the lines it spans.
+
+    The splitter strips whitespace between chunks and may overlap consecutive
+    chunks, so chunks are found by searching the file from just after the start
+    of the previous chunk. A chunk that is not found is placed at that point.
+
+    Args:
+        data (bytes): The contents of the file.
+        chunks (list[str]): The chunks of the file, in order.
+
+    Returns:
+        list[tuple[int, int]]: The 0-based first and last line of each chunk.
+    """
+    if not chunks:
+        return []
+    offsets = line_offsets(data)
+    starts = []
+    ends = []
+    cursor = 0
+    for chunk in chunks:
+        encoded = chunk.encode("utf-8")
+        start = data.find(encoded, cursor)
+        if start < 0:
+            start = min(cursor, len(data))
+        starts.append(start)
+        ends.append(max(start, start + len(encoded) - 1))
+        cursor = start + 1
+    last_line = max(len(offsets) - 2, 0)
+    first_lines = (offsets.searchsorted(starts, side="right") - 1).clip(0, last_line)
+    last_lines = (offsets.searchsorted(ends, side="right") - 1).clip(0, last_line)
+    return [
+        (int(first), int(last)) for first, last in zip(first_lines, last_lines)
+    ]
+
+
+def _read_split_and_locate(
+    full_path_str: str,
+    language: str,
+    token_splitter: chunker_model.TokenSplitter | None = None,
+    rel_path_str: str | None = None,
+    mtime_ns: int = 0,
+) -> tuple[
+    list[str],
+    list[tuple[int, int]],
+    tuple[list[chunker_model.Symbol], chunker_model.SourceLines] | None,
+]:
+    """
+    Read a file, split it into chunks and locate their lines, blocking the
+    calling thread.
+
+    Args:
+        full_path_str (str): Absolute file path.
+        language (str): Programming language for chunking.
+        token_splitter (chunker_model.TokenSplitter | None): Token budget of the
+            chunks; when None, chunks are sized in characters.
+        rel_path_str (str | None): Path of the file, relative to the project;
+            when set, the definitions and line offsets of the file are
+            extracted from the same read.
+        mtime_ns (int): Modification time of the file, recorded with its line
+            offsets.
+
+    Returns:
+        tuple[list[str], list[tuple[int, int]], tuple[list[chunker_model.Symbol],
+        chunker_model.SourceLines] | None]: The chunks, the first and last line
+        of each, and the file's definitions and line offsets when requested.
+    """
+    data, code = _read_source(full_path_str)
+    chunks = _split_code(code, language, token_splitter)
+    line_ranges = _chunk_line_ranges(data, chunks)
+    if rel_path_str is None:
+        return chunks, line_ranges, None
+    with time_stage("symbols"):
+        symbols = extract_symbols(code, rel_path_str, language)
+        lines = chunker_model.SourceLines(
+            full_path=full_path_str,
+            size=len(data),
+            mtime_ns=mtime_ns,
+            offsets=line_offsets(data),
+        )
+    return chunks, line_ranges, (symbols, lines)
+
+
+async def _read_and_chunk_file(
+    full_path_str: str,
+    semaphore: asyncio.Semaphore,
+    language: str,
+    logger,
+    token_splitter: chunker_model.TokenSplitter | None = None,
+    rel_path_str: str | None = None,
+    mtime_ns: int = 0,
+) -> tuple[
+    list[str],
+    list[tuple[int, int]],
+    tuple[list[chunker_model.Symbol], chunker_model.SourceLines] | None,
+]:
+    """
+    Read the file and split it into chunks in a worker thread.
+
+    Splitting is CPU-bound, so it runs off the event loop to keep queries
+    served by the same loop responsive.
 
     Args:
         full_path_str (str): Absolute file path.
         semaphore (asyncio.Semaphore): Semaphore to limit concurrency.
         language (str): Programming language for chunking.
         logger: Logger instance.
+        token_splitter (chunker_model.TokenSplitter | None): Token budget of the
+            chunks; when None, chunks are sized in characters.
+        rel_path_str (str | None): Path of the file, relative to the project;
+            when set, its definitions and line offsets are extracted too.
+        mtime_ns (int): Modification time of the file, recorded with its line
+            offsets.
 
     Returns:
-        list[str]: List of text chunks.
+        tuple[list[str], list[tuple[int, int]], tuple[list[chunker_model.Symbol],
+        chunker_model.SourceLines] | None]: List of text chunks, the first and
+        last line of each, and the file's definitions and line offsets when
+        requested; empty and None if the file could not be read.
     """
     try:
         async with semaphore:
-            with open(full_path_str, "r", encoding="utf-8") as f:
-                code = f.read()
-            splitter = RecursiveCharacterTextSplitter.from_language(
-                getattr(Language, language.upper())
+            return await asyncio.to_thread(
+                _read_split_and_locate,
+                full_path_str,
+                language,
+                token_splitter,
+                rel_path_str,
+                mtime_ns,
             )
-            chunks = splitter.split_text(code)
-            return chunks
     except UnicodeDecodeError:
         logger.warning(
             f"UnicodeDecodeError: Skipping file {full_path_str} (probably binary)"
         )
-        return []
+        return [], [], None
     except Exception as e:
         logger.warning(f"Error reading or chunking file {full_path_str}: {e}")
-        return []
+        return [], [], None
 
 
-def _compute_chunk_metadata(chunks: list[str], relative_path_str: str) -> list[dict]:
+def _compute_chunk_metadata(
+    chunks: list[str],
+    relative_path_str: str,
+    line_ranges: list[tuple[int, int]],
+    token_counts: list[int] | None = None,
+) -> list[dict]:
     """
-    Compute line ranges for each chunk.
+    Compute the metadata of each chunk.
 
     Args:
         chunks (list[str]): List of text chunks.
-        relative_path_str (str): Absolute file path.
+        relative_path_str (str): Path of the file, relative to the project.
+        line_ranges (list[tuple[int, int]]): First and last line of each chunk,
+            see `_chunk_line_ranges`.
+        token_counts (list[int] | None): Token count of each chunk, stored as
+            `tokens` when given.
 
     Returns:
         list[dict]: List of metadata dicts for each chunk.
     """
     metas = []
-    current_line = 0
-    for chunk in chunks:
-        chunk_lines = chunk.count("\n") + 1
-        start_line = current_line
-        end_line = current_line + chunk_lines - 1
-        metas.append({"path": relative_path_str, "start": start_line, "end": end_line})
-        current_line = end_line + 1
+    for idx, (start_line, end_line) in enumerate(line_ranges[: len(chunks)]):
+        meta = {"path": relative_path_str, "start": start_line, "end": end_line}
+        if token_counts is not None:
+            meta["tokens"] = token_counts[idx]
+        metas.append(meta)
     return metas
 
 
+def _embed_for_storage(
+    chunks: list[str], transform: chunker_model.EmbeddingTransform
+) -> list:
+    """
+    Embed chunks client-side and apply the embedding transform, blocking the thread.
+
+    Args:
+        chunks (list[str]): Texts of the chunks.
+        transform (chunker_model.EmbeddingTransform): The embedding transform.
+
+    Returns:
+        list: The stored embeddings, reduced and at the transform's precision.
+    """
+    with time_stage("embed"):
+        vectors = embeddings.embed_texts(chunks)
+        return list(decode_embeddings(transform, encode_embeddings(transform, vectors)))
+
+
+async def _add_batch(
+    collection,
+    ids: list[str],
+    chunks: list[str],
+    metas: list[dict],
+    vectors: list | None = None,
+    upsert: bool = False,
+) -> float:
+    """
+    Add one batch to the collection and return how long the call took.
+
+    Args:
+        collection: The ChromaDB collection object.
+        ids (list[str]): Ids of the chunks.
+        chunks (list[str]): Texts of the chunks.
+        metas (list[dict]): Metadata of the chunks.
+        vectors (list | None): Embeddings of the chunks; when None the collection
+            embeds them.
+        upsert (bool): Write with collection.upsert(), replacing chunks a failed
+            earlier attempt may have stored.
+
+    Returns:
+        float: Duration of the collection.add() call in seconds.
+    """
+    operation = "upsert" if upsert else "add"
+    write = getattr(collection, operation)
+    started = time.perf_counter()
+    with time_stage("write"), time_chroma_call(operation):
+        if vectors is None:
+            await write(ids=ids, documents=chunks, metadatas=metas)
+        else:
+            await write(ids=ids, documents=chunks, metadatas=metas, embeddings=vectors)
+    return time.perf_counter() - started
+
+
 async def _add_chunks_to_collection(
     collection,
-    collection_lock,
     chunks: list[str],
     metas: list[dict],
-    max_batch_size: int,
+    controller: chunker_model.AdaptiveBatchController,
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+    ids: list[str] | None = None,
+    vectors: list | None = None,
 ):
     """
     Add chunks and metadata to the collection in batches.
 
+    Batch size and the number of concurrent collection.add() calls follow the
+    controller, which reacts to latency, timeouts, 413s and 5xx. A failed batch
+    is re-queued and re-cut at the new batch size. Ids are assigned up front
+    and retried batches are upserted, so a batch the server partly or wholly
+    stored before failing is neither duplicated nor rejected. When every chunk
+    has a `tokens` count, batches are also capped at the controller's token
+    budget.
+
     Args:
         collection: The ChromaDB collection object.
-        collection_lock: Asyncio lock for collection operations.
         chunks (list[str]): List of text chunks.
         metas (list[dict]): List of metadata dicts.
-        max_batch_size (int): Maximum batch size for collection.add().
-        full_path_str (str): Absolute file path.
+        controller (chunker_model.AdaptiveBatchController): Batch size and concurrency.
+        retry_policy (chunker_model.RetryPolicy): Attempts and backoff per batch.
+        logger (logging.Logger): Logger instance.
+        ids (list[str] | None): Ids of the chunks; generated when None.
+        vectors (list | None): Embeddings of the chunks; when None the collection
+            embeds them.
 
     Returns:
         None
+
+    Raises:
+        Exception: The last error of a batch once its attempts are exhausted.
     """
-    async with collection_lock:
-        for idx in range(0, len(chunks), max_batch_size):
-            inserted_chunks = chunks[idx : idx + max_batch_size]
-            await collection.add(
-                ids=[_get_uuid() for _ in inserted_chunks],
-                documents=inserted_chunks,
-                metadatas=metas[idx : idx + max_batch_size],
+    ids = ids if ids is not None else [_get_uuid() for _ in chunks]
+    pending: deque[tuple[int, int, int]] = deque([(0, len(chunks), 1)])
+    token_offsets = None
+    if all("tokens" in meta for meta in metas):
+        token_offsets = [0]
+        for meta in metas:
+            token_offsets.append(token_offsets[-1] + meta["tokens"])
+
+    while pending:
+        wave = []
+        while pending and len(wave) < controller.concurrency:
+            start, end, attempt = pending.popleft()
+            cut = cut_batch(controller, start, end, token_offsets)
+            if cut < end:
+                pending.appendleft((cut, end, attempt))
+            wave.append((start, cut, attempt))
+
+        outcomes = await asyncio.gather(
+            *[
+                _add_batch(
+                    collection,
+                    ids[start:end],
+                    chunks[start:end],
+                    metas[start:end],
+                    vectors[start:end] if vectors is not None else None,
+                    upsert=attempt > 1,
+                )
+                for start, end, attempt in wave
+            ],
+            return_exceptions=True,
+        )
+
+        backoff_attempt = 0
+        for (start, end, attempt), outcome in zip(wave, outcomes):
+            if not isinstance(outcome, BaseException):
+                record_batch_success(controller, outcome)
+                inc_counter("chunker_chunks_total", value=end - start)
+                continue
+
+            error_kind = classify_chroma_error(outcome)
+            record_batch_failure(controller, error_kind, end - start)
+            if attempt >= retry_policy.max_retries:
+                raise outcome
+            logger.warning(
+                f"Chroma add of {end - start} chunks failed ({error_kind}, attempt "
+                f"{attempt}/{retry_policy.max_retries}): {outcome}. Batch size is now "
+                f"{controller.batch_size}, concurrency {controller.concurrency}."
             )
+            inc_counter("chunker_chroma_retries_total", labels={"operation": "add"})
+            pending.appendleft((start, end, attempt + 1))
+            if error_kind != "too_large":
+                backoff_attempt = max(backoff_attempt, attempt)
 
+        if backoff_attempt:
+            delay = retry_policy.base_delay * 2 ** (backoff_attempt - 1)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
 
-async def _update_stats(stats: dict[str, int], stats_lock, key: str):
+
+async def _deduplicate_chunks(
+    collection,
+    dedup_index: chunker_model.DedupIndex,
+    chunks: list[str],
+    metas: list[dict],
+    rel_path_str: str,
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> tuple[list[str], list[str], list[dict], set[str]]:
+    """
+    Replace the chunks of a file that duplicate chunks of the collection by aliases.
+
+    The file's previous entries are removed from the dedup index first. A
+    previous canonical chunk of the file that other files alias is re-pointed
+    to an equal chunk, or re-added under its first alias.
+
+    Args:
+        collection: The ChromaDB collection object.
+        dedup_index (chunker_model.DedupIndex): The dedup index.
+        chunks (list[str]): The chunks of the file.
+        metas (list[dict]): Metadata of each chunk.
+        rel_path_str (str): Path of the file relative to the project directory.
+        retry_policy (chunker_model.RetryPolicy): Retry policy for Chroma calls.
+        logger (logging.Logger): Logger instance.
+
+    Returns:
+        tuple[list[str], list[str], list[dict], set[str]]: Ids, texts and metadata
+        of the chunks to add, and the canonical chunks of other files whose
+        aliases changed.
+    """
+    touched, orphans = remove_path(dedup_index, rel_path_str)
+    orphan_texts: dict[str, str] = {}
+    if orphans:
+        fetched = await _with_retry(
+            operation="get",
+            call=lambda: collection.get(
+                ids=[orphan.chunk_id for orphan in orphans], include=["documents"]
+            ),
+            retry_policy=retry_policy,
+            logger=logger,
+        )
+        orphan_texts = dict(zip(fetched.get("ids") or [], fetched.get("documents") or []))
+
+    ids: list[str] = []
+    kept_chunks: list[str] = []
+    kept_metas: list[dict] = []
+    new_canonicals: set[str] = set()
+    for chunk, meta in zip(chunks, metas):
+        chunk_id = _get_uuid()
+        if len(chunk.strip()) >= dedup_index.min_chars:
+            exact, signature = chunk_fingerprint(chunk)
+            canonical_id = find_canonical(dedup_index, exact, signature)
+            if canonical_id is not None:
+                register_alias(
+                    dedup_index, canonical_id, rel_path_str, meta["start"], meta["end"]
+                )
+                touched.add(canonical_id)
+                inc_counter("chunker_chunks_deduplicated_total")
+                continue
+            register_canonical(
+                dedup_index,
+                chunk_id,
+                rel_path_str,
+                meta["start"],
+                meta["end"],
+                exact,
+                signature,
+            )
+            new_canonicals.add(chunk_id)
+        ids.append(chunk_id)
+        kept_chunks.append(chunk)
+        kept_metas.append(meta)
+
+    for orphan in orphans:
+        aliases = orphan.aliases
+        canonical_id = find_canonical(dedup_index, orphan.exact, orphan.signature)
+        if canonical_id is not None:
+            touched.add(canonical_id)
+        elif orphan.chunk_id in orphan_texts:
+            (path, start, end), aliases = aliases[0], aliases[1:]
+            canonical_id = _get_uuid()
+            register_canonical(
+                dedup_index, canonical_id, path, start, end, orphan.exact, orphan.signature
+            )
+            new_canonicals.add(canonical_id)
+            ids.append(canonical_id)
+            kept_chunks.append(orphan_texts[orphan.chunk_id])
+            kept_metas.append({"path": path, "start": start, "end": end})
+        else:
+            logger.warning(f"Canonical chunk {orphan.chunk_id} is gone; dropping its aliases.")
+            continue
+        for path, start, end in aliases:
+            register_alias(dedup_index, canonical_id, path, start, end)
+
+    for idx, chunk_id in enumerate(ids):
+        if chunk_id in new_canonicals:
+            aliases = aliases_of(dedup_index, chunk_id)
+            if aliases:
+                kept_metas[idx] = {**kept_metas[idx], "aliases": json.dumps(aliases)}
+
+    return ids, kept_chunks, kept_metas, touched - new_canonicals
+
+
+async def _refresh_aliases(
+    collection,
+    dedup_index: chunker_model.DedupIndex,
+    canonical_ids: set[str],
+    retry_policy: chunker_model.RetryPolicy,
+    logger: logging.Logger,
+) -> None:
+    """
+    Write the current aliases of canonical chunks to their collection metadata.
+
+    Args:
+        collection: The ChromaDB collection object.
+        dedup_index (chunker_model.DedupIndex): The dedup index.
+        canonical_ids (set[str]): The canonical chunks whose aliases changed.
+        retry_policy (chunker_model.RetryPolicy): Retry policy for the Chroma call.
+        logger (logging.Logger): Logger instance.
+    """
+    updates = {
+        chunk_id: metadata
+        for chunk_id in sorted(canonical_ids)
+        if (metadata := canonical_metadata(dedup_index, chunk_id)) is not None
+    }
+    if not updates:
+        return
+    await _with_retry(
+        operation="update",
+        call=lambda: collection.update(
+            ids=list(updates), metadatas=list(updates.values())
+        ),
+        retry_policy=retry_policy,
+        logger=logger,
+    )
+
+
+def _update_stats(stats: dict[str, int], key: str):
     """
     Update the stats dictionary.
 
+    Files run as tasks of one event loop and the increment does not await, so
+    concurrent files need no lock.
+
     Args:
         stats (dict[str, int]): Stats dictionary.
-        stats_lock: Asyncio lock for stats.
-        key (str): 'add' or 'update'.
+        key (str): 'add', 'update' or 'skipped'.
 
     Returns:
         None
     """
-    async with stats_lock:
-        stats[key] += 1
+    stats[key] += 1
+    inc_counter("chunker_files_total", labels={"result": key})
 
 
 async def _add_file_with_langchain(
     file_path: str,
     logger: logging.Logger,
     collection: AsyncCollection,
-    collection_lock: asyncio.Lock,
     stats: dict[str, int],
-    stats_lock: asyncio.Lock,
-    max_batch_size: int,
+    batch_controller: chunker_model.AdaptiveBatchController,
     semaphore: asyncio.Semaphore,
     project_dir: Path,
     language: str = "python",
+    journal: chunker_model.RunJournal | None = None,
+    retry_policy: chunker_model.RetryPolicy | None = None,
+    dedup_index: chunker_model.DedupIndex | None = None,
+    embedding_transform: chunker_model.EmbeddingTransform | None = None,
+    token_splitter: chunker_model.TokenSplitter | None = None,
+    symbol_index: chunker_model.SymbolIndex | None = None,
+    sequencer: chunker_model.PathSequencer | None = None,
 ) -> None:
     """
     Add a file's contents to a ChromaDB collection, chunked and with metadata.
 
+    The new chunks are added before the previous chunks of the file are
+    deleted, so an aborted run never leaves a file without chunks. The writes
+    of one path are never interleaved with those of another run of the same
+    path, so its chunks are replaced exactly once; other files write
+    concurrently. Files already completed by the journaled run being resumed
+    are skipped. With a dedup index, duplicates of chunks already in the
+    collection are stored as aliases of the existing chunk instead. With a
+    symbol index, the file's definitions are extracted in a thread while its
+    chunks are embedded and written.
+
     Args:
         file_path (str): Path to the file to process.
         logger (logging.Logger): Logger instance.
         collection (object): The ChromaDB collection object.
-        collection_lock (asyncio.Lock): Asyncio lock for collection operations.
         stats (dict[str, int]): Dictionary to track add/update stats.
-        stats_lock (asyncio.Lock): Asyncio lock for stats.
-        max_batch_size (int): Maximum batch size for collection.add().
+        batch_controller (chunker_model.AdaptiveBatchController): Batch size and
+            concurrency of collection.add() calls.
         semaphore (asyncio.Semaphore): Semaphore to limit concurrency.
         project_dir (Path): The root directory of the project.
         language (str): Programming language for chunking.
+        journal (chunker_model.RunJournal | None): Journal of the run, if any.
+        retry_policy (chunker_model.RetryPolicy | None): Retry policy for Chroma calls.
+        dedup_index (chunker_model.DedupIndex | None): Index of canonical chunks,
+            when duplicates are suppressed.
+        embedding_transform (chunker_model.EmbeddingTransform | None): When set,
+            chunks are embedded client-side and stored transformed.
+        token_splitter (chunker_model.TokenSplitter | None): When set, chunks are
+            sized in tokens and their token counts stored.
+        symbol_index (chunker_model.SymbolIndex | None): When set, the file's
+            definitions replace those recorded for it.
+        sequencer (chunker_model.PathSequencer | None): Orders the writes to
+            each path; a new one when None.
 
     Returns:
         None
     """
+    retry_policy = retry_policy or chunker_model.RetryPolicy()
     full_path_str = await _expand_and_validate_path(file_path)
     rel_path_str = os.path.relpath(full_path_str, start=str(project_dir))
-    logger.info(f"Processing file: {rel_path_str}")
+    sequencer = sequencer or chunker_model.PathSequencer()
+    async with path_turn(sequencer, (collection.name, rel_path_str)):
+        try:
+            mtime_ns = os.stat(full_path_str).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Skipping file {rel_path_str}: {e}")
+            _update_stats(stats, "skipped")
+            return
+
+        if journal is not None and is_file_completed(journal, rel_path_str, mtime_ns):
+            logger.info(f"Skipping file completed by the resumed run: {rel_path_str}")
+            _update_stats(stats, "skipped")
+            return
+
+        logger.info(f"Processing file: {rel_path_str}")
+        if journal is not None:
+            record_journal_event(journal, "begin", rel_path_str, mtime_ns)
+
+        existing_ids = await _get_existing_chunk_ids(
+            collection, rel_path_str, retry_policy, logger
+        )
 
-    num_existing_chunks = await _remove_existing_chunks(
-        collection, collection_lock, rel_path_str
-    )
+        chunks, line_ranges, file_symbols = await _read_and_chunk_file(
+            full_path_str,
+            semaphore,
+            language,
+            logger,
+            token_splitter,
+            rel_path_str=rel_path_str if symbol_index is not None else None,
+            mtime_ns=mtime_ns,
+        )
+        has_chunks = bool(chunks) and not (len(chunks) == 1 and chunks[0] == "")
+        new_chunks = chunks if has_chunks else []
+        token_counts = None
+        if token_splitter is not None and new_chunks:
+            async with semaphore:
+                token_counts = await asyncio.to_thread(
+                    count_tokens, token_splitter.tokenizer, new_chunks
+                )
+        metas = _compute_chunk_metadata(
+            new_chunks, rel_path_str, line_ranges, token_counts
+        )
+        ids = None
+        touched: set[str] = set()
+        if dedup_index is not None:
+            ids, new_chunks, metas, touched = await _deduplicate_chunks(
+                collection,
+                dedup_index,
+                new_chunks,
+                metas,
+                rel_path_str,
+                retry_policy,
+                logger,
+            )
+        if new_chunks:
+            vectors = None
+            if embedding_transform is not None:
+                async with semaphore:
+                    vectors = await asyncio.to_thread(
+                        _embed_for_storage, new_chunks, embedding_transform
+                    )
+            await _add_chunks_to_collection(
+                collection,
+                new_chunks,
+                metas,
+                batch_controller,
+                retry_policy,
+                logger,
+                ids=ids,
+                vectors=vectors,
+            )
 
-    chunks = await _read_and_chunk_file(full_path_str, semaphore, language, logger)
-    if not chunks or (len(chunks) == 1 and chunks[0] == ""):
-        return
+        await _delete_chunks(collection, existing_ids, retry_policy, logger)
+
+        if dedup_index is not None:
+            await _refresh_aliases(
+                collection, dedup_index, touched, retry_policy, logger
+            )
+            commit_dedup_index(dedup_index)
 
-    metas = _compute_chunk_metadata(chunks, rel_path_str)
+        if file_symbols is not None:
+            symbols, lines = file_symbols
+            await asyncio.to_thread(
+                replace_symbols, symbol_index, rel_path_str, symbols, lines
+            )
 
-    await _add_chunks_to_collection(
-        collection, collection_lock, chunks, metas, max_batch_size
-    )
+        if journal is not None:
+            record_journal_event(journal, "done", rel_path_str, mtime_ns)
+
+        if not has_chunks:
+            return
+
+        if existing_ids:
+            _update_stats(stats, "update")
+        else:
+            _update_stats(stats, "add")
 
-    if num_existing_chunks:
-        await _update_stats(stats, stats_lock, "update")
-    else:
-        await _update_stats(stats, stats_lock, "add")
+
+def _walk_project_dir(
+    project_dir: Path, patterns: list[str], exclude: list[str] | None = None
+) -> list[Path]:
+    """
+    List the files matching any of the patterns that are not excluded or ignored
+    by .gitignore, in a single walk of the project.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        patterns (list[str]): Glob patterns for files to process.
+        exclude (list[str] | None): Glob patterns for files to leave out.
+
+    Returns:
+        list[Path]: The matching files.
+    """
+    selector = compile_file_selector(patterns, exclude)
+    return walk_selected_files(project_dir, selector, _load_gitignore(project_dir))
+
+
+def _load_gitignore(project_dir: Path) -> pathspec.PathSpec | None:
+    """
+    Load the patterns of the project's .gitignore.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+
+    Returns:
+        pathspec.PathSpec | None: The patterns, or None without a .gitignore.
+    """
+    gitignore_path = project_dir / ".gitignore"
+    if not gitignore_path.exists():
+        return None
+    with open(gitignore_path, "r", encoding="utf-8") as f:
+        gitignore_patterns = f.read().splitlines()
+    return pathspec.PathSpec.from_lines("gitwildmatch", gitignore_patterns)
 
 
 def _filter_files_with_gitignore(files: list[Path], project_dir: Path) -> list[Path]:
@@ -250,14 +986,10 @@ def _filter_files_with_gitignore(files: list[Path], project_dir: Path) -> list[P
     Returns:
         list[Path]: Filtered list of files not ignored by .gitignore.
     """
-    gitignore_path = project_dir / ".gitignore"
-    if not gitignore_path.exists():
+    spec = _load_gitignore(project_dir)
+    if spec is None:
         return files
 
-    with open(gitignore_path, "r", encoding="utf-8") as f:
-        gitignore_patterns = f.read().splitlines()
-    spec = pathspec.PathSpec.from_lines("gitwildmatch", gitignore_patterns)
-
     filtered_files = []
     for f in files:
         try:
@@ -304,35 +1036,60 @@ from chunker_src import model as chunker_model
 
 async def chunk_and_vectorise_core(
     project_dir: Path,
-    pattern: str,
+    pattern: str | list[str],
     config: chunker_model.ChunkAndVectoriseConfig,
     logger_instance: logging.Logger,
+    client_pool: chunker_model.ClientPool | None = None,
+    scheduler: chunker_model.FairScheduler | None = None,
+    progress: Callable[[int, int], None] | None = None,
 ) -> Union[
     None,
     chunker_model.InvalidPatternError,
     chunker_model.UnsupportedLanguageError,
+    chunker_model.InvalidFileOrderError,
     chunker_model.NoFilesFoundError,
     chunker_model.FileOutsideProjectDirError,
     chunker_model.ChromaDBError,
+    chunker_model.IngestionError,
+    chunker_model.EmbeddingTransformError,
+    chunker_model.TokenizerError,
 ]:
     """
     Core logic for chunking and vectorising files in a project directory.
 
+    All patterns are matched in one walk of the project, skipping directories
+    that no pattern can reach or that `config.exclude_patterns` excludes
+    entirely. Files are indexed in the order set by `config.file_order` and
+    `config.priority_paths`, and coverage of the matched bytes is logged at
+    every tenth and exported as the `chunker_coverage_ratio` gauge. Up to
+    `config.max_file_concurrency` files are processed at once, started in
+    that order; writes to the same path are applied in the order they were
+    started. When the run ends, the collection's update marker in its state
+    directory is rewritten, so query caches drop their results.
+
     Args:
         project_dir (Path): The root directory of the project.
-        pattern (str): Glob pattern for files to process.
+        pattern (str | list[str]): Glob pattern, or patterns, for files to process.
         config (chunker_model.ChunkAndVectoriseConfig): Configuration object for chunking and vectorising.
         logger_instance (logging.Logger): Logger instance.
+        client_pool (chunker_model.ClientPool | None): Shared Chroma clients; when
+            None a new client is connected.
+        scheduler (chunker_model.FairScheduler | None): Shares file slots fairly
+            with the runs of other collections; when None files are not throttled.
+        progress (Callable[[int, int], None] | None): Called with the number of
+            files processed and the total number of files, before the first file
+            and after each file.
 
     Returns:
         Union[None, ...]: None on success, or a specific error object on failure.
     """
-    if pattern.startswith("--"):
+    patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+    if any(p.startswith("--") for p in patterns):
         return chunker_model.InvalidPatternError(
             message="The first argument must be the file pattern (e.g., '*.py')."
         )
 
-    validation_error = _validate_glob_pattern(pattern)
+    validation_error = _validate_patterns(patterns, config.exclude_patterns)
     if validation_error:
         return chunker_model.InvalidPatternError(message=str(validation_error))
 
@@ -344,51 +1101,320 @@ async def chunk_and_vectorise_core(
             )
         )
 
-    files = list(project_dir.glob(pattern))
-    files = _filter_files_with_gitignore(files, project_dir)
+    if config.file_order not in FILE_ORDERS:
+        return chunker_model.InvalidFileOrderError(
+            message=(
+                f"'{config.file_order}' is not a file order. "
+                f"Choose from: {', '.join(FILE_ORDERS)}"
+            )
+        )
+
+    with time_stage("walk"):
+        files = await asyncio.to_thread(
+            _walk_project_dir, project_dir, patterns, config.exclude_patterns
+        )
     if not files:
         return chunker_model.NoFilesFoundError(
-            message=f"No files found matching pattern: {pattern}"
+            message=f"No files found matching pattern: {', '.join(patterns)}"
         )
 
     check_error = _check_files_within_project_dir(files, project_dir)
     if check_error:
         return chunker_model.FileOutsideProjectDirError(message=str(check_error))
 
-    try:
-        client = await chromadb.AsyncHttpClient(
-            host=config.chroma_host,
-            port=config.chroma_port,
+    sizes = await asyncio.to_thread(file_sizes, files)
+    if config.file_order != "glob" or config.priority_paths:
+        files = await asyncio.to_thread(
+            order_files,
+            files,
+            project_dir,
+            config.file_order,
+            config.priority_paths,
+            sizes,
         )
-        collection = await client.get_or_create_collection(config.collection_name)
+
+    embedding_transform = None
+    if config.embedding_transform is not None:
+        try:
+            embedding_transform = load_embedding_transform(config.embedding_transform)
+        except (OSError, KeyError, ValueError) as e:
+            return chunker_model.EmbeddingTransformError(
+                message=f"Could not load the embedding transform: {e}"
+            )
+
+    token_splitter = None
+    if config.chunk_tokens is not None:
+        try:
+            tokenizer = await asyncio.to_thread(load_tokenizer, config.tokenizer)
+        except Exception as e:
+            return chunker_model.TokenizerError(
+                message=f"Could not load the tokenizer: {e}"
+            )
+        token_splitter = chunker_model.TokenSplitter(
+            tokenizer=tokenizer,
+            chunk_tokens=config.chunk_tokens,
+            chunk_overlap_tokens=config.chunk_overlap_tokens,
+        )
+
+    try:
+        with time_chroma_call("get_or_create_collection"):
+            client = await get_client(
+                chroma_host=config.chroma_host,
+                chroma_port=config.chroma_port,
+                chroma_endpoints=config.chroma_endpoints,
+                client_pool=client_pool,
+                local_store=config.local_store,
+            )
+            collection = await client.get_or_create_collection(
+                config.collection_name,
+                embedding_function=shared_embedding_function(),
+            )
     except Exception as e:
         logger_instance.error(f"Failed to get/create the collection: {e}")
         return chunker_model.ChromaDBError(
             message=f"Failed to get/create the collection: {e}"
         )
 
-    stats = {"add": 0, "update": 0, "removed": 0}
-    collection_lock = asyncio.Lock()
-    stats_lock = asyncio.Lock()
+    stats = {"add": 0, "update": 0, "removed": 0, "skipped": 0}
     semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+    retry_policy = chunker_model.RetryPolicy(
+        max_retries=config.max_retries, base_delay=config.retry_base_delay
+    )
+    try:
+        server_max_batch_size = await client.get_max_batch_size()
+    except Exception as e:
+        logger_instance.warning(f"Could not get the server's max batch size: {e}")
+        server_max_batch_size = None
+    batch_controller = new_batch_controller(
+        initial_batch_size=config.max_batch_size,
+        server_max_batch_size=server_max_batch_size,
+        max_concurrency=config.max_add_concurrency,
+        target_latency=config.target_batch_latency,
+        adaptive=config.adaptive_batching,
+        max_batch_tokens=config.max_batch_tokens,
+    )
+    journal = open_run_journal(
+        state_dir=config.state_dir or default_state_dir(config.collection_name),
+        fingerprint=run_fingerprint(
+            project_dir,
+            "\n".join(patterns + [f"!{p}" for p in config.exclude_patterns]),
+            config.language,
+        ),
+        resume=config.resume,
+    )
+    if journal.completed or journal.in_flight:
+        logger_instance.info(
+            f"Resuming aborted run: {len(journal.completed)} files completed, "
+            f"{len(journal.in_flight)} in flight."
+        )
+    dedup_index = None
+    if config.dedup:
+        dedup_index = open_dedup_index(
+            state_dir=config.state_dir or default_state_dir(config.collection_name),
+            threshold=config.dedup_threshold,
+            min_chars=config.dedup_min_chars,
+        )
+    symbol_index = None
+    if config.symbols:
+        symbol_index = open_symbol_index(
+            config.state_dir or default_state_dir(config.collection_name)
+        )
 
     logger_instance.info(f"Starting vectorisation for {len(files)} files.")
-    for file in files:
-        await _add_file_with_langchain(
-            file_path=str(file),
-            logger=logger_instance,
-            collection=collection,
-            collection_lock=collection_lock,
-            stats=stats,
-            stats_lock=stats_lock,
-            max_batch_size=config.max_batch_size,
-            semaphore=semaphore,
-            project_dir=project_dir,
-            language=config.language,
+    if progress is not None:
+        progress(0, len(files))
+    total_bytes = sum(sizes.values())
+    files_done = 0
+    bytes_done = 0
+    set_gauge("chunker_coverage_ratio", 0.0)
+    set_gauge("chunker_files_pending", len(files))
+    sequencer = (
+        scheduler.sequencer if scheduler is not None else chunker_model.PathSequencer()
+    )
+    file_concurrency = 1 if dedup_index is not None else config.max_file_concurrency
+    queue = iter(files)
+    in_flight: list[Path] = []
+    failed: list[Path] = []
+
+    async def process_files() -> None:
+        nonlocal files_done, bytes_done
+        for file in queue:
+            in_flight.append(file)
+            try:
+                async with fair_slot(scheduler, config.collection_name):
+                    with profile_frame(
+                        FILE_FRAME_PREFIX + os.path.relpath(file, project_dir)
+                    ):
+                        await _add_file_with_langchain(
+                            file_path=str(file),
+                            logger=logger_instance,
+                            collection=collection,
+                            stats=stats,
+                            batch_controller=batch_controller,
+                            semaphore=semaphore,
+                            project_dir=project_dir,
+                            language=config.language,
+                            journal=journal,
+                            retry_policy=retry_policy,
+                            dedup_index=dedup_index,
+                            embedding_transform=embedding_transform,
+                            token_splitter=token_splitter,
+                            symbol_index=symbol_index,
+                            sequencer=sequencer,
+                        )
+            except Exception:
+                failed.append(file)
+                raise
+            finally:
+                in_flight.remove(file)
+            logger_instance.info(f"Finished processing {file}")
+            files_done += 1
+            set_gauge("chunker_files_pending", len(files) - files_done)
+            if progress is not None:
+                progress(files_done, len(files))
+            covered_before = bytes_done * 10 // max(total_bytes, 1)
+            bytes_done += sizes[file]
+            set_gauge("chunker_coverage_ratio", bytes_done / max(total_bytes, 1))
+            if bytes_done * 10 // max(total_bytes, 1) > covered_before:
+                logger_instance.info(
+                    f"Coverage: {files_done}/{len(files)} files, "
+                    f"{100 * bytes_done // max(total_bytes, 1)}% of bytes."
+                )
+
+    workers = [
+        asyncio.create_task(process_files())
+        for _ in range(max(1, min(file_concurrency, len(files))))
+    ]
+    try:
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            interrupted = ", ".join(str(file) for file in in_flight)
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            mark_collection_updated(
+                config.state_dir or default_state_dir(config.collection_name)
+            )
+    except asyncio.CancelledError:
+        close_run_journal(journal, finished=False)
+        if dedup_index is not None:
+            close_dedup_index(dedup_index, commit=False)
+        if symbol_index is not None:
+            close_symbol_index(symbol_index)
+        logger_instance.info(f"Run cancelled while processing {interrupted}.")
+        raise
+    except Exception as e:
+        close_run_journal(journal, finished=False)
+        if dedup_index is not None:
+            close_dedup_index(dedup_index, commit=False)
+        if symbol_index is not None:
+            close_symbol_index(symbol_index)
+        where = f" while processing {failed[0]}" if failed else ""
+        logger_instance.error(f"Run aborted{where}: {e}")
+        error_type = (
+            chunker_model.ChromaDBError
+            if is_chroma_error(e)
+            else chunker_model.IngestionError
+        )
+        return error_type(
+            message=f"Run aborted{where}: {e}. Re-run the same command to resume."
         )
-        logger_instance.info(f"Finished processing {file}")
+    set_gauge("chunker_files_pending", 0)
+    close_run_journal(journal, finished=True)
+    if dedup_index is not None:
+        close_dedup_index(dedup_index, commit=True)
+    if symbol_index is not None:
+        close_symbol_index(symbol_index)
+    if config.snapshot_dir is not None:
+        try:
+            with time_stage("snapshot"):
+                await refresh_snapshot(
+                    source=collection,
+                    snapshot_dir=config.snapshot_dir,
+                    collection_name=config.collection_name,
+                    logger=logger_instance,
+                )
+        except Exception as e:
+            logger_instance.warning(f"Could not refresh the query snapshot: {e}")
 
+    stats["batch_size"] = batch_controller.batch_size
+    stats["concurrency"] = batch_controller.concurrency
     logger_instance.info(
-        f"All files processed. Added: {stats['add']}, Updated: {stats['update']}"
+        f"All files processed. Added: {stats['add']}, Updated: {stats['update']}, "
+        f"Skipped: {stats['skipped']}. Final batch size: {stats['batch_size']}, "
+        f"concurrency: {stats['concurrency']}"
     )
     return None
+
+
+async def fit_embedding_transform_core(
+    project_dir: Path,
+    pattern: str,
+    language: str,
+    output: Path,
+    dim: int | None,
+    quantization: str,
+    sample_size: int,
+    logger_instance: logging.Logger,
+    seed: int = 0,
+) -> Union[
+    None,
+    chunker_model.InvalidPatternError,
+    chunker_model.NoFilesFoundError,
+    chunker_model.EmbeddingTransformError,
+]:
+    """
+    Fit an embedding transform on a sample of a project's chunks and save it.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        pattern (str): Glob pattern for files to sample.
+        language (str): Programming language for chunking.
+        output (Path): Where to save the transform.
+        dim (int | None): Number of dimensions to keep; None keeps all.
+        quantization (str): 'none', 'float16' or 'int8'.
+        sample_size (int): Number of chunks to fit on.
+        logger_instance (logging.Logger): Logger instance.
+        seed (int): Seed for sampling chunks.
+
+    Returns:
+        Union[None, ...]: None on success, or a specific error object on failure.
+    """
+    validation_error = _validate_glob_pattern(pattern)
+    if validation_error:
+        return chunker_model.InvalidPatternError(message=str(validation_error))
+
+    files = await asyncio.to_thread(_walk_project_dir, project_dir, [pattern])
+    if not files:
+        return chunker_model.NoFilesFoundError(
+            message=f"No files found matching pattern: {pattern}"
+        )
+
+    rng = random.Random(seed)
+    rng.shuffle(files)
+    sample: list[str] = []
+    for file in files:
+        if len(sample) >= sample_size:
+            break
+        try:
+            chunks = await asyncio.to_thread(_read_and_split, str(file), language)
+        except (OSError, UnicodeDecodeError):
+            continue
+        sample.extend(chunk for chunk in chunks if chunk.strip())
+    sample = rng.sample(sample, min(sample_size, len(sample)))
+    if not sample:
+        return chunker_model.NoFilesFoundError(
+            message=f"No chunks found in files matching pattern: {pattern}"
+        )
+
+    logger_instance.info(f"Fitting the embedding transform on {len(sample)} chunks.")
+    try:
+        vectors = await asyncio.to_thread(embeddings.embed_texts, sample)
+        transform = fit_embedding_transform(
+            sample=vectors, dim=dim, quantization=quantization
+        )
+        save_embedding_transform(transform, output)
+    except (OSError, ValueError) as e:
+        return chunker_model.EmbeddingTransformError(message=str(e))
+    return None
@@ -1,20 +1,160 @@
 import argparse
-from chunker_src.crud import delete_all_records_in_collection
+import asyncio
 from fastmcp import FastMCP, Context
 import os
 from fastmcp.prompts.prompt import UserMessage, AssistantMessage
 from pathlib import Path
-from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
-from chunker_src.query_chunks import query_chunks_core
 import logging
 from chunker_src import model as chunker_model
 import sys
+import time
 from typing import Any, Literal
 import pathspec
+from pydantic import TypeAdapter
+from chunker_src.file_reader import read_file_range, resolve_project_file
+from chunker_src.metrics import start_metrics_server
 
 
 mcp = FastMCP("Chunker MCP")
 
+_file_cache = chunker_model.FileCache()
+_file_range_contents_adapter = TypeAdapter(list[chunker_model.FileRangeContent])
+_projects_adapter = TypeAdapter(dict[str, chunker_model.ProjectConfig])
+_projects: dict[str, chunker_model.ProjectConfig] = {}
+_client_pool = chunker_model.ClientPool()
+_scheduler = chunker_model.FairScheduler()
+_jobs = chunker_model.JobRegistry()
+_query_cache = chunker_model.QueryCache()
+_rerank_timeout = chunker_model.QueryChunksConfig.rerank_timeout
+_job_statuses_adapter = TypeAdapter(list[chunker_model.IngestionJobStatus])
+_symbols_adapter = TypeAdapter(list[chunker_model.Symbol])
+
+
+def _chroma_endpoints_from_env() -> list[str]:
+    """
+    Read the shard endpoints of a sharded collection from the environment.
+
+    Returns:
+        list[str]: The 'host:port' endpoints in CHROMA_ENDPOINTS, or an empty list.
+    """
+    endpoints = os.environ.get("CHROMA_ENDPOINTS", "")
+    return [endpoint.strip() for endpoint in endpoints.split(",") if endpoint.strip()]
+
+
+def _local_store_from_env() -> Path | None:
+    """
+    Read the directory of the local vector store from the environment.
+
+    Returns:
+        Path | None: The directory in CHUNKER_LOCAL_STORE, or None to use Chroma.
+    """
+    local_store = os.environ.get("CHUNKER_LOCAL_STORE")
+    return Path(local_store) if local_store else None
+
+
+def _snapshot_dir_from_env() -> Path | None:
+    """
+    Read the directory of the query snapshots from the environment.
+
+    Returns:
+        Path | None: The directory in CHUNKER_SNAPSHOT_DIR, or None to query Chroma.
+    """
+    snapshot_dir = os.environ.get("CHUNKER_SNAPSHOT_DIR")
+    return Path(snapshot_dir) if snapshot_dir else None
+
+
+def _rerank_timeout_from_env() -> float | chunker_model.InvalidSettingError:
+    """
+    Read the latency cap of reranks from the environment.
+
+    Returns:
+        float | chunker_model.InvalidSettingError: The seconds in
+        CHUNKER_RERANK_TIMEOUT, the default when unset, or an error if it is not a
+        non-negative number.
+    """
+    value = os.environ.get("CHUNKER_RERANK_TIMEOUT")
+    if not value:
+        return chunker_model.QueryChunksConfig.rerank_timeout
+    try:
+        timeout = float(value)
+    except ValueError:
+        timeout = -1.0
+    if not timeout >= 0:
+        return chunker_model.InvalidSettingError(
+            message=(
+                "CHUNKER_RERANK_TIMEOUT must be a non-negative number of seconds, "
+                f"got {value!r}"
+            )
+        )
+    return timeout
+
+
+def _load_projects_file(path: Path) -> dict[str, chunker_model.ProjectConfig]:
+    """
+    Load the projects served by the MCP server from a JSON file.
+
+    The file maps project names to objects with `project_dir` and
+    `collection_name`.
+
+    Args:
+        path (Path): The projects file.
+
+    Returns:
+        dict[str, chunker_model.ProjectConfig]: The projects by name.
+    """
+    return _projects_adapter.validate_json(path.read_text(encoding="utf-8"))
+
+
+def _resolve_project(
+    project: str | None,
+) -> tuple[str, chunker_model.ProjectConfig] | chunker_model.ProjectNotFoundError:
+    """
+    Resolve the project a tool call targets.
+
+    A named project is looked up among the registered projects. Without a name,
+    the project configured by PROJECT_DIR and CHROMA_COLLECTION_NAME is used, or
+    the only registered project.
+
+    Args:
+        project (str | None): The project name given to the tool, if any.
+
+    Returns:
+        tuple[str, chunker_model.ProjectConfig] | chunker_model.ProjectNotFoundError:
+        The project name and configuration, or an error.
+    """
+    if project:
+        if project not in _projects:
+            return chunker_model.ProjectNotFoundError(
+                message=(
+                    f"Unknown project {project!r}. "
+                    f"Available projects: {', '.join(sorted(_projects)) or 'none'}."
+                )
+            )
+        return project, _projects[project]
+
+    project_dir = os.environ.get("PROJECT_DIR")
+    collection_name = os.environ.get("CHROMA_COLLECTION_NAME")
+    if project_dir and collection_name:
+        return collection_name, chunker_model.ProjectConfig(
+            project_dir=project_dir, collection_name=collection_name
+        )
+    if len(_projects) == 1:
+        return next(iter(_projects.items()))
+    if _projects:
+        return chunker_model.ProjectNotFoundError(
+            message=(
+                "project must be specified. "
+                f"Available projects: {', '.join(sorted(_projects))}."
+            )
+        )
+    if not project_dir:
+        return chunker_model.ProjectNotFoundError(
+            message="project_dir must be specified."
+        )
+    return chunker_model.ProjectNotFoundError(
+        message="chroma_collection_name must be specified."
+    )
+
 
 def _parse_gitignore(project_dir: Path) -> pathspec.PathSpec | None:
     """
@@ -81,37 +221,66 @@ def _traverse_project_dir_and_ignore_dirs(
 
 
 @mcp.tool(
-    description="Chunk and vectorise files matching the given pattern and language.",
+    description=(
+        "Start chunking and vectorising files matching the given pattern, or list of "
+        "patterns, and language in the background, leaving out files matching any "
+        "exclude pattern. Returns the job status with its job_id; follow it with "
+        "wait_for_job or get_job_status."
+    ),
 )
 async def chunk_and_vectorise(
-    pattern: str,
+    pattern: str | list[str],
     language: str,
     ctx: Context,
+    project: str | None = None,
+    exclude: list[str] | None = None,
 ) -> str:
     """
-    Chunk and vectorise files matching the given pattern and language.
-    `project_dir` is the root directory of the project to search for files.
+    Start a background job chunking and vectorising files matching the given
+    pattern and language.
+    `pattern` may be a list of patterns, all ingested by one run, and `exclude`
+    lists patterns of files to leave out.
+    `project` names the project to index; it defaults to the project configured
+    by PROJECT_DIR and CHROMA_COLLECTION_NAME, or the only registered project.
     `chroma_host` and `chroma_port` specify the Chroma DB connection.
     """
-    project_dir = os.environ.get("PROJECT_DIR")
-    chroma_host = os.environ.get("CHROMA_HOST")
-    chroma_port = os.environ.get("CHROMA_PORT")
-    collection_name = os.environ.get("CHROMA_COLLECTION_NAME")
+    from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+    from chunker_src.jobs import job_status, start_job
+    from chunker_src.query_cache import invalidate_query_cache
+    from chunker_src.scheduling import project_lock
+
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+    project_name, project_config = resolved
+
+    project_dir = project_config.project_dir
+    local_store = _local_store_from_env()
+    chroma_host = os.environ.get("CHROMA_HOST") or ("localhost" if local_store else None)
+    chroma_port = os.environ.get("CHROMA_PORT") or ("8000" if local_store else None)
+    collection_name = project_config.collection_name
     max_batch_size = os.environ.get("CHROMA_MAX_BATCH_SIZE", "64")
     language = os.environ.get("LANGUAGE", "python")
+    state_dir = os.environ.get("CHUNKER_STATE_DIR")
+    dedup = os.environ.get("CHUNKER_DEDUP", "").lower() in ("1", "true", "yes")
+    symbols = os.environ.get("CHUNKER_SYMBOLS", "").lower() in ("1", "true", "yes")
+    dedup_threshold = os.environ.get("CHUNKER_DEDUP_THRESHOLD", "0.9")
+    embedding_transform = os.environ.get("CHUNKER_EMBEDDING_TRANSFORM")
+    chunk_tokens = os.environ.get("CHUNKER_CHUNK_TOKENS")
+    max_batch_tokens = os.environ.get("CHUNKER_MAX_BATCH_TOKENS")
+    tokenizer = os.environ.get("CHUNKER_TOKENIZER")
+    file_order = os.environ.get(
+        "CHUNKER_FILE_ORDER", chunker_model.ChunkAndVectoriseConfig.file_order
+    )
+    priority = os.environ.get("CHUNKER_PRIORITY", "")
 
-    if not project_dir:
-        await ctx.log("error", "Error: project_dir must be specified.")
-        return "Error: project_dir must be specified."
     if not chroma_host:
         await ctx.log("error", "Error: chroma_host must be specified.")
         return "Error: chroma_host must be specified."
     if not chroma_port:
         await ctx.log("error", "Error: chroma_port must be specified.")
         return "Error: chroma_port must be specified."
-    if not collection_name:
-        await ctx.log("error", "Error: chroma_collection_name must be specified.")
-        return "Error: chroma_collection_name must be specified."
 
     try:
         chroma_port_int = int(chroma_port)
@@ -129,59 +298,259 @@ async def chunk_and_vectorise(
         )
         return f"Error: max_batch_size must be an integer, got {max_batch_size!r}"
 
+    try:
+        dedup_threshold_float = float(dedup_threshold)
+    except Exception:
+        msg = f"Error: CHUNKER_DEDUP_THRESHOLD must be a number, got {dedup_threshold!r}"
+        await ctx.log("error", msg)
+        return msg
+
+    try:
+        chunk_tokens_int = int(chunk_tokens) if chunk_tokens else None
+        max_batch_tokens_int = int(max_batch_tokens) if max_batch_tokens else None
+    except Exception:
+        msg = (
+            "Error: CHUNKER_CHUNK_TOKENS and CHUNKER_MAX_BATCH_TOKENS must be integers, "
+            f"got {chunk_tokens!r} and {max_batch_tokens!r}"
+        )
+        await ctx.log("error", msg)
+        return msg
+
     config = chunker_model.ChunkAndVectoriseConfig(
         chroma_host=chroma_host,
         chroma_port=chroma_port_int,
         collection_name=collection_name,
         max_batch_size=max_batch_size_int,
         language=language,
+        state_dir=Path(state_dir) if state_dir else None,
+        chroma_endpoints=_chroma_endpoints_from_env(),
+        local_store=local_store,
+        snapshot_dir=_snapshot_dir_from_env(),
+        dedup=dedup,
+        dedup_threshold=dedup_threshold_float,
+        symbols=symbols,
+        embedding_transform=Path(embedding_transform) if embedding_transform else None,
+        chunk_tokens=chunk_tokens_int,
+        tokenizer=Path(tokenizer) if tokenizer else None,
+        max_batch_tokens=max_batch_tokens_int,
+        file_order=file_order,
+        priority_paths=[p.strip() for p in priority.split(",") if p.strip()],
+        exclude_patterns=exclude or [],
     )
+    patterns = [pattern] if isinstance(pattern, str) else pattern
 
     logger = logging.getLogger(__name__)
 
-    result = await chunk_and_vectorise_core(
-        Path(project_dir),
-        pattern,
-        config,
-        logger_instance=logger,
+    async def run(job: chunker_model.IngestionJob) -> str | None:
+        def progress(files_done: int, files_total: int) -> None:
+            job.files_done = files_done
+            job.files_total = files_total
+
+        async with project_lock(_scheduler, project_name):
+            job.state = "running"
+            try:
+                result = await chunk_and_vectorise_core(
+                    Path(project_dir),
+                    pattern,
+                    config,
+                    logger_instance=logger,
+                    client_pool=_client_pool,
+                    scheduler=_scheduler,
+                    progress=progress,
+                )
+            finally:
+                invalidate_query_cache(_query_cache, config.collection_name)
+        return None if result is None else result.message
+
+    job = start_job(
+        registry=_jobs,
+        project=project_name,
+        pattern=", ".join(patterns),
+        language=language,
+        run=run,
     )
-    if result is None:
-        await ctx.log(
-            "info",
-            f"Chunked and vectorised files matching: {pattern} (language: {language})",
-        )
-        return (
-            f"Chunked and vectorised files matching: {pattern} (language: {language})"
-        )
-    else:
-        await ctx.log("error", f"Error: {getattr(result, 'message', str(result))}")
-        return f"Error: {getattr(result, 'message', str(result))}"
+    await ctx.log(
+        "info",
+        f"Started job {job.job_id} for files matching: {', '.join(patterns)} "
+        f"(language: {language})",
+    )
+    return job_status(job).model_dump_json()
 
 
 @mcp.tool(
-    description="Query chunks from the ChromaDB collection using the provided query string.",
+    description="Get the state and progress of a background chunk_and_vectorise job.",
+)
+async def get_job_status(job_id: str, ctx: Context) -> str:
+    """
+    Get the status of a background ingestion job.
+
+    Args:
+        job_id (str): Identifier returned by chunk_and_vectorise.
+        ctx (Context): The MCP context for logging.
+
+    Returns:
+        str: The job status as JSON, or an error message.
+    """
+    from chunker_src.jobs import get_job, job_status
+
+    job = get_job(_jobs, job_id)
+    if isinstance(job, chunker_model.JobNotFoundError):
+        await ctx.log("error", f"Error: {job.message}")
+        return f"Error: {job.message}"
+    return job_status(job).model_dump_json()
+
+
+@mcp.tool(
+    description=(
+        "Wait for a background chunk_and_vectorise job to finish, reporting its "
+        "progress, for at most timeout_seconds."
+    ),
+)
+async def wait_for_job(job_id: str, ctx: Context, timeout_seconds: float = 30.0) -> str:
+    """
+    Wait for a background ingestion job, streaming its progress to the client.
+
+    Args:
+        job_id (str): Identifier returned by chunk_and_vectorise.
+        ctx (Context): The MCP context for logging and progress notifications.
+        timeout_seconds (float, optional): Longest time to wait. Default is 30.
+
+    Returns:
+        str: The job status as JSON once the job finished or the wait timed out,
+        or an error message.
+    """
+    from chunker_src.jobs import FINISHED_STATES, get_job, job_status
+
+    job = get_job(_jobs, job_id)
+    if isinstance(job, chunker_model.JobNotFoundError):
+        await ctx.log("error", f"Error: {job.message}")
+        return f"Error: {job.message}"
+
+    deadline = time.monotonic() + max(0.0, timeout_seconds)
+    reported = None
+    while True:
+        if (job.files_done, job.files_total) != reported:
+            reported = (job.files_done, job.files_total)
+            await ctx.report_progress(
+                progress=job.files_done, total=job.files_total or None
+            )
+        if job.state in FINISHED_STATES or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+
+    await ctx.log(
+        "info",
+        f"Job {job.job_id} is {job.state}: {job.files_done}/{job.files_total} files.",
+    )
+    return job_status(job).model_dump_json()
+
+
+@mcp.tool(
+    description="Cancel a background chunk_and_vectorise job. Re-running it resumes the run.",
+)
+async def cancel_job(job_id: str, ctx: Context) -> str:
+    """
+    Cancel a background ingestion job.
+
+    Args:
+        job_id (str): Identifier returned by chunk_and_vectorise.
+        ctx (Context): The MCP context for logging.
+
+    Returns:
+        str: The job status as JSON, or an error message.
+    """
+    from chunker_src import jobs
+
+    job = jobs.cancel_job(_jobs, job_id)
+    if isinstance(job, chunker_model.JobNotFoundError):
+        await ctx.log("error", f"Error: {job.message}")
+        return f"Error: {job.message}"
+    await ctx.log("info", f"Cancelling job {job.job_id}.")
+    return jobs.job_status(job).model_dump_json()
+
+
+@mcp.tool(
+    description="List the background chunk_and_vectorise jobs and their states.",
+)
+async def list_jobs(ctx: Context) -> str:
+    """
+    List the background ingestion jobs, oldest first.
+
+    Args:
+        ctx (Context): The MCP context for logging.
+
+    Returns:
+        str: A JSON list of job statuses.
+    """
+    from chunker_src.jobs import job_status
+
+    statuses = [job_status(job) for job in _jobs.jobs.values()]
+    await ctx.log("info", f"{len(statuses)} jobs.")
+    return _job_statuses_adapter.dump_json(statuses).decode()
+
+
+@mcp.tool(
+    description=(
+        "Query chunks from the ChromaDB collection using the provided query string. "
+        "Set expand_lines or expand_to_definition to get the code around each hit "
+        "without a follow-up read_file call."
+    ),
 )
 async def query_chunks(
     query: str,
     ctx: Context,
+    merge_results: bool = False,
+    token_budget: int | None = None,
+    include_text: bool = True,
+    projects: list[str] | None = None,
+    rerank: bool = False,
+    expand_lines: int = 0,
+    expand_to_definition: bool = False,
 ) -> str:
     """
     Query chunks from the ChromaDB collection using the provided query string.
-    All configuration is loaded from environment variables.
+    The Chroma connection is loaded from environment variables.
 
     Args:
         query (str): The query string to search for.
         ctx (Context): The MCP context for logging.
+        merge_results (bool, optional): Merge adjacent and duplicate hits per file
+            into one window per region. Default is False.
+        token_budget (int | None, optional): Approximate cap on the total tokens
+            of merged output. Default is None (no cap).
+        include_text (bool, optional): Include chunk texts; when False only paths,
+            line ranges and distances are returned. Default is True.
+        projects (list[str] | None, optional): Projects to query. Several projects
+            are queried concurrently and their hits merged by distance. Default is
+            the configured or only registered project.
+        rerank (bool, optional): Over-fetch candidates and rerank them client-side.
+            Default is False.
+        expand_lines (int, optional): Lines of surrounding code to return before
+            and after each hit, saving a read_file call. Default is 0.
+        expand_to_definition (bool, optional): Return the whole function or
+            class enclosing each hit. Default is False.
 
     Returns:
-        str: A summary of the query result or an error message.
+        str: The results as a compact columnar JSON object, or an error message.
     """
-    import os
-    import logging
+    from chunker_src.query_chunks import (
+        build_query_response,
+        query_chunks_core,
+        query_collections_core,
+    )
 
-    chroma_host = os.environ.get("CHROMA_HOST")
-    chroma_port = os.environ.get("CHROMA_PORT")
-    collection_name = os.environ.get("CHROMA_COLLECTION_NAME")
+    collection_names = []
+    for project in projects or [None]:
+        resolved = _resolve_project(project)
+        if isinstance(resolved, chunker_model.ProjectNotFoundError):
+            await ctx.log("error", f"Error: {resolved.message}")
+            return f"Error: {resolved.message}"
+        collection_names.append(resolved[1].collection_name)
+    collection_name = collection_names[0]
+
+    local_store = _local_store_from_env()
+    chroma_host = os.environ.get("CHROMA_HOST") or ("localhost" if local_store else None)
+    chroma_port = os.environ.get("CHROMA_PORT") or ("8000" if local_store else None)
     n_results = os.environ.get("CHROMA_N_RESULTS", "10")
 
     if not chroma_host:
@@ -190,9 +559,6 @@ async def query_chunks(
     if not chroma_port:
         await ctx.log("error", "Error: chroma_port must be specified.")
         return "Error: chroma_port must be specified."
-    if not collection_name:
-        await ctx.log("error", "Error: chroma_collection_name must be specified.")
-        return "Error: chroma_collection_name must be specified."
 
     try:
         chroma_port_int = int(chroma_port)
@@ -213,25 +579,57 @@ async def query_chunks(
         chroma_port=chroma_port_int,
         collection_name=collection_name,
         n_results=n_results_int,
+        merge_results=merge_results,
+        token_budget=token_budget,
+        chroma_endpoints=_chroma_endpoints_from_env(),
+        local_store=local_store,
+        snapshot_dir=_snapshot_dir_from_env(),
+        embedding_transform=(
+            Path(os.environ["CHUNKER_EMBEDDING_TRANSFORM"])
+            if os.environ.get("CHUNKER_EMBEDDING_TRANSFORM")
+            else None
+        ),
+        rerank=rerank,
+        rerank_model=(
+            Path(os.environ["CHUNKER_RERANK_MODEL"])
+            if os.environ.get("CHUNKER_RERANK_MODEL")
+            else None
+        ),
+        rerank_timeout=_rerank_timeout,
+        expand_lines=expand_lines,
+        expand_to_definition=expand_to_definition,
+        state_dir=(
+            Path(os.environ["CHUNKER_STATE_DIR"])
+            if os.environ.get("CHUNKER_STATE_DIR")
+            else None
+        ),
     )
 
     logger = logging.getLogger(__name__)
 
     try:
-        result = await query_chunks_core(
-            query_text=query,
-            config=config,
-            logger=logger,
-            n_results=n_results_int,
-        )
-        summary = "["
-        for r in result:
-            summary += r.model_dump_json()
-            summary += ","
-        summary += "]"
-
-        await ctx.log("info", summary)
-        return summary
+        if len(collection_names) > 1:
+            result = await query_collections_core(
+                query_text=query,
+                config=config,
+                collection_names=collection_names,
+                logger=logger,
+                n_results=n_results_int,
+                client_pool=_client_pool,
+                query_cache=_query_cache,
+            )
+        else:
+            result = await query_chunks_core(
+                query_text=query,
+                config=config,
+                logger=logger,
+                n_results=n_results_int,
+                client_pool=_client_pool,
+                query_cache=_query_cache,
+            )
+        response = build_query_response(result, include_text=include_text)
+        await ctx.log("info", f"Query returned {len(result)} results.")
+        return response.model_dump_json(exclude_none=True)
     except Exception as e:
         msg = f"Error during query: {e}"
         await ctx.log("error", msg)
@@ -243,24 +641,32 @@ async def query_chunks(
 )
 async def delete_collection(
     ctx: Context,
+    project: str | None = None,
 ) -> str:
     """
     Delete all records in the specified ChromaDB collection.
 
     Args:
         ctx (Context): The MCP context for logging.
+        project (str | None, optional): The project whose collection is cleared.
+            Default is the configured or only registered project.
 
     Returns:
         str: Success or error message.
     """
-    import os
-
-    chroma_host = os.environ.get("CHROMA_HOST")
-    chroma_port = os.environ.get("CHROMA_PORT")
-    collection_name = os.environ.get("CHROMA_COLLECTION_NAME")
-    if not collection_name:
-        await ctx.log("error", "Error: collection_name must be specified.")
-        return "Error: collection_name must be specified."
+    from chunker_src.crud import delete_all_records_in_collection
+    from chunker_src.query_cache import invalidate_query_cache
+
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+
+    local_store = _local_store_from_env()
+    chroma_host = os.environ.get("CHROMA_HOST") or ("localhost" if local_store else None)
+    chroma_port = os.environ.get("CHROMA_PORT") or ("8000" if local_store else None)
+    collection_name = resolved[1].collection_name
+    state_dir = os.environ.get("CHUNKER_STATE_DIR")
     if not chroma_host:
         await ctx.log("error", "Error: chroma_host must be specified.")
         return "Error: chroma_host must be specified."
@@ -275,19 +681,17 @@ async def delete_collection(
         )
         return f"Error: chroma_port must be an integer, got {chroma_port!r}"
 
-    if not collection_name:
-        await ctx.log(
-            "error",
-            "Error: collection_name must be specified (argument, global, or env).",
-        )
-        return "Error: collection_name must be specified (argument, global, or env)."
-
     try:
         await delete_all_records_in_collection(
             chroma_host=chroma_host,
             chroma_port=chroma_port_int,
             collection_name=collection_name,
+            chroma_endpoints=_chroma_endpoints_from_env(),
+            state_dir=Path(state_dir) if state_dir else None,
+            local_store=local_store,
+            snapshot_dir=_snapshot_dir_from_env(),
         )
+        invalidate_query_cache(_query_cache, collection_name)
         await ctx.log(
             "info", f"All records deleted from collection '{collection_name}'."
         )
@@ -297,12 +701,65 @@ async def delete_collection(
         return f"Error deleting collection: {e}"
 
 
+@mcp.tool(
+    description=(
+        "Find where a class, function or method is defined, by exact name, "
+        "qualified name (e.g. 'Server.start'), prefix or fuzzy match. Answers from "
+        "the symbol index built by chunk_and_vectorise; returns paths and 0-based "
+        "line ranges for read_file."
+    ),
+)
+async def find_symbol(
+    name: str,
+    ctx: Context,
+    limit: int = 20,
+    kind: str | None = None,
+    project: str | None = None,
+) -> str:
+    """
+    Find definitions by name in the symbol index of a project's collection.
+
+    Args:
+        name (str): Name, qualified name or prefix of a definition.
+        ctx (Context): The MCP context for logging.
+        limit (int, optional): Maximum number of definitions. Default is 20.
+        kind (str | None, optional): Only return 'class', 'function' or 'method'
+            definitions. Default is all kinds.
+        project (str | None, optional): The project to search. Default is the
+            configured or only registered project.
+
+    Returns:
+        str: The definitions as a JSON list, or an error message.
+    """
+    from chunker_src.symbols import find_symbol_core
+
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+
+    state_dir = os.environ.get("CHUNKER_STATE_DIR")
+    result = find_symbol_core(
+        collection_name=resolved[1].collection_name,
+        query=name,
+        state_dir=Path(state_dir) if state_dir else None,
+        limit=limit,
+        kind=kind,
+    )
+    if isinstance(result, chunker_model.SymbolIndexError):
+        await ctx.log("error", f"Error: {result.message}")
+        return f"Error: {result.message}"
+    await ctx.log("info", f"Found {len(result)} definitions for {name!r}.")
+    return _symbols_adapter.dump_json(result, exclude_none=True).decode()
+
+
 @mcp.tool(
     description="List directories in the project directory, excluding those ignored by .gitignore and .git.",
 )
 async def list_project_directories(
     ctx: Context,
     recursive: bool = False,
+    project: str | None = None,
 ) -> str:
     """
     List all directories in the project directory, excluding those ignored by .gitignore and .git.
@@ -310,14 +767,17 @@ async def list_project_directories(
     Args:
         ctx (Context): The MCP context for logging.
         recursive (bool, optional): Whether to list directories recursively. Default is False.
+        project (str | None, optional): The project to list. Default is the
+            configured or only registered project.
 
     Returns:
         str: A newline-separated list of directories, or an error message.
     """
-    project_dir = os.environ.get("PROJECT_DIR")
-    if not project_dir:
-        await ctx.log("error", "Error: PROJECT_DIR must be specified.")
-        return "Error: PROJECT_DIR must be specified."
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+    project_dir = resolved[1].project_dir
 
     base = Path(project_dir)
     if not base.exists() or not base.is_dir():
@@ -339,11 +799,19 @@ async def list_project_directories(
 
 
 @mcp.tool(
-    description="Read the contents of a single file by relative path from the project directory.",
+    description=(
+        "Read the contents of a single file by relative path from the project directory, "
+        "optionally restricted to a line range (0-based, inclusive) or a byte range."
+    ),
 )
 async def read_file(
     relative_path: str,
     ctx: Context,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+    project: str | None = None,
 ) -> str:
     """
     Reads the contents of a single file given a relative path from the project directory.
@@ -351,43 +819,125 @@ async def read_file(
     Args:
         relative_path (str): The path to the file, relative to the project root.
         ctx (Context): The MCP context for logging.
+        start_line (int | None, optional): First line to read (0-based, inclusive).
+        end_line (int | None, optional): Last line to read (0-based, inclusive).
+        start_byte (int | None, optional): First byte to read (inclusive).
+        end_byte (int | None, optional): Byte offset to stop reading at (exclusive).
+        project (str | None, optional): The project to read from. Default is the
+            configured or only registered project.
 
     Returns:
         str: The file contents, or an error message.
     """
-    import os
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+    project_dir = resolved[1].project_dir
+
+    file_path = resolve_project_file(Path(project_dir), relative_path)
+    if isinstance(file_path, chunker_model.FileReadError):
+        await ctx.log("error", f"Error: {file_path.message}")
+        return f"Error: {file_path.message}"
+
+    contents = read_file_range(
+        file_path=file_path,
+        cache=_file_cache,
+        start_line=start_line,
+        end_line=end_line,
+        start_byte=start_byte,
+        end_byte=end_byte,
+    )
+    if isinstance(contents, chunker_model.FileReadError):
+        await ctx.log("error", f"Error: {contents.message}")
+        return f"Error: {contents.message}"
 
-    project_dir = os.environ.get("PROJECT_DIR")
-    if not project_dir:
-        await ctx.log("error", "Error: PROJECT_DIR must be specified.")
-        return "Error: PROJECT_DIR must be specified."
+    await ctx.log("info", f"Read file '{relative_path}' successfully.")
+    return contents
+
+
+@mcp.tool(
+    description=(
+        "Read many files or line/byte ranges of files from the project directory in one call. "
+        "Returns a JSON list with the content or error of each requested range."
+    ),
+)
+async def read_files(
+    ranges: list[chunker_model.FileRange],
+    ctx: Context,
+    project: str | None = None,
+) -> str:
+    """
+    Reads several files or ranges of files given paths relative to the project directory.
+
+    Args:
+        ranges (list[chunker_model.FileRange]): The files and optional line or byte
+            ranges to read.
+        ctx (Context): The MCP context for logging.
+        project (str | None, optional): The project to read from. Default is the
+            configured or only registered project.
+
+    Returns:
+        str: A JSON list of FileRangeContent objects, or an error message.
+    """
+    resolved = _resolve_project(project)
+    if isinstance(resolved, chunker_model.ProjectNotFoundError):
+        await ctx.log("error", f"Error: {resolved.message}")
+        return f"Error: {resolved.message}"
+    project_dir = resolved[1].project_dir
 
     base = Path(project_dir)
-    file_path = base / relative_path
+    results = []
+    for file_range in ranges:
+        file_path = resolve_project_file(base, file_range.relative_path)
+        if isinstance(file_path, chunker_model.FileReadError):
+            contents: str | chunker_model.FileReadError = file_path
+        else:
+            contents = read_file_range(
+                file_path=file_path,
+                cache=_file_cache,
+                start_line=file_range.start_line,
+                end_line=file_range.end_line,
+                start_byte=file_range.start_byte,
+                end_byte=file_range.end_byte,
+            )
+
+        if isinstance(contents, chunker_model.FileReadError):
+            results.append(
+                chunker_model.FileRangeContent(
+                    relative_path=file_range.relative_path, error=contents.message
+                )
+            )
+        else:
+            results.append(
+                chunker_model.FileRangeContent(
+                    relative_path=file_range.relative_path, content=contents
+                )
+            )
+
+    await ctx.log("info", f"Read {len(results)} file ranges.")
+    return _file_range_contents_adapter.dump_json(results, exclude_none=True).decode()
 
-    # Security: ensure the resolved path is within the project directory
-    try:
-        file_path_resolved = file_path.resolve(strict=True)
-        base_resolved = base.resolve(strict=True)
-        if not str(file_path_resolved).startswith(str(base_resolved)):
-            await ctx.log("error", "Error: File is outside the project directory.")
-            return "Error: File is outside the project directory."
-    except FileNotFoundError:
-        await ctx.log("error", f"Error: File '{relative_path}' does not exist.")
-        return f"Error: File '{relative_path}' does not exist."
-
-    if not file_path.is_file():
-        await ctx.log("error", f"Error: '{relative_path}' is not a file.")
-        return f"Error: '{relative_path}' is not a file."
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            contents = f.read()
-        await ctx.log("info", f"Read file '{relative_path}' successfully.")
-        return contents
-    except Exception as e:
-        await ctx.log("error", f"Error reading file: {e}")
-        return f"Error reading file: {e}"
+@mcp.tool(
+    description="List the projects served by this server and their collections.",
+)
+async def list_projects(ctx: Context) -> str:
+    """
+    List the projects served by this server.
+
+    Args:
+        ctx (Context): The MCP context for logging.
+
+    Returns:
+        str: A JSON object mapping project names to their directory and collection.
+    """
+    projects = dict(_projects)
+    resolved = _resolve_project(None)
+    if not isinstance(resolved, chunker_model.ProjectNotFoundError):
+        projects.setdefault(resolved[0], resolved[1])
+    await ctx.log("info", f"Serving {len(projects)} projects.")
+    return _projects_adapter.dump_json(projects).decode()
 
 
 @mcp.prompt(name="chunk_and_vectorise")
@@ -492,6 +1042,9 @@ def good_pattern_help() -> str:
         "- '**/*.py' (recursive all-file match is not allowed)\n"
         "- '**/foo.py' (recursive all-file match is not allowed)\n"
         "\n"
+        "Several patterns can be passed as a list and are ingested in one run; exclude "
+        "patterns (which may start with '**/', e.g. '**/vendor/**') leave files out.\n"
+        "\n"
         "Choose patterns that help you focus on the files you want to process, while avoiding unnecessary or unsafe matches. "
         "If your pattern is rejected, check that it does not use '..' or start with '**/'."
     )
@@ -504,8 +1057,15 @@ def read_file_help() -> str:
     """
     return (
         "Use the 'read_file' tool to read the contents of a single file by specifying its path "
-        "relative to the project root directory. Only one file can be read at a time, and the path "
-        "must not be an expression or glob pattern. Example: 'src/main.py'."
+        "relative to the project root directory. The path must not be an expression or glob pattern. "
+        "Example: 'src/main.py'.\n"
+        "\n"
+        "To read only part of a file, pass 'start_line' and 'end_line' (0-based, inclusive, as returned "
+        "by 'query_chunks') or 'start_byte' and 'end_byte' (end exclusive). Example: "
+        "read_file('src/main.py', start_line=120, end_line=180).\n"
+        "\n"
+        "Use the 'read_files' tool to read several files or ranges in one call, passing a list of "
+        "objects with 'relative_path' and optional range fields."
     )
 
 
@@ -522,6 +1082,14 @@ def query_chunks_help() -> str:
         "\n"
         "Arguments:\n"
         "- query: The search string or question about your codebase (e.g., function names, class responsibilities, or documentation topics).\n"
+        "- merge_results: Merge neighbouring hits from the same file into one window per region (default: false).\n"
+        "- token_budget: Approximate cap on the total tokens returned when merging (optional).\n"
+        "- include_text: Set to false to get only paths, line ranges and distances (default: true).\n"
+        "- rerank: Fetch more candidates and rerank them by overlap with the query's identifiers (default: false).\n"
+        "\n"
+        "The result is a columnar JSON object: hit i is at paths[path_index[i]], lines start[i]-end[i] "
+        "(0-based, inclusive), with distance distances[i] and text chunks[i]. "
+        "Reranked results also carry scores[i], higher is better.\n"
         "\n"
         "Example usage:\n"
         "- 'Where is the database connection established?'\n"
@@ -541,24 +1109,45 @@ def main(
     Entry point for the Chunker MCP CLI. Ensures all required configuration
     arguments are provided and non-empty before starting the MCP server.
 
-    Exits with an error if any required argument is missing or empty.
+    Exits with an error if any required argument is missing or empty. A single
+    project is configured with `--project_dir` and `--chroma_collection_name`;
+    several projects with `--projects_file`, a JSON file mapping project names
+    to their `project_dir` and `collection_name`. With `--local_store`, vectors
+    are kept in that directory and no Chroma server is needed. When `--metrics_port` is
+    given, Prometheus metrics are served at
+    `http://<metrics_host>:<metrics_port>/metrics`. Results of recent queries are
+    reused for repeated and similar queries, see `--query_cache_size`,
+    `--query_cache_ttl` and `--query_cache_threshold`; `--query_cache_size 0`
+    disables this.
     """
+    global _rerank_timeout
     parser = argparse.ArgumentParser()
-    parser.add_argument("--project_dir", type=str, required=True)
-    parser.add_argument("--chroma_host", type=str, required=True)
-    parser.add_argument("--chroma_port", type=int, required=True)
-    parser.add_argument("--chroma_collection_name", type=str, required=True)
+    parser.add_argument("--project_dir", type=str, default=None)
+    parser.add_argument("--chroma_host", type=str, default=None)
+    parser.add_argument("--chroma_port", type=int, default=None)
+    parser.add_argument("--chroma_collection_name", type=str, default=None)
+    parser.add_argument("--projects_file", type=str, default=None)
+    parser.add_argument("--ingest_slots", type=int, default=4)
+    parser.add_argument("--chroma_endpoints", type=str, default=None)
+    parser.add_argument("--local_store", type=str, default=None)
+    parser.add_argument("--metrics_host", type=str, default="127.0.0.1")
+    parser.add_argument("--metrics_port", type=int, default=None)
+    parser.add_argument("--query_cache_size", type=int, default=256)
+    parser.add_argument("--query_cache_ttl", type=float, default=300.0)
+    parser.add_argument("--query_cache_threshold", type=float, default=0.9)
     args, _ = parser.parse_known_args()
 
     missing = []
-    if not args.project_dir or not args.project_dir.strip():
-        missing.append("--project_dir")
-    if not args.chroma_host or not args.chroma_host.strip():
-        missing.append("--chroma_host")
-    if args.chroma_port is None or str(args.chroma_port).strip() == "":
-        missing.append("--chroma_port")
-    if not args.chroma_collection_name or not args.chroma_collection_name.strip():
-        missing.append("--chroma_collection_name")
+    if not args.projects_file:
+        if not args.project_dir or not args.project_dir.strip():
+            missing.append("--project_dir")
+        if not args.chroma_collection_name or not args.chroma_collection_name.strip():
+            missing.append("--chroma_collection_name")
+    if not args.local_store:
+        if not args.chroma_host or not args.chroma_host.strip():
+            missing.append("--chroma_host")
+        if args.chroma_port is None or str(args.chroma_port).strip() == "":
+            missing.append("--chroma_port")
 
     if missing:
         sys.stderr.write(
@@ -566,8 +1155,34 @@ def main(
         )
         sys.exit(1)
 
-    os.environ["PROJECT_DIR"] = args.project_dir
-    os.environ["CHROMA_HOST"] = args.chroma_host
-    os.environ["CHROMA_PORT"] = str(args.chroma_port)
-    os.environ["CHROMA_COLLECTION_NAME"] = args.chroma_collection_name
+    if args.projects_file:
+        try:
+            _projects.update(_load_projects_file(Path(args.projects_file)))
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Error: Could not load {args.projects_file}: {e}\n")
+            sys.exit(1)
+    if args.project_dir and args.chroma_collection_name:
+        os.environ["PROJECT_DIR"] = args.project_dir
+        os.environ["CHROMA_COLLECTION_NAME"] = args.chroma_collection_name
+    if args.chroma_host:
+        os.environ["CHROMA_HOST"] = args.chroma_host
+    if args.chroma_port is not None:
+        os.environ["CHROMA_PORT"] = str(args.chroma_port)
+    if args.local_store:
+        os.environ["CHUNKER_LOCAL_STORE"] = args.local_store
+    _scheduler.slots = max(1, args.ingest_slots)
+    _query_cache.max_entries = max(0, args.query_cache_size)
+    _query_cache.ttl = args.query_cache_ttl
+    _query_cache.threshold = args.query_cache_threshold
+    rerank_timeout = _rerank_timeout_from_env()
+    if isinstance(rerank_timeout, chunker_model.InvalidSettingError):
+        sys.stderr.write(
+            f"Warning: {rerank_timeout.message}; using {_rerank_timeout} seconds.\n"
+        )
+    else:
+        _rerank_timeout = rerank_timeout
+    if args.chroma_endpoints:
+        os.environ["CHROMA_ENDPOINTS"] = args.chroma_endpoints
+    if args.metrics_port is not None:
+        start_metrics_server(host=args.metrics_host, port=args.metrics_port)
     mcp.run(transport=transport, **transport_kwargs)
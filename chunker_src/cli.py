@@ -1,12 +1,11 @@
 import asyncio
 import typer
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 import logging
 import json
-from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
-from chunker_src import model as chunker_model
-from chunker_src.query_chunks import query_chunks_core
-from chunker_src.crud import delete_all_records_in_collection
+import time
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
@@ -16,17 +15,60 @@ logger = logging.getLogger(__name__)
 app = typer.Typer()
 
 
+def _write_run_report(report_path: Path | None, started: float) -> None:
+    """
+    Write the metrics of this run as a JSON report, if a path was given.
+
+    Args:
+        report_path (Path | None): Where to write the report, or None to skip.
+        started (float): The `time.perf_counter()` value at the start of the run.
+    """
+    if report_path is None:
+        return
+    from chunker_src.metrics import build_run_report
+
+    report = build_run_report(elapsed_seconds=time.perf_counter() - started)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+@contextmanager
+def _profile(output: Path | None, root: str, top_n: int) -> Iterator[None]:
+    """
+    Profile the block and write the profile, if an output path was given.
+
+    Args:
+        output (Path | None): Path of the profile files without suffix, or None
+            to skip.
+        root (str): Name of the root frame, e.g. the command.
+        top_n (int): Number of slowest files in the report.
+    """
+    if output is None:
+        yield
+        return
+    from chunker_src.profiling import profile_run, write_profile
+
+    with profile_run(root) as profiler:
+        yield
+    folded, report = write_profile(profiler, output, top_n)
+    typer.echo(f"Profile written to {folded} and {report}", err=True)
+
+
 @app.command()
 def chunk_and_vectorise(
     project_dir: Path = typer.Argument(
         ..., help="Root directory of the project to search for files"
     ),
-    pattern: str = typer.Argument(
-        ..., help="Glob pattern for files to process (e.g., '*.py')"
+    pattern: list[str] = typer.Argument(
+        ...,
+        help="Glob patterns for files to process (e.g., 'src/**/*.py' 'tests/*.py')",
     ),
     language: str = typer.Option(
         "python", help="Programming language for splitting (e.g., 'python')"
     ),
+    exclude: list[str] = typer.Option(
+        None, help="Glob pattern of files to leave out; repeat to list several"
+    ),
     chroma_host: str = typer.Option(
         "localhost", help="ChromaDB host (default: 'localhost')"
     ),
@@ -35,30 +77,204 @@ def chunk_and_vectorise(
         "default", help="ChromaDB collection name (default: 'default')"
     ),
     max_batch_size: int = typer.Option(
-        64, help="Maximum batch size for collection.add() (default: 64)"
+        64,
+        help="Batch size for collection.add(); the initial size when batching is "
+        "adaptive (default: 64)",
+    ),
+    adaptive_batching: bool = typer.Option(
+        True,
+        help="Adapt batch size and concurrency to Chroma latency and errors, up to "
+        "the server's max batch size",
+    ),
+    max_add_concurrency: int = typer.Option(
+        8, help="Maximum concurrent collection.add() calls (default: 8)"
+    ),
+    max_file_concurrency: int = typer.Option(
+        4,
+        help="Files processed concurrently; runs with --dedup process one at a "
+        "time (default: 4)",
+    ),
+    chroma_endpoint: list[str] = typer.Option(
+        None,
+        help="'host:port' of a Chroma shard; repeat for a sharded collection "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    metrics_report: Path = typer.Option(
+        None, help="Write a JSON report of timings and throughput to this path"
+    ),
+    state_dir: Path = typer.Option(
+        None,
+        help="Directory for local state such as the run journal "
+        "(default: ~/.cache/chunker/<collection_name>)",
+    ),
+    resume: bool = typer.Option(
+        True, help="Resume an aborted run from its journal instead of starting over"
+    ),
+    max_retries: int = typer.Option(
+        5, help="Attempts per Chroma write before the run is aborted (default: 5)"
+    ),
+    dedup: bool = typer.Option(
+        False,
+        help="Store exact and near-duplicate chunks once, listing the other "
+        "locations in the 'aliases' metadata",
+    ),
+    dedup_threshold: float = typer.Option(
+        0.9,
+        help="Estimated similarity (0-1) at or above which chunks are duplicates; "
+        "1.0 only suppresses exact duplicates (default: 0.9)",
+    ),
+    dedup_min_chars: int = typer.Option(
+        64, help="Chunks shorter than this are never deduplicated (default: 64)"
+    ),
+    embedding_transform: Path = typer.Option(
+        None,
+        help="Embed client-side and store vectors reduced and quantized with this "
+        "transform (see fit-embedding-transform)",
+    ),
+    chunk_tokens: int = typer.Option(
+        None,
+        help="Split into chunks of at most this many tokens of the embedding model "
+        "and store token counts (default: size chunks in characters)",
+    ),
+    chunk_overlap_tokens: int = typer.Option(
+        0, help="Tokens shared by consecutive chunks with --chunk-tokens (default: 0)"
+    ),
+    tokenizer: Path = typer.Option(
+        None,
+        help="tokenizer.json to count tokens with (default: the embedding model's)",
+    ),
+    max_batch_tokens: int = typer.Option(
+        None, help="Cap on the total tokens per collection.add() with --chunk-tokens"
+    ),
+    local_store: Path = typer.Option(
+        None,
+        help="Store vectors in this local directory instead of Chroma "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    snapshot_dir: Path = typer.Option(
+        None, help="Refresh the collection's local query snapshot in this directory"
+    ),
+    symbols: bool = typer.Option(
+        False, help="Record each file's definitions in the symbol index for find-symbol"
+    ),
+    file_order: str = typer.Option(
+        "glob",
+        help="Order to index files in: 'glob', 'recent' (last committed first) or "
+        "'size' (smallest first) (default: glob)",
+    ),
+    priority: list[str] = typer.Option(
+        None,
+        help="Gitignore-style pattern of files to index before all others; "
+        "repeat to list several, most important first",
+    ),
+    profile: Path = typer.Option(
+        None,
+        help="Profile wall time, CPU time and allocation peaks per stage and file, "
+        "processing files one at a time, and write <path>.folded collapsed stacks "
+        "and a <path>.json report",
+    ),
+    profile_top: int = typer.Option(
+        20, help="Slowest files listed in the --profile report (default: 20)"
     ),
 ):
+    from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+    from chunker_src import model as chunker_model
+
+    started = time.perf_counter()
     config = chunker_model.ChunkAndVectoriseConfig(
         chroma_host=chroma_host,
         chroma_port=chroma_port,
         collection_name=collection_name,
         max_batch_size=max_batch_size,
         language=language,
+        state_dir=state_dir,
+        resume=resume,
+        max_retries=max_retries,
+        adaptive_batching=adaptive_batching,
+        max_add_concurrency=max_add_concurrency,
+        max_file_concurrency=1 if profile is not None else max_file_concurrency,
+        chroma_endpoints=chroma_endpoint or [],
+        dedup=dedup,
+        dedup_threshold=dedup_threshold,
+        dedup_min_chars=dedup_min_chars,
+        embedding_transform=embedding_transform,
+        chunk_tokens=chunk_tokens,
+        chunk_overlap_tokens=chunk_overlap_tokens,
+        tokenizer=tokenizer,
+        max_batch_tokens=max_batch_tokens,
+        local_store=local_store,
+        snapshot_dir=snapshot_dir,
+        symbols=symbols,
+        file_order=file_order,
+        priority_paths=priority or [],
+        exclude_patterns=exclude or [],
     )
+    with _profile(profile, "chunk-and-vectorise", profile_top):
+        result = asyncio.run(
+            chunk_and_vectorise_core(
+                project_dir=project_dir,
+                pattern=pattern,
+                config=config,
+                logger_instance=logger,
+            )
+        )
+    _write_run_report(metrics_report, started)
+    if result is None:
+        typer.echo(
+            f"Chunked and vectorised files matching: {', '.join(pattern)} "
+            f"(language: {language})"
+        )
+    else:
+        typer.echo(f"Error: {getattr(result, 'message', str(result))}", err=True)
+        raise typer.Exit(code=2)
+
+
+@app.command()
+def fit_embedding_transform(
+    project_dir: Path = typer.Argument(
+        ..., help="Root directory of the project to sample chunks from"
+    ),
+    pattern: str = typer.Argument(
+        ..., help="Glob pattern for files to sample (e.g., 'src/**/*.py')"
+    ),
+    output: Path = typer.Argument(..., help="Where to save the transform (.npz)"),
+    language: str = typer.Option(
+        "python", help="Programming language for splitting (e.g., 'python')"
+    ),
+    dim: int = typer.Option(
+        None, help="Dimensions to keep after PCA (default: keep all)"
+    ),
+    quantization: str = typer.Option(
+        "none", help="Stored precision: 'none', 'float16' or 'int8' (default: none)"
+    ),
+    sample_size: int = typer.Option(
+        2000, help="Number of chunks to fit the transform on (default: 2000)"
+    ),
+):
+    """
+    Fit a PCA and quantization transform on a sample of a project's chunks.
+
+    Pass the saved transform as --embedding-transform to chunk-and-vectorise
+    and query-chunks of the same collection.
+    """
+    from chunker_src.chunk_and_vectorise import fit_embedding_transform_core
+
     result = asyncio.run(
-        chunk_and_vectorise_core(
+        fit_embedding_transform_core(
             project_dir=project_dir,
             pattern=pattern,
-            config=config,
+            language=language,
+            output=output,
+            dim=dim,
+            quantization=quantization,
+            sample_size=sample_size,
             logger_instance=logger,
         )
     )
     if result is None:
-        typer.echo(
-            f"Chunked and vectorised files matching: {pattern} (language: {language})"
-        )
+        typer.echo(f"Embedding transform written to {output}")
     else:
-        typer.echo(f"Error: {getattr(result, 'message', str(result))}", err=True)
+        typer.echo(f"Error: {result.message}", err=True)
         raise typer.Exit(code=2)
 
 
@@ -87,6 +303,71 @@ def query_chunks(
         "default", help="ChromaDB collection name (default: 'default')"
     ),
     n_results: int = typer.Option(10, help="Number of results to return (default: 10)"),
+    merge_results: bool = typer.Option(
+        False, help="Merge adjacent and duplicate hits per file into windows"
+    ),
+    token_budget: int = typer.Option(
+        None, help="Approximate cap on total output tokens when merging results"
+    ),
+    elide_text: bool = typer.Option(
+        False, help="Return only paths, line ranges and distances, without chunk text"
+    ),
+    metrics_report: Path = typer.Option(
+        None, help="Write a JSON report of timings and throughput to this path"
+    ),
+    chroma_endpoint: list[str] = typer.Option(
+        None,
+        help="'host:port' of a Chroma shard; repeat for a sharded collection "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    shard_timeout: float = typer.Option(
+        10.0, help="Per-shard query timeout in seconds (default: 10)"
+    ),
+    embedding_transform: Path = typer.Option(
+        None, help="Embedding transform the collection was indexed with"
+    ),
+    rerank: bool = typer.Option(
+        False, help="Over-fetch candidates and rerank them by lexical overlap"
+    ),
+    rerank_factor: int = typer.Option(
+        5, help="Candidates fetched per result when reranking (default: 5)"
+    ),
+    rerank_model: Path = typer.Option(
+        None,
+        help="Directory with a cross-encoder model.onnx and tokenizer.json to "
+        "rerank with after the lexical rerank",
+    ),
+    rerank_timeout: float = typer.Option(
+        0.25,
+        help="Latency cap of the rerank in seconds, after which results keep "
+        "vector order (default: 0.25)",
+    ),
+    local_store: Path = typer.Option(
+        None,
+        help="Query the local store in this directory instead of Chroma "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    snapshot_dir: Path = typer.Option(
+        None,
+        help="Answer from a memory-mapped snapshot of the collection in this "
+        "directory, built on first use",
+    ),
+    expand_lines: int = typer.Option(
+        0, help="Lines of surrounding code to add before and after each hit (default: 0)"
+    ),
+    expand_to_definition: bool = typer.Option(
+        False, help="Widen each hit to the function or class enclosing it"
+    ),
+    state_dir: Path = typer.Option(
+        None,
+        help="Local state directory of the collection, for --expand-lines and "
+        "--expand-to-definition (default: $XDG_CACHE_HOME/chunker/<collection>)",
+    ),
+    profile: Path = typer.Option(
+        None,
+        help="Profile wall time, CPU time and allocation peaks per stage and write "
+        "<path>.folded collapsed stacks and a <path>.json report",
+    ),
 ):
     """
     Query chunks from a ChromaDB collection and print the results as JSON.
@@ -97,7 +378,29 @@ def query_chunks(
         chroma_port (int): ChromaDB port.
         collection_name (str): ChromaDB collection name.
         n_results (int): Number of results to return.
+        merge_results (bool): Merge adjacent and duplicate hits per file.
+        token_budget (int): Approximate cap on total output tokens when merging.
+        elide_text (bool): Omit chunk texts from the output.
+        metrics_report (Path): Where to write a JSON metrics report, if given.
+        chroma_endpoint (list[str]): 'host:port' endpoints of a sharded collection.
+        shard_timeout (float): Per-shard query timeout in seconds.
+        embedding_transform (Path): Embedding transform the collection was indexed with.
+        rerank (bool): Over-fetch candidates and rerank them client-side.
+        rerank_factor (int): Candidates fetched per result when reranking.
+        rerank_model (Path): Cross-encoder model directory for the rerank.
+        rerank_timeout (float): Latency cap of the rerank in seconds.
+        local_store (Path): Directory of a local store to query instead of Chroma.
+        snapshot_dir (Path): Directory of local query snapshots.
+        expand_lines (int): Lines of context to add around each hit.
+        expand_to_definition (bool): Widen each hit to its enclosing definition.
+        state_dir (Path): Local state directory of the collection.
+        profile (Path): Where to write a profile of the query, if given.
     """
+    from chunker_src import model as chunker_model
+    from chunker_src.metrics import time_stage
+    from chunker_src.query_chunks import build_query_response, query_chunks_core
+
+    started = time.perf_counter()
 
     logger = logging.getLogger(__name__)
 
@@ -110,27 +413,213 @@ def query_chunks(
         chroma_port=chroma_port,
         collection_name=collection_name,
         n_results=n_results,
+        merge_results=merge_results,
+        token_budget=token_budget,
+        chroma_endpoints=chroma_endpoint or [],
+        shard_timeout=shard_timeout,
+        embedding_transform=embedding_transform,
+        rerank=rerank or rerank_model is not None,
+        rerank_factor=rerank_factor,
+        rerank_model=rerank_model,
+        rerank_timeout=rerank_timeout,
+        local_store=local_store,
+        snapshot_dir=snapshot_dir,
+        expand_lines=expand_lines,
+        expand_to_definition=expand_to_definition,
+        state_dir=state_dir,
     )
 
     try:
-        result = asyncio.run(
-            query_chunks_core(
-                query_text=query,
-                config=config,
-                logger=logger,
-                n_results=n_results,
+        with _profile(profile, "query-chunks", 0):
+            result = asyncio.run(
+                query_chunks_core(
+                    query_text=query,
+                    config=config,
+                    logger=logger,
+                    n_results=n_results,
+                )
             )
-        )
-        if not result:
+            output = None
+            if result:
+                with time_stage("encode"):
+                    response = build_query_response(result, include_text=not elide_text)
+                    output = response.model_dump_json(exclude_none=True, indent=2)
+        _write_run_report(metrics_report, started)
+        if output is None:
             typer.echo("No results found.")
         else:
-            json_result = json.dumps([r.model_dump_json() for r in result], indent=2)
-            typer.echo(json_result)
+            typer.echo(output)
     except Exception as e:
         typer.echo(f"Error during query: {e}", err=True)
         raise typer.Exit(code=1)
 
 
+@app.command()
+def find_symbol(
+    name: str = typer.Argument(..., help="Name, qualified name or prefix of a definition"),
+    collection_name: str = typer.Option(
+        "default", help="ChromaDB collection name (default: 'default')"
+    ),
+    state_dir: Path = typer.Option(
+        None,
+        help="Local state directory of the collection "
+        "(default: $XDG_CACHE_HOME/chunker/<collection>)",
+    ),
+    limit: int = typer.Option(20, help="Maximum number of definitions (default: 20)"),
+    kind: str = typer.Option(
+        None, help="Only return definitions of this kind: class, function or method"
+    ),
+    fuzzy: bool = typer.Option(True, help="Fill up the results with fuzzy matches"),
+):
+    """
+    Find where a class, function or method is defined, from the symbol index.
+
+    Args:
+        name (str): Name, qualified name or prefix of a definition.
+        collection_name (str): ChromaDB collection name.
+        state_dir (Path): Local state directory of the collection.
+        limit (int): Maximum number of definitions.
+        kind (str): Only return definitions of this kind.
+        fuzzy (bool): Fill up the results with fuzzy matches.
+    """
+    from chunker_src.symbols import find_symbol_core
+
+    result = find_symbol_core(
+        collection_name=collection_name,
+        query=name,
+        state_dir=state_dir,
+        limit=limit,
+        kind=kind,
+        fuzzy=fuzzy,
+    )
+    if not isinstance(result, list):
+        typer.echo(f"Error: {result.message}", err=True)
+        raise typer.Exit(code=1)
+    if not result:
+        typer.echo("No definitions found.")
+        return
+    typer.echo(
+        json.dumps([symbol.model_dump(exclude_none=True) for symbol in result], indent=2)
+    )
+
+
+@app.command("export")
+def export_collection(
+    output: Path = typer.Argument(..., help="Archive file to write"),
+    chroma_host: str = typer.Option(
+        "localhost", help="ChromaDB host (default: 'localhost')"
+    ),
+    chroma_port: int = typer.Option(8000, help="ChromaDB port (default: 8000)"),
+    collection_name: str = typer.Option(
+        "default", help="ChromaDB collection name (default: 'default')"
+    ),
+    chroma_endpoint: list[str] = typer.Option(
+        None,
+        help="'host:port' of a Chroma shard; repeat for a sharded collection "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    local_store: Path = typer.Option(
+        None,
+        help="Export from the local store in this directory instead of Chroma "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    block_size: int = typer.Option(
+        1000, help="Records per compressed block of the archive (default: 1000)"
+    ),
+):
+    """
+    Export a collection's ids, embeddings, documents and metadata to an archive.
+
+    Args:
+        output (Path): Archive file to write.
+        chroma_host (str): ChromaDB host.
+        chroma_port (int): ChromaDB port.
+        collection_name (str): ChromaDB collection name.
+        chroma_endpoint (list[str]): 'host:port' endpoints of a sharded collection.
+        local_store (Path): Directory of a local store to use instead of Chroma.
+        block_size (int): Records per compressed block.
+    """
+    from chunker_src.archive import export_collection_core
+
+    result = asyncio.run(
+        export_collection_core(
+            chroma_host=chroma_host,
+            chroma_port=chroma_port,
+            collection_name=collection_name,
+            output=output,
+            logger=logger,
+            chroma_endpoints=chroma_endpoint or [],
+            local_store=local_store,
+            block_size=block_size,
+        )
+    )
+    if not isinstance(result, int):
+        typer.echo(f"Error: {result.message}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Exported {result} records from '{collection_name}' to {output}.")
+
+
+@app.command("import")
+def import_collection(
+    archive: Path = typer.Argument(..., help="Archive file written by 'export'"),
+    chroma_host: str = typer.Option(
+        "localhost", help="ChromaDB host (default: 'localhost')"
+    ),
+    chroma_port: int = typer.Option(8000, help="ChromaDB port (default: 8000)"),
+    collection_name: str = typer.Option(
+        "default", help="ChromaDB collection name (default: 'default')"
+    ),
+    chroma_endpoint: list[str] = typer.Option(
+        None,
+        help="'host:port' of a Chroma shard; repeat for a sharded collection "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    local_store: Path = typer.Option(
+        None,
+        help="Import into the local store in this directory instead of Chroma "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    batch_size: int = typer.Option(
+        None, help="Records per collection.add() (default: the server's max batch size)"
+    ),
+    concurrency: int = typer.Option(
+        4, help="Concurrent collection.add() calls (default: 4)"
+    ),
+):
+    """
+    Import an archive into a collection without re-embedding.
+
+    Args:
+        archive (Path): Archive file written by 'export'.
+        chroma_host (str): ChromaDB host.
+        chroma_port (int): ChromaDB port.
+        collection_name (str): ChromaDB collection name.
+        chroma_endpoint (list[str]): 'host:port' endpoints of a sharded collection.
+        local_store (Path): Directory of a local store to use instead of Chroma.
+        batch_size (int): Records per collection.add().
+        concurrency (int): Concurrent collection.add() calls.
+    """
+    from chunker_src.archive import import_collection_core
+
+    result = asyncio.run(
+        import_collection_core(
+            chroma_host=chroma_host,
+            chroma_port=chroma_port,
+            collection_name=collection_name,
+            archive=archive,
+            logger=logger,
+            chroma_endpoints=chroma_endpoint or [],
+            local_store=local_store,
+            batch_size=batch_size,
+            concurrency=concurrency,
+        )
+    )
+    if not isinstance(result, int):
+        typer.echo(f"Error: {result.message}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Imported {result} records from {archive} into '{collection_name}'.")
+
+
 @app.command()
 def delete_collection(
     chroma_host: str = typer.Option(
@@ -140,6 +629,25 @@ def delete_collection(
     collection_name: str = typer.Option(
         "default", help="ChromaDB collection name (default: 'default')"
     ),
+    chroma_endpoint: list[str] = typer.Option(
+        None,
+        help="'host:port' of a Chroma shard; repeat for a sharded collection "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    local_store: Path = typer.Option(
+        None,
+        help="Delete from the local store in this directory instead of Chroma "
+        "(overrides --chroma-host/--chroma-port)",
+    ),
+    snapshot_dir: Path = typer.Option(
+        None, help="Also drop the collection's query snapshot in this directory"
+    ),
+    state_dir: Path = typer.Option(
+        None,
+        help="Local state directory of the collection, whose dedup and symbol "
+        "indexes and run journals are deleted too "
+        "(default: $XDG_CACHE_HOME/chunker/<collection>)",
+    ),
 ):
     """
     Delete all records in a specific ChromaDB collection.
@@ -148,13 +656,23 @@ def delete_collection(
         chroma_host (str): ChromaDB host.
         chroma_port (int): ChromaDB port.
         collection_name (str): ChromaDB collection name.
+        chroma_endpoint (list[str]): 'host:port' endpoints of a sharded collection.
+        local_store (Path): Directory of a local store to use instead of Chroma.
+        snapshot_dir (Path): Directory of local query snapshots.
+        state_dir (Path): Local state directory of the collection.
     """
+    from chunker_src.crud import delete_all_records_in_collection
+
     try:
         asyncio.run(
             delete_all_records_in_collection(
                 chroma_host=chroma_host,
                 chroma_port=chroma_port,
                 collection_name=collection_name,
+                chroma_endpoints=chroma_endpoint or [],
+                state_dir=state_dir,
+                local_store=local_store,
+                snapshot_dir=snapshot_dir,
             )
         )
         typer.echo(f"All records deleted from collection '{collection_name}'.")
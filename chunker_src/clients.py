@@ -0,0 +1,103 @@
+import asyncio
+from pathlib import Path
+import chromadb
+from chunker_src import model as chunker_model
+from chunker_src.local_store import LocalClient
+from chunker_src.sharding import ShardedClient, parse_endpoint
+from chunker_src.storage import StorageClient
+
+
+async def connect_client(
+    chroma_host: str,
+    chroma_port: int,
+    chroma_endpoints: list[str] | None = None,
+    shard_timeout: float = 10.0,
+    local_store: Path | None = None,
+) -> StorageClient:
+    """
+    Connect to a single Chroma server, a sharded set of Chroma servers, or a
+    local store.
+
+    Args:
+        chroma_host (str): Hostname of the ChromaDB server.
+        chroma_port (int): Port of the ChromaDB server.
+        chroma_endpoints (list[str] | None): 'host:port' endpoints of the shards.
+            When it holds more than one endpoint, `chroma_host` and `chroma_port`
+            are ignored.
+        shard_timeout (float): Per-shard query timeout in seconds.
+        local_store (Path | None): Directory of a local store; when set, Chroma
+            is not used.
+
+    Returns:
+        StorageClient: A Chroma async client, a ShardedClient or a LocalClient.
+    """
+    if local_store is not None:
+        return LocalClient(local_store)
+    if not chroma_endpoints:
+        return await chromadb.AsyncHttpClient(host=chroma_host, port=chroma_port)
+
+    endpoints = [parse_endpoint(endpoint) for endpoint in chroma_endpoints]
+    if len(endpoints) == 1:
+        host, port = endpoints[0]
+        return await chromadb.AsyncHttpClient(host=host, port=port)
+
+    clients = await asyncio.gather(
+        *[chromadb.AsyncHttpClient(host=host, port=port) for host, port in endpoints]
+    )
+    return ShardedClient(
+        clients=list(clients),
+        endpoints=[f"{host}:{port}" for host, port in endpoints],
+        timeout=shard_timeout,
+    )
+
+
+async def get_client(
+    chroma_host: str,
+    chroma_port: int,
+    chroma_endpoints: list[str] | None = None,
+    shard_timeout: float = 10.0,
+    client_pool: chunker_model.ClientPool | None = None,
+    local_store: Path | None = None,
+) -> StorageClient:
+    """
+    Return a client from the pool, connecting on first use.
+
+    Args:
+        chroma_host (str): Hostname of the ChromaDB server.
+        chroma_port (int): Port of the ChromaDB server.
+        chroma_endpoints (list[str] | None): 'host:port' endpoints of the shards.
+        shard_timeout (float): Per-shard query timeout in seconds.
+        client_pool (chunker_model.ClientPool | None): The pool; when None a new
+            client is connected.
+        local_store (Path | None): Directory of a local store; when set, Chroma
+            is not used.
+
+    Returns:
+        StorageClient: A Chroma async client, a ShardedClient or a LocalClient.
+    """
+    if client_pool is None:
+        return await connect_client(
+            chroma_host=chroma_host,
+            chroma_port=chroma_port,
+            chroma_endpoints=chroma_endpoints,
+            shard_timeout=shard_timeout,
+            local_store=local_store,
+        )
+
+    key = (
+        chroma_host,
+        chroma_port,
+        tuple(chroma_endpoints or ()),
+        shard_timeout,
+        local_store,
+    )
+    async with client_pool.lock:
+        if key not in client_pool.clients:
+            client_pool.clients[key] = await connect_client(
+                chroma_host=chroma_host,
+                chroma_port=chroma_port,
+                chroma_endpoints=chroma_endpoints,
+                shard_timeout=shard_timeout,
+                local_store=local_store,
+            )
+        return client_pool.clients[key]
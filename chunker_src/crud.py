@@ -1,10 +1,17 @@
-import chromadb
+from pathlib import Path
+from chunker_src.clients import connect_client
+from chunker_src.journal import default_state_dir, delete_run_journals
+from chunker_src.snapshot import drop_snapshot
 
 
 async def delete_all_records_in_collection(
     chroma_host: str,
     chroma_port: int,
     collection_name: str,
+    chroma_endpoints: list[str] | None = None,
+    state_dir: Path | None = None,
+    local_store: Path | None = None,
+    snapshot_dir: Path | None = None,
 ) -> None:
     """
     Delete all records in the specified ChromaDB collection using the async client.
@@ -13,14 +20,36 @@ async def delete_all_records_in_collection(
         chroma_host (str): ChromaDB host.
         chroma_port (int): ChromaDB port.
         collection_name (str): Name of the collection to delete all records from.
+        chroma_endpoints (list[str] | None): 'host:port' endpoints of a sharded
+            collection; records are deleted from every shard.
+        state_dir (Path | None): Local state directory of the collection, whose
+            dedup and symbol indexes, run journals and update marker are
+            removed with the records. Defaults to
+            `$XDG_CACHE_HOME/chunker/<collection_name>`.
+        local_store (Path | None): Directory of a local store holding the
+            collection, used instead of Chroma.
+        snapshot_dir (Path | None): Directory of query snapshots; the
+            collection's snapshot is dropped with the records.
 
     Raises:
         Exception: If connection, collection retrieval, or deletion fails.
     """
-    client = await chromadb.AsyncHttpClient(host=chroma_host, port=chroma_port)
+    client = await connect_client(
+        chroma_host=chroma_host,
+        chroma_port=chroma_port,
+        chroma_endpoints=chroma_endpoints,
+        local_store=local_store,
+    )
     collection = await client.get_collection(collection_name)
     # Fetch all ids in the collection
     results = await collection.get()
     ids = results.get("ids", [])
     if ids:
         await collection.delete(ids=ids)
+    state_dir = state_dir or default_state_dir(collection_name)
+    (state_dir / "dedup.sqlite").unlink(missing_ok=True)
+    (state_dir / "symbols.sqlite").unlink(missing_ok=True)
+    (state_dir / "updated").unlink(missing_ok=True)
+    delete_run_journals(state_dir)
+    if snapshot_dir is not None:
+        await drop_snapshot(snapshot_dir, collection_name)
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import re
+import sqlite3
+from pathlib import Path
+import numpy as np
+from chunker_src import model as chunker_model
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(seed=1)
+_PERM_A = _rng.integers(1, 1 << 29, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS canonical (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    exact TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS canonical_path ON canonical (path);
+CREATE INDEX IF NOT EXISTS canonical_exact ON canonical (exact);
+CREATE TABLE IF NOT EXISTS band (bucket TEXT NOT NULL, id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS band_bucket ON band (bucket);
+CREATE INDEX IF NOT EXISTS band_id ON band (id);
+CREATE TABLE IF NOT EXISTS alias (
+    canonical_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alias_canonical ON alias (canonical_id);
+CREATE INDEX IF NOT EXISTS alias_path ON alias (path);
+"""
+
+
+def chunk_fingerprint(text: str) -> tuple[str, np.ndarray]:
+    """
+    Compute the exact hash and MinHash signature of a chunk.
+
+    The exact hash ignores differences in whitespace. The signature is built
+    over shingles of `SHINGLE_SIZE` tokens.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        tuple[str, np.ndarray]: The exact hash, and the signature as `NUM_PERM`
+        uint64 values.
+    """
+    tokens = _TOKEN_PATTERN.findall(text)
+    exact = hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+
+    size = min(SHINGLE_SIZE, max(1, len(tokens)))
+    shingles = {
+        " ".join(tokens[idx : idx + size])
+        for idx in range(max(1, len(tokens) - size + 1))
+    }
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big"
+            )
+            for shingle in shingles
+        ],
+        dtype=np.uint64,
+    )
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % np.uint64(_MERSENNE_PRIME)
+    return exact, permuted.min(axis=0)
+
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two chunks from their signatures.
+
+    Args:
+        signature_a (np.ndarray): MinHash signature of the first chunk.
+        signature_b (np.ndarray): MinHash signature of the second chunk.
+
+    Returns:
+        float: The estimated similarity, between 0 and 1.
+    """
+    return float(np.mean(signature_a == signature_b))
+
+
+def _band_buckets(signature: np.ndarray) -> list[str]:
+    """
+    Split a signature into LSH band buckets.
+
+    Args:
+        signature (np.ndarray): The MinHash signature.
+
+    Returns:
+        list[str]: One bucket key per band.
+    """
+    rows = NUM_PERM // BANDS
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * rows : (band + 1) * rows].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def open_dedup_index(
+    state_dir: Path, threshold: float, min_chars: int
+) -> chunker_model.DedupIndex:
+    """
+    Open the near-duplicate index of a collection.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+        threshold (float): Estimated Jaccard similarity at or above which a chunk
+            is a near-duplicate.
+        min_chars (int): Chunks shorter than this are never deduplicated.
+
+    Returns:
+        chunker_model.DedupIndex: The open index.
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = state_dir / "dedup.sqlite"
+    connection = sqlite3.connect(path)
+    connection.executescript(_SCHEMA)
+    return chunker_model.DedupIndex(
+        path=path, connection=connection, threshold=threshold, min_chars=min_chars
+    )
+
+
+def find_canonical(
+    index: chunker_model.DedupIndex, exact: str, signature: np.ndarray
+) -> str | None:
+    """
+    Find the canonical chunk a chunk duplicates, if any.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        exact (str): Exact hash of the chunk.
+        signature (np.ndarray): MinHash signature of the chunk.
+
+    Returns:
+        str | None: Id of the canonical chunk, or None if the chunk is unique.
+    """
+    row = index.connection.execute(
+        "SELECT id FROM canonical WHERE exact = ? LIMIT 1", (exact,)
+    ).fetchone()
+    if row is not None:
+        return row[0]
+    if index.threshold >= 1.0:
+        return None
+
+    buckets = _band_buckets(signature)
+    candidates = index.connection.execute(
+        "SELECT id, signature FROM canonical WHERE id IN "
+        f"(SELECT id FROM band WHERE bucket IN ({','.join('?' * len(buckets))}))",
+        buckets,
+    ).fetchall()
+    best_id, best_similarity = None, index.threshold
+    for candidate_id, blob in candidates:
+        similarity = estimate_similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+        if similarity >= best_similarity:
+            best_id, best_similarity = candidate_id, similarity
+    return best_id
+
+
+def register_canonical(
+    index: chunker_model.DedupIndex,
+    chunk_id: str,
+    path: str,
+    start: int,
+    end: int,
+    exact: str,
+    signature: np.ndarray,
+) -> None:
+    """
+    Record a chunk stored in the collection as canonical.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        chunk_id (str): Id of the chunk in the collection.
+        path (str): Path of the chunk.
+        start (int): First line of the chunk.
+        end (int): Last line of the chunk.
+        exact (str): Exact hash of the chunk.
+        signature (np.ndarray): MinHash signature of the chunk.
+    """
+    index.connection.execute(
+        "INSERT OR REPLACE INTO canonical VALUES (?, ?, ?, ?, ?, ?)",
+        (chunk_id, path, start, end, exact, signature.astype(np.uint64).tobytes()),
+    )
+    index.connection.executemany(
+        "INSERT INTO band VALUES (?, ?)",
+        [(bucket, chunk_id) for bucket in _band_buckets(signature)],
+    )
+
+
+def register_alias(
+    index: chunker_model.DedupIndex, canonical_id: str, path: str, start: int, end: int
+) -> None:
+    """
+    Record a duplicate chunk as an alias of a canonical chunk.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        canonical_id (str): Id of the canonical chunk.
+        path (str): Path of the duplicate.
+        start (int): First line of the duplicate.
+        end (int): Last line of the duplicate.
+    """
+    index.connection.execute(
+        "INSERT INTO alias VALUES (?, ?, ?, ?)", (canonical_id, path, start, end)
+    )
+
+
+def aliases_of(index: chunker_model.DedupIndex, canonical_id: str) -> list[str]:
+    """
+    List the aliases of a canonical chunk.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        canonical_id (str): Id of the canonical chunk.
+
+    Returns:
+        list[str]: The aliases as 'path:start-end', in insertion order.
+    """
+    rows = index.connection.execute(
+        "SELECT path, start_line, end_line FROM alias WHERE canonical_id = ? ORDER BY rowid",
+        (canonical_id,),
+    ).fetchall()
+    return [f"{path}:{start}-{end}" for path, start, end in rows]
+
+
+def canonical_metadata(index: chunker_model.DedupIndex, canonical_id: str) -> dict | None:
+    """
+    Build the collection metadata of a canonical chunk, including its aliases.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        canonical_id (str): Id of the canonical chunk.
+
+    Returns:
+        dict | None: The metadata, or None if the chunk is not canonical.
+    """
+    row = index.connection.execute(
+        "SELECT path, start_line, end_line FROM canonical WHERE id = ?",
+        (canonical_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "path": row[0],
+        "start": row[1],
+        "end": row[2],
+        "aliases": json.dumps(aliases_of(index, canonical_id)),
+    }
+
+
+def remove_path(
+    index: chunker_model.DedupIndex, path: str
+) -> tuple[set[str], list[chunker_model.DedupOrphan]]:
+    """
+    Remove the canonical chunks and aliases of a file before it is re-indexed.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        path (str): Path of the file.
+
+    Returns:
+        tuple[set[str], list[chunker_model.DedupOrphan]]: Canonical chunks of
+        other files that lost aliases, and the file's canonical chunks that
+        still have aliases in other files.
+    """
+    connection = index.connection
+    touched = {
+        row[0]
+        for row in connection.execute(
+            "SELECT DISTINCT canonical_id FROM alias WHERE path = ?", (path,)
+        )
+    }
+    connection.execute("DELETE FROM alias WHERE path = ?", (path,))
+
+    orphans = []
+    for chunk_id, exact, blob in connection.execute(
+        "SELECT id, exact, signature FROM canonical WHERE path = ?", (path,)
+    ).fetchall():
+        aliases = connection.execute(
+            "SELECT path, start_line, end_line FROM alias WHERE canonical_id = ? ORDER BY rowid",
+            (chunk_id,),
+        ).fetchall()
+        if aliases:
+            orphans.append(
+                chunker_model.DedupOrphan(
+                    chunk_id=chunk_id,
+                    exact=exact,
+                    signature=np.frombuffer(blob, dtype=np.uint64),
+                    aliases=[(a_path, start, end) for a_path, start, end in aliases],
+                )
+            )
+        connection.execute("DELETE FROM alias WHERE canonical_id = ?", (chunk_id,))
+        connection.execute("DELETE FROM band WHERE id = ?", (chunk_id,))
+    connection.execute("DELETE FROM canonical WHERE path = ?", (path,))
+    return touched - {orphan.chunk_id for orphan in orphans}, orphans
+
+
+def commit_dedup_index(index: chunker_model.DedupIndex) -> None:
+    """
+    Commit the changes made for a file.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+    """
+    index.connection.commit()
+
+
+def close_dedup_index(index: chunker_model.DedupIndex, commit: bool) -> None:
+    """
+    Close the dedup index, discarding uncommitted changes unless `commit` is set.
+
+    Args:
+        index (chunker_model.DedupIndex): The dedup index.
+        commit (bool): Commit pending changes before closing.
+    """
+    if commit:
+        index.connection.commit()
+    index.connection.close()
@@ -0,0 +1,155 @@
+from pathlib import Path
+import numpy as np
+from chunker_src import model as chunker_model
+
+QUANTIZATIONS = ("none", "float16", "int8")
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def fit_embedding_transform(
+    sample: np.ndarray, dim: int | None, quantization: str
+) -> chunker_model.EmbeddingTransform:
+    """
+    Fit PCA and quantization parameters on a sample of embeddings.
+
+    Args:
+        sample (np.ndarray): Sample embeddings, one row per chunk.
+        dim (int | None): Number of dimensions to keep; None keeps all of them.
+        quantization (str): 'none', 'float16' or 'int8'.
+
+    Returns:
+        chunker_model.EmbeddingTransform: The fitted transform.
+
+    Raises:
+        ValueError: If the quantization is unknown or `dim` is out of range.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(
+            f"Unknown quantization {quantization!r}; choose from {', '.join(QUANTIZATIONS)}."
+        )
+    sample = np.asarray(sample, dtype=np.float32)
+    full_dim = sample.shape[1]
+    dim = full_dim if dim is None else dim
+    if not 0 < dim <= full_dim:
+        raise ValueError(f"dim must be between 1 and {full_dim}, got {dim}.")
+
+    mean = sample.mean(axis=0)
+    if dim == full_dim:
+        mean = np.zeros(full_dim, dtype=np.float32)
+        components = np.eye(full_dim, dtype=np.float32)
+    else:
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        components = vt[:dim].astype(np.float32)
+
+    transform = chunker_model.EmbeddingTransform(
+        mean=mean.astype(np.float32), components=components, quantization=quantization
+    )
+    if quantization == "int8":
+        projected = project_embeddings(transform, sample)
+        transform.scale = np.maximum(np.abs(projected).max(axis=0), 1e-6) / 127.0
+    return transform
+
+
+def project_embeddings(
+    transform: chunker_model.EmbeddingTransform, vectors: np.ndarray
+) -> np.ndarray:
+    """
+    Reduce embeddings to the transform's dimensions, L2-normalised.
+
+    Queries are only projected, not quantized, which keeps recall higher.
+
+    Args:
+        transform (chunker_model.EmbeddingTransform): The transform.
+        vectors (np.ndarray): Embeddings, one row per text.
+
+    Returns:
+        np.ndarray: The projected float32 embeddings.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return _normalise((vectors - transform.mean) @ transform.components.T)
+
+
+def encode_embeddings(
+    transform: chunker_model.EmbeddingTransform, vectors: np.ndarray
+) -> np.ndarray:
+    """
+    Project and quantize embeddings into the codes a compact store keeps.
+
+    Args:
+        transform (chunker_model.EmbeddingTransform): The transform.
+        vectors (np.ndarray): Embeddings, one row per text.
+
+    Returns:
+        np.ndarray: int8, float16 or float32 codes.
+    """
+    projected = project_embeddings(transform, vectors)
+    match transform.quantization:
+        case "int8":
+            return np.clip(np.round(projected / transform.scale), -127, 127).astype(np.int8)
+        case "float16":
+            return projected.astype(np.float16)
+        case _:
+            return projected
+
+
+def decode_embeddings(
+    transform: chunker_model.EmbeddingTransform, codes: np.ndarray
+) -> np.ndarray:
+    """
+    Turn codes back into float32 embeddings.
+
+    Args:
+        transform (chunker_model.EmbeddingTransform): The transform.
+        codes (np.ndarray): Codes from `encode_embeddings`.
+
+    Returns:
+        np.ndarray: The float32 embeddings.
+    """
+    if transform.quantization == "int8":
+        return codes.astype(np.float32) * transform.scale
+    return codes.astype(np.float32)
+
+
+def save_embedding_transform(
+    transform: chunker_model.EmbeddingTransform, path: Path
+) -> None:
+    """
+    Save a transform as a NumPy archive.
+
+    Args:
+        transform (chunker_model.EmbeddingTransform): The transform.
+        path (Path): Where to write it.
+    """
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            mean=transform.mean,
+            components=transform.components,
+            quantization=np.array(transform.quantization),
+            scale=transform.scale if transform.scale is not None else np.zeros(0),
+        )
+
+
+def load_embedding_transform(path: Path) -> chunker_model.EmbeddingTransform:
+    """
+    Load a transform saved by `save_embedding_transform`.
+
+    Args:
+        path (Path): The transform file.
+
+    Returns:
+        chunker_model.EmbeddingTransform: The transform.
+    """
+    with np.load(path) as archive:
+        scale = archive["scale"]
+        return chunker_model.EmbeddingTransform(
+            mean=archive["mean"],
+            components=archive["components"],
+            quantization=str(archive["quantization"]),
+            scale=scale if scale.size else None,
+        )
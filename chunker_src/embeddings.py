@@ -0,0 +1,81 @@
+import threading
+from pathlib import Path
+from typing import Any
+import numpy as np
+from chromadb.api.types import DefaultEmbeddingFunction, Documents, Embeddings
+
+
+class SharedEmbeddingFunction(DefaultEmbeddingFunction):
+    """
+    Chroma's default embedding function, backed by a single model instance.
+
+    `DefaultEmbeddingFunction` builds a new ONNX model for every call. This
+    subclass loads it once and shares it between all collections of the process.
+    It keeps the name 'default', so it is compatible with existing collections.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._engine: Any = None
+        self._lock = threading.Lock()
+
+    def engine(self) -> Any:
+        """
+        Return the shared model, loading it on first use.
+
+        Returns:
+            Any: The ONNXMiniLM_L6_V2 instance.
+        """
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import (
+                        ONNXMiniLM_L6_V2,
+                    )
+
+                    self._engine = ONNXMiniLM_L6_V2()
+        return self._engine
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.engine()(input)
+
+
+_shared_embedding_function: SharedEmbeddingFunction | None = None
+
+
+def shared_embedding_function() -> SharedEmbeddingFunction:
+    """
+    Return the process-wide embedding function.
+
+    Returns:
+        SharedEmbeddingFunction: The embedding function, created on first use.
+    """
+    global _shared_embedding_function
+    if _shared_embedding_function is None:
+        _shared_embedding_function = SharedEmbeddingFunction()
+    return _shared_embedding_function
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts client-side with the process-wide embedding function.
+
+    Args:
+        texts (list[str]): The texts to embed.
+
+    Returns:
+        np.ndarray: A float32 matrix with one row per text.
+    """
+    return np.asarray(shared_embedding_function()(texts), dtype=np.float32)
+
+
+def embedding_tokenizer_file() -> Path:
+    """
+    Return the tokenizer file of the embedding model, downloading the model if needed.
+
+    Returns:
+        Path: Path of the model's `tokenizer.json`.
+    """
+    engine = shared_embedding_function().engine()
+    engine._download_model_if_not_exists()
+    return Path(engine.DOWNLOAD_PATH) / engine.EXTRACTED_FOLDER_NAME / "tokenizer.json"
@@ -0,0 +1,128 @@
+import mmap
+import os
+from contextlib import ExitStack
+from pathlib import Path
+from chunker_src import model as chunker_model
+from chunker_src.symbols import (
+    close_symbol_index,
+    enclosing_symbol,
+    load_source_lines,
+    open_symbol_index,
+)
+
+
+def _open_source(
+    index: chunker_model.SymbolIndex, path: str, stack: ExitStack
+) -> tuple[chunker_model.SourceLines, mmap.mmap] | None:
+    """
+    Memory-map a source file whose line offsets are recorded in the index.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+        path (str): Path of the file, relative to the project.
+        stack (ExitStack): Closes the file and its map.
+
+    Returns:
+        tuple[chunker_model.SourceLines, mmap.mmap] | None: The offsets and the
+        map, or None if no offsets are recorded, the file is empty, or it has
+        changed since it was chunked.
+    """
+    lines = load_source_lines(index, path)
+    if lines is None or lines.size == 0:
+        return None
+    try:
+        f = stack.enter_context(open(lines.full_path, "rb"))
+        stat = os.fstat(f.fileno())
+        if stat.st_size != lines.size or stat.st_mtime_ns != lines.mtime_ns:
+            return None
+        return lines, stack.enter_context(
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _expand_result(
+    index: chunker_model.SymbolIndex,
+    result: chunker_model.QueryResult,
+    lines: chunker_model.SourceLines,
+    buffer: mmap.mmap,
+    context_lines: int,
+    to_definition: bool,
+) -> chunker_model.QueryResult:
+    start, end = result.start, result.end
+    if to_definition:
+        symbol = enclosing_symbol(index, result.path, start, end)
+        if symbol is not None:
+            start, end = symbol.start, symbol.end
+    last_line = len(lines.offsets) - 2
+    start = max(0, min(start - context_lines, last_line))
+    end = max(start, min(end + context_lines, last_line))
+    text = buffer[lines.offsets[start] : lines.offsets[end + 1]]
+    return result.model_copy(
+        update={
+            "chunk": text.decode("utf-8", errors="replace").removesuffix("\n"),
+            "start": start,
+            "end": end,
+        }
+    )
+
+
+def expand_query_results(
+    results: list[list[chunker_model.QueryResult]],
+    collection_name: str,
+    state_dir: Path,
+    context_lines: int = 0,
+    to_definition: bool = False,
+) -> list[list[chunker_model.QueryResult]] | chunker_model.SymbolIndexError:
+    """
+    Replace each hit by the code around it, read from the source files.
+
+    A hit is widened to its innermost enclosing definition when `to_definition`
+    is set, then by `context_lines` lines on each side. Lines are located with
+    the offsets recorded in the symbol index at ingestion and read from a
+    memory map of the file, so no file is scanned. Hits in files that changed
+    since they were chunked, or whose offsets are not recorded, are kept as
+    they are. Blocks the calling thread.
+
+    Args:
+        results (list[list[chunker_model.QueryResult]]): The hits of each query.
+        collection_name (str): The collection the hits come from.
+        state_dir (Path): Local state directory of the collection.
+        context_lines (int): Lines to add before and after each hit.
+        to_definition (bool): Widen each hit to its enclosing definition.
+
+    Returns:
+        list[list[chunker_model.QueryResult]] | chunker_model.SymbolIndexError:
+        The expanded hits, or an error if the collection has no symbol index.
+    """
+    if not (state_dir / "symbols.sqlite").exists():
+        return chunker_model.SymbolIndexError(
+            message=(
+                f"No symbol index for collection {collection_name!r}; "
+                "run chunk_and_vectorise with symbols enabled first."
+            )
+        )
+    index = open_symbol_index(state_dir)
+    sources: dict[str, tuple[chunker_model.SourceLines, mmap.mmap] | None] = {}
+    try:
+        with ExitStack() as stack:
+            expanded = []
+            for query_results in results:
+                row = []
+                for result in query_results:
+                    if result.path not in sources:
+                        sources[result.path] = _open_source(index, result.path, stack)
+                    source = sources[result.path]
+                    if source is None:
+                        row.append(result)
+                        continue
+                    row.append(
+                        _expand_result(
+                            index, result, *source, context_lines, to_definition
+                        )
+                    )
+                expanded.append(row)
+            return expanded
+    finally:
+        close_symbol_index(index)
@@ -0,0 +1,261 @@
+import mmap
+import os
+from pathlib import Path
+from typing import Union
+from chunker_src import model as chunker_model
+
+
+def _compute_line_offsets(buffer: Union[bytes, mmap.mmap], size: int) -> list[int]:
+    """
+    Compute the byte offset at which each line of a buffer starts.
+
+    Args:
+        buffer (Union[bytes, mmap.mmap]): The file contents or a memory map of them.
+        size (int): Size of the buffer in bytes.
+
+    Returns:
+        list[int]: Start offset of every line; empty for an empty buffer.
+    """
+    if size == 0:
+        return []
+
+    offsets = [0]
+    position = buffer.find(b"\n")
+    while position != -1 and position + 1 < size:
+        offsets.append(position + 1)
+        position = buffer.find(b"\n", position + 1)
+    return offsets
+
+
+def _load_file_index(
+    file_path: Path, cache: chunker_model.FileCache
+) -> chunker_model.CachedFileIndex:
+    """
+    Return the line index of a file, from the cache when its mtime and size match.
+
+    Small files also keep their contents in the cache; larger files are indexed
+    through a memory map without reading them into memory.
+
+    Args:
+        file_path (Path): Absolute path of the file.
+        cache (chunker_model.FileCache): The LRU cache to consult and update.
+
+    Returns:
+        chunker_model.CachedFileIndex: The up to date index of the file.
+    """
+    key = str(file_path)
+    stat = file_path.stat()
+    cached = cache.entries.get(key)
+    if (
+        cached is not None
+        and cached.mtime_ns == stat.st_mtime_ns
+        and cached.size == stat.st_size
+    ):
+        cache.entries.move_to_end(key)
+        return cached
+
+    with open(file_path, "rb") as f:
+        if stat.st_size == 0:
+            index = chunker_model.CachedFileIndex(
+                mtime_ns=stat.st_mtime_ns, size=0, line_offsets=[], data=b""
+            )
+        elif stat.st_size <= cache.max_content_bytes:
+            data = f.read()
+            index = chunker_model.CachedFileIndex(
+                mtime_ns=stat.st_mtime_ns,
+                size=len(data),
+                line_offsets=_compute_line_offsets(buffer=data, size=len(data)),
+                data=data,
+            )
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = chunker_model.CachedFileIndex(
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    line_offsets=_compute_line_offsets(buffer=mm, size=stat.st_size),
+                )
+
+    cache.entries[key] = index
+    cache.entries.move_to_end(key)
+    while len(cache.entries) > cache.max_entries:
+        cache.entries.popitem(last=False)
+    return index
+
+
+def _read_bytes(
+    file_path: Path, index: chunker_model.CachedFileIndex, start: int, end: int
+) -> bytes:
+    """
+    Read a byte span of a file from the cached contents or by seeking.
+
+    Args:
+        file_path (Path): Absolute path of the file.
+        index (chunker_model.CachedFileIndex): The index of the file.
+        start (int): First byte to read (inclusive).
+        end (int): Byte offset to stop reading at (exclusive).
+
+    Returns:
+        bytes: The bytes in the span.
+    """
+    if index.data is not None:
+        return index.data[start:end]
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return f.read(max(end - start, 0))
+
+
+def read_line_range(
+    file_path: Path,
+    cache: chunker_model.FileCache,
+    start_line: int | None = None,
+    end_line: int | None = None,
+) -> Union[str, chunker_model.FileReadError]:
+    """
+    Read a range of lines from a file without loading the rest of it.
+
+    Line numbers are 0-based and inclusive, matching the `start`/`end` chunk
+    metadata returned by query_chunks. The end is clamped to the last line.
+
+    Args:
+        file_path (Path): Absolute path of the file.
+        cache (chunker_model.FileCache): The LRU cache of file indexes.
+        start_line (int | None): First line to read (default: 0).
+        end_line (int | None): Last line to read (default: last line).
+
+    Returns:
+        Union[str, chunker_model.FileReadError]: The text of the lines, or an error.
+    """
+    start = 0 if start_line is None else start_line
+    if start < 0 or (end_line is not None and end_line < start):
+        return chunker_model.FileReadError(
+            message=f"Invalid line range: {start_line}-{end_line}."
+        )
+
+    index = _load_file_index(file_path=file_path, cache=cache)
+    num_lines = len(index.line_offsets)
+    if start >= num_lines:
+        return chunker_model.FileReadError(
+            message=f"start_line {start} is beyond the end of the file ({num_lines} lines)."
+        )
+
+    end = num_lines - 1 if end_line is None else min(end_line, num_lines - 1)
+    start_byte = index.line_offsets[start]
+    end_byte = index.line_offsets[end + 1] if end + 1 < num_lines else index.size
+    data = _read_bytes(file_path=file_path, index=index, start=start_byte, end=end_byte)
+    return data.decode("utf-8", errors="replace")
+
+
+def read_byte_range(
+    file_path: Path,
+    cache: chunker_model.FileCache,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+) -> Union[str, chunker_model.FileReadError]:
+    """
+    Read a range of bytes from a file by seeking, decoding it as UTF-8.
+
+    Characters split by the range boundaries are replaced with U+FFFD.
+
+    Args:
+        file_path (Path): Absolute path of the file.
+        cache (chunker_model.FileCache): The LRU cache of file indexes.
+        start_byte (int | None): First byte to read (default: 0).
+        end_byte (int | None): Byte offset to stop at, exclusive (default: end of file).
+
+    Returns:
+        Union[str, chunker_model.FileReadError]: The decoded text, or an error.
+    """
+    start = 0 if start_byte is None else start_byte
+    if start < 0 or (end_byte is not None and end_byte < start):
+        return chunker_model.FileReadError(
+            message=f"Invalid byte range: {start_byte}-{end_byte}."
+        )
+
+    index = _load_file_index(file_path=file_path, cache=cache)
+    end = index.size if end_byte is None else min(end_byte, index.size)
+    data = _read_bytes(file_path=file_path, index=index, start=start, end=end)
+    return data.decode("utf-8", errors="replace")
+
+
+def read_file_range(
+    file_path: Path,
+    cache: chunker_model.FileCache,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+) -> Union[str, chunker_model.FileReadError]:
+    """
+    Read a whole file, a line range or a byte range of it.
+
+    A whole file is read as UTF-8 text with universal newlines, failing on
+    binary files; ranges are read by byte offset and never fail to decode.
+
+    Args:
+        file_path (Path): Absolute path of the file.
+        cache (chunker_model.FileCache): The LRU cache of file indexes.
+        start_line (int | None): First line to read (0-based, inclusive).
+        end_line (int | None): Last line to read (0-based, inclusive).
+        start_byte (int | None): First byte to read (inclusive).
+        end_byte (int | None): Byte offset to stop at (exclusive).
+
+    Returns:
+        Union[str, chunker_model.FileReadError]: The text read, or an error.
+    """
+    has_lines = start_line is not None or end_line is not None
+    has_bytes = start_byte is not None or end_byte is not None
+    if has_lines and has_bytes:
+        return chunker_model.FileReadError(
+            message="Specify either a line range or a byte range, not both."
+        )
+
+    try:
+        if not has_lines and not has_bytes:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return f.read()
+        if has_lines:
+            return read_line_range(
+                file_path=file_path,
+                cache=cache,
+                start_line=start_line,
+                end_line=end_line,
+            )
+        return read_byte_range(
+            file_path=file_path,
+            cache=cache,
+            start_byte=start_byte,
+            end_byte=end_byte,
+        )
+    except (OSError, UnicodeDecodeError) as e:
+        return chunker_model.FileReadError(message=f"Error reading file: {e}")
+
+
+def resolve_project_file(
+    project_dir: Path, relative_path: str
+) -> Union[Path, chunker_model.FileReadError]:
+    """
+    Resolve a path relative to the project directory, refusing paths outside it.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        relative_path (str): The path to resolve, relative to the project root.
+
+    Returns:
+        Union[Path, chunker_model.FileReadError]: The resolved file path, or an error.
+    """
+    try:
+        file_path_resolved = (project_dir / relative_path).resolve(strict=True)
+        base_resolved = project_dir.resolve(strict=True)
+    except FileNotFoundError:
+        return chunker_model.FileReadError(
+            message=f"File '{relative_path}' does not exist."
+        )
+
+    if not file_path_resolved.is_relative_to(base_resolved):
+        return chunker_model.FileReadError(
+            message="File is outside the project directory."
+        )
+    if not os.path.isfile(file_path_resolved):
+        return chunker_model.FileReadError(message=f"'{relative_path}' is not a file.")
+    return file_path_resolved
@@ -0,0 +1,207 @@
+import os
+import re
+from pathlib import Path
+import pathspec
+from chunker_src import model as chunker_model
+
+
+def _translate_segment(segment: str) -> str:
+    """
+    Translate one path segment of a glob into a regular expression.
+
+    Args:
+        segment (str): The segment, without '/'.
+
+    Returns:
+        str: A regular expression matching the segment and nothing across '/'.
+    """
+    out = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        i += 1
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            j = i
+            if j < len(segment) and segment[j] in "!^":
+                j += 1
+            if j < len(segment) and segment[j] == "]":
+                j += 1
+            end = segment.find("]", j)
+            if end < 0:
+                out.append(re.escape(char))
+                continue
+            body = segment[i:end].replace("\\", "\\\\")
+            if body[:1] == "!":
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        else:
+            out.append(re.escape(char))
+    return "".join(out)
+
+
+def _split_pattern(pattern: str) -> list[str]:
+    return [part for part in pattern.strip().split("/") if part not in ("", ".")]
+
+
+def _translate(parts: list[str]) -> str:
+    """
+    Translate the segments of a glob into a regular expression over whole paths.
+
+    '**' matches any number of directories; as the last segment it matches
+    every path below.
+
+    Args:
+        parts (list[str]): The segments of the glob.
+
+    Returns:
+        str: The regular expression.
+    """
+    out = []
+    for idx, part in enumerate(parts):
+        last = idx == len(parts) - 1
+        if part == "**":
+            out.append(".+" if last else "(?:[^/]+/)*")
+        else:
+            out.append(_translate_segment(part) + ("" if last else "/"))
+    return "".join(out)
+
+
+def _union(regexes: list[str]) -> re.Pattern | None:
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes), re.DOTALL)
+
+
+def compile_file_selector(
+    include: list[str], exclude: list[str] | None = None
+) -> chunker_model.FileSelector:
+    """
+    Compile include and exclude globs, relative to the project directory, into
+    one selector.
+
+    Globs match like `Path.glob`: '*' and '?' stay within a path segment and
+    '**' matches any number of directories. A file is selected when it matches
+    an include glob and no exclude glob.
+
+    Args:
+        include (list[str]): Globs of the files to select.
+        exclude (list[str] | None): Globs of the files to leave out; one ending
+            in '/**' also stops the walk from entering matching directories.
+
+    Returns:
+        chunker_model.FileSelector: The selector.
+    """
+    include_parts = [_split_pattern(pattern) for pattern in include]
+    exclude_parts = [_split_pattern(pattern) for pattern in exclude or []]
+    return chunker_model.FileSelector(
+        include=_union([_translate(parts) for parts in include_parts]),
+        exclude=_union([_translate(parts) for parts in exclude_parts if parts]),
+        excluded_dirs=_union(
+            [
+                _translate(parts[:-1])
+                for parts in exclude_parts
+                if len(parts) > 1 and parts[-1] == "**"
+            ]
+        ),
+        include_segments=[
+            [
+                None if part == "**" else re.compile(_translate_segment(part), re.DOTALL)
+                for part in parts
+            ]
+            for parts in include_parts
+        ],
+    )
+
+
+def _may_contain_matches(
+    segments: list[re.Pattern | None], dir_parts: list[str]
+) -> bool:
+    """
+    Check whether files below a directory can match an include glob.
+
+    Args:
+        segments (list[re.Pattern | None]): The glob's segments; None for '**'.
+        dir_parts (list[str]): Segments of the directory's relative path.
+
+    Returns:
+        bool: False if no file below the directory can match.
+    """
+    for idx, part in enumerate(dir_parts):
+        if idx >= len(segments):
+            return False
+        if segments[idx] is None:
+            return True
+        if not segments[idx].fullmatch(part):
+            return False
+    return len(dir_parts) < len(segments)
+
+
+def selects_file(selector: chunker_model.FileSelector, rel_path: str) -> bool:
+    """
+    Check whether the selector selects a file.
+
+    Args:
+        selector (chunker_model.FileSelector): The selector.
+        rel_path (str): The file's path relative to the project, with '/'.
+
+    Returns:
+        bool: True if an include glob matches and no exclude glob does.
+    """
+    if selector.include is None or not selector.include.fullmatch(rel_path):
+        return False
+    return selector.exclude is None or not selector.exclude.fullmatch(rel_path)
+
+
+def walk_selected_files(
+    project_dir: Path,
+    selector: chunker_model.FileSelector,
+    gitignore: pathspec.PathSpec | None = None,
+) -> list[Path]:
+    """
+    Walk the project once, returning the selected files in sorted order.
+
+    Directories that no include glob can reach, that an exclude glob covers
+    entirely, that the gitignore ignores, or that are named '.git' are not
+    entered. Symbolic links to directories are not followed.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        selector (chunker_model.FileSelector): The selector.
+        gitignore (pathspec.PathSpec | None): The project's gitignore patterns.
+
+    Returns:
+        list[Path]: The selected files, under `project_dir`.
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        rel_dir = Path(dirpath).relative_to(project_dir).as_posix()
+        prefix = "" if rel_dir == "." else f"{rel_dir}/"
+        kept = []
+        for name in sorted(dirnames):
+            rel = prefix + name
+            if name == ".git":
+                continue
+            if not any(
+                _may_contain_matches(segments, rel.split("/"))
+                for segments in selector.include_segments
+            ):
+                continue
+            if selector.excluded_dirs is not None and selector.excluded_dirs.fullmatch(rel):
+                continue
+            if gitignore is not None and gitignore.match_file(rel + "/"):
+                continue
+            kept.append(name)
+        dirnames[:] = kept
+        for name in sorted(filenames):
+            rel = prefix + name
+            if not selects_file(selector, rel):
+                continue
+            if gitignore is not None and gitignore.match_file(rel):
+                continue
+            files.append(Path(dirpath) / name)
+    return files
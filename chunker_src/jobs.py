@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable
+from chunker_src import model as chunker_model
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+
+def _prune_finished_jobs(registry: chunker_model.JobRegistry) -> None:
+    """
+    Drop the oldest finished jobs beyond the registry's limit.
+
+    Args:
+        registry (chunker_model.JobRegistry): The job registry.
+    """
+    finished = [
+        job_id
+        for job_id, job in registry.jobs.items()
+        if job.state in FINISHED_STATES
+    ]
+    for job_id in finished[: max(0, len(finished) - registry.max_finished)]:
+        del registry.jobs[job_id]
+
+
+async def _run_job(
+    job: chunker_model.IngestionJob,
+    run: Callable[[chunker_model.IngestionJob], Awaitable[str | None]],
+) -> None:
+    """
+    Run a job to completion, recording its outcome.
+
+    Args:
+        job (chunker_model.IngestionJob): The job.
+        run (Callable): Runs the ingestion and returns an error message, or None.
+    """
+    try:
+        error = await run(job)
+    except asyncio.CancelledError:
+        job.state = "cancelled"
+        job.finished_at = time.monotonic()
+        logger.info(f"Job {job.job_id} cancelled after {job.files_done} files.")
+        raise
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    job.finished_at = time.monotonic()
+    if error is None:
+        job.state = "completed"
+        logger.info(f"Job {job.job_id} completed: {job.files_done} files.")
+    else:
+        job.state = "failed"
+        job.error = error
+        logger.error(f"Job {job.job_id} failed: {error}")
+
+
+def start_job(
+    registry: chunker_model.JobRegistry,
+    project: str,
+    pattern: str,
+    language: str,
+    run: Callable[[chunker_model.IngestionJob], Awaitable[str | None]],
+) -> chunker_model.IngestionJob:
+    """
+    Start an ingestion job in the background of the running event loop.
+
+    `run` receives the job so it can update its state and progress; it returns
+    an error message on failure, or None.
+
+    Args:
+        registry (chunker_model.JobRegistry): The job registry.
+        project (str): The project being indexed.
+        pattern (str): Glob pattern of the files to index.
+        language (str): Programming language for chunking.
+        run (Callable): Runs the ingestion.
+
+    Returns:
+        chunker_model.IngestionJob: The started job.
+    """
+    _prune_finished_jobs(registry)
+    job = chunker_model.IngestionJob(
+        job_id=uuid.uuid4().hex[:12],
+        project=project,
+        pattern=pattern,
+        language=language,
+        started_at=time.monotonic(),
+    )
+    job.task = asyncio.get_running_loop().create_task(_run_job(job, run))
+    registry.jobs[job.job_id] = job
+    return job
+
+
+def get_job(
+    registry: chunker_model.JobRegistry, job_id: str
+) -> chunker_model.IngestionJob | chunker_model.JobNotFoundError:
+    """
+    Look up a job by id.
+
+    Args:
+        registry (chunker_model.JobRegistry): The job registry.
+        job_id (str): Identifier of the job.
+
+    Returns:
+        chunker_model.IngestionJob | chunker_model.JobNotFoundError: The job, or an
+        error if no such job is known.
+    """
+    job = registry.jobs.get(job_id)
+    if job is None:
+        return chunker_model.JobNotFoundError(message=f"Unknown job {job_id!r}.")
+    return job
+
+
+def cancel_job(
+    registry: chunker_model.JobRegistry, job_id: str
+) -> chunker_model.IngestionJob | chunker_model.JobNotFoundError:
+    """
+    Cancel a queued or running job.
+
+    The journal of a cancelled run is kept, so starting the same job again
+    resumes it.
+
+    Args:
+        registry (chunker_model.JobRegistry): The job registry.
+        job_id (str): Identifier of the job.
+
+    Returns:
+        chunker_model.IngestionJob | chunker_model.JobNotFoundError: The job, or an
+        error if no such job is known.
+    """
+    job = get_job(registry, job_id)
+    if isinstance(job, chunker_model.IngestionJob) and job.task is not None:
+        job.task.cancel()
+    return job
+
+
+def job_status(job: chunker_model.IngestionJob) -> chunker_model.IngestionJobStatus:
+    """
+    Describe a job for the MCP client.
+
+    Args:
+        job (chunker_model.IngestionJob): The job.
+
+    Returns:
+        chunker_model.IngestionJobStatus: The job's status.
+    """
+    end = job.finished_at if job.finished_at is not None else time.monotonic()
+    return chunker_model.IngestionJobStatus(
+        job_id=job.job_id,
+        project=job.project,
+        pattern=job.pattern,
+        language=job.language,
+        state=job.state,
+        files_done=job.files_done,
+        files_total=job.files_total,
+        error=job.error,
+        elapsed_seconds=round(end - job.started_at, 3),
+    )
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from chunker_src import model as chunker_model
+
+
+def default_state_dir(collection_name: str) -> Path:
+    """
+    Return the default directory for local state of a collection.
+
+    Args:
+        collection_name (str): Name of the ChromaDB collection.
+
+    Returns:
+        Path: `$XDG_CACHE_HOME/chunker/<collection_name>` (or `~/.cache/...`).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "chunker" / collection_name
+
+
+def run_fingerprint(project_dir: Path, pattern: str, language: str) -> str:
+    """
+    Identify a run by what it ingests, so a re-run finds the journal of an aborted run.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        pattern (str): Glob pattern of the run.
+        language (str): Programming language of the run.
+
+    Returns:
+        str: A short hex digest.
+    """
+    key = f"{project_dir.resolve()}\0{pattern}\0{language.lower()}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _replay_journal(journal_path: Path) -> tuple[dict[str, int], set[str]]:
+    """
+    Replay a journal file into completed and in-flight files.
+
+    A truncated last line, left by a crash mid-write, is ignored.
+
+    Args:
+        journal_path (Path): The journal file.
+
+    Returns:
+        tuple[dict[str, int], set[str]]: Completed files with their mtimes, and
+        files begun but not completed.
+    """
+    completed: dict[str, int] = {}
+    in_flight: set[str] = set()
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            path = record.get("path")
+            match record.get("event"):
+                case "begin":
+                    in_flight.add(path)
+                    completed.pop(path, None)
+                case "done":
+                    in_flight.discard(path)
+                    completed[path] = int(record.get("mtime_ns", 0))
+                case _:
+                    continue
+    return completed, in_flight
+
+
+def open_run_journal(
+    state_dir: Path, fingerprint: str, resume: bool
+) -> chunker_model.RunJournal:
+    """
+    Open the journal of a run, replaying it when resuming an aborted run.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+        fingerprint (str): Identifier of the run, see `run_fingerprint`.
+        resume (bool): Replay an existing journal; when False it is discarded.
+
+    Returns:
+        chunker_model.RunJournal: The open journal.
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    journal_path = state_dir / f"journal-{fingerprint}.jsonl"
+
+    completed: dict[str, int] = {}
+    in_flight: set[str] = set()
+    if journal_path.exists():
+        if resume:
+            completed, in_flight = _replay_journal(journal_path)
+        else:
+            journal_path.unlink()
+
+    return chunker_model.RunJournal(
+        path=journal_path,
+        handle=open(journal_path, "a", encoding="utf-8"),
+        completed=completed,
+        in_flight=in_flight,
+    )
+
+
+def is_file_completed(
+    journal: chunker_model.RunJournal, rel_path: str, mtime_ns: int
+) -> bool:
+    """
+    Check whether a file was already indexed, unchanged, by the run being resumed.
+
+    Args:
+        journal (chunker_model.RunJournal): The run journal.
+        rel_path (str): Path of the file relative to the project directory.
+        mtime_ns (int): Current modification time of the file.
+
+    Returns:
+        bool: True if the file can be skipped.
+    """
+    return journal.completed.get(rel_path) == mtime_ns
+
+
+def record_journal_event(
+    journal: chunker_model.RunJournal, event: str, rel_path: str, mtime_ns: int
+) -> None:
+    """
+    Append an event to the journal and flush it to the operating system.
+
+    Args:
+        journal (chunker_model.RunJournal): The run journal.
+        event (str): 'begin' before a file is written, 'done' once it is consistent.
+        rel_path (str): Path of the file relative to the project directory.
+        mtime_ns (int): Modification time of the file when it was read.
+    """
+    journal.handle.write(
+        json.dumps({"event": event, "path": rel_path, "mtime_ns": mtime_ns}) + "\n"
+    )
+    journal.handle.flush()
+    match event:
+        case "begin":
+            journal.in_flight.add(rel_path)
+        case "done":
+            journal.in_flight.discard(rel_path)
+            journal.completed[rel_path] = mtime_ns
+        case _:
+            return
+
+
+def close_run_journal(journal: chunker_model.RunJournal, finished: bool) -> None:
+    """
+    Close the journal, deleting it when the run finished so the next run starts fresh.
+
+    Args:
+        journal (chunker_model.RunJournal): The run journal.
+        finished (bool): Whether every file of the run was processed.
+    """
+    journal.handle.close()
+    if finished:
+        journal.path.unlink(missing_ok=True)
+
+
+def delete_run_journals(state_dir: Path) -> None:
+    """
+    Delete the journals of aborted runs, so no run resumes into a cleared collection.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+    """
+    for journal_path in state_dir.glob("journal-*.jsonl"):
+        journal_path.unlink(missing_ok=True)
+
+
+def mark_collection_updated(state_dir: Path) -> None:
+    """
+    Record that the records of a collection changed, so query caches of other
+    processes drop their results.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    staging = state_dir / f"updated-{uuid.uuid4().hex}.tmp"
+    staging.write_text(uuid.uuid4().hex, encoding="utf-8")
+    os.replace(staging, state_dir / "updated")
+
+
+def collection_update_token(state_dir: Path) -> str | None:
+    """
+    Return the token written by the last `mark_collection_updated`.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+
+    Returns:
+        str | None: The token, or None if the collection was never marked.
+    """
+    try:
+        return (state_dir / "updated").read_text(encoding="utf-8")
+    except OSError:
+        return None
@@ -0,0 +1,516 @@
+import asyncio
+import json
+import re
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable
+import numpy as np
+from chunker_src.vector_search import squared_norms, top_k
+
+LOCAL_MAX_BATCH_SIZE = 5461
+MIN_CAPACITY = 1024
+
+_SQL_CHUNK = 500
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    slot INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    path TEXT,
+    document TEXT,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_path ON records (path);
+CREATE TABLE IF NOT EXISTS free (slot INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def _where_sql(where: dict | None) -> tuple[str, list]:
+    """
+    Translate a Chroma `where` filter into an SQL condition on the records table.
+
+    Supports equality, `$eq`, `$ne`, `$in`, `$nin`, `$and` and `$or`.
+
+    Args:
+        where (dict | None): The filter.
+
+    Returns:
+        tuple[str, list]: The condition and its parameters.
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator.
+    """
+    if not where:
+        return "1", []
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_sql(clause) for clause in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + (joiner.join(sql for sql, _ in parts) or "1") + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+        if key == "path":
+            column = "path"
+        else:
+            column = "json_extract(metadata, ?)"
+        operators = condition if isinstance(condition, dict) else {"$eq": condition}
+        for op, operand in operators.items():
+            key_params = [] if key == "path" else [f'$."{key}"']
+            if op in ("$eq", "$ne"):
+                clauses.append(f"{column} {'=' if op == '$eq' else '!='} ?")
+                params.extend([*key_params, operand])
+            elif op in ("$in", "$nin"):
+                marks = ",".join("?" * len(operand)) or "NULL"
+                clauses.append(f"{column} {'IN' if op == '$in' else 'NOT IN'} ({marks})")
+                params.extend([*key_params, *operand])
+            else:
+                raise ValueError(f"Unsupported where operator {op!r}.")
+    return " AND ".join(clauses), params
+
+
+class LocalCollection:
+    """
+    A collection stored on local disk, searched exactly in process.
+
+    Vectors live in a memory-mapped float32 file with one row per slot.
+    Documents and metadata live in SQLite, keyed by slot. Slots of deleted
+    records are reused by later adds. Distances are squared L2, like Chroma's
+    default space.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        embedding_function: Callable[[list[str]], Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.directory = directory
+        self.embedding_function = embedding_function
+        directory.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(directory / "records.sqlite")
+        self._connection.executescript(_SCHEMA)
+        info = dict(self._connection.execute("SELECT key, value FROM info"))
+        self._dim: int | None = info.get("dim")
+        self._next_slot: int = info.get("next_slot", 0)
+        self._vectors_path = directory / "vectors.f32"
+        self._vectors: np.ndarray | None = None
+        self._norms: np.ndarray | None = None
+        self._live: np.ndarray | None = None
+        if self._dim is not None:
+            self._open_vectors()
+
+    def _open_vectors(self) -> None:
+        """
+        Map the vector file, sized to a whole number of rows.
+        """
+        rows = self._vectors_path.stat().st_size // (4 * self._dim)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self._dim)
+        )
+        self._norms = None
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """
+        Grow the vector file to hold at least `rows` rows, doubling its size.
+
+        Args:
+            rows (int): The number of rows needed.
+        """
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity, MIN_CAPACITY)
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * 4 * self._dim)
+        self._open_vectors()
+
+    def _embed(self, documents: list[str]) -> np.ndarray:
+        if self.embedding_function is None:
+            raise ValueError(
+                f"Collection {self.name} has no embedding function; pass embeddings."
+            )
+        return np.asarray(self.embedding_function(documents), dtype=np.float32)
+
+    def _check_dim(self, vectors: np.ndarray) -> None:
+        """
+        Fix the collection's dimension on the first add, and check it afterwards.
+
+        Args:
+            vectors (np.ndarray): The vectors to store.
+
+        Raises:
+            ValueError: If the vectors do not match the collection's dimension.
+        """
+        dim = vectors.shape[1]
+        if self._dim is None:
+            self._dim = dim
+            self._connection.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (dim,))
+            self._vectors_path.touch()
+            self._ensure_capacity(MIN_CAPACITY)
+        elif dim != self._dim:
+            raise ValueError(
+                f"Embedding dimension {dim} does not match collection "
+                f"dimensionality {self._dim}."
+            )
+
+    def _slots_of(self, ids: list[str]) -> dict[str, int]:
+        slots = {}
+        for offset in range(0, len(ids), _SQL_CHUNK):
+            part = ids[offset : offset + _SQL_CHUNK]
+            slots.update(
+                self._connection.execute(
+                    f"SELECT id, slot FROM records WHERE id IN ({','.join('?' * len(part))})",
+                    part,
+                )
+            )
+        return slots
+
+    def _allocate(self, count: int) -> list[int]:
+        """
+        Take `count` slots, reusing the slots of deleted records first.
+
+        Args:
+            count (int): The number of slots.
+
+        Returns:
+            list[int]: The slots.
+        """
+        reused = [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT slot FROM free ORDER BY slot LIMIT ?", (count,)
+            )
+        ]
+        self._connection.executemany("DELETE FROM free WHERE slot = ?", [(s,) for s in reused])
+        fresh = list(range(self._next_slot, self._next_slot + count - len(reused)))
+        self._next_slot += len(fresh)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO info VALUES ('next_slot', ?)", (self._next_slot,)
+        )
+        return reused + fresh
+
+    def _write_vectors(self, slots: list[int], vectors: np.ndarray) -> None:
+        self._ensure_capacity(max(slots) + 1)
+        self._vectors[slots] = vectors
+        self._vectors.flush()
+        if self._norms is not None and len(self._norms) == len(self._vectors):
+            self._norms[slots] = squared_norms(vectors)
+        else:
+            self._norms = None
+
+    def _changed(self) -> None:
+        self._connection.commit()
+        self._live = None
+
+    async def count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    async def add(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        if not ids:
+            return
+        if embeddings is None:
+            vectors = await asyncio.to_thread(self._embed, documents or [])
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+        self._check_dim(vectors)
+
+        existing = self._slots_of(ids)
+        new_slots = iter(self._allocate(sum(1 for i in ids if i not in existing)))
+        slots = [existing[i] if i in existing else next(new_slots) for i in ids]
+        self._write_vectors(slots, vectors)
+        metadatas = metadatas or [{} for _ in ids]
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    slot,
+                    record_id,
+                    metadatas[idx].get("path"),
+                    documents[idx] if documents else "",
+                    json.dumps(metadatas[idx]),
+                )
+                for idx, (slot, record_id) in enumerate(zip(slots, ids))
+            ],
+        )
+        self._changed()
+
+    async def upsert(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        await self.add(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+        )
+
+    async def update(
+        self,
+        ids: list[str],
+        metadatas: list[dict] | None = None,
+        documents: list[str] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        existing = self._slots_of(ids)
+        positions = [idx for idx, record_id in enumerate(ids) if record_id in existing]
+        if not positions:
+            return
+        if metadatas is not None:
+            self._connection.executemany(
+                "UPDATE records SET metadata = ?, path = ? WHERE id = ?",
+                [
+                    (json.dumps(metadatas[idx]), metadatas[idx].get("path"), ids[idx])
+                    for idx in positions
+                ],
+            )
+        if documents is not None:
+            self._connection.executemany(
+                "UPDATE records SET document = ? WHERE id = ?",
+                [(documents[idx], ids[idx]) for idx in positions],
+            )
+            if embeddings is None:
+                embeddings = await asyncio.to_thread(self._embed, list(documents))
+        if embeddings is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)[positions]
+            self._check_dim(vectors)
+            self._write_vectors([existing[ids[idx]] for idx in positions], vectors)
+        self._changed()
+
+    def _select_rows(
+        self,
+        ids: list[str] | None,
+        where: dict | None,
+        columns: str,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> list[tuple]:
+        """
+        Select records by id and filter, in slot order.
+
+        Args:
+            ids (list[str] | None): The ids to select; None selects all records.
+            where (dict | None): A Chroma `where` filter.
+            columns (str): The columns to return.
+            limit (int | None): Maximum number of records.
+            offset (int | None): Number of matching records to skip.
+
+        Returns:
+            list[tuple]: The selected rows.
+        """
+        condition, params = _where_sql(where)
+        if ids is None:
+            rows = self._connection.execute(
+                f"SELECT {columns} FROM records WHERE {condition} ORDER BY slot", params
+            ).fetchall()
+        else:
+            rows = []
+            for start in range(0, len(ids), _SQL_CHUNK):
+                part = ids[start : start + _SQL_CHUNK]
+                rows.extend(
+                    self._connection.execute(
+                        f"SELECT {columns} FROM records WHERE id IN "
+                        f"({','.join('?' * len(part))}) AND {condition}",
+                        [*part, *params],
+                    )
+                )
+        start = offset or 0
+        return rows[start : start + limit if limit is not None else None]
+
+    async def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = ["documents", "metadatas"] if include is None else include
+        rows = self._select_rows(
+            ids, where, "slot, id, document, metadata", limit=limit, offset=offset
+        )
+        result: dict[str, Any] = {"ids": [row[1] for row in rows]}
+        result["documents"] = [row[2] for row in rows] if "documents" in include else None
+        result["metadatas"] = (
+            [json.loads(row[3]) for row in rows] if "metadatas" in include else None
+        )
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.array(self._vectors[[row[0] for row in rows]])
+                if rows
+                else np.zeros((0, self._dim or 0), dtype=np.float32)
+            )
+        else:
+            result["embeddings"] = None
+        return result
+
+    async def delete(
+        self, ids: list[str] | None = None, where: dict | None = None
+    ) -> None:
+        slots = [row[0] for row in self._select_rows(ids, where, "slot")]
+        if not slots:
+            return
+        for offset in range(0, len(slots), _SQL_CHUNK):
+            part = slots[offset : offset + _SQL_CHUNK]
+            self._connection.execute(
+                f"DELETE FROM records WHERE slot IN ({','.join('?' * len(part))})", part
+            )
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO free VALUES (?)", [(slot,) for slot in slots]
+        )
+        self._changed()
+
+    def _valid_slots(self, where: dict | None) -> np.ndarray:
+        """
+        Build the mask of the slots a query may return.
+
+        The mask of all live slots is cached until the next write.
+
+        Args:
+            where (dict | None): The query's filter.
+
+        Returns:
+            np.ndarray: A boolean mask over the used slots.
+        """
+        if not where and self._live is not None:
+            return self._live
+        mask = np.zeros(self._next_slot, dtype=bool)
+        slots = [row[0] for row in self._select_rows(None, where, "slot")]
+        mask[slots] = True
+        if not where:
+            self._live = mask
+        return mask
+
+    def _search(
+        self, queries: np.ndarray, n_results: int, valid: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        used = len(valid)
+        matrix = self._vectors[:used]
+        if self._norms is None or len(self._norms) != len(self._vectors):
+            self._norms = squared_norms(np.asarray(self._vectors))
+        return top_k(matrix, self._norms[:used], queries, n_results, valid=valid)
+
+    async def query(
+        self,
+        query_texts: list[str] | None = None,
+        query_embeddings: Any = None,
+        n_results: int = 10,
+        where: dict | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        if query_embeddings is None:
+            queries = await asyncio.to_thread(self._embed, query_texts or [])
+        else:
+            queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+
+        result: dict[str, Any] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if self._dim is None or not len(queries):
+            result["ids"] = [[] for _ in queries]
+            for key in ("documents", "metadatas", "distances"):
+                result[key] = [[] for _ in queries] if key in include else None
+            return result
+
+        valid = self._valid_slots(where)
+        indices, distances = await asyncio.to_thread(
+            self._search, queries, n_results, valid
+        )
+        hit_slots = sorted({int(slot) for slot in indices.ravel()})
+        records = {}
+        for offset in range(0, len(hit_slots), _SQL_CHUNK):
+            part = hit_slots[offset : offset + _SQL_CHUNK]
+            for slot, record_id, document, metadata in self._connection.execute(
+                "SELECT slot, id, document, metadata FROM records WHERE slot IN "
+                f"({','.join('?' * len(part))})",
+                part,
+            ):
+                records[slot] = (record_id, document, metadata)
+
+        for row_slots, row_distances in zip(indices, distances):
+            hits = [
+                (records[int(slot)], float(distance))
+                for slot, distance in zip(row_slots, row_distances)
+                if int(slot) in records
+            ]
+            result["ids"].append([record[0] for record, _ in hits])
+            result["documents"].append([record[1] for record, _ in hits])
+            result["metadatas"].append([json.loads(record[2]) for record, _ in hits])
+            result["distances"].append([distance for _, distance in hits])
+        return {key: value for key, value in result.items() if key == "ids" or key in include}
+
+    def close(self) -> None:
+        """
+        Flush the vectors and close the metadata store.
+        """
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._connection.close()
+
+
+class LocalClient:
+    """
+    A vector store in a local directory, exposing the client calls chunker uses.
+
+    Each collection is a subdirectory. Collections are opened once per client
+    and shared by every caller.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.collections: dict[str, LocalCollection] = {}
+
+    def _directory(self, name: str) -> Path:
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name {name!r}.")
+        return self.root / name
+
+    def _open(
+        self, name: str, embedding_function: Callable[[list[str]], Any] | None
+    ) -> LocalCollection:
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = LocalCollection(self._directory(name), name, embedding_function)
+            self.collections[name] = collection
+        elif embedding_function is not None:
+            collection.embedding_function = embedding_function
+        return collection
+
+    async def get_or_create_collection(
+        self,
+        name: str,
+        embedding_function: Callable[[list[str]], Any] | None = None,
+        **kwargs: Any,
+    ) -> LocalCollection:
+        return self._open(name, embedding_function)
+
+    async def get_collection(
+        self,
+        name: str,
+        embedding_function: Callable[[list[str]], Any] | None = None,
+        **kwargs: Any,
+    ) -> LocalCollection:
+        if name not in self.collections and not self._directory(name).is_dir():
+            raise ValueError(f"Collection {name} does not exist.")
+        return self._open(name, embedding_function)
+
+    async def delete_collection(self, name: str) -> None:
+        collection = self.collections.pop(name, None)
+        if collection is not None:
+            collection.close()
+        shutil.rmtree(self._directory(name), ignore_errors=True)
+
+    async def get_max_batch_size(self) -> int:
+        return LOCAL_MAX_BATCH_SIZE
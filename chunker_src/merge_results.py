@@ -0,0 +1,179 @@
+from chunker_src import model as chunker_model
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text using a characters-per-token heuristic.
+
+    Args:
+        text (str): The text to estimate.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return (len(text) + 3) // 4
+
+
+def _flatten_hits(
+    results: list[chunker_model.QueryResult],
+) -> list[chunker_model.ChunkWindow]:
+    """
+    Flatten query results into single-hit windows, dropping identical content.
+
+    Args:
+        results (list[chunker_model.QueryResult]): Query results ordered by distance.
+
+    Returns:
+        list[chunker_model.ChunkWindow]: One window per distinct hit.
+    """
+    seen_texts: set[str] = set()
+    hits = []
+    for result in results:
+        if result.chunk in seen_texts:
+            continue
+        seen_texts.add(result.chunk)
+        hits.append(
+            chunker_model.ChunkWindow(
+                path=result.path,
+                start=result.start,
+                end=result.end,
+                lines=result.chunk.split("\n"),
+                distance=result.distance,
+                score=result.score,
+            )
+        )
+    return hits
+
+
+def _merge_path_hits(
+    hits: list[chunker_model.ChunkWindow],
+) -> list[chunker_model.ChunkWindow]:
+    """
+    Merge overlapping or adjacent hits of a single file into windows.
+
+    Args:
+        hits (list[chunker_model.ChunkWindow]): Hits belonging to the same path.
+
+    Returns:
+        list[chunker_model.ChunkWindow]: Merged windows sorted by start line.
+    """
+    windows: list[chunker_model.ChunkWindow] = []
+    for hit in sorted(hits, key=lambda h: (h.start, h.end)):
+        if not windows or hit.start > windows[-1].end + 1:
+            windows.append(
+                chunker_model.ChunkWindow(
+                    path=hit.path,
+                    start=hit.start,
+                    end=hit.end,
+                    lines=list(hit.lines),
+                    distance=hit.distance,
+                    score=hit.score,
+                )
+            )
+            continue
+
+        current = windows[-1]
+        if hit.end > current.end:
+            overlap = current.end - hit.start + 1
+            current.lines.extend(hit.lines[overlap:])
+            current.end = hit.end
+        current.distance = min(current.distance, hit.distance)
+        if hit.score is not None:
+            current.score = (
+                hit.score if current.score is None else max(current.score, hit.score)
+            )
+    return windows
+
+
+def _truncate_window(
+    window: chunker_model.ChunkWindow, token_budget: int
+) -> chunker_model.ChunkWindow | None:
+    """
+    Truncate a window to the lines that fit in the token budget.
+
+    Args:
+        window (chunker_model.ChunkWindow): The window to truncate.
+        token_budget (int): The remaining token budget.
+
+    Returns:
+        chunker_model.ChunkWindow | None: The truncated window, or None if no line fits.
+    """
+    kept_lines: list[str] = []
+    used = 0
+    for line in window.lines:
+        cost = _estimate_tokens(line + "\n")
+        if used + cost > token_budget:
+            break
+        kept_lines.append(line)
+        used += cost
+
+    if not kept_lines:
+        return None
+
+    return chunker_model.ChunkWindow(
+        path=window.path,
+        start=window.start,
+        end=window.start + len(kept_lines) - 1,
+        lines=kept_lines,
+        distance=window.distance,
+        score=window.score,
+    )
+
+
+def merge_query_results(
+    results: list[chunker_model.QueryResult],
+    token_budget: int | None = None,
+) -> list[chunker_model.QueryResult]:
+    """
+    Collapse query hits into one compact window per file region.
+
+    Hits are de-duplicated by content, grouped by path, and overlapping or
+    adjacent line ranges are merged. Windows are returned best rerank score
+    first when the hits were reranked, best distance first otherwise, and the
+    total output is capped at `token_budget` tokens when given.
+
+    Args:
+        results (list[chunker_model.QueryResult]): Query results ordered by distance.
+        token_budget (int | None): Approximate cap on the total output tokens.
+
+    Returns:
+        list[chunker_model.QueryResult]: One QueryResult per merged window.
+    """
+    hits_by_path: dict[str, list[chunker_model.ChunkWindow]] = {}
+    for hit in _flatten_hits(results=results):
+        hits_by_path.setdefault(hit.path, []).append(hit)
+
+    windows = [
+        window
+        for path_hits in hits_by_path.values()
+        for window in _merge_path_hits(hits=path_hits)
+    ]
+    if windows and all(w.score is not None for w in windows):
+        windows.sort(key=lambda w: -w.score)
+    else:
+        windows.sort(key=lambda w: w.distance)
+
+    merged = []
+    remaining = token_budget
+    for window in windows:
+        if remaining is not None:
+            cost = _estimate_tokens("\n".join(window.lines))
+            if cost > remaining:
+                truncated = _truncate_window(window=window, token_budget=remaining)
+                if truncated is not None:
+                    merged.append(truncated)
+                break
+            remaining -= cost
+        merged.append(window)
+
+    return [
+        chunker_model.QueryResult(
+            chunk="\n".join(window.lines),
+            path=window.path,
+            start=window.start,
+            end=window.end,
+            distance=window.distance,
+            score=window.score,
+        )
+        for window in merged
+    ]
@@ -0,0 +1,367 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from chunker_src import model as chunker_model
+from chunker_src.profiling import profile_frame
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+REGISTRY = chunker_model.MetricsRegistry()
+
+
+def _metric_key(
+    name: str, labels: dict[str, str] | None
+) -> chunker_model.MetricKey:
+    """
+    Build the registry key of a metric from its name and labels.
+
+    Args:
+        name (str): The metric name.
+        labels (dict[str, str] | None): The metric labels.
+
+    Returns:
+        chunker_model.MetricKey: The name and the sorted label pairs.
+    """
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc_counter(
+    name: str,
+    value: float = 1.0,
+    labels: dict[str, str] | None = None,
+    registry: chunker_model.MetricsRegistry = REGISTRY,
+) -> None:
+    """
+    Increment a counter.
+
+    Args:
+        name (str): The metric name.
+        value (float): The amount to add (default: 1).
+        labels (dict[str, str] | None): The metric labels.
+        registry (chunker_model.MetricsRegistry): The registry to update.
+    """
+    key = _metric_key(name, labels)
+    with registry.lock:
+        registry.counters[key] = registry.counters.get(key, 0.0) + value
+
+
+def set_gauge(
+    name: str,
+    value: float,
+    labels: dict[str, str] | None = None,
+    registry: chunker_model.MetricsRegistry = REGISTRY,
+) -> None:
+    """
+    Set a gauge to a value.
+
+    Args:
+        name (str): The metric name.
+        value (float): The new value.
+        labels (dict[str, str] | None): The metric labels.
+        registry (chunker_model.MetricsRegistry): The registry to update.
+    """
+    key = _metric_key(name, labels)
+    with registry.lock:
+        registry.gauges[key] = value
+
+
+def observe(
+    name: str,
+    value: float,
+    labels: dict[str, str] | None = None,
+    registry: chunker_model.MetricsRegistry = REGISTRY,
+) -> None:
+    """
+    Record an observation in a histogram.
+
+    Args:
+        name (str): The metric name.
+        value (float): The observed value.
+        labels (dict[str, str] | None): The metric labels.
+        registry (chunker_model.MetricsRegistry): The registry to update.
+    """
+    key = _metric_key(name, labels)
+    with registry.lock:
+        histogram = registry.histograms.get(key)
+        if histogram is None:
+            histogram = chunker_model.Histogram(
+                buckets=DEFAULT_BUCKETS, counts=[0] * (len(DEFAULT_BUCKETS) + 1)
+            )
+            registry.histograms[key] = histogram
+        histogram.counts[bisect.bisect_left(histogram.buckets, value)] += 1
+        histogram.total += value
+        histogram.count += 1
+
+
+@contextmanager
+def time_stage(
+    stage: str, registry: chunker_model.MetricsRegistry = REGISTRY
+) -> Iterator[None]:
+    """
+    Time a pipeline stage into the `chunker_stage_seconds` histogram, and into
+    the running profile, if any.
+
+    Args:
+        stage (str): The stage name (e.g. 'walk', 'read', 'split', 'write', 'query').
+        registry (chunker_model.MetricsRegistry): The registry to update.
+    """
+    started = time.perf_counter()
+    try:
+        with profile_frame(stage):
+            yield
+    finally:
+        observe(
+            "chunker_stage_seconds",
+            time.perf_counter() - started,
+            labels={"stage": stage},
+            registry=registry,
+        )
+
+
+@contextmanager
+def time_chroma_call(
+    operation: str, registry: chunker_model.MetricsRegistry = REGISTRY
+) -> Iterator[None]:
+    """
+    Time a Chroma call and count it as an error if it raises. The call is a
+    `chroma:<operation>` frame of the running profile, if any.
+
+    Args:
+        operation (str): The Chroma operation (e.g. 'get', 'add', 'query').
+        registry (chunker_model.MetricsRegistry): The registry to update.
+    """
+    labels = {"operation": operation}
+    started = time.perf_counter()
+    try:
+        with profile_frame(f"chroma:{operation}"):
+            yield
+    except Exception:
+        inc_counter("chunker_chroma_errors_total", labels=labels, registry=registry)
+        raise
+    finally:
+        observe(
+            "chunker_chroma_call_seconds",
+            time.perf_counter() - started,
+            labels=labels,
+            registry=registry,
+        )
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: str = "") -> str:
+    """
+    Format label pairs in the Prometheus exposition format.
+
+    Args:
+        labels (tuple[tuple[str, str], ...]): The label pairs.
+        extra (str): An extra, already formatted, label pair.
+
+    Returns:
+        str: The formatted labels including braces, or an empty string.
+    """
+    escaped = [
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    ]
+    if extra:
+        escaped.append(extra)
+    return "{" + ",".join(escaped) + "}" if escaped else ""
+
+
+def render_prometheus(registry: chunker_model.MetricsRegistry = REGISTRY) -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Args:
+        registry (chunker_model.MetricsRegistry): The registry to render.
+
+    Returns:
+        str: The exposition text.
+    """
+    with registry.lock:
+        counters = sorted(registry.counters.items())
+        gauges = sorted(registry.gauges.items())
+        histograms = sorted(
+            (
+                key,
+                chunker_model.Histogram(
+                    buckets=h.buckets, counts=list(h.counts), total=h.total, count=h.count
+                ),
+            )
+            for key, h in registry.histograms.items()
+        )
+
+    lines = []
+    typed: set[str] = set()
+    for metric_type, items in (("counter", counters), ("gauge", gauges)):
+        for (name, labels), value in items:
+            if name not in typed:
+                lines.append(f"# TYPE {name} {metric_type}")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+    for (name, labels), histogram in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            bucket_labels = _format_labels(labels, extra=f'le="{bound:g}"')
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        bucket_labels = _format_labels(labels, extra='le="+Inf"')
+        lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_quantile(histogram: chunker_model.Histogram, quantile: float) -> float:
+    """
+    Estimate a quantile of a histogram by interpolating within its buckets.
+
+    Args:
+        histogram (chunker_model.Histogram): The histogram.
+        quantile (float): The quantile to estimate, between 0 and 1.
+
+    Returns:
+        float: The estimated value; the largest finite bound for the +Inf bucket.
+    """
+    if histogram.count == 0:
+        return 0.0
+
+    rank = quantile * histogram.count
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        if count and cumulative + count >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return histogram.buckets[-1]
+
+
+def _metric_name(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    """
+    Format a metric name with its labels for the JSON run report.
+
+    Args:
+        name (str): The metric name.
+        labels (tuple[tuple[str, str], ...]): The label pairs.
+
+    Returns:
+        str: The name followed by its labels, if any.
+    """
+    return f"{name}{_format_labels(labels)}"
+
+
+def build_run_report(
+    elapsed_seconds: float, registry: chunker_model.MetricsRegistry = REGISTRY
+) -> dict:
+    """
+    Summarise the metrics of a run as a JSON-serialisable report.
+
+    Args:
+        elapsed_seconds (float): Wall-clock duration of the run.
+        registry (chunker_model.MetricsRegistry): The registry to summarise.
+
+    Returns:
+        dict: Counters, gauges, histogram summaries and throughput rates.
+    """
+    with registry.lock:
+        counters = {
+            _metric_name(name, labels): value
+            for (name, labels), value in sorted(registry.counters.items())
+        }
+        gauges = {
+            _metric_name(name, labels): value
+            for (name, labels), value in sorted(registry.gauges.items())
+        }
+        histograms = {
+            _metric_name(name, labels): {
+                "count": h.count,
+                "sum": h.total,
+                "mean": h.total / h.count if h.count else 0.0,
+                "p50": _histogram_quantile(h, 0.5),
+                "p99": _histogram_quantile(h, 0.99),
+            }
+            for (name, labels), h in sorted(registry.histograms.items())
+        }
+
+    rates = {}
+    if elapsed_seconds > 0:
+        for rate_name, counter_name in (
+            ("files_per_second", "chunker_files_total"),
+            ("bytes_per_second", "chunker_bytes_read_total"),
+            ("chunks_per_second", "chunker_chunks_total"),
+            ("queries_per_second", "chunker_queries_total"),
+        ):
+            total = sum(
+                value
+                for name, value in counters.items()
+                if name.split("{")[0] == counter_name
+            )
+            rates[rate_name] = total / elapsed_seconds
+
+    return {
+        "elapsed_seconds": elapsed_seconds,
+        "rates": rates,
+        "counters": counters,
+        "gauges": gauges,
+        "histograms": histograms,
+    }
+
+
+def start_metrics_server(
+    host: str,
+    port: int,
+    registry: chunker_model.MetricsRegistry = REGISTRY,
+) -> ThreadingHTTPServer:
+    """
+    Serve the metrics at `/metrics` from a daemon thread.
+
+    Args:
+        host (str): The interface to bind to.
+        port (int): The port to listen on.
+        registry (chunker_model.MetricsRegistry): The registry to expose.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(registry).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            return None
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
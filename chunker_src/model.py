@@ -1,6 +1,15 @@
-from dataclasses import dataclass
+import asyncio
+from collections import OrderedDict, deque
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, TextIO
 from pydantic import BaseModel
 
+FileOrder = Literal["glob", "recent", "size"]
+
 
 @dataclass
 class ChunkAndVectoriseConfig:
@@ -13,6 +22,55 @@ class ChunkAndVectoriseConfig:
         collection_name (str): Name of the ChromaDB collection.
         max_batch_size (int): Maximum batch size for collection.add().
         language (str): Programming language for chunking.
+        state_dir (Path | None): Directory for local state such as the run journal.
+            Defaults to `$XDG_CACHE_HOME/chunker/<collection_name>`.
+        resume (bool): Resume an aborted run from its journal instead of starting over.
+        max_retries (int): Attempts per Chroma write before the run is aborted.
+        retry_base_delay (float): Initial backoff in seconds between retries.
+        adaptive_batching (bool): Adapt the batch size and the number of concurrent
+            collection.add() calls to the latency and errors of the Chroma server.
+            `max_batch_size` is then the initial batch size, and the server's
+            reported max batch size the ceiling.
+        target_batch_latency (float): collection.add() latency, in seconds, below
+            which the adaptive controller grows batch size and concurrency.
+        max_add_concurrency (int): Upper bound on concurrent collection.add() calls
+            of a file.
+        max_file_concurrency (int): Files processed concurrently. Runs with
+            `dedup` process one file at a time, as a file's duplicates are found
+            among the canonical chunks of the files before it.
+        chroma_endpoints (list[str]): 'host:port' endpoints of a sharded collection.
+            Chunks are assigned to a shard by a stable hash of their path. When
+            empty, `chroma_host` and `chroma_port` are used.
+        dedup (bool): Store exact and near-duplicate chunks once, as a canonical
+            chunk whose `aliases` metadata lists the other locations.
+        dedup_threshold (float): Estimated Jaccard similarity at or above which a
+            chunk is a near-duplicate; 1.0 only suppresses exact duplicates.
+        dedup_min_chars (int): Chunks shorter than this are never deduplicated.
+        embedding_transform (Path | None): Embedding transform file, see
+            `fit_embedding_transform`. When set, chunks are embedded client-side
+            and stored reduced and quantized.
+        chunk_tokens (int | None): Split files into chunks of at most this many
+            tokens of the embedding model, and store each chunk's token count as
+            `tokens` metadata. When None, chunks are sized in characters.
+        chunk_overlap_tokens (int): Tokens shared by consecutive chunks when
+            splitting by tokens.
+        tokenizer (Path | None): `tokenizer.json` to count tokens with; defaults
+            to the tokenizer of the embedding model.
+        max_batch_tokens (int | None): Cap on the total tokens of a
+            collection.add() batch, for chunks with a token count.
+        local_store (Path | None): Directory of a local vector store to use
+            instead of Chroma.
+        snapshot_dir (Path | None): Directory of local query snapshots; the
+            collection's snapshot is refreshed after the run when set.
+        symbols (bool): Record the definitions of each file in the collection's
+            symbol index, for `find_symbol`.
+        file_order (FileOrder): Order in which files are indexed: 'glob' (walk
+            order), 'recent' (most recently committed first) or 'size'
+            (smallest first).
+        priority_paths (list[str]): Gitignore-style patterns of files to index
+            before all others, in the order given.
+        exclude_patterns (list[str]): Globs of files to leave out of the run,
+            relative to the project directory.
     """
 
     chroma_host: str
@@ -20,6 +78,29 @@ class ChunkAndVectoriseConfig:
     collection_name: str
     max_batch_size: int
     language: str
+    state_dir: Path | None = None
+    resume: bool = True
+    max_retries: int = 5
+    retry_base_delay: float = 0.5
+    adaptive_batching: bool = True
+    target_batch_latency: float = 1.0
+    max_add_concurrency: int = 8
+    max_file_concurrency: int = 4
+    chroma_endpoints: list[str] = field(default_factory=list)
+    dedup: bool = False
+    dedup_threshold: float = 0.9
+    dedup_min_chars: int = 64
+    embedding_transform: Path | None = None
+    chunk_tokens: int | None = None
+    chunk_overlap_tokens: int = 0
+    tokenizer: Path | None = None
+    max_batch_tokens: int | None = None
+    local_store: Path | None = None
+    snapshot_dir: Path | None = None
+    symbols: bool = False
+    file_order: FileOrder = "glob"
+    priority_paths: list[str] = field(default_factory=list)
+    exclude_patterns: list[str] = field(default_factory=list)
 
 
 @dataclass
@@ -32,27 +113,185 @@ class QueryChunksConfig:
         chroma_port (int): Port for the ChromaDB server.
         collection_name (str): Name of the ChromaDB collection.
         n_results (int): Number of results to return from the query.
+        merge_results (bool): Merge adjacent and duplicate hits per file into windows.
+        token_budget (int | None): Approximate cap on the total tokens of merged output.
+        chroma_endpoints (list[str]): 'host:port' endpoints of a sharded collection,
+            queried concurrently. When empty, `chroma_host` and `chroma_port` are used.
+        shard_timeout (float): Per-shard query timeout in seconds.
+        embedding_transform (Path | None): Embedding transform the collection was
+            indexed with; queries are embedded client-side and projected with it.
+        rerank (bool): Over-fetch candidates and rerank them client-side.
+        rerank_factor (int): Candidates fetched per requested result when reranking.
+        rerank_model (Path | None): Directory with a cross-encoder `model.onnx` and
+            `tokenizer.json`, applied after the lexical rerank when set.
+        rerank_timeout (float): Latency cap of the rerank in seconds, after which
+            results fall back to vector order.
+        rerank_batch_size (int): Candidates scored per cross-encoder batch.
+        local_store (Path | None): Directory of a local vector store to use
+            instead of Chroma.
+        snapshot_dir (Path | None): Directory of local query snapshots. When
+            set, queries are answered from a memory-mapped snapshot of the
+            collection, built from Chroma on first use.
+        expand_lines (int): Lines of surrounding code added before and after
+            each hit, read from the source files.
+        expand_to_definition (bool): Widen each hit to the innermost definition
+            enclosing it.
+        state_dir (Path | None): Local state directory of the collection, whose
+            symbol index locates the lines of expanded hits. Defaults to
+            `$XDG_CACHE_HOME/chunker/<collection_name>`.
     """
 
     chroma_host: str
     chroma_port: int
     collection_name: str
     n_results: int = 10
+    merge_results: bool = False
+    token_budget: int | None = None
+    chroma_endpoints: list[str] = field(default_factory=list)
+    shard_timeout: float = 10.0
+    embedding_transform: Path | None = None
+    rerank: bool = False
+    rerank_factor: int = 5
+    rerank_model: Path | None = None
+    rerank_timeout: float = 0.25
+    rerank_batch_size: int = 16
+    local_store: Path | None = None
+    snapshot_dir: Path | None = None
+    expand_lines: int = 0
+    expand_to_definition: bool = False
+    state_dir: Path | None = None
 
 
 class QueryResult(BaseModel):
     """
-    Result of a chunk query.
+    Result of a chunk query: a single hit.
+
+    Args:
+        chunk (str): The retrieved chunk text.
+        path (str): The file path of the chunk.
+        start (int): The first line of the chunk in its file (0-based).
+        end (int): The last line of the chunk in its file (0-based).
+        distance (float): The distance score of the chunk.
+        collection (str | None): The collection of the chunk, set when several
+            collections are queried at once.
+        aliases (list[str] | None): Other locations of the chunk, as
+            'path:start-end', when duplicates were suppressed at ingestion.
+        score (float | None): Relevance assigned by the rerank, higher is better;
+            None when the results are in vector order.
+    """
+
+    chunk: str
+    path: str
+    start: int
+    end: int
+    distance: float
+    collection: str | None = None
+    aliases: list[str] | None = None
+    score: float | None = None
+
+
+class Symbol(BaseModel):
+    """
+    A definition found in a file while chunking it.
+
+    Args:
+        name (str): The name of the definition.
+        qualified_name (str): The name prefixed with its enclosing classes, e.g.
+            'Server.start'.
+        kind (str): 'class', 'function' or 'method'.
+        path (str): The file path of the definition.
+        start (int): The first line of the definition (0-based).
+        end (int): The last line of the definition (0-based).
+        match (str | None): How a lookup matched it: 'exact', 'prefix' or 'fuzzy'.
+    """
+
+    name: str
+    qualified_name: str
+    kind: str
+    path: str
+    start: int
+    end: int
+    match: str | None = None
+
+
+class QueryResponse(BaseModel):
+    """
+    Compact, columnar encoding of a list of query results.
+
+    Each hit `i` is described by `paths[path_index[i]]`, `start[i]`, `end[i]`
+    and `distances[i]`. Every distinct path is stored once. `chunks` holds the
+    hit texts and is omitted when text is elided. When several collections are
+    queried, hit `i` comes from `collections[collection_index[i]]`.
 
     Args:
-        chunks (list[str]): The retrieved chunk texts.
-        path (list[str]): The file paths corresponding to each chunk.
-        distances (list[float]): The distance scores for each chunk.
+        paths (list[str]): The distinct file paths of the hits.
+        path_index (list[int]): Index into `paths` for each hit.
+        start (list[int]): The first line of each hit (0-based).
+        end (list[int]): The last line of each hit (0-based).
+        distances (list[float]): The distance score of each hit.
+        chunks (list[str] | None): The text of each hit, or None when elided.
+        collections (list[str] | None): The distinct collections of the hits, when
+            several collections were queried.
+        collection_index (list[int] | None): Index into `collections` for each hit.
+        aliases (dict[int, list[str]] | None): Other locations, as 'path:start-end',
+            of the hits that have duplicates, keyed by hit index.
+        scores (list[float] | None): The rerank score of each hit, when reranked.
     """
 
-    chunks: list[str]
-    path: list[str]
+    paths: list[str]
+    path_index: list[int]
+    start: list[int]
+    end: list[int]
     distances: list[float]
+    chunks: list[str] | None = None
+    collections: list[str] | None = None
+    collection_index: list[int] | None = None
+    aliases: dict[int, list[str]] | None = None
+    scores: list[float] | None = None
+
+
+class ProjectConfig(BaseModel):
+    """
+    A project served by the MCP server.
+
+    Args:
+        project_dir (str): The root directory of the project.
+        collection_name (str): Name of the ChromaDB collection of the project.
+    """
+
+    project_dir: str
+    collection_name: str
+
+
+JobState = Literal["queued", "running", "completed", "failed", "cancelled"]
+
+
+class IngestionJobStatus(BaseModel):
+    """
+    Status of a background ingestion job, as reported by the MCP server.
+
+    Args:
+        job_id (str): Identifier of the job.
+        project (str): The project being indexed.
+        pattern (str): Glob pattern of the files to index.
+        language (str): Programming language for chunking.
+        state (JobState): 'queued', 'running', 'completed', 'failed' or 'cancelled'.
+        files_done (int): Files processed so far.
+        files_total (int): Files matched by the pattern, once known.
+        error (str | None): Why the job failed, if it did.
+        elapsed_seconds (float): Time since the job was started, or its duration
+            once finished.
+    """
+
+    job_id: str
+    project: str
+    pattern: str
+    language: str
+    state: JobState
+    files_done: int
+    files_total: int
+    error: str | None = None
+    elapsed_seconds: float
 
 
 @dataclass
@@ -68,6 +307,10 @@ class InvalidPatternError(ChunkAndVectoriseError):
 class UnsupportedLanguageError(ChunkAndVectoriseError):
     pass
 
+@dataclass
+class InvalidFileOrderError(ChunkAndVectoriseError):
+    pass
+
 @dataclass
 class NoFilesFoundError(ChunkAndVectoriseError):
     pass
@@ -79,3 +322,573 @@ class FileOutsideProjectDirError(ChunkAndVectoriseError):
 @dataclass
 class ChromaDBError(ChunkAndVectoriseError):
     pass
+
+@dataclass
+class ProjectNotFoundError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class JobNotFoundError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class EmbeddingTransformError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class TokenizerError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class ArchiveError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class SymbolIndexError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class InvalidSettingError(ChunkAndVectoriseError):
+    pass
+
+@dataclass
+class IngestionError(ChunkAndVectoriseError):
+    pass
+
+
+@dataclass
+class ChunkWindow:
+    """
+    A contiguous line range of a file assembled from one or more query hits.
+
+    Args:
+        path (str): The file path of the window.
+        start (int): The first line of the window.
+        end (int): The last line of the window.
+        lines (list[str]): The text lines of the window.
+        distance (float): The best (lowest) distance among the merged hits.
+        score (float | None): The best (highest) rerank score among the merged
+            hits, or None when they were not reranked.
+    """
+
+    path: str
+    start: int
+    end: int
+    lines: list[str]
+    distance: float
+    score: float | None = None
+
+
+@dataclass
+class FileReadError:
+    """Error raised while reading a file or a range of it."""
+    message: str
+
+
+@dataclass
+class CachedFileIndex:
+    """
+    Line offset index and optional contents of a recently read file.
+
+    Args:
+        mtime_ns (int): Modification time of the file when it was indexed.
+        size (int): Size of the file in bytes when it was indexed.
+        line_offsets (list[int]): Byte offset at which each line starts.
+        data (bytes | None): The file contents, kept only for small files.
+    """
+
+    mtime_ns: int
+    size: int
+    line_offsets: list[int]
+    data: bytes | None = None
+
+
+@dataclass
+class FileCache:
+    """
+    LRU cache of recently read files, validated by modification time and size.
+
+    Args:
+        max_entries (int): Maximum number of files kept in the cache.
+        max_content_bytes (int): Largest file whose contents are cached in memory.
+        entries (OrderedDict[str, CachedFileIndex]): Cached files, oldest first.
+    """
+
+    max_entries: int = 128
+    max_content_bytes: int = 1024 * 1024
+    entries: OrderedDict[str, CachedFileIndex] = field(default_factory=OrderedDict)
+
+
+class FileRange(BaseModel):
+    """
+    A file, optionally restricted to a line or byte range, to read.
+
+    Args:
+        relative_path (str): Path of the file relative to the project root.
+        start_line (int | None): First line to read (0-based, inclusive).
+        end_line (int | None): Last line to read (0-based, inclusive).
+        start_byte (int | None): First byte to read (inclusive).
+        end_byte (int | None): Byte offset to stop reading at (exclusive).
+    """
+
+    relative_path: str
+    start_line: int | None = None
+    end_line: int | None = None
+    start_byte: int | None = None
+    end_byte: int | None = None
+
+
+class FileRangeContent(BaseModel):
+    """
+    Contents, or error, of a single range read by a batch read.
+
+    Args:
+        relative_path (str): Path of the file relative to the project root.
+        content (str | None): The text read, or None on error.
+        error (str | None): The error message, or None on success.
+    """
+
+    relative_path: str
+    content: str | None = None
+    error: str | None = None
+
+
+MetricKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values.
+
+    Args:
+        buckets (tuple[float, ...]): Upper bounds of the buckets, ascending.
+        counts (list[int]): Observations per bucket, plus one for +Inf.
+        total (float): Sum of all observed values.
+        count (int): Number of observations.
+    """
+
+    buckets: tuple[float, ...]
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+@dataclass
+class MetricsRegistry:
+    """
+    In-process store of counters, gauges and histograms keyed by name and labels.
+
+    Args:
+        counters (dict[MetricKey, float]): Monotonic counters.
+        gauges (dict[MetricKey, float]): Point-in-time values.
+        histograms (dict[MetricKey, Histogram]): Value distributions.
+        lock (threading.Lock): Guards the maps against the metrics server thread.
+    """
+
+    counters: dict[MetricKey, float] = field(default_factory=dict)
+    gauges: dict[MetricKey, float] = field(default_factory=dict)
+    histograms: dict[MetricKey, Histogram] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class ProfileTotals:
+    """
+    Time and memory spent in one stack of profiled frames.
+
+    Args:
+        calls (int): Times the stack was entered.
+        wall (float): Wall-clock seconds, including time spent in nested frames.
+        cpu (float): CPU seconds of the thread that ran the frame.
+        peak_bytes (int): Largest traced allocation peak above the memory in use
+            when the frame was entered.
+    """
+
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_bytes: int = 0
+
+
+@dataclass
+class Profiler:
+    """
+    Per-stage profile of a run, keyed by stacks of frame names.
+
+    Args:
+        stacks (dict[tuple[str, ...], ProfileTotals]): Totals per stack of
+            frames, outermost first.
+        trace_allocations (bool): Record allocation peaks with tracemalloc.
+        lock (threading.Lock): Guards the stacks against stages run in threads.
+    """
+
+    stacks: dict[tuple[str, ...], ProfileTotals] = field(default_factory=dict)
+    trace_allocations: bool = True
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class RunJournal:
+    """
+    Append-only journal of an ingestion run, used to resume aborted runs.
+
+    Args:
+        path (Path): Location of the journal file.
+        handle (TextIO): The journal file opened for appending.
+        completed (dict[str, int]): Modification time of each completed file when
+            it was indexed, keyed by relative path.
+        in_flight (set[str]): Files that were started but not completed.
+    """
+
+    path: Path
+    handle: TextIO
+    completed: dict[str, int] = field(default_factory=dict)
+    in_flight: set[str] = field(default_factory=set)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff policy for Chroma calls.
+
+    Args:
+        max_retries (int): Total attempts before giving up.
+        base_delay (float): Delay in seconds before the first retry; doubles each retry.
+    """
+
+    max_retries: int = 5
+    base_delay: float = 0.5
+
+
+@dataclass
+class AdaptiveBatchController:
+    """
+    AIMD controller for the batch size and concurrency of collection.add() calls.
+
+    Args:
+        batch_size (int): Current number of chunks per collection.add() call.
+        concurrency (int): Current number of concurrent collection.add() calls.
+        min_batch_size (int): Smallest batch size the controller backs off to.
+        max_batch_size (int): Largest batch size; lowered when the server rejects
+            a batch as too large.
+        max_concurrency (int): Largest number of concurrent calls.
+        target_latency (float): Latency in seconds below which the controller grows.
+        adaptive (bool): When False, batch size and concurrency stay fixed.
+        successes (int): Consecutive fast batches since the last adjustment.
+        failures (int): Number of failed batches.
+        max_batch_tokens (int | None): Cap on the total tokens of a batch, applied
+            to chunks with a `tokens` count.
+    """
+
+    batch_size: int
+    concurrency: int = 1
+    min_batch_size: int = 1
+    max_batch_size: int = 5461
+    max_concurrency: int = 8
+    target_latency: float = 1.0
+    adaptive: bool = True
+    successes: int = 0
+    failures: int = 0
+    max_batch_tokens: int | None = None
+
+
+@dataclass
+class ClientPool:
+    """
+    Connected Chroma clients shared by every project of a server process.
+
+    Args:
+        clients (dict[tuple, Any]): Clients keyed by host, port, shard endpoints,
+            shard timeout and local store.
+        lock (asyncio.Lock): Serialises connecting, so each client is created once.
+    """
+
+    clients: dict[tuple, Any] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+@dataclass
+class PathSequencer:
+    """
+    Orders the collection writes of each file path, see `path_turn`.
+
+    Args:
+        tails (dict[tuple[str, str], asyncio.Future]): Per collection and path,
+            resolved when the last writer to queue up is finished.
+    """
+
+    tails: dict[tuple[str, str], asyncio.Future] = field(default_factory=dict)
+
+
+@dataclass
+class FairScheduler:
+    """
+    Round-robin scheduler of file slots across the ingestion jobs of several projects.
+
+    Args:
+        slots (int): Number of files processed concurrently across all projects.
+        active (int): Slots currently held.
+        waiters (OrderedDict[str, deque[asyncio.Future]]): Waiting acquirers per
+            project, served in turn.
+        project_locks (dict[str, asyncio.Lock]): One lock per project, so a
+            project runs a single ingestion job at a time.
+        sequencer (PathSequencer): Orders the writes of jobs to the same path.
+    """
+
+    slots: int = 4
+    active: int = 0
+    waiters: OrderedDict[str, deque[asyncio.Future]] = field(default_factory=OrderedDict)
+    project_locks: dict[str, asyncio.Lock] = field(default_factory=dict)
+    sequencer: PathSequencer = field(default_factory=PathSequencer)
+
+
+@dataclass
+class IngestionJob:
+    """
+    A chunk and vectorise run executing in the background of the MCP server.
+
+    Args:
+        job_id (str): Identifier of the job.
+        project (str): The project being indexed.
+        pattern (str): Glob pattern of the files to index.
+        language (str): Programming language for chunking.
+        state (JobState): Current state of the job.
+        files_done (int): Files processed so far.
+        files_total (int): Files matched by the pattern, once known.
+        error (str | None): Why the job failed, if it did.
+        started_at (float): `time.monotonic()` when the job was started.
+        finished_at (float | None): `time.monotonic()` when the job finished.
+        task (asyncio.Task | None): The task running the job.
+    """
+
+    job_id: str
+    project: str
+    pattern: str
+    language: str
+    state: JobState = "queued"
+    files_done: int = 0
+    files_total: int = 0
+    error: str | None = None
+    started_at: float = 0.0
+    finished_at: float | None = None
+    task: asyncio.Task | None = None
+
+
+@dataclass
+class JobRegistry:
+    """
+    Background ingestion jobs of the MCP server.
+
+    Args:
+        jobs (dict[str, IngestionJob]): Jobs by id, in the order they were started.
+        max_finished (int): Finished jobs kept for status queries; older ones are
+            dropped.
+    """
+
+    jobs: dict[str, IngestionJob] = field(default_factory=dict)
+    max_finished: int = 100
+
+
+@dataclass
+class QueryCacheEntry:
+    """
+    The results of a recent query.
+
+    Args:
+        collection_name (str): The collection the query was answered from.
+        scope (str): The query settings the results depend on, see
+            `query_cache_scope`.
+        text (str): The normalised query text.
+        vector (Any): The unit embedding of the query.
+        results (list[QueryResult]): The final results of the query.
+        created (float): `time.monotonic()` when the results were stored.
+    """
+
+    collection_name: str
+    scope: str
+    text: str
+    vector: Any
+    results: list[QueryResult]
+    created: float
+
+
+@dataclass
+class QueryCache:
+    """
+    Results of recent queries, reused for repeated and paraphrased queries.
+
+    Args:
+        max_entries (int): Entries kept; the least recently used is evicted. 0
+            disables the cache.
+        ttl (float): Seconds an entry's results are reused.
+        threshold (float): Cosine similarity to a cached query at or above which
+            a query reuses its results.
+        entries (OrderedDict[int, QueryCacheEntry]): Entries by id, least
+            recently used first.
+        exact (dict[tuple[str, str], int]): Entry id by scope and normalised text.
+        scopes (dict[str, set[int]]): Entry ids by scope.
+        generations (dict[str, int]): Bumped on each invalidation of a
+            collection, so results of a query that overlapped a re-index are
+            not stored.
+        update_tokens (dict[str, str | None]): The update marker of each
+            collection when it was last checked; a changed marker means
+            another process re-indexed the collection.
+        next_id (int): Id of the next entry.
+    """
+
+    max_entries: int = 256
+    ttl: float = 300.0
+    threshold: float = 0.9
+    entries: OrderedDict[int, QueryCacheEntry] = field(default_factory=OrderedDict)
+    exact: dict[tuple[str, str], int] = field(default_factory=dict)
+    scopes: dict[str, set[int]] = field(default_factory=dict)
+    generations: dict[str, int] = field(default_factory=dict)
+    update_tokens: dict[str, str | None] = field(default_factory=dict)
+    next_id: int = 0
+
+
+@dataclass
+class DedupIndex:
+    """
+    Local index of the canonical chunks of a collection and their duplicates.
+
+    Args:
+        path (Path): Location of the SQLite database.
+        connection (sqlite3.Connection): The open database.
+        threshold (float): Estimated Jaccard similarity at or above which a chunk
+            is a near-duplicate.
+        min_chars (int): Chunks shorter than this are never deduplicated.
+    """
+
+    path: Path
+    connection: sqlite3.Connection
+    threshold: float = 0.9
+    min_chars: int = 64
+
+
+@dataclass
+class SymbolIndex:
+    """
+    Local table of the definitions in a collection's files.
+
+    Args:
+        path (Path): Location of the SQLite database.
+        connection (sqlite3.Connection): The open database, usable from any
+            thread holding `lock`.
+        lock (threading.Lock): Serialises writes from worker threads.
+        commit_every (int): Number of files whose changes are committed together.
+        pending (int): Number of files changed since the last commit.
+    """
+
+    path: Path
+    connection: sqlite3.Connection
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    commit_every: int = 256
+    pending: int = 0
+
+
+@dataclass
+class SourceLines:
+    """
+    Line offsets of a source file, recorded in the symbol index when chunked.
+
+    Args:
+        full_path (str): Absolute path of the file.
+        size (int): Size of the file in bytes when it was read.
+        mtime_ns (int): Modification time of the file when it was read.
+        offsets (np.ndarray): Start offset of each line, followed by `size`.
+    """
+
+    full_path: str
+    size: int
+    mtime_ns: int
+    offsets: Any
+
+
+@dataclass
+class FileSelector:
+    """
+    Include and exclude globs compiled for a single walk of a project.
+
+    Args:
+        include (re.Pattern | None): Matches the relative paths of included files.
+        exclude (re.Pattern | None): Matches the relative paths of excluded files.
+        excluded_dirs (re.Pattern | None): Matches directories excluded entirely.
+        include_segments (list[list[re.Pattern | None]]): Per include glob, a
+            matcher for each path segment, None for '**'; used to skip
+            directories no include glob can reach.
+    """
+
+    include: re.Pattern | None
+    exclude: re.Pattern | None
+    excluded_dirs: re.Pattern | None
+    include_segments: list[list[re.Pattern | None]]
+
+
+@dataclass
+class DedupOrphan:
+    """
+    A canonical chunk removed by re-indexing its file while other files alias it.
+
+    Args:
+        chunk_id (str): Id of the removed canonical chunk.
+        exact (str): Exact hash of the chunk.
+        signature (Any): MinHash signature of the chunk.
+        aliases (list[tuple[str, int, int]]): Path, start and end line of each alias.
+    """
+
+    chunk_id: str
+    exact: str
+    signature: Any
+    aliases: list[tuple[str, int, int]]
+
+
+@dataclass
+class EmbeddingTransform:
+    """
+    Dimensionality reduction and quantization applied to embeddings client-side.
+
+    Args:
+        mean (Any): Mean of the fitting sample, subtracted before projecting.
+        components (Any): PCA components, one row per output dimension.
+        quantization (str): 'none', 'float16' or 'int8'.
+        scale (Any): Per-dimension scale of int8 codes, or None.
+    """
+
+    mean: Any
+    components: Any
+    quantization: str = "none"
+    scale: Any = None
+
+
+@dataclass
+class CrossEncoder:
+    """
+    An ONNX cross-encoder that scores (query, chunk) pairs.
+
+    Args:
+        session (Any): The onnxruntime inference session.
+        tokenizer (Any): The `tokenizers` tokenizer of the model.
+        input_names (list[str]): The inputs the model expects.
+    """
+
+    session: Any
+    tokenizer: Any
+    input_names: list[str]
+
+
+@dataclass
+class TokenSplitter:
+    """
+    Token budget for splitting files into chunks.
+
+    Args:
+        tokenizer (Any): The `tokenizers` tokenizer that measures chunks.
+        chunk_tokens (int): Maximum tokens per chunk.
+        chunk_overlap_tokens (int): Tokens shared by consecutive chunks.
+    """
+
+    tokenizer: Any
+    chunk_tokens: int
+    chunk_overlap_tokens: int = 0
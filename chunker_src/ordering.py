@@ -0,0 +1,135 @@
+import os
+import subprocess
+from pathlib import Path
+import pathspec
+from chunker_src import model as chunker_model
+
+FILE_ORDERS = ("glob", "recent", "size")
+_COMMIT_MARKER = "\x01"
+
+
+def _git_commit_times(project_dir: Path, wanted: set[str]) -> dict[str, int]:
+    """
+    Find when each file was last committed, newest history first.
+
+    `git log` is read as it streams and stopped once every wanted file has been
+    seen, so recently active files cost only the recent part of the history.
+
+    Args:
+        project_dir (Path): The root directory of the project.
+        wanted (set[str]): Paths relative to the project directory.
+
+    Returns:
+        dict[str, int]: Commit timestamps of the wanted files with history; empty
+        if the project is not in a git repository or git is not installed.
+    """
+    try:
+        log = subprocess.Popen(
+            [
+                "git",
+                "-c",
+                "core.quotepath=off",
+                "log",
+                "--relative",
+                "--name-only",
+                f"--format={_COMMIT_MARKER}%ct",
+                "--",
+                ".",
+            ],
+            cwd=project_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    except OSError:
+        return {}
+    times: dict[str, int] = {}
+    committed_at = 0
+    with log:
+        for line in log.stdout:
+            line = line.rstrip("\n")
+            if line.startswith(_COMMIT_MARKER):
+                committed_at = int(line[1:])
+            elif line in wanted and line not in times:
+                times[line] = committed_at
+                if len(times) == len(wanted):
+                    log.kill()
+                    break
+    return times
+
+
+def file_sizes(files: list[Path]) -> dict[Path, int]:
+    """
+    Return the size in bytes of each file; files that cannot be read count as 0.
+
+    Args:
+        files (list[Path]): The files.
+
+    Returns:
+        dict[Path, int]: The sizes.
+    """
+    sizes = {}
+    for file in files:
+        try:
+            sizes[file] = os.stat(file).st_size
+        except OSError:
+            sizes[file] = 0
+    return sizes
+
+
+def order_files(
+    files: list[Path],
+    project_dir: Path,
+    order: chunker_model.FileOrder,
+    priority: list[str],
+    sizes: dict[Path, int],
+) -> list[Path]:
+    """
+    Order the files of a run so the most useful ones are indexed first.
+
+    Files matching an entry of `priority` come first, grouped in the order of
+    the entries. Within each group, 'recent' orders by the time of the last
+    commit touching the file, newest first, and files never committed by
+    their modification time; 'size' orders smallest first, to cover as many
+    files as possible early; 'glob' keeps the walk order.
+
+    Args:
+        files (list[Path]): The files, in walk order.
+        project_dir (Path): The root directory of the project.
+        order (chunker_model.FileOrder): 'glob', 'recent' or 'size'.
+        priority (list[str]): Gitignore-style patterns, relative to the project
+            directory, of files to index first.
+        sizes (dict[Path, int]): Size of each file, see `file_sizes`.
+
+    Returns:
+        list[Path]: The files in the order to index them.
+    """
+    rel_paths = {file: file.relative_to(project_dir).as_posix() for file in files}
+    specs = [pathspec.PathSpec.from_lines("gitwildmatch", [p]) for p in priority]
+
+    def rank(file: Path) -> int:
+        for idx, spec in enumerate(specs):
+            if spec.match_file(rel_paths[file]):
+                return idx
+        return len(specs)
+
+    if order == "recent":
+        committed = _git_commit_times(project_dir, set(rel_paths.values()))
+
+        def recency(file: Path) -> float:
+            changed = committed.get(rel_paths[file])
+            if changed is None:
+                try:
+                    changed = os.stat(file).st_mtime
+                except OSError:
+                    changed = 0
+            return -changed
+
+        key = lambda file: (rank(file), recency(file))
+    elif order == "size":
+        key = lambda file: (rank(file), sizes[file])
+    else:
+        key = rank
+    return sorted(files, key=key)
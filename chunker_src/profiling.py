@@ -0,0 +1,217 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator
+from chunker_src import model as chunker_model
+
+FILE_FRAME_PREFIX = "file:"
+
+_profiler: chunker_model.Profiler | None = None
+
+_frames: ContextVar[tuple[tuple[str, list[int]], ...]] = ContextVar(
+    "chunker_profile_frames", default=()
+)
+
+
+@contextmanager
+def profile_frame(name: str) -> Iterator[None]:
+    """
+    Record the wall time, CPU time and allocation peak of a block under the
+    frames enclosing it.
+
+    A no-op unless a profile is running, see `profile_run`. Frames follow the
+    asyncio task and the threads started with `asyncio.to_thread`; each open
+    frame keeps the highest traced allocation peak seen while it was open, as
+    nested frames reset the peak. CPU time is that of the thread running the
+    block, so a frame that awaits also counts the other tasks of the event
+    loop. Allocation peaks are global to the process and include overlapping
+    frames of other tasks.
+
+    Args:
+        name (str): The frame name, e.g. a stage or `file:<path>`.
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+
+    outer = _frames.get()
+    tracing = profiler.trace_allocations and tracemalloc.is_tracing()
+    start_memory = 0
+    if tracing:
+        start_memory, peak = tracemalloc.get_traced_memory()
+        for _, seen in outer:
+            seen[0] = max(seen[0], peak)
+        tracemalloc.reset_peak()
+    seen = [start_memory]
+    token = _frames.set(outer + ((name.replace(";", ","), seen),))
+    started_wall = time.perf_counter()
+    started_cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - started_wall
+        cpu = time.thread_time() - started_cpu
+        peak_bytes = 0
+        if tracing and tracemalloc.is_tracing():
+            peak_bytes = max(seen[0], tracemalloc.get_traced_memory()[1]) - start_memory
+        stack = tuple(frame for frame, _ in _frames.get())
+        _frames.reset(token)
+        with profiler.lock:
+            totals = profiler.stacks.setdefault(stack, chunker_model.ProfileTotals())
+            totals.calls += 1
+            totals.wall += wall
+            totals.cpu += cpu
+            totals.peak_bytes = max(totals.peak_bytes, peak_bytes)
+
+
+@contextmanager
+def profile_run(
+    root: str, trace_allocations: bool = True
+) -> Iterator[chunker_model.Profiler]:
+    """
+    Profile every frame entered within the block, under a root frame.
+
+    Args:
+        root (str): Name of the root frame, e.g. the command.
+        trace_allocations (bool): Record allocation peaks with tracemalloc,
+            which slows allocation-heavy stages down.
+
+    Yields:
+        chunker_model.Profiler: The profile, complete once the block exits.
+    """
+    global _profiler
+    profiler = chunker_model.Profiler(trace_allocations=trace_allocations)
+    started_tracing = trace_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _profiler = profiler
+    try:
+        with profile_frame(root):
+            yield profiler
+    finally:
+        _profiler = None
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def render_collapsed_stacks(profiler: chunker_model.Profiler) -> str:
+    """
+    Render a profile in the collapsed-stack format read by flamegraph tools.
+
+    Each line is a stack of frames joined by ';' and the microseconds of wall
+    time spent in its last frame outside nested frames.
+
+    Args:
+        profiler (chunker_model.Profiler): The profile.
+
+    Returns:
+        str: One line per stack, sorted.
+    """
+    with profiler.lock:
+        stacks = {stack: totals.wall for stack, totals in profiler.stacks.items()}
+    self_wall = dict(stacks)
+    for stack, wall in stacks.items():
+        if stack[:-1] in self_wall:
+            self_wall[stack[:-1]] -= wall
+    lines = [
+        f"{';'.join(stack)} {round(wall * 1e6)}"
+        for stack, wall in sorted(self_wall.items())
+        if round(wall * 1e6) > 0
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _summary(totals: chunker_model.ProfileTotals) -> dict:
+    return {
+        "calls": totals.calls,
+        "wall_seconds": totals.wall,
+        "cpu_seconds": totals.cpu,
+        "peak_alloc_bytes": totals.peak_bytes,
+    }
+
+
+def _merge(into: chunker_model.ProfileTotals, totals: chunker_model.ProfileTotals) -> None:
+    into.calls += totals.calls
+    into.wall += totals.wall
+    into.cpu += totals.cpu
+    into.peak_bytes = max(into.peak_bytes, totals.peak_bytes)
+
+
+def build_profile_report(profiler: chunker_model.Profiler, top_n: int = 20) -> dict:
+    """
+    Summarise a profile per stage and list the slowest files.
+
+    Args:
+        profiler (chunker_model.Profiler): The profile.
+        top_n (int): Number of files to list.
+
+    Returns:
+        dict: Totals per stage over the whole run, and the `top_n` files with
+        the most wall time, each with its totals per stage.
+    """
+    with profiler.lock:
+        stacks = list(profiler.stacks.items())
+
+    stages: dict[str, chunker_model.ProfileTotals] = {}
+    files: dict[tuple[str, ...], chunker_model.ProfileTotals] = {}
+    for stack, totals in stacks:
+        if stack[-1].startswith(FILE_FRAME_PREFIX):
+            files[stack] = totals
+        elif len(stack) > 1:
+            _merge(stages.setdefault(stack[-1], chunker_model.ProfileTotals()), totals)
+
+    slowest = sorted(files.items(), key=lambda item: item[1].wall, reverse=True)[:top_n]
+    report_files = []
+    for file_stack, totals in slowest:
+        file_stages: dict[str, chunker_model.ProfileTotals] = {}
+        for stack, stage_totals in stacks:
+            if len(stack) > len(file_stack) and stack[: len(file_stack)] == file_stack:
+                _merge(
+                    file_stages.setdefault(stack[-1], chunker_model.ProfileTotals()),
+                    stage_totals,
+                )
+        report_files.append(
+            {
+                "path": file_stack[-1].removeprefix(FILE_FRAME_PREFIX),
+                **_summary(totals),
+                "stages": {
+                    name: _summary(stage_totals)
+                    for name, stage_totals in sorted(file_stages.items())
+                },
+            }
+        )
+
+    roots = [totals for stack, totals in stacks if len(stack) == 1]
+    return {
+        "wall_seconds": sum(totals.wall for totals in roots),
+        "files_profiled": len(files),
+        "stages": {name: _summary(totals) for name, totals in sorted(stages.items())},
+        "slowest_files": report_files,
+    }
+
+
+def write_profile(
+    profiler: chunker_model.Profiler, output: Path, top_n: int = 20
+) -> tuple[Path, Path]:
+    """
+    Write a profile as `<output>.folded` collapsed stacks and a `<output>.json`
+    report.
+
+    Args:
+        profiler (chunker_model.Profiler): The profile.
+        output (Path): Path of the files, without suffix.
+        top_n (int): Number of slowest files in the report.
+
+    Returns:
+        tuple[Path, Path]: The collapsed-stack file and the report.
+    """
+    folded = Path(f"{output}.folded")
+    report = Path(f"{output}.json")
+    folded.write_text(render_collapsed_stacks(profiler), encoding="utf-8")
+    with open(report, "w", encoding="utf-8") as f:
+        json.dump(build_profile_report(profiler, top_n), f, indent=2)
+    return folded, report
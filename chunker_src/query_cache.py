@@ -0,0 +1,254 @@
+import dataclasses
+import json
+import time
+from typing import Any
+import numpy as np
+from chunker_src import model as chunker_model
+from chunker_src.metrics import inc_counter
+
+
+def normalize_query(text: str) -> str:
+    """
+    Fold the case and spacing of a query, so trivially different texts match.
+
+    Args:
+        text (str): The query text.
+
+    Returns:
+        str: The lower-cased text with runs of whitespace collapsed.
+    """
+    return " ".join(text.lower().split())
+
+
+def query_cache_scope(config: chunker_model.QueryChunksConfig, n_results: int) -> str:
+    """
+    Describe the settings the results of a query depend on.
+
+    Queries only share results within a scope, so a query never reuses the
+    results of another collection, result count, rerank or expansion.
+
+    Args:
+        config (chunker_model.QueryChunksConfig): The query configuration.
+        n_results (int): The number of results requested.
+
+    Returns:
+        str: The scope.
+    """
+    return json.dumps(
+        [dataclasses.asdict(config), n_results], default=str, sort_keys=True
+    )
+
+
+def cache_generation(cache: chunker_model.QueryCache, collection_name: str) -> int:
+    """
+    Return the number of times a collection's entries were invalidated.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        collection_name (str): The collection.
+
+    Returns:
+        int: The generation, to pass to `store_query_results`.
+    """
+    return cache.generations.get(collection_name, 0)
+
+
+def _drop(cache: chunker_model.QueryCache, entry_id: int) -> None:
+    """
+    Remove an entry from the cache and its exact and scope indexes.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        entry_id (int): The entry.
+    """
+    entry = cache.entries.pop(entry_id)
+    if cache.exact.get((entry.scope, entry.text)) == entry_id:
+        del cache.exact[(entry.scope, entry.text)]
+    scope_ids = cache.scopes[entry.scope]
+    scope_ids.discard(entry_id)
+    if not scope_ids:
+        del cache.scopes[entry.scope]
+
+
+def _is_live(cache: chunker_model.QueryCache, entry_id: int, now: float) -> bool:
+    """
+    Check that an entry is within its TTL, dropping it if not.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        entry_id (int): The entry.
+        now (float): The current `time.monotonic()`.
+
+    Returns:
+        bool: True if the entry may be reused.
+    """
+    if now - cache.entries[entry_id].created <= cache.ttl:
+        return True
+    _drop(cache, entry_id)
+    return False
+
+
+def _hit(
+    cache: chunker_model.QueryCache, entry_id: int, match: str
+) -> list[chunker_model.QueryResult]:
+    """
+    Mark an entry as most recently used and count the hit.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        entry_id (int): The entry.
+        match (str): How the entry matched: 'exact' or 'similar'.
+
+    Returns:
+        list[chunker_model.QueryResult]: A copy of the entry's results.
+    """
+    cache.entries.move_to_end(entry_id)
+    inc_counter("chunker_query_cache_hits_total", labels={"match": match})
+    return list(cache.entries[entry_id].results)
+
+
+def _unit(vector: Any) -> np.ndarray:
+    """
+    Scale an embedding to unit length, so dot products are cosine similarities.
+
+    Args:
+        vector (Any): The embedding.
+
+    Returns:
+        np.ndarray: The flattened float32 unit vector; a zero vector unchanged.
+    """
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def lookup_exact(
+    cache: chunker_model.QueryCache, scope: str, text: str
+) -> list[chunker_model.QueryResult] | None:
+    """
+    Return the cached results of the same query text, ignoring case and spacing.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        scope (str): The scope of the query.
+        text (str): The query text.
+
+    Returns:
+        list[chunker_model.QueryResult] | None: The results, or None on a miss.
+    """
+    entry_id = cache.exact.get((scope, normalize_query(text)))
+    if entry_id is None or not _is_live(cache, entry_id, time.monotonic()):
+        return None
+    return _hit(cache, entry_id, "exact")
+
+
+def lookup_similar(
+    cache: chunker_model.QueryCache, scope: str, vector: Any
+) -> list[chunker_model.QueryResult] | None:
+    """
+    Return the cached results of the query most similar to an embedding.
+
+    The scope holds at most `cache.max_entries` embeddings, so they are
+    compared exhaustively with one matrix-vector product.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        scope (str): The scope of the query.
+        vector (Any): The embedding of the query.
+
+    Returns:
+        list[chunker_model.QueryResult] | None: The results of the most similar
+        query, or None if none is within `cache.threshold`.
+    """
+    now = time.monotonic()
+    candidates = [
+        entry_id
+        for entry_id in list(cache.scopes.get(scope, ()))
+        if _is_live(cache, entry_id, now)
+    ]
+    if candidates:
+        matrix = np.stack([cache.entries[entry_id].vector for entry_id in candidates])
+        similarities = matrix @ _unit(vector)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= cache.threshold:
+            return _hit(cache, candidates[best], "similar")
+    inc_counter("chunker_query_cache_misses_total")
+    return None
+
+
+def store_query_results(
+    cache: chunker_model.QueryCache,
+    collection_name: str,
+    scope: str,
+    text: str,
+    vector: Any,
+    results: list[chunker_model.QueryResult],
+    generation: int,
+) -> None:
+    """
+    Cache the results of a query, evicting the least recently used entries.
+
+    Results are not stored if the collection was invalidated since the query
+    started, as they may predate the re-index.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        collection_name (str): The collection the query was answered from.
+        scope (str): The scope of the query.
+        text (str): The query text.
+        vector (Any): The embedding of the query.
+        results (list[chunker_model.QueryResult]): The final results.
+        generation (int): `cache_generation` when the query started.
+    """
+    if cache.max_entries < 1 or generation != cache_generation(cache, collection_name):
+        return
+    key = (scope, normalize_query(text))
+    if key in cache.exact:
+        _drop(cache, cache.exact[key])
+    while len(cache.entries) >= cache.max_entries:
+        _drop(cache, next(iter(cache.entries)))
+    entry_id = cache.next_id
+    cache.next_id += 1
+    cache.entries[entry_id] = chunker_model.QueryCacheEntry(
+        collection_name=collection_name,
+        scope=scope,
+        text=key[1],
+        vector=_unit(vector),
+        results=list(results),
+        created=time.monotonic(),
+    )
+    cache.exact[key] = entry_id
+    cache.scopes.setdefault(scope, set()).add(entry_id)
+
+
+def invalidate_query_cache(
+    cache: chunker_model.QueryCache, collection_name: str
+) -> None:
+    """
+    Drop the cached results of a collection whose records changed.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        collection_name (str): The collection.
+    """
+    cache.generations[collection_name] = cache_generation(cache, collection_name) + 1
+    for entry_id, entry in list(cache.entries.items()):
+        if entry.collection_name == collection_name:
+            _drop(cache, entry_id)
+
+
+def sync_query_cache(
+    cache: chunker_model.QueryCache, collection_name: str, update_token: str | None
+) -> None:
+    """
+    Drop the cached results of a collection re-indexed by another process.
+
+    Args:
+        cache (chunker_model.QueryCache): The cache.
+        collection_name (str): The collection.
+        update_token (str | None): The collection's current update marker, from
+            `collection_update_token`.
+    """
+    if cache.update_tokens.get(collection_name, update_token) != update_token:
+        invalidate_query_cache(cache, collection_name)
+    cache.update_tokens[collection_name] = update_token
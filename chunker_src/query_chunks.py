@@ -1,6 +1,168 @@
+import asyncio
+import dataclasses
+import json
 import logging
+from functools import lru_cache
+from pathlib import Path
+from chunker_src import embeddings
 from chunker_src import model as chunker_model
-import chromadb
+from chunker_src.clients import get_client
+from chunker_src.embedding_transform import load_embedding_transform, project_embeddings
+from chunker_src.embeddings import shared_embedding_function
+from chunker_src.expansion import expand_query_results
+from chunker_src.journal import collection_update_token, default_state_dir
+from chunker_src.merge_results import merge_query_results
+from chunker_src.metrics import inc_counter, time_chroma_call, time_stage
+from chunker_src.query_cache import (
+    cache_generation,
+    lookup_exact,
+    lookup_similar,
+    query_cache_scope,
+    store_query_results,
+    sync_query_cache,
+)
+from chunker_src.rerank import rerank_with_deadline
+from chunker_src.snapshot import open_snapshot, refresh_snapshot
+from chunker_src.storage import StorageCollection
+
+
+@lru_cache(maxsize=8)
+def _cached_embedding_transform(
+    path: Path, mtime_ns: int
+) -> chunker_model.EmbeddingTransform:
+    """
+    Load an embedding transform, reusing it until the file changes.
+
+    Args:
+        path (Path): The embedding transform file.
+        mtime_ns (int): Modification time of the file, part of the cache key so
+            a rewritten transform is loaded again.
+
+    Returns:
+        chunker_model.EmbeddingTransform: The transform.
+    """
+    return load_embedding_transform(path)
+
+
+def _embed_queries(query_texts: list[str], transform_path: Path) -> list:
+    """
+    Embed queries client-side and project them with the collection's transform.
+
+    Args:
+        query_texts (list[str]): The texts to query for.
+        transform_path (Path): The embedding transform file.
+
+    Returns:
+        list: The query embeddings, one row per query.
+    """
+    transform = _cached_embedding_transform(
+        transform_path, transform_path.stat().st_mtime_ns
+    )
+    return list(project_embeddings(transform, embeddings.embed_texts(query_texts)))
+
+
+def _embed_query_texts(query_texts: list[str], transform_path: Path | None) -> list:
+    """
+    Embed queries client-side as the collection would embed them.
+
+    Args:
+        query_texts (list[str]): The texts to query for.
+        transform_path (Path | None): The collection's embedding transform file.
+
+    Returns:
+        list: The query embeddings, one row per query.
+    """
+    if transform_path is not None:
+        return _embed_queries(query_texts, transform_path)
+    return list(shared_embedding_function()(query_texts))
+
+
+async def _get_query_collection(
+    config: chunker_model.QueryChunksConfig,
+    logger: logging.Logger,
+    client_pool: chunker_model.ClientPool | None,
+) -> StorageCollection:
+    """
+    Return the collection to query: its snapshot when `config.snapshot_dir` is
+    set, else the collection itself.
+
+    A missing snapshot is built from the collection first.
+
+    Args:
+        config (chunker_model.QueryChunksConfig): Configuration object.
+        logger (logging.Logger): Logger instance.
+        client_pool (chunker_model.ClientPool | None): Shared Chroma clients.
+
+    Returns:
+        StorageCollection: The collection or its snapshot.
+    """
+    if config.snapshot_dir is not None:
+        snapshot = await open_snapshot(config.snapshot_dir, config.collection_name)
+        if snapshot is not None:
+            snapshot.embedding_function = shared_embedding_function()
+            return snapshot
+
+    try:
+        with time_chroma_call("get_or_create_collection"):
+            client = await get_client(
+                chroma_host=config.chroma_host,
+                chroma_port=config.chroma_port,
+                chroma_endpoints=config.chroma_endpoints,
+                shard_timeout=config.shard_timeout,
+                client_pool=client_pool,
+                local_store=config.local_store,
+            )
+            collection = await client.get_or_create_collection(
+                config.collection_name,
+                embedding_function=shared_embedding_function(),
+            )
+    except Exception as e:
+        logger.error(f"Failed to connect to ChromaDB or get collection: {e}")
+        raise
+
+    if config.snapshot_dir is None:
+        return collection
+    with time_stage("snapshot"):
+        snapshot = await refresh_snapshot(
+            source=collection,
+            snapshot_dir=config.snapshot_dir,
+            collection_name=config.collection_name,
+            logger=logger,
+        )
+    snapshot.embedding_function = shared_embedding_function()
+    return snapshot
+
+
+def _parse_query_row(
+    documents: list, metadatas: list, distances: list
+) -> list[chunker_model.QueryResult]:
+    """
+    Build the QueryResults of one query from its row of a collection.query() result.
+
+    Args:
+        documents (list): The documents of the hits.
+        metadatas (list): The metadata of the hits.
+        distances (list): The distances of the hits.
+
+    Returns:
+        list[chunker_model.QueryResult]: One QueryResult per hit.
+    """
+    query_results = []
+    for doc, meta, distance in zip(documents, metadatas, distances):
+        meta = meta if isinstance(meta, dict) else {}
+        start = int(meta.get("start", 0))
+        aliases = json.loads(meta["aliases"]) if meta.get("aliases") else None
+        query_results.append(
+            chunker_model.QueryResult(
+                chunk=doc,
+                path=str(meta.get("path", "")),
+                start=start,
+                end=int(meta.get("end", start)),
+                distance=distance,
+                aliases=aliases or None,
+            )
+        )
+    return query_results
 
 
 async def query_chunks_core(
@@ -8,78 +170,317 @@ async def query_chunks_core(
     config: chunker_model.QueryChunksConfig,
     logger: logging.Logger,
     n_results: int = 10,
+    client_pool: chunker_model.ClientPool | None = None,
+    query_cache: chunker_model.QueryCache | None = None,
 ) -> list[chunker_model.QueryResult]:
     """
     Query chunks from a ChromaDB collection and return a list of QueryResult objects.
 
-    Each QueryResult contains a single chunk and its associated file path.
+    Each QueryResult contains a single chunk and its associated file path. When
+    `config.rerank` is set, `config.rerank_factor` times as many candidates are
+    fetched and reranked client-side. When `config.expand_lines` or
+    `config.expand_to_definition` is set, each hit is replaced by the code
+    around it. When `config.merge_results` is set, hits are merged into one
+    window per file region.
 
     Args:
         query_text (str): The text to query for.
         config (chunker_model.ChunkAndVectoriseConfig): Configuration object.
         logger (logging.Logger): Logger instance.
         n_results (int): Number of results to return from the query (default: 10).
+        client_pool (chunker_model.ClientPool | None): Shared Chroma clients; when
+            None a new client is connected.
+        query_cache (chunker_model.QueryCache | None): Results of recent queries,
+            reused for the same or a similar query, see `query_chunks_batch_core`.
+
+    Returns:
+        list[chunker_model.QueryResult]: List of QueryResult objects, one per hit.
+    """
+    results = await query_chunks_batch_core(
+        query_texts=[query_text],
+        config=config,
+        logger=logger,
+        n_results=n_results,
+        client_pool=client_pool,
+        query_cache=query_cache,
+    )
+    return results[0]
+
+
+async def query_chunks_batch_core(
+    query_texts: list[str],
+    config: chunker_model.QueryChunksConfig,
+    logger: logging.Logger,
+    n_results: int = 10,
+    client_pool: chunker_model.ClientPool | None = None,
+    query_cache: chunker_model.QueryCache | None = None,
+) -> list[list[chunker_model.QueryResult]]:
+    """
+    Answer several queries with one collection.query() call.
+
+    The queries are embedded together and, when answered from a snapshot,
+    searched with a single matrix multiply. Reranking, expansion and merging
+    apply per query, as in `query_chunks_core`.
+
+    With a `query_cache`, a query with the text of a recent query, or an
+    embedding within the cache's cosine threshold of one, gets that query's
+    results without querying the collection. Queries are then embedded
+    client-side, and their results cached unless some shard of a sharded
+    collection failed to answer. The cache is checked against the
+    collection's update marker in `config.state_dir` first, so runs of other
+    processes invalidate it too.
+
+    Args:
+        query_texts (list[str]): The texts to query for.
+        config (chunker_model.QueryChunksConfig): Configuration object.
+        logger (logging.Logger): Logger instance.
+        n_results (int): Number of results per query (default: 10).
+        client_pool (chunker_model.ClientPool | None): Shared Chroma clients; when
+            None a new client is connected.
+        query_cache (chunker_model.QueryCache | None): Results of recent queries.
 
     Returns:
-        list[chunker_model.QueryResult]: List of QueryResult objects, each with one chunk and one path.
+        list[list[chunker_model.QueryResult]]: The hits of each query, in the
+        order of `query_texts`.
     """
+    if not query_texts:
+        return []
     if n_results < 1:
         logger.warning("n_results < 1; setting n_results to 1.")
         n_results = 1
+    fetch_n_results = (
+        n_results * max(1, config.rerank_factor) if config.rerank else n_results
+    )
+    inc_counter("chunker_queries_total", value=len(query_texts))
 
-    try:
-        client = await chromadb.AsyncHttpClient(
-            host=config.chroma_host,
-            port=config.chroma_port,
+    batch_results: list[list[chunker_model.QueryResult] | None] = [None] * len(
+        query_texts
+    )
+    use_cache = query_cache is not None and query_cache.max_entries > 0
+    if use_cache:
+        sync_query_cache(
+            query_cache,
+            config.collection_name,
+            collection_update_token(
+                config.state_dir or default_state_dir(config.collection_name)
+            ),
         )
-        collection = await client.get_or_create_collection(config.collection_name)
-    except Exception as e:
-        logger.error(f"Failed to connect to ChromaDB or get collection: {e}")
-        raise
+        scope = query_cache_scope(config, n_results)
+        generation = cache_generation(query_cache, config.collection_name)
+        batch_results = [lookup_exact(query_cache, scope, text) for text in query_texts]
+    pending = [row for row, cached in enumerate(batch_results) if cached is None]
+    if not pending:
+        return batch_results
+
+    pending_embeddings = None
+    if use_cache:
+        with time_stage("embed"):
+            pending_embeddings = await asyncio.to_thread(
+                _embed_query_texts,
+                [query_texts[row] for row in pending],
+                config.embedding_transform,
+            )
+        misses = []
+        for row, embedding in zip(pending, pending_embeddings):
+            batch_results[row] = lookup_similar(query_cache, scope, embedding)
+            if batch_results[row] is None:
+                misses.append((row, embedding))
+        if not misses:
+            return batch_results
+        pending = [row for row, _ in misses]
+        pending_embeddings = [embedding for _, embedding in misses]
+    pending_texts = [query_texts[row] for row in pending]
+
+    collection = await _get_query_collection(config, logger, client_pool)
 
     try:
-        results = await collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            include=["documents", "metadatas", "distances"],
-        )
+        with time_stage("query"), time_chroma_call("query"):
+            if pending_embeddings is None and config.embedding_transform is not None:
+                pending_embeddings = await asyncio.to_thread(
+                    _embed_queries, pending_texts, config.embedding_transform
+                )
+            if pending_embeddings is not None:
+                results = await collection.query(
+                    query_embeddings=pending_embeddings,
+                    n_results=fetch_n_results,
+                    include=["documents", "metadatas", "distances"],
+                )
+            else:
+                results = await collection.query(
+                    query_texts=pending_texts,
+                    n_results=fetch_n_results,
+                    include=["documents", "metadatas", "distances"],
+                )
     except Exception as e:
         logger.error(f"Query failed: {e}")
         raise
 
-    query_results = []
     documents = results.get("documents")
     metadatas = results.get("metadatas")
     distances = results.get("distances")
-    if (
-        documents
-        and isinstance(documents, list)
-        and len(documents) > 0
-        and isinstance(documents[0], list)
-        and metadatas
-        and isinstance(metadatas, list)
-        and len(metadatas) > 0
-        and isinstance(metadatas[0], list)
-        and distances
-        and isinstance(distances, list)
-        and len(distances) > 0
-        and isinstance(distances[0], list)
-    ):
-        for doc, meta, distance in zip(documents[0], metadatas[0], distances[0]):
-            chunk = [doc]
-            path: list[str] = [
-                str(meta.get("path", "")) if isinstance(meta, dict) else ""
-            ]
-            query_results.append(
-                chunker_model.QueryResult(
-                    chunks=chunk,
-                    path=path,
-                    distances=[distance],
-                )
+    pending_results = []
+    for row in range(len(pending_texts)):
+        if (
+            isinstance(documents, list)
+            and len(documents) > row
+            and isinstance(documents[row], list)
+            and isinstance(metadatas, list)
+            and len(metadatas) > row
+            and isinstance(metadatas[row], list)
+            and isinstance(distances, list)
+            and len(distances) > row
+            and isinstance(distances[row], list)
+        ):
+            query_results = _parse_query_row(
+                documents[row], metadatas[row], distances[row]
+            )
+        else:
+            logger.warning(
+                f"QueryResult missing or malformed: no documents {len(documents) if documents else 0}, metadatas {len(metadatas) if metadatas else 0}, or distances {len(distances) if distances else 0} found."
+            )
+            query_results = []
+
+        if config.rerank:
+            query_results = await rerank_with_deadline(
+                query_text=pending_texts[row],
+                results=query_results,
+                n_results=n_results,
+                config=config,
+                logger=logger,
+            )
+        pending_results.append(query_results)
+
+    if config.expand_lines > 0 or config.expand_to_definition:
+        with time_stage("expand"):
+            expanded = await asyncio.to_thread(
+                expand_query_results,
+                pending_results,
+                config.collection_name,
+                config.state_dir or default_state_dir(config.collection_name),
+                max(0, config.expand_lines),
+                config.expand_to_definition,
             )
+        if isinstance(expanded, chunker_model.SymbolIndexError):
+            logger.warning(f"Hits are not expanded: {expanded.message}")
+        else:
+            pending_results = expanded
+
+    if config.merge_results:
+        pending_results = [
+            merge_query_results(results=query_results, token_budget=config.token_budget)
+            for query_results in pending_results
+        ]
+    complete = not results.get("failed_shards")
+    for index, row in enumerate(pending):
+        batch_results[row] = pending_results[index]
+        if use_cache and complete:
+            store_query_results(
+                query_cache,
+                collection_name=config.collection_name,
+                scope=scope,
+                text=query_texts[row],
+                vector=pending_embeddings[index],
+                results=pending_results[index],
+                generation=generation,
+            )
+    return batch_results
+
+
+async def query_collections_core(
+    query_text: str,
+    config: chunker_model.QueryChunksConfig,
+    collection_names: list[str],
+    logger: logging.Logger,
+    n_results: int = 10,
+    client_pool: chunker_model.ClientPool | None = None,
+    query_cache: chunker_model.QueryCache | None = None,
+) -> list[chunker_model.QueryResult]:
+    """
+    Query several collections concurrently and merge the hits by distance.
+
+    Each collection is queried as by `query_chunks_core`, so reranking, merging
+    and the token budget apply per collection. Hits are tagged with their
+    collection, and ordered by rerank score when every hit has one.
+
+    Args:
+        query_text (str): The text to query for.
+        config (chunker_model.QueryChunksConfig): Configuration object; its
+            `collection_name` is replaced by each of `collection_names`.
+        collection_names (list[str]): The collections to query.
+        logger (logging.Logger): Logger instance.
+        n_results (int): Number of results to return in total (default: 10).
+        client_pool (chunker_model.ClientPool | None): Shared Chroma clients.
+        query_cache (chunker_model.QueryCache | None): Results of recent queries.
+
+    Returns:
+        list[chunker_model.QueryResult]: The closest hits across all collections.
+    """
+    per_collection = await asyncio.gather(
+        *[
+            query_chunks_core(
+                query_text=query_text,
+                config=dataclasses.replace(config, collection_name=name),
+                logger=logger,
+                n_results=n_results,
+                client_pool=client_pool,
+                query_cache=query_cache,
+            )
+            for name in collection_names
+        ]
+    )
+    merged = [
+        result.model_copy(update={"collection": name})
+        for name, results in zip(collection_names, per_collection)
+        for result in results
+    ]
+    if merged and all(result.score is not None for result in merged):
+        merged.sort(key=lambda result: -result.score)
     else:
-        logger.warning(
-            f"QueryResult missing or malformed: no documents {len(documents) if documents else 0}, metadatas {len(metadatas) if metadatas else 0}, or distances {len(distances) if distances else 0} found."
-        )
+        merged.sort(key=lambda result: result.distance)
+    return merged[:n_results]
 
-    return query_results
+
+def build_query_response(
+    results: list[chunker_model.QueryResult],
+    include_text: bool = True,
+) -> chunker_model.QueryResponse:
+    """
+    Encode query results in the compact, columnar QueryResponse format.
+
+    Args:
+        results (list[chunker_model.QueryResult]): The query results.
+        include_text (bool): Include the chunk texts; when False only paths,
+            line ranges and distances are returned (default: True).
+
+    Returns:
+        chunker_model.QueryResponse: The columnar response.
+    """
+    path_ids: dict[str, int] = {}
+    path_index = []
+    for r in results:
+        path_index.append(path_ids.setdefault(r.path, len(path_ids)))
+
+    collection_ids: dict[str, int] = {}
+    collection_index = None
+    if any(r.collection is not None for r in results):
+        collection_index = [
+            collection_ids.setdefault(r.collection or "", len(collection_ids))
+            for r in results
+        ]
+
+    return chunker_model.QueryResponse(
+        paths=list(path_ids),
+        path_index=path_index,
+        start=[r.start for r in results],
+        end=[r.end for r in results],
+        distances=[r.distance for r in results],
+        chunks=[r.chunk for r in results] if include_text else None,
+        collections=list(collection_ids) if collection_index is not None else None,
+        collection_index=collection_index,
+        aliases={idx: r.aliases for idx, r in enumerate(results) if r.aliases} or None,
+        scores=(
+            [r.score for r in results]
+            if results and all(r.score is not None for r in results)
+            else None
+        ),
+    )
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from chunker_src import model as chunker_model
+from chunker_src.metrics import inc_counter, time_stage
+
+LEXICAL_WEIGHT = 0.5
+CROSS_ENCODER_BUDGET = 0.8
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+_SUBWORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def _terms(text: str) -> set[str]:
+    """
+    Split a text into lowercase identifiers and their camelCase and snake_case parts.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        set[str]: The distinct terms.
+    """
+    terms = set()
+    for word in _WORD_PATTERN.findall(text):
+        terms.add(word.lower())
+        terms.update(part.lower() for part in _SUBWORD_PATTERN.findall(word))
+    return terms
+
+
+def lexical_scores(query_text: str, chunks: list[str]) -> list[float]:
+    """
+    Score chunks by the IDF-weighted share of query terms they contain.
+
+    Query terms are matched as case-insensitive substrings, so 'user' matches
+    both `user_id` and `loadUser`. Document frequencies are taken over the
+    candidates themselves, so terms that every candidate shares count for little.
+
+    Args:
+        query_text (str): The query.
+        chunks (list[str]): The candidate chunks.
+
+    Returns:
+        list[float]: One score between 0 and 1 per chunk.
+    """
+    query_terms = _terms(query_text)
+    if not query_terms or not chunks:
+        return [0.0] * len(chunks)
+    lowered = [chunk.lower() for chunk in chunks]
+    chunk_terms = [{term for term in query_terms if term in text} for text in lowered]
+    weights = {
+        term: math.log(1 + len(chunks) / (1 + sum(term in terms for terms in chunk_terms)))
+        for term in query_terms
+    }
+    total = sum(weights.values())
+    return [sum(weights[term] for term in terms) / total for terms in chunk_terms]
+
+
+@lru_cache(maxsize=2)
+def load_cross_encoder(model_dir: Path) -> chunker_model.CrossEncoder:
+    """
+    Load an ONNX cross-encoder for CPU inference.
+
+    Args:
+        model_dir (Path): Directory with `model.onnx` and `tokenizer.json`.
+
+    Returns:
+        chunker_model.CrossEncoder: The loaded model, cached per directory.
+    """
+    import onnxruntime
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=512)
+    tokenizer.enable_padding()
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = 1
+    session = onnxruntime.InferenceSession(
+        str(model_dir / "model.onnx"),
+        sess_options=options,
+        providers=["CPUExecutionProvider"],
+    )
+    return chunker_model.CrossEncoder(
+        session=session,
+        tokenizer=tokenizer,
+        input_names=[model_input.name for model_input in session.get_inputs()],
+    )
+
+
+def cross_encoder_scores(
+    cross_encoder: chunker_model.CrossEncoder,
+    query_text: str,
+    chunks: list[str],
+    batch_size: int,
+    deadline: float,
+) -> list[float] | None:
+    """
+    Score (query, chunk) pairs with a cross-encoder, batch by batch.
+
+    Args:
+        cross_encoder (chunker_model.CrossEncoder): The model.
+        query_text (str): The query.
+        chunks (list[str]): The candidate chunks.
+        batch_size (int): Pairs scored per inference call.
+        deadline (float): `time.monotonic()` value after which scoring stops.
+
+    Returns:
+        list[float] | None: One score per chunk, or None if the deadline passed.
+    """
+    scores: list[float] = []
+    for offset in range(0, len(chunks), batch_size):
+        if time.monotonic() >= deadline:
+            return None
+        encodings = cross_encoder.tokenizer.encode_batch(
+            [(query_text, chunk) for chunk in chunks[offset : offset + batch_size]]
+        )
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = cross_encoder.session.run(
+            None, {name: inputs[name] for name in cross_encoder.input_names}
+        )[0]
+        scores.extend(float(row[-1]) for row in np.asarray(logits).reshape(len(encodings), -1))
+    return scores
+
+
+def rerank_results(
+    query_text: str,
+    results: list[chunker_model.QueryResult],
+    n_results: int,
+    config: chunker_model.QueryChunksConfig,
+    deadline: float,
+    logger: logging.Logger,
+) -> list[chunker_model.QueryResult]:
+    """
+    Rerank candidates by lexical overlap blended with vector similarity, then
+    by the cross-encoder if one is configured and finishes before the deadline.
+
+    Args:
+        query_text (str): The query.
+        results (list[chunker_model.QueryResult]): Candidates in vector order.
+        n_results (int): Number of results to keep.
+        config (chunker_model.QueryChunksConfig): Configuration of the query.
+        deadline (float): `time.monotonic()` value after which the cross-encoder
+            stage is abandoned.
+        logger (logging.Logger): Logger instance.
+
+    Returns:
+        list[chunker_model.QueryResult]: The best `n_results` candidates with
+        their scores, best first.
+    """
+    chunks = [result.chunk for result in results]
+    scores = [
+        LEXICAL_WEIGHT * lexical + (1 - LEXICAL_WEIGHT) / (1 + result.distance)
+        for lexical, result in zip(lexical_scores(query_text, chunks), results)
+    ]
+
+    if config.rerank_model is not None:
+        try:
+            cross_encoder = load_cross_encoder(config.rerank_model)
+            model_scores = cross_encoder_scores(
+                cross_encoder,
+                query_text,
+                chunks,
+                batch_size=config.rerank_batch_size,
+                deadline=deadline,
+            )
+        except Exception as e:
+            logger.warning(f"Cross-encoder rerank failed, using the lexical rerank: {e}")
+            model_scores = None
+        if model_scores is not None:
+            scores = model_scores
+
+    order = sorted(range(len(results)), key=lambda idx: -scores[idx])
+    return [
+        results[idx].model_copy(update={"score": scores[idx]})
+        for idx in order[:n_results]
+    ]
+
+
+async def rerank_with_deadline(
+    query_text: str,
+    results: list[chunker_model.QueryResult],
+    n_results: int,
+    config: chunker_model.QueryChunksConfig,
+    logger: logging.Logger,
+) -> list[chunker_model.QueryResult]:
+    """
+    Rerank candidates off the event loop within `config.rerank_timeout`.
+
+    The cross-encoder stops starting batches after `CROSS_ENCODER_BUDGET` of the
+    cap, so the lexical ranking is usually still in time. When the cap is hit,
+    the best `n_results` candidates are returned in vector order and without
+    scores.
+
+    Args:
+        query_text (str): The query.
+        results (list[chunker_model.QueryResult]): Candidates in vector order.
+        n_results (int): Number of results to keep.
+        config (chunker_model.QueryChunksConfig): Configuration of the query.
+        logger (logging.Logger): Logger instance.
+
+    Returns:
+        list[chunker_model.QueryResult]: The best `n_results` candidates.
+    """
+    deadline = time.monotonic() + CROSS_ENCODER_BUDGET * config.rerank_timeout
+    with time_stage("rerank"):
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(
+                    rerank_results, query_text, results, n_results, config, deadline, logger
+                ),
+                timeout=config.rerank_timeout,
+            )
+        except TimeoutError:
+            inc_counter("chunker_rerank_fallbacks_total")
+            logger.warning(
+                f"Rerank exceeded {config.rerank_timeout}s; using vector order."
+            )
+            return results[:n_results]
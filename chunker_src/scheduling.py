@@ -0,0 +1,120 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from chunker_src import model as chunker_model
+
+
+def project_lock(scheduler: chunker_model.FairScheduler, key: str) -> asyncio.Lock:
+    """
+    Return the lock serialising the ingestion jobs of a project.
+
+    Args:
+        scheduler (chunker_model.FairScheduler): The scheduler.
+        key (str): The project name.
+
+    Returns:
+        asyncio.Lock: The project's lock.
+    """
+    return scheduler.project_locks.setdefault(key, asyncio.Lock())
+
+
+def _release_slot(scheduler: chunker_model.FairScheduler) -> None:
+    """
+    Hand a released slot to the next project in turn, or return it to the pool.
+
+    Args:
+        scheduler (chunker_model.FairScheduler): The scheduler.
+    """
+    while scheduler.waiters:
+        key, queue = scheduler.waiters.popitem(last=False)
+        while queue:
+            waiter = queue.popleft()
+            if not waiter.done():
+                if queue:
+                    scheduler.waiters[key] = queue
+                waiter.set_result(None)
+                return
+    scheduler.active -= 1
+
+
+@asynccontextmanager
+async def fair_slot(
+    scheduler: chunker_model.FairScheduler | None, key: str
+) -> AsyncIterator[None]:
+    """
+    Hold one file slot of the scheduler while processing a file.
+
+    Slots are handed out round-robin across projects, so a large project cannot
+    starve a small one. Without a scheduler this is a no-op.
+
+    Args:
+        scheduler (chunker_model.FairScheduler | None): The scheduler, if any.
+        key (str): The project name.
+    """
+    if scheduler is None:
+        yield
+        return
+
+    if scheduler.active < scheduler.slots and not scheduler.waiters:
+        scheduler.active += 1
+    else:
+        waiter = asyncio.get_running_loop().create_future()
+        scheduler.waiters.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                _release_slot(scheduler)
+            else:
+                queue = scheduler.waiters.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del scheduler.waiters[key]
+            raise
+
+    try:
+        yield
+    finally:
+        _release_slot(scheduler)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+@asynccontextmanager
+async def path_turn(
+    sequencer: chunker_model.PathSequencer, key: tuple[str, str]
+) -> AsyncIterator[None]:
+    """
+    Wait for the earlier writers of a path, then hold the path while writing it.
+
+    Writers of a path run one after another in the order they entered, while
+    writers of other paths are not held up. A writer cancelled while waiting
+    still hands over in order: its successor waits for its predecessor.
+
+    Args:
+        sequencer (chunker_model.PathSequencer): The sequencer.
+        key (tuple[str, str]): The collection name and the file's path.
+    """
+    previous = sequencer.tails.get(key)
+    turn = asyncio.get_running_loop().create_future()
+    sequencer.tails[key] = turn
+
+    def forget(done: asyncio.Future) -> None:
+        if sequencer.tails.get(key) is done:
+            del sequencer.tails[key]
+
+    turn.add_done_callback(forget)
+    try:
+        if previous is not None and not previous.done():
+            await asyncio.shield(previous)
+        yield
+    finally:
+        if previous is None or previous.done():
+            _resolve(turn)
+        else:
+            previous.add_done_callback(lambda _: _resolve(turn))
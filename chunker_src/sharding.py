@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ROW_KEYS = ("ids", "documents", "metadatas", "distances", "embeddings", "uris")
+
+
+def parse_endpoint(endpoint: str) -> tuple[str, int]:
+    """
+    Parse a 'host:port' Chroma endpoint.
+
+    Args:
+        endpoint (str): The endpoint, e.g. 'localhost:8001'.
+
+    Returns:
+        tuple[str, int]: The host and port.
+
+    Raises:
+        ValueError: If the endpoint has no valid port.
+    """
+    host, sep, port = endpoint.strip().rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise ValueError(f"Invalid Chroma endpoint {endpoint!r}; expected 'host:port'.")
+    return host, int(port)
+
+
+def shard_for_path(path: str, num_shards: int) -> int:
+    """
+    Pick the shard of a file by a stable hash of its path.
+
+    Args:
+        path (str): The file path stored in the chunk metadata.
+        num_shards (int): The number of shards.
+
+    Returns:
+        int: The shard index.
+    """
+    digest = hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+def _path_of_where(where: dict | None) -> str | None:
+    """
+    Return the path a `where` filter pins, if it is a plain path equality.
+
+    Args:
+        where (dict | None): The Chroma where filter.
+
+    Returns:
+        str | None: The path, or None if the filter spans several paths.
+    """
+    if not where or set(where) != {"path"}:
+        return None
+    condition = where["path"]
+    if isinstance(condition, dict):
+        condition = condition.get("$eq") if set(condition) == {"$eq"} else None
+    return condition if isinstance(condition, str) else None
+
+
+def _merge_get_results(results: list[dict]) -> dict:
+    """
+    Concatenate the results of `collection.get` across shards.
+
+    Args:
+        results (list[dict]): The per-shard results.
+
+    Returns:
+        dict: A single result in the same format.
+    """
+    merged: dict[str, Any] = {}
+    for result in results:
+        for key, values in result.items():
+            if key not in ROW_KEYS or values is None:
+                merged.setdefault(key, values)
+                continue
+            existing = merged.get(key)
+            merged[key] = (existing if isinstance(existing, list) else []) + list(values)
+    return merged
+
+
+def _merge_query_results(results: list[dict], n_results: int) -> dict:
+    """
+    Merge per-shard `collection.query` results into a global top-k by distance.
+
+    Args:
+        results (list[dict]): The per-shard results.
+        n_results (int): Number of results to keep per query.
+
+    Returns:
+        dict: A single result in the Chroma query format.
+
+    Raises:
+        ValueError: If a shard's result has rows but no distances to rank them by.
+    """
+    for result in results:
+        if result.get("ids") and result.get("distances") is None:
+            raise ValueError("Query results must include distances to be merged.")
+    list_keys = [
+        key
+        for key in ROW_KEYS
+        if any(result.get(key) is not None for result in results)
+    ]
+    num_queries = max((len(result.get("ids") or []) for result in results), default=0)
+    merged: dict[str, Any] = {key: [] for key in list_keys}
+    merged["included"] = results[0].get("included") if results else None
+    for q in range(num_queries):
+        rows = []
+        for result in results:
+            ids = result.get("ids") or []
+            if q >= len(ids):
+                continue
+            distances = result["distances"][q]
+            for idx in range(len(ids[q])):
+                row = {
+                    key: result[key][q][idx]
+                    for key in list_keys
+                    if result.get(key) is not None and result[key][q] is not None
+                }
+                row["__distance"] = distances[idx]
+                rows.append(row)
+        rows.sort(key=lambda row: row["__distance"])
+        rows = rows[:n_results]
+        for key in list_keys:
+            merged[key].append([row.get(key) for row in rows])
+    return merged
+
+
+class ShardedCollection:
+    """
+    A collection spread over several Chroma nodes, sharded by file path.
+
+    Exposes the subset of `AsyncCollection` used by chunker. Writes and
+    path-pinned reads go to the shard owning the path; other reads are fanned
+    out, and queries are scattered to every shard with a per-shard timeout and
+    merged by distance; distances are fetched even when `include` leaves them
+    out. A query result lists the endpoints of the shards that failed or timed
+    out under `failed_shards`.
+    """
+
+    def __init__(self, shards: list[Any], endpoints: list[str], timeout: float) -> None:
+        self.shards = shards
+        self.endpoints = endpoints
+        self.timeout = timeout
+
+    @property
+    def name(self) -> str:
+        return self.shards[0].name
+
+    async def _fan_out(self, operation: str, **kwargs: Any) -> list[Any]:
+        return await asyncio.gather(
+            *[getattr(shard, operation)(**kwargs) for shard in self.shards]
+        )
+
+    async def count(self) -> int:
+        return sum(await self._fan_out("count"))
+
+    async def get(self, where: dict | None = None, **kwargs: Any) -> dict:
+        path = _path_of_where(where)
+        if path is not None:
+            shard = self.shards[shard_for_path(path, len(self.shards))]
+            return await shard.get(where=where, **kwargs)
+        if kwargs.get("limit") is not None or kwargs.get("offset") is not None:
+            raise ValueError("Paged get() is not supported across shards.")
+        return _merge_get_results(await self._fan_out("get", where=where, **kwargs))
+
+    async def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        path = _path_of_where(where)
+        if path is not None:
+            shard = self.shards[shard_for_path(path, len(self.shards))]
+            await shard.delete(ids=ids, where=where)
+            return
+        await self._fan_out("delete", ids=ids, where=where)
+
+    async def _route_by_path(
+        self, operation: str, ids: list[str], metadatas: list[dict], **columns: Any
+    ) -> None:
+        groups: dict[int, list[int]] = {}
+        for idx, meta in enumerate(metadatas):
+            shard = shard_for_path(str(meta.get("path", "")), len(self.shards))
+            groups.setdefault(shard, []).append(idx)
+
+        calls = []
+        for shard, indices in groups.items():
+            shard_columns = {
+                key: [values[i] for i in indices]
+                for key, values in columns.items()
+                if values is not None
+            }
+            calls.append(
+                getattr(self.shards[shard], operation)(
+                    ids=[ids[i] for i in indices],
+                    metadatas=[metadatas[i] for i in indices],
+                    **shard_columns,
+                )
+            )
+        await asyncio.gather(*calls)
+
+    async def add(
+        self,
+        ids: list[str],
+        metadatas: list[dict],
+        documents: list[str] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        await self._route_by_path(
+            "add", ids, metadatas, documents=documents, embeddings=embeddings
+        )
+
+    async def upsert(
+        self,
+        ids: list[str],
+        metadatas: list[dict],
+        documents: list[str] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        await self._route_by_path(
+            "upsert", ids, metadatas, documents=documents, embeddings=embeddings
+        )
+
+    async def update(self, ids: list[str], metadatas: list[dict], **kwargs: Any) -> None:
+        await self._route_by_path("update", ids, metadatas, **kwargs)
+
+    async def query(self, n_results: int = 10, **kwargs: Any) -> dict:
+        include = kwargs.get("include")
+        if include is not None and "distances" not in include:
+            kwargs["include"] = [*include, "distances"]
+        outcomes = await asyncio.gather(
+            *[
+                asyncio.wait_for(
+                    shard.query(n_results=n_results, **kwargs), timeout=self.timeout
+                )
+                for shard in self.shards
+            ],
+            return_exceptions=True,
+        )
+        results = []
+        failed = []
+        for endpoint, outcome in zip(self.endpoints, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"Shard {endpoint} failed or timed out: {outcome!r}")
+                failed.append(endpoint)
+                continue
+            results.append(outcome)
+        if not results:
+            raise RuntimeError("All shards failed or timed out.")
+        merged = _merge_query_results(results, n_results)
+        merged["failed_shards"] = failed
+        return merged
+
+
+class ShardedClient:
+    """
+    A set of Chroma clients, one per shard, exposing the client calls chunker uses.
+    """
+
+    def __init__(self, clients: list[Any], endpoints: list[str], timeout: float) -> None:
+        self.clients = clients
+        self.endpoints = endpoints
+        self.timeout = timeout
+
+    async def _collection(self, operation: str, name: str, **kwargs: Any) -> ShardedCollection:
+        shards = await asyncio.gather(
+            *[getattr(client, operation)(name, **kwargs) for client in self.clients]
+        )
+        return ShardedCollection(
+            shards=list(shards), endpoints=self.endpoints, timeout=self.timeout
+        )
+
+    async def get_or_create_collection(self, name: str, **kwargs: Any) -> ShardedCollection:
+        return await self._collection("get_or_create_collection", name, **kwargs)
+
+    async def get_collection(self, name: str, **kwargs: Any) -> ShardedCollection:
+        return await self._collection("get_collection", name, **kwargs)
+
+    async def get_max_batch_size(self) -> int:
+        return min(
+            await asyncio.gather(*[client.get_max_batch_size() for client in self.clients])
+        )
@@ -0,0 +1,116 @@
+import logging
+from pathlib import Path
+from chunker_src.local_store import LocalClient, LocalCollection
+from chunker_src.storage import StorageCollection
+
+SNAPSHOT_FETCH_SIZE = 1000
+
+_snapshot_clients: dict[Path, LocalClient] = {}
+
+
+def _snapshot_client(snapshot_dir: Path) -> LocalClient:
+    """
+    Return the process-wide client of a snapshot directory, so snapshots stay
+    mapped between queries.
+
+    Args:
+        snapshot_dir (Path): The snapshot directory.
+
+    Returns:
+        LocalClient: The client.
+    """
+    client = _snapshot_clients.get(snapshot_dir)
+    if client is None:
+        client = LocalClient(snapshot_dir)
+        _snapshot_clients[snapshot_dir] = client
+    return client
+
+
+async def open_snapshot(
+    snapshot_dir: Path, collection_name: str
+) -> LocalCollection | None:
+    """
+    Open the snapshot of a collection.
+
+    Args:
+        snapshot_dir (Path): The snapshot directory.
+        collection_name (str): The collection.
+
+    Returns:
+        LocalCollection | None: The snapshot, or None if it has not been built
+        or is empty.
+    """
+    try:
+        snapshot = await _snapshot_client(snapshot_dir).get_collection(collection_name)
+    except ValueError:
+        return None
+    if await snapshot.count() == 0:
+        return None
+    return snapshot
+
+
+async def drop_snapshot(snapshot_dir: Path, collection_name: str) -> None:
+    """
+    Delete the snapshot of a collection.
+
+    Args:
+        snapshot_dir (Path): The snapshot directory.
+        collection_name (str): The collection.
+    """
+    await _snapshot_client(snapshot_dir).delete_collection(collection_name)
+
+
+async def refresh_snapshot(
+    source: StorageCollection,
+    snapshot_dir: Path,
+    collection_name: str,
+    logger: logging.Logger,
+    rebuild: bool = False,
+) -> LocalCollection:
+    """
+    Bring the snapshot of a collection up to date with the collection.
+
+    Chunk ids are never reused, so the snapshot is refreshed by id: records no
+    longer in the collection are dropped and new records are fetched with
+    their embeddings, `SNAPSHOT_FETCH_SIZE` at a time. Only the ids of the
+    collection are listed in full.
+
+    Args:
+        source (StorageCollection): The collection.
+        snapshot_dir (Path): The snapshot directory.
+        collection_name (str): Name of the collection.
+        logger (logging.Logger): Logger instance.
+        rebuild (bool): Drop the snapshot and fetch every record, which also
+            picks up metadata updated in place.
+
+    Returns:
+        LocalCollection: The refreshed snapshot.
+    """
+    client = _snapshot_client(snapshot_dir)
+    if rebuild:
+        await client.delete_collection(collection_name)
+    snapshot = await client.get_or_create_collection(collection_name)
+
+    source_ids = set((await source.get(include=[]))["ids"])
+    snapshot_ids = set((await snapshot.get(include=[]))["ids"])
+    stale = sorted(snapshot_ids - source_ids)
+    missing = sorted(source_ids - snapshot_ids)
+    if stale:
+        await snapshot.delete(ids=stale)
+    for offset in range(0, len(missing), SNAPSHOT_FETCH_SIZE):
+        records = await source.get(
+            ids=missing[offset : offset + SNAPSHOT_FETCH_SIZE],
+            include=["documents", "metadatas", "embeddings"],
+        )
+        if records["ids"]:
+            await snapshot.add(
+                ids=records["ids"],
+                documents=records["documents"],
+                metadatas=records["metadatas"],
+                embeddings=records["embeddings"],
+            )
+    logger.info(
+        f"Snapshot of {collection_name} refreshed: {len(missing)} added, "
+        f"{len(stale)} removed."
+    )
+    return snapshot
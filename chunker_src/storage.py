@@ -0,0 +1,75 @@
+from typing import Any, Protocol
+
+
+class StorageCollection(Protocol):
+    """
+    The collection calls chunker makes on a vector store.
+
+    This is the subset of Chroma's `AsyncCollection` chunker uses, with the same
+    arguments and result format. Chroma collections, sharded collections and
+    local collections implement it.
+    """
+
+    async def add(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None: ...
+
+    async def upsert(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None: ...
+
+    async def update(
+        self,
+        ids: list[str],
+        metadatas: list[dict] | None = None,
+        documents: list[str] | None = None,
+        embeddings: Any = None,
+    ) -> None: ...
+
+    async def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict: ...
+
+    async def delete(
+        self, ids: list[str] | None = None, where: dict | None = None
+    ) -> None: ...
+
+    async def query(
+        self,
+        query_texts: list[str] | None = None,
+        query_embeddings: Any = None,
+        n_results: int = 10,
+        where: dict | None = None,
+        include: list[str] | None = None,
+    ) -> dict: ...
+
+    async def count(self) -> int: ...
+
+
+class StorageClient(Protocol):
+    """
+    The client calls chunker makes on a vector store.
+
+    This is the subset of Chroma's `AsyncClientAPI` chunker uses.
+    """
+
+    async def get_or_create_collection(
+        self, name: str, **kwargs: Any
+    ) -> StorageCollection: ...
+
+    async def get_collection(self, name: str, **kwargs: Any) -> StorageCollection: ...
+
+    async def get_max_batch_size(self) -> int: ...
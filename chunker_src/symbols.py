@@ -0,0 +1,649 @@
+import ast
+import bisect
+import difflib
+import re
+import sqlite3
+from pathlib import Path
+import numpy as np
+from chunker_src import model as chunker_model
+from chunker_src.journal import default_state_dir
+
+FUZZY_CANDIDATES = 200
+FUZZY_CUTOFF = 0.6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbol (
+    name TEXT NOT NULL,
+    folded TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    qualified_folded TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbol_folded ON symbol (folded);
+CREATE INDEX IF NOT EXISTS symbol_qualified ON symbol (qualified_folded);
+CREATE INDEX IF NOT EXISTS symbol_path ON symbol (path);
+CREATE TABLE IF NOT EXISTS trigram (
+    gram TEXT NOT NULL,
+    folded TEXT NOT NULL,
+    PRIMARY KEY (gram, folded)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS source (
+    path TEXT PRIMARY KEY,
+    full_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    line_offsets BLOB NOT NULL
+);
+"""
+_OFFSET_DTYPE = np.dtype("<u4")
+
+_CLASS_PATTERN = re.compile(
+    r"^\s*(?:(?:export|default|public|private|protected|internal|abstract|final|"
+    r"sealed|open|data|static|pub(?:\([^)]*\))?)\s+)*"
+    r"(?:class|interface|enum|struct|trait|object|record|module|contract|message|service)"
+    r"\s+([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+_GO_TYPE_PATTERN = re.compile(r"^type\s+(\w+)\s+(?:struct|interface)\b", re.MULTILINE)
+_FUNCTION_PATTERNS: dict[str, list[re.Pattern]] = {
+    "python": [re.compile(r"^\s*(?:async\s+)?def\s+(\w+)", re.MULTILINE)],
+    "js": [
+        re.compile(
+            r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)",
+            re.MULTILINE,
+        ),
+        re.compile(
+            r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*"
+            r"(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)",
+            re.MULTILINE,
+        ),
+        re.compile(
+            r"^\s+(?:(?:static|async|get|set|public|private|protected|readonly|override)\s+)*"
+            r"([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::\s*[^{;]+)?\{",
+            re.MULTILINE,
+        ),
+    ],
+    "go": [re.compile(r"^func\s+(?:\(\s*\w*\s*\*?(\w+)[^)]*\)\s*)?(\w+)", re.MULTILINE)],
+    "rust": [
+        re.compile(
+            r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?"
+            r"(?:extern\s+\"[^\"]*\"\s+)?fn\s+(\w+)",
+            re.MULTILINE,
+        )
+    ],
+    "java": [
+        re.compile(
+            r"^\s+(?:(?:public|private|protected|static|final|abstract|synchronized|"
+            r"native|default|override|virtual|async|internal|sealed|extern|unsafe|new)\s+)+"
+            r"[\w<>\[\],.?]+(?:\s*<[^>]*>)?\s+(\w+)\s*\(",
+            re.MULTILINE,
+        )
+    ],
+    "kotlin": [re.compile(r"\bfun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(\w+)\s*\(")],
+    "scala": [re.compile(r"^\s*(?:(?:override|private|protected|final)\s+)*def\s+(\w+)", re.MULTILINE)],
+    "swift": [re.compile(r"\bfunc\s+(\w+)")],
+    "php": [re.compile(r"\bfunction\s+(\w+)\s*\(")],
+    "ruby": [re.compile(r"^\s*def\s+(?:self\.)?(\w+[?!=]?)", re.MULTILINE)],
+    "lua": [re.compile(r"^\s*(?:local\s+)?function\s+(?:[\w.]+[.:])?(\w+)", re.MULTILINE)],
+    "perl": [re.compile(r"^\s*sub\s+(\w+)", re.MULTILINE)],
+    "elixir": [re.compile(r"^\s*def(?:p|macro|macrop)?\s+(\w+[?!]?)", re.MULTILINE)],
+    "powershell": [re.compile(r"^\s*function\s+([\w-]+)", re.MULTILINE | re.IGNORECASE)],
+    "sol": [re.compile(r"^\s*(?:function|modifier|event)\s+(\w+)", re.MULTILINE)],
+    "proto": [re.compile(r"^\s*rpc\s+(\w+)", re.MULTILINE)],
+    "c": [
+        re.compile(
+            r"^(?!\s)(?!(?:if|for|while|switch|return|else|do)\b)"
+            r"(?:[\w*&<>,:~]+\s+)+\**(~?\w+(?:::~?\w+)*)\s*\([^;{]*\)\s*(?:const\s*)?(?:\{|$)",
+            re.MULTILINE,
+        )
+    ],
+}
+_FUNCTION_PATTERNS["ts"] = _FUNCTION_PATTERNS["js"]
+_FUNCTION_PATTERNS["csharp"] = _FUNCTION_PATTERNS["java"]
+_FUNCTION_PATTERNS["cpp"] = _FUNCTION_PATTERNS["c"]
+_BRACE_LANGUAGES = {
+    "js", "ts", "go", "rust", "java", "kotlin", "scala", "swift", "php", "sol",
+    "proto", "c", "cpp", "csharp", "powershell",
+}
+_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with", "else"}
+
+
+def _python_symbols(code: str, path: str) -> list[chunker_model.Symbol]:
+    """
+    Extract the classes, functions and methods of Python code with `ast`.
+
+    Args:
+        code (str): The source.
+        path (str): Path of the file, relative to the project.
+
+    Returns:
+        list[chunker_model.Symbol]: The definitions; a definition starts at its
+        first decorator.
+    """
+    symbols = []
+
+    def visit(node: ast.AST, prefix: str, in_class: bool) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                is_class = isinstance(child, ast.ClassDef)
+                qualified = f"{prefix}{child.name}"
+                start = min(
+                    [child.lineno] + [d.lineno for d in child.decorator_list]
+                )
+                symbols.append(
+                    chunker_model.Symbol(
+                        name=child.name,
+                        qualified_name=qualified,
+                        kind="class" if is_class else "method" if in_class else "function",
+                        path=path,
+                        start=start - 1,
+                        end=(child.end_lineno or child.lineno) - 1,
+                    )
+                )
+                visit(child, f"{qualified}.", is_class)
+
+    visit(ast.parse(code), "", False)
+    return symbols
+
+
+def _block_end(lines: list[str], start: int, column: int, braces: bool) -> int:
+    """
+    Find the last line of the definition starting at `lines[start]`.
+
+    With braces, the block ends where the first `{` after the name is closed.
+    Otherwise it ends before the next non-blank line indented no deeper than
+    the definition, including a closing `end` at the same indent.
+
+    Args:
+        lines (list[str]): The lines of the file.
+        start (int): The first line of the definition.
+        column (int): Column of the definition's name on its first line.
+        braces (bool): Whether the language delimits blocks with braces.
+
+    Returns:
+        int: The last line of the definition.
+    """
+    if braces:
+        depth = 0
+        opened = False
+        for idx in range(start, min(len(lines), start + 5000)):
+            text = lines[idx][column:] if idx == start else lines[idx]
+            if not opened and idx > start + 3 and "{" not in text:
+                return start
+            for char in text:
+                if char == "{":
+                    depth += 1
+                    opened = True
+                elif char == "}" and opened:
+                    depth -= 1
+                    if depth == 0:
+                        return idx
+            if not opened and text.rstrip().endswith(";"):
+                return idx
+        return start
+
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    end = start
+    for idx in range(start + 1, len(lines)):
+        stripped = lines[idx].strip()
+        if not stripped:
+            continue
+        if len(lines[idx]) - len(lines[idx].lstrip()) <= indent:
+            if stripped == "end" or stripped.startswith("end "):
+                return idx
+            break
+        end = idx
+    return end
+
+
+def _pattern_symbols(code: str, path: str, language: str) -> list[chunker_model.Symbol]:
+    """
+    Extract definitions with the regular expressions of a language.
+
+    Classes and functions are found by their declaration lines; functions inside
+    the line range of a class are methods, qualified with the class name. Go
+    methods are qualified with their receiver type.
+
+    Args:
+        code (str): The source.
+        path (str): Path of the file, relative to the project.
+        language (str): The language of the file.
+
+    Returns:
+        list[chunker_model.Symbol]: The definitions, in file order.
+    """
+    function_patterns = _FUNCTION_PATTERNS.get(language)
+    if function_patterns is None:
+        return []
+    lines = code.splitlines()
+    line_starts = [0]
+    for line in lines:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    def position(offset: int) -> tuple[int, int]:
+        line = max(0, bisect.bisect_right(line_starts, offset) - 1)
+        return line, offset - line_starts[line]
+
+    braces = language in _BRACE_LANGUAGES
+    found: dict[tuple[int, str], tuple[str, str | None, int]] = {}
+    class_pattern = _GO_TYPE_PATTERN if language == "go" else _CLASS_PATTERN
+    for match in class_pattern.finditer(code):
+        line, column = position(match.start(1))
+        found[(line, match.group(1))] = ("class", None, column)
+    for pattern in function_patterns:
+        for match in pattern.finditer(code):
+            name = match.group(match.lastindex)
+            if name in _KEYWORDS:
+                continue
+            receiver = match.group(1) if match.lastindex and match.lastindex > 1 else None
+            line, column = position(match.start(match.lastindex))
+            found.setdefault((line, name), ("function", receiver, column))
+
+    symbols = []
+    classes: list[chunker_model.Symbol] = []
+    for (line, name), (kind, receiver, column) in sorted(found.items()):
+        end = _block_end(lines, line, column, braces)
+        owner = receiver
+        if owner is None:
+            enclosing = [c for c in classes if c.start < line <= c.end]
+            owner = enclosing[-1].qualified_name if enclosing else None
+        symbol = chunker_model.Symbol(
+            name=name,
+            qualified_name=f"{owner}.{name}" if owner else name,
+            kind="method" if kind == "function" and owner else kind,
+            path=path,
+            start=line,
+            end=end,
+        )
+        if kind == "class":
+            classes.append(symbol)
+        symbols.append(symbol)
+    return symbols
+
+
+def extract_symbols(code: str, path: str, language: str) -> list[chunker_model.Symbol]:
+    """
+    Extract the definitions of a file: classes, functions and methods.
+
+    Python is parsed with `ast`; other languages are scanned with per-language
+    regular expressions, which find most definitions but can miss unusual
+    declarations.
+
+    Args:
+        code (str): The source.
+        path (str): Path of the file, relative to the project.
+        language (str): The language of the file.
+
+    Returns:
+        list[chunker_model.Symbol]: The definitions with 0-based, inclusive
+        line ranges.
+    """
+    if language == "python":
+        try:
+            return _python_symbols(code, path)
+        except (SyntaxError, ValueError):
+            return _pattern_symbols(code, path, "python")
+    return _pattern_symbols(code, path, language)
+
+
+def line_offsets(data: bytes) -> np.ndarray:
+    """
+    Compute the byte offset at which each line of a file starts.
+
+    Args:
+        data (bytes): The contents of the file.
+
+    Returns:
+        np.ndarray: Start offset of every line, followed by the size of the
+        file, so line `i` spans `offsets[i]:offsets[i + 1]`; `[0]` for an
+        empty file.
+    """
+    if not data:
+        return np.zeros(1, dtype=np.int64)
+    newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10) + 1
+    if len(newlines) and newlines[-1] == len(data):
+        newlines = newlines[:-1]
+    return np.concatenate(([0], newlines, [len(data)])).astype(np.int64)
+
+
+def _trigrams(folded: str) -> set[str]:
+    padded = f"^{folded}$"
+    return {padded[idx : idx + 3] for idx in range(max(1, len(padded) - 2))}
+
+
+def open_symbol_index(state_dir: Path) -> chunker_model.SymbolIndex:
+    """
+    Open the symbol index of a collection.
+
+    Args:
+        state_dir (Path): Directory holding local state of the collection.
+
+    Returns:
+        chunker_model.SymbolIndex: The open index.
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = state_dir / "symbols.sqlite"
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return chunker_model.SymbolIndex(path=path, connection=connection)
+
+
+def replace_symbols(
+    index: chunker_model.SymbolIndex,
+    path: str,
+    symbols: list[chunker_model.Symbol],
+    lines: chunker_model.SourceLines | None = None,
+) -> None:
+    """
+    Replace the definitions and line offsets recorded for a file.
+
+    Trigrams are only added for names no other file defines, as the names of
+    other files already have theirs. May be called from a worker thread; the
+    changes are committed every `index.commit_every` files and on close, so a
+    crashed run can lose the definitions of its last files.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+        path (str): Path of the file, relative to the project.
+        symbols (list[chunker_model.Symbol]): The file's definitions.
+        lines (chunker_model.SourceLines | None): The file's line offsets; when
+            None, or when the file is too large for 32-bit offsets, none are
+            kept for it.
+    """
+    with index.lock:
+        connection = index.connection
+        connection.execute("DELETE FROM source WHERE path = ?", (path,))
+        if lines is not None and lines.size <= np.iinfo(_OFFSET_DTYPE).max:
+            connection.execute(
+                "INSERT INTO source VALUES (?, ?, ?, ?, ?)",
+                (
+                    path,
+                    lines.full_path,
+                    lines.size,
+                    lines.mtime_ns,
+                    lines.offsets.astype(_OFFSET_DTYPE).tobytes(),
+                ),
+            )
+        old_names = {
+            row[0]
+            for row in connection.execute(
+                "SELECT folded FROM symbol WHERE path = ?", (path,)
+            )
+        }
+        connection.execute("DELETE FROM symbol WHERE path = ?", (path,))
+        new_names = {s.name.lower() for s in symbols}
+        added = list(new_names - old_names)
+        if added:
+            placeholders = ",".join("?" * len(added))
+            known = {
+                row[0]
+                for row in connection.execute(
+                    "SELECT DISTINCT folded FROM symbol "
+                    f"WHERE folded IN ({placeholders})",
+                    added,
+                )
+            }
+            connection.executemany(
+                "INSERT OR IGNORE INTO trigram VALUES (?, ?)",
+                [
+                    (gram, name)
+                    for name in added
+                    if name not in known
+                    for gram in _trigrams(name)
+                ],
+            )
+        connection.executemany(
+            "INSERT INTO symbol VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    s.name,
+                    s.name.lower(),
+                    s.qualified_name,
+                    s.qualified_name.lower(),
+                    s.kind,
+                    path,
+                    s.start,
+                    s.end,
+                )
+                for s in symbols
+            ],
+        )
+        for name in old_names - new_names:
+            if connection.execute(
+                "SELECT 1 FROM symbol WHERE folded = ? LIMIT 1", (name,)
+            ).fetchone() is None:
+                connection.execute("DELETE FROM trigram WHERE folded = ?", (name,))
+        index.pending += 1
+        if index.pending >= index.commit_every:
+            connection.commit()
+            index.pending = 0
+
+
+def load_source_lines(
+    index: chunker_model.SymbolIndex, path: str
+) -> chunker_model.SourceLines | None:
+    """
+    Return the line offsets recorded for a file when it was last chunked.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+        path (str): Path of the file, relative to the project.
+
+    Returns:
+        chunker_model.SourceLines | None: The offsets, or None if none are
+        recorded.
+    """
+    row = index.connection.execute(
+        "SELECT full_path, size, mtime_ns, line_offsets FROM source WHERE path = ?",
+        (path,),
+    ).fetchone()
+    if row is None:
+        return None
+    full_path, size, mtime_ns, offsets = row
+    return chunker_model.SourceLines(
+        full_path=full_path,
+        size=size,
+        mtime_ns=mtime_ns,
+        offsets=np.frombuffer(offsets, dtype=_OFFSET_DTYPE).astype(np.int64),
+    )
+
+
+def enclosing_symbol(
+    index: chunker_model.SymbolIndex, path: str, start: int, end: int
+) -> chunker_model.Symbol | None:
+    """
+    Find the innermost definition of a file enclosing a line range.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+        path (str): Path of the file, relative to the project.
+        start (int): First line of the range (0-based).
+        end (int): Last line of the range (0-based).
+
+    Returns:
+        chunker_model.Symbol | None: The definition, or None if no recorded
+        definition contains the whole range.
+    """
+    row = index.connection.execute(
+        "SELECT name, qualified_name, kind, start_line, end_line FROM symbol "
+        "WHERE path = ? AND start_line <= ? AND end_line >= ? "
+        "ORDER BY end_line - start_line LIMIT 1",
+        (path, start, end),
+    ).fetchone()
+    if row is None:
+        return None
+    name, qualified_name, kind, symbol_start, symbol_end = row
+    return chunker_model.Symbol(
+        name=name,
+        qualified_name=qualified_name,
+        kind=kind,
+        path=path,
+        start=symbol_start,
+        end=symbol_end,
+    )
+
+
+def close_symbol_index(index: chunker_model.SymbolIndex) -> None:
+    """
+    Close the symbol index.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+    """
+    with index.lock:
+        index.connection.commit()
+        index.connection.close()
+
+
+def _select_symbols(
+    index: chunker_model.SymbolIndex,
+    condition: str,
+    params: list,
+    kind: str | None,
+    limit: int,
+) -> list[chunker_model.Symbol]:
+    if kind is not None:
+        condition = f"({condition}) AND kind = ?"
+        params = [*params, kind]
+    rows = index.connection.execute(
+        "SELECT name, qualified_name, kind, path, start_line, end_line FROM symbol "
+        f"WHERE {condition} ORDER BY length(qualified_name), qualified_name, path, "
+        "start_line LIMIT ?",
+        [*params, limit],
+    )
+    return [
+        chunker_model.Symbol(
+            name=name,
+            qualified_name=qualified_name,
+            kind=symbol_kind,
+            path=path,
+            start=start,
+            end=end,
+        )
+        for name, qualified_name, symbol_kind, path, start, end in rows
+    ]
+
+
+def find_symbols(
+    index: chunker_model.SymbolIndex,
+    query: str,
+    limit: int = 20,
+    kind: str | None = None,
+    fuzzy: bool = True,
+) -> list[chunker_model.Symbol]:
+    """
+    Find definitions by name: exact matches, then prefix matches, then fuzzy ones.
+
+    Matching is case-insensitive. A query with a dot matches qualified names
+    such as `Class.method`. Exact and prefix matches are B-tree lookups on the
+    name index. Fuzzy matches are names sharing trigrams with the query, ranked
+    by similarity.
+
+    Args:
+        index (chunker_model.SymbolIndex): The symbol index.
+        query (str): The name, qualified name or prefix to look for.
+        limit (int): Maximum number of definitions to return.
+        kind (str | None): Only return 'class', 'function' or 'method'
+            definitions when set.
+        fuzzy (bool): Fill up the results with fuzzy matches.
+
+    Returns:
+        list[chunker_model.Symbol]: The definitions, tagged with how they matched.
+    """
+    folded = query.strip().lower()
+    if not folded or limit < 1:
+        return []
+    column = "qualified_folded" if "." in folded else "folded"
+
+    results: list[chunker_model.Symbol] = []
+    seen: set[tuple[str, int]] = set()
+
+    def extend(symbols: list[chunker_model.Symbol], match: str) -> None:
+        for symbol in symbols:
+            if (symbol.path, symbol.start) in seen or len(results) >= limit:
+                continue
+            seen.add((symbol.path, symbol.start))
+            results.append(symbol.model_copy(update={"match": match}))
+
+    extend(_select_symbols(index, f"{column} = ?", [folded], kind, limit), "exact")
+    if len(results) < limit:
+        extend(
+            _select_symbols(
+                index,
+                f"{column} > ? AND {column} < ?",
+                [folded, folded + "\U0010ffff"],
+                kind,
+                limit + len(results),
+            ),
+            "prefix",
+        )
+    if fuzzy and len(results) < limit:
+        name = folded.rsplit(".", 1)[-1]
+        grams = sorted(_trigrams(name))
+        candidates = [
+            row[0]
+            for row in index.connection.execute(
+                "SELECT folded FROM trigram WHERE gram IN "
+                f"({','.join('?' * len(grams))}) GROUP BY folded "
+                "ORDER BY COUNT(*) DESC LIMIT ?",
+                [*grams, FUZZY_CANDIDATES],
+            )
+        ]
+        ranked = sorted(
+            (
+                (difflib.SequenceMatcher(None, name, candidate).ratio(), candidate)
+                for candidate in candidates
+            ),
+            key=lambda scored: (-scored[0], scored[1]),
+        )
+        for score, candidate in ranked:
+            if score < FUZZY_CUTOFF or len(results) >= limit:
+                break
+            extend(
+                _select_symbols(index, "folded = ?", [candidate], kind, limit), "fuzzy"
+            )
+    return results
+
+
+def find_symbol_core(
+    collection_name: str,
+    query: str,
+    state_dir: Path | None = None,
+    limit: int = 20,
+    kind: str | None = None,
+    fuzzy: bool = True,
+) -> list[chunker_model.Symbol] | chunker_model.SymbolIndexError:
+    """
+    Look up definitions in the symbol index of a collection, without Chroma.
+
+    Args:
+        collection_name (str): The collection whose files were indexed.
+        query (str): The name, qualified name or prefix to look for.
+        state_dir (Path | None): Local state directory of the collection.
+            Defaults to `$XDG_CACHE_HOME/chunker/<collection_name>`.
+        limit (int): Maximum number of definitions to return.
+        kind (str | None): Only return definitions of this kind when set.
+        fuzzy (bool): Fill up the results with fuzzy matches.
+
+    Returns:
+        list[chunker_model.Symbol] | chunker_model.SymbolIndexError: The
+        definitions, or an error if the collection has no symbol index.
+    """
+    path = (state_dir or default_state_dir(collection_name)) / "symbols.sqlite"
+    if not path.exists():
+        return chunker_model.SymbolIndexError(
+            message=(
+                f"No symbol index for collection {collection_name!r}; "
+                "run chunk_and_vectorise with symbols enabled first."
+            )
+        )
+    index = open_symbol_index(path.parent)
+    try:
+        return find_symbols(index, query, limit=limit, kind=kind, fuzzy=fuzzy)
+    finally:
+        close_symbol_index(index)
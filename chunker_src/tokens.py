@@ -0,0 +1,68 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+from chunker_src import embeddings
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(tokenizer_file: Path | None) -> Any:
+    """
+    Load a tokenizer for counting tokens, without truncation or padding.
+
+    Args:
+        tokenizer_file (Path | None): A `tokenizer.json`; None loads the
+            tokenizer of the embedding model.
+
+    Returns:
+        Any: The `tokenizers` tokenizer, cached per file.
+    """
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(
+        str(tokenizer_file or embeddings.embedding_tokenizer_file())
+    )
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def count_tokens(tokenizer: Any, texts: list[str]) -> list[int]:
+    """
+    Count the tokens of texts in one batched call, excluding special tokens.
+
+    Args:
+        tokenizer (Any): The tokenizer.
+        texts (list[str]): The texts.
+
+    Returns:
+        list[int]: The number of tokens of each text.
+    """
+    if not texts:
+        return []
+    return [
+        len(encoding.ids)
+        for encoding in tokenizer.encode_batch(texts, add_special_tokens=False)
+    ]
+
+
+def token_length_function(tokenizer: Any) -> Callable[[str], int]:
+    """
+    Build a memoized token length function for a text splitter.
+
+    The splitter measures the same pieces several times while merging them, so
+    each distinct piece is tokenized once.
+
+    Args:
+        tokenizer (Any): The tokenizer.
+
+    Returns:
+        Callable[[str], int]: Returns the number of tokens of a text.
+    """
+    lengths: dict[str, int] = {}
+
+    def length(text: str) -> int:
+        if text not in lengths:
+            lengths[text] = len(tokenizer.encode(text, add_special_tokens=False).ids)
+        return lengths[text]
+
+    return length
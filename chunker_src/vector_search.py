@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def squared_norms(matrix: np.ndarray) -> np.ndarray:
+    """
+    Compute the squared L2 norm of every row.
+
+    Args:
+        matrix (np.ndarray): The vectors, one row each.
+
+    Returns:
+        np.ndarray: A float32 vector of squared norms.
+    """
+    return np.einsum("ij,ij->i", matrix, matrix, dtype=np.float32)
+
+
+def top_k(
+    matrix: np.ndarray,
+    matrix_norms: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    valid: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k nearest rows of each query by squared L2 distance, exactly.
+
+    All queries are answered with one matrix multiply; the best k per query
+    are selected with `argpartition` before sorting.
+
+    Args:
+        matrix (np.ndarray): The vectors searched, one row each.
+        matrix_norms (np.ndarray): Squared norms of the rows of `matrix`.
+        queries (np.ndarray): The query vectors, one row each.
+        k (int): Number of neighbours per query.
+        valid (np.ndarray | None): Boolean mask of the rows that may be returned.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Row indices and squared L2 distances,
+        shaped (queries, hits), closest first. Fewer than k hits are returned
+        when fewer rows are valid.
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    available = len(matrix) if valid is None else int(valid.sum())
+    k = min(k, available)
+    if k <= 0:
+        return (
+            np.zeros((len(queries), 0), dtype=np.int64),
+            np.zeros((len(queries), 0), dtype=np.float32),
+        )
+
+    distances = matrix_norms[None, :] - 2.0 * (queries @ matrix.T)
+    distances += squared_norms(queries)[:, None]
+    if valid is not None:
+        distances[:, ~valid] = np.inf
+    if k < distances.shape[1]:
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+    candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+    order = np.argsort(candidate_distances, axis=1, kind="stable")
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.maximum(np.take_along_axis(candidate_distances, order, axis=1), 0.0)
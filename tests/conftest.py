@@ -0,0 +1,33 @@
+from unittest import mock
+
+import pytest
+
+from fake_chroma import FakeAsyncClient, fake_embed, make_fake_client_factory
+
+
+@pytest.fixture
+def fake_client():
+    """
+    An in-process Chroma server, returned by every `chromadb.AsyncHttpClient`
+    created during the test.
+    """
+    client = FakeAsyncClient()
+    with mock.patch("chromadb.AsyncHttpClient", make_fake_client_factory(client)):
+        yield client
+
+
+@pytest.fixture
+def fake_embedding():
+    """
+    Embed chunks and queries with `fake_embed` instead of the ONNX model.
+    """
+    with (
+        mock.patch(
+            "chunker_src.chunk_and_vectorise.shared_embedding_function",
+            lambda: fake_embed,
+        ),
+        mock.patch(
+            "chunker_src.query_chunks.shared_embedding_function", lambda: fake_embed
+        ),
+    ):
+        yield fake_embed
@@ -0,0 +1,259 @@
+import re
+import zlib
+from typing import Any
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def fake_embed(texts: list[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed texts as L2-normalised hashed bag-of-words vectors.
+
+    Deterministic across processes, so benchmark results are reproducible.
+
+    Args:
+        texts (list[str]): The texts to embed.
+        dim (int): The embedding dimension.
+
+    Returns:
+        np.ndarray: A float32 matrix with one row per text.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            vectors[row, zlib.crc32(token.encode("utf-8")) % dim] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _matches(metadata: dict, where: dict | None) -> bool:
+    """
+    Evaluate a Chroma `where` filter against a metadata dict.
+
+    Supports equality, `$eq`, `$ne`, `$in`, `$nin`, `$and` and `$or`.
+
+    Args:
+        metadata (dict): The metadata of a record.
+        where (dict | None): The filter.
+
+    Returns:
+        bool: True if the record matches.
+    """
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class FakeAsyncCollection:
+    """
+    In-process stand-in for `chromadb.api.models.AsyncCollection`.
+
+    Stores records in memory and answers queries by exact cosine distance over
+    `fake_embed` vectors, so ingestion and query paths can run offline.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.ids: list[str] = []
+        self.documents: dict[str, str] = {}
+        self.metadatas: dict[str, dict] = {}
+        self.embeddings: dict[str, np.ndarray] = {}
+
+    async def count(self) -> int:
+        return len(self.ids)
+
+    def _select(
+        self,
+        ids: list[str] | None,
+        where: dict | None,
+    ) -> list[str]:
+        candidates = self.ids if ids is None else [i for i in ids if i in self.documents]
+        return [i for i in candidates if _matches(self.metadatas[i], where)]
+
+    async def add(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        if embeddings is None:
+            vectors = fake_embed(documents or [])
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+        for idx, record_id in enumerate(ids):
+            if record_id not in self.documents:
+                self.ids.append(record_id)
+            self.documents[record_id] = documents[idx] if documents else ""
+            self.metadatas[record_id] = dict(metadatas[idx]) if metadatas else {}
+            self.embeddings[record_id] = vectors[idx]
+
+    async def upsert(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        await self.add(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+        )
+
+    async def update(
+        self,
+        ids: list[str],
+        metadatas: list[dict] | None = None,
+        documents: list[str] | None = None,
+        embeddings: Any = None,
+    ) -> None:
+        for idx, record_id in enumerate(ids):
+            if record_id not in self.documents:
+                continue
+            if metadatas is not None:
+                self.metadatas[record_id] = dict(metadatas[idx])
+            if documents is not None:
+                self.documents[record_id] = documents[idx]
+                if embeddings is None:
+                    self.embeddings[record_id] = fake_embed([documents[idx]])[0]
+            if embeddings is not None:
+                self.embeddings[record_id] = np.asarray(
+                    embeddings[idx], dtype=np.float32
+                )
+
+    async def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = ["documents", "metadatas"] if include is None else include
+        selected = self._select(ids=ids, where=where)
+        start = offset or 0
+        selected = selected[start : start + limit if limit is not None else None]
+        result: dict[str, Any] = {"ids": selected}
+        result["documents"] = (
+            [self.documents[i] for i in selected] if "documents" in include else None
+        )
+        result["metadatas"] = (
+            [self.metadatas[i] for i in selected] if "metadatas" in include else None
+        )
+        result["embeddings"] = (
+            np.array([self.embeddings[i] for i in selected], dtype=np.float32)
+            if "embeddings" in include
+            else None
+        )
+        return result
+
+    async def delete(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+    ) -> None:
+        doomed = set(self._select(ids=ids, where=where))
+        if not doomed:
+            return
+        self.ids = [i for i in self.ids if i not in doomed]
+        for record_id in doomed:
+            del self.documents[record_id]
+            del self.metadatas[record_id]
+            del self.embeddings[record_id]
+
+    async def query(
+        self,
+        query_texts: list[str] | None = None,
+        query_embeddings: Any = None,
+        n_results: int = 10,
+        where: dict | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        if query_embeddings is None:
+            queries = fake_embed(query_texts or [])
+        else:
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+
+        selected = self._select(ids=None, where=where)
+        result: dict[str, Any] = {
+            "ids": [],
+            "documents": [],
+            "metadatas": [],
+            "distances": [],
+        }
+        if selected:
+            matrix = np.stack([self.embeddings[i] for i in selected])
+        for query in queries:
+            if not selected:
+                order: list[int] = []
+                distances = np.zeros(0, dtype=np.float32)
+            else:
+                distances = 1.0 - matrix @ query
+                order = list(np.argsort(distances, kind="stable")[:n_results])
+            result["ids"].append([selected[i] for i in order])
+            result["documents"].append([self.documents[selected[i]] for i in order])
+            result["metadatas"].append([self.metadatas[selected[i]] for i in order])
+            result["distances"].append([float(distances[i]) for i in order])
+        return {k: v for k, v in result.items() if k == "ids" or k in include}
+
+
+class FakeAsyncClient:
+    """In-process stand-in for the client returned by `chromadb.AsyncHttpClient`."""
+
+    def __init__(self) -> None:
+        self.collections: dict[str, FakeAsyncCollection] = {}
+
+    async def get_or_create_collection(
+        self, name: str, **kwargs: Any
+    ) -> FakeAsyncCollection:
+        return self.collections.setdefault(name, FakeAsyncCollection(name))
+
+    async def get_collection(self, name: str, **kwargs: Any) -> FakeAsyncCollection:
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    async def get_max_batch_size(self) -> int:
+        return 5461
+
+
+def make_fake_client_factory(client: FakeAsyncClient):
+    """
+    Build an async factory that can replace `chromadb.AsyncHttpClient`.
+
+    Args:
+        client (FakeAsyncClient): The client every call returns.
+
+    Returns:
+        Callable: An async function accepting the AsyncHttpClient arguments.
+    """
+
+    async def factory(*args: Any, **kwargs: Any) -> FakeAsyncClient:
+        return client
+
+    return factory
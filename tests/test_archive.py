@@ -0,0 +1,139 @@
+import asyncio
+import logging
+
+import numpy as np
+
+from chunker_src import model as chunker_model
+from chunker_src.archive import export_collection_core, import_collection_core
+from fake_chroma import FakeAsyncClient
+
+logger = logging.getLogger(__name__)
+
+
+def _fill(client: FakeAsyncClient, count: int) -> None:
+    async def run():
+        collection = await client.get_or_create_collection("source")
+        await collection.add(
+            ids=[f"id{idx}" for idx in range(count)],
+            documents=[f"def f{idx}(): return {idx}" for idx in range(count)],
+            metadatas=[{"path": f"m{idx % 7}.py", "start": idx} for idx in range(count)],
+        )
+
+    asyncio.run(run())
+
+
+def _records(client: FakeAsyncClient, name: str) -> dict:
+    async def run():
+        collection = client.collections[name]
+        return await collection.get(include=["documents", "metadatas", "embeddings"])
+
+    result = asyncio.run(run())
+    order = np.argsort(result["ids"])
+    return {
+        "ids": [result["ids"][i] for i in order],
+        "documents": [result["documents"][i] for i in order],
+        "metadatas": [result["metadatas"][i] for i in order],
+        "embeddings": result["embeddings"][order],
+    }
+
+
+def test_export_import_roundtrip(tmp_path, fake_client):
+    _fill(fake_client, 25)
+    archive = tmp_path / "source.chunks"
+
+    async def run():
+        exported = await export_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="source",
+            output=archive,
+            logger=logger,
+            block_size=4,
+        )
+        imported = await import_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="copy",
+            archive=archive,
+            logger=logger,
+            batch_size=3,
+            concurrency=3,
+        )
+        return exported, imported
+
+    exported, imported = asyncio.run(run())
+    assert exported == 25
+    assert imported == 25
+    assert not (tmp_path / "source.chunks.part").exists()
+    source, copy = _records(fake_client, "source"), _records(fake_client, "copy")
+    assert copy["ids"] == source["ids"]
+    assert copy["documents"] == source["documents"]
+    assert copy["metadatas"] == source["metadatas"]
+    assert np.array_equal(copy["embeddings"], source["embeddings"])
+
+
+def test_import_into_local_store(tmp_path, fake_client):
+    _fill(fake_client, 10)
+    archive = tmp_path / "source.chunks"
+
+    async def run():
+        await export_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="source",
+            output=archive,
+            logger=logger,
+        )
+        return await import_collection_core(
+            chroma_host="unused",
+            chroma_port=0,
+            collection_name="copy",
+            archive=archive,
+            logger=logger,
+            local_store=tmp_path / "store",
+        )
+
+    assert asyncio.run(run()) == 10
+    assert (tmp_path / "store" / "copy" / "records.sqlite").exists()
+
+
+def test_import_rejects_truncated_archive(tmp_path, fake_client):
+    _fill(fake_client, 10)
+    archive = tmp_path / "source.chunks"
+
+    async def run():
+        await export_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="source",
+            output=archive,
+            logger=logger,
+            block_size=4,
+        )
+        archive.write_bytes(archive.read_bytes()[:-20])
+        return await import_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="copy",
+            archive=archive,
+            logger=logger,
+            retry_policy=chunker_model.RetryPolicy(max_retries=1),
+        )
+
+    result = asyncio.run(run())
+    assert isinstance(result, chunker_model.ArchiveError)
+
+
+def test_import_rejects_other_files(tmp_path):
+    archive = tmp_path / "not-an-archive"
+    archive.write_bytes(b"hello")
+    result = asyncio.run(
+        import_collection_core(
+            chroma_host="fake",
+            chroma_port=0,
+            collection_name="copy",
+            archive=archive,
+            logger=logger,
+        )
+    )
+    assert isinstance(result, chunker_model.ArchiveError)
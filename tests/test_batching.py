@@ -0,0 +1,107 @@
+import httpx
+import pytest
+from chromadb import errors as chroma_errors
+
+from chunker_src.batching import (
+    GROW_AFTER_SUCCESSES,
+    classify_chroma_error,
+    cut_batch,
+    new_batch_controller,
+    record_batch_failure,
+    record_batch_success,
+)
+
+
+def _status_error(status):
+    request = httpx.Request("POST", "http://chroma/api/v2/add")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (_status_error(413), "too_large"),
+        (chroma_errors.BatchSizeExceededError("too many"), "too_large"),
+        (_status_error(503), "overloaded"),
+        (_status_error(429), "overloaded"),
+        (httpx.ReadTimeout("read timed out"), "timeout"),
+        (TimeoutError(), "timeout"),
+        (ValueError("bad metadata"), "other"),
+    ],
+    ids=["413", "batch_size", "503", "429", "httpx_timeout", "timeout", "other"],
+)
+def test_classify_chroma_error(error, expected):
+    assert classify_chroma_error(error) == expected
+
+
+def _controller(adaptive=True):
+    return new_batch_controller(
+        initial_batch_size=64,
+        server_max_batch_size=256,
+        max_concurrency=4,
+        target_latency=1.0,
+        adaptive=adaptive,
+    )
+
+
+def test_controller_grows_batch_size_then_concurrency():
+    controller = _controller()
+    for _ in range(GROW_AFTER_SUCCESSES * 2):
+        record_batch_success(controller, latency=0.1)
+    assert controller.batch_size == 256
+    assert controller.concurrency == 1
+    for _ in range(GROW_AFTER_SUCCESSES):
+        record_batch_success(controller, latency=0.1)
+    assert controller.batch_size == 256
+    assert controller.concurrency == 2
+
+
+def test_controller_backs_off_on_overload_and_slow_batches():
+    controller = _controller()
+    controller.concurrency = 4
+    record_batch_failure(controller, "timeout", batch_size=64)
+    assert controller.batch_size == 32
+    assert controller.concurrency == 2
+    record_batch_success(controller, latency=5.0)
+    assert controller.concurrency == 1
+
+
+def test_controller_lowers_ceiling_on_too_large():
+    controller = _controller()
+    record_batch_failure(controller, "too_large", batch_size=64)
+    assert controller.max_batch_size == 32
+    for _ in range(GROW_AFTER_SUCCESSES * 4):
+        record_batch_success(controller, latency=0.1)
+    assert controller.batch_size == 32
+
+
+def test_controller_respects_server_max_and_fixed_mode():
+    controller = new_batch_controller(
+        initial_batch_size=10_000,
+        server_max_batch_size=100,
+        max_concurrency=4,
+        target_latency=1.0,
+        adaptive=False,
+    )
+    assert controller.batch_size == 100
+    for _ in range(GROW_AFTER_SUCCESSES * 4):
+        record_batch_success(controller, latency=0.01)
+    assert controller.batch_size == 100
+    assert controller.concurrency == 1
+
+
+def test_cut_batch_caps_tokens():
+    controller = new_batch_controller(
+        initial_batch_size=4,
+        server_max_batch_size=None,
+        max_concurrency=1,
+        target_latency=1.0,
+        adaptive=False,
+        max_batch_tokens=100,
+    )
+    token_offsets = [0, 40, 80, 300, 310, 320, 330]
+    assert cut_batch(controller, 0, 6, token_offsets) == 2
+    assert cut_batch(controller, 2, 6, token_offsets) == 3
+    assert cut_batch(controller, 3, 6, token_offsets) == 6
+    assert cut_batch(controller, 0, 6) == 4
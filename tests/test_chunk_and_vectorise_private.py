@@ -72,3 +72,158 @@ def test__check_files_within_project_dir_outside(tmp_path, tmp_path_factory):
     result = _check_files_within_project_dir([f1, f2], tmp_path)
     assert isinstance(result, ValueError)
     assert "outside the project directory" in str(result)
+
+
+def test__add_chunks_to_collection_splits_rejected_batches():
+    import asyncio
+    import logging
+
+    from chromadb import errors as chroma_errors
+
+    from fake_chroma import FakeAsyncCollection
+    from chunker_src import model as chunker_model
+    from chunker_src.batching import new_batch_controller
+    from chunker_src.chunk_and_vectorise import _add_chunks_to_collection
+
+    collection = FakeAsyncCollection("test")
+    original_add = collection.add
+    batch_sizes = []
+
+    async def limited_add(ids, documents, metadatas):
+        batch_sizes.append(len(ids))
+        if len(ids) > 10:
+            raise chroma_errors.BatchSizeExceededError("batch too large")
+        await original_add(ids=ids, documents=documents, metadatas=metadatas)
+
+    collection.add = limited_add
+    collection.upsert = limited_add
+    controller = new_batch_controller(
+        initial_batch_size=40,
+        server_max_batch_size=None,
+        max_concurrency=2,
+        target_latency=1.0,
+        adaptive=True,
+    )
+    chunks = [f"chunk {i}" for i in range(35)]
+    metas = [{"path": "a.py", "start": i, "end": i} for i in range(35)]
+
+    asyncio.run(
+        _add_chunks_to_collection(
+            collection,
+            chunks,
+            metas,
+            controller,
+            chunker_model.RetryPolicy(max_retries=5, base_delay=0.0),
+            logging.getLogger("test"),
+        )
+    )
+
+    assert sorted(collection.documents.values()) == sorted(chunks)
+    assert controller.max_batch_size <= 10
+    assert controller.failures == len([size for size in batch_sizes if size > 10])
+
+
+def test_chunk_line_ranges_match_the_file(tmp_path, fake_client):
+    import asyncio
+    import logging
+    from unittest import mock
+
+    from fake_chroma import FakeAsyncClient, make_fake_client_factory
+    from chunker_src import model as chunker_model
+    from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    source = "\n\n\n".join(
+        f"def f{idx}(value):\n"
+        + "".join(f"    value = value * {n} + {idx}\n" for n in range(idx % 7 + 1))
+        + "    return value\n"
+        for idx in range(300)
+    )
+    (project_dir / "module.py").write_text(source)
+    lines = source.splitlines()
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+    )
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project_dir, "*.py", config, logging.getLogger("test")
+        )
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    chunks = [
+        (collection.documents[i], collection.metadatas[i]) for i in collection.ids
+    ]
+    assert len(chunks) > 5
+    overlapping = 0
+    previous_end = -1
+    for chunk, meta in sorted(chunks, key=lambda item: item[1]["start"]):
+        chunk_lines = chunk.splitlines()
+        assert lines[meta["start"]].strip() == chunk_lines[0].strip()
+        assert lines[meta["end"]].strip() == chunk_lines[-1].strip()
+        assert "\n".join(lines[meta["start"] : meta["end"] + 1]).strip() == chunk
+        overlapping += meta["start"] <= previous_end
+        previous_end = meta["end"]
+    assert overlapping > 0
+
+
+def test__add_chunks_to_collection_upserts_partly_written_batches():
+    import asyncio
+    import logging
+
+    from fake_chroma import FakeAsyncCollection
+    from chunker_src import model as chunker_model
+    from chunker_src.batching import new_batch_controller
+    from chunker_src.chunk_and_vectorise import _add_chunks_to_collection
+
+    collection = FakeAsyncCollection("test")
+    original_add = collection.add
+    calls = []
+
+    async def add_then_time_out(ids, documents, metadatas):
+        calls.append("add")
+        if any(record_id in collection.documents for record_id in ids):
+            raise ValueError("Duplicate ids")
+        half = len(ids) // 2
+        await original_add(
+            ids=ids[:half], documents=documents[:half], metadatas=metadatas[:half]
+        )
+        raise TimeoutError("timed out after the server stored part of the batch")
+
+    async def upsert(ids, documents, metadatas):
+        calls.append("upsert")
+        await original_add(ids=ids, documents=documents, metadatas=metadatas)
+
+    collection.add = add_then_time_out
+    collection.upsert = upsert
+    controller = new_batch_controller(
+        initial_batch_size=20,
+        server_max_batch_size=None,
+        max_concurrency=1,
+        target_latency=1.0,
+        adaptive=False,
+    )
+    chunks = [f"chunk {i}" for i in range(20)]
+    metas = [{"path": "a.py", "start": i, "end": i} for i in range(20)]
+
+    asyncio.run(
+        _add_chunks_to_collection(
+            collection,
+            chunks,
+            metas,
+            controller,
+            chunker_model.RetryPolicy(max_retries=3, base_delay=0.0),
+            logging.getLogger("test"),
+        )
+    )
+
+    assert calls[0] == "add" and set(calls[1:]) == {"upsert"}
+    assert len(collection.ids) == len(set(collection.ids)) == 20
+    assert sorted(collection.documents.values()) == sorted(chunks)
@@ -40,3 +40,51 @@ def test_traverse_project_dir_and_ignore_dirs(tmp_path):
     assert "foo" not in dirnames
     assert "bar" not in dirnames
     assert ".git" not in dirnames
+
+def test_resolve_project(monkeypatch):
+    from chunker_src import chunker_mcp
+    from chunker_src import model as chunker_model
+
+    monkeypatch.delenv("PROJECT_DIR", raising=False)
+    monkeypatch.delenv("CHROMA_COLLECTION_NAME", raising=False)
+    monkeypatch.setattr(chunker_mcp, "_projects", {})
+    assert isinstance(chunker_mcp._resolve_project(None), chunker_model.ProjectNotFoundError)
+
+    api = chunker_model.ProjectConfig(project_dir="/src/api", collection_name="api")
+    web = chunker_model.ProjectConfig(project_dir="/src/web", collection_name="web")
+    chunker_mcp._projects.update({"api": api})
+    assert chunker_mcp._resolve_project(None) == ("api", api)
+
+    chunker_mcp._projects.update({"web": web})
+    assert chunker_mcp._resolve_project("web") == ("web", web)
+    assert isinstance(chunker_mcp._resolve_project(None), chunker_model.ProjectNotFoundError)
+    assert isinstance(chunker_mcp._resolve_project("nope"), chunker_model.ProjectNotFoundError)
+
+    monkeypatch.setenv("PROJECT_DIR", "/src/default")
+    monkeypatch.setenv("CHROMA_COLLECTION_NAME", "default")
+    name, project = chunker_mcp._resolve_project(None)
+    assert (name, project.project_dir) == ("default", "/src/default")
+
+
+def test_load_projects_file(tmp_path):
+    from chunker_src.chunker_mcp import _load_projects_file
+
+    projects_file = tmp_path / "projects.json"
+    projects_file.write_text(
+        '{"api": {"project_dir": "/src/api", "collection_name": "api"}}'
+    )
+    projects = _load_projects_file(projects_file)
+    assert projects["api"].collection_name == "api"
+
+
+def test_rerank_timeout_from_env(monkeypatch):
+    from chunker_src.chunker_mcp import _rerank_timeout_from_env
+    from chunker_src import model as chunker_model
+
+    monkeypatch.delenv("CHUNKER_RERANK_TIMEOUT", raising=False)
+    assert _rerank_timeout_from_env() == 0.25
+    monkeypatch.setenv("CHUNKER_RERANK_TIMEOUT", "0.5")
+    assert _rerank_timeout_from_env() == 0.5
+    for value in ["fast", "-1", "nan"]:
+        monkeypatch.setenv("CHUNKER_RERANK_TIMEOUT", value)
+        assert isinstance(_rerank_timeout_from_env(), chunker_model.InvalidSettingError)
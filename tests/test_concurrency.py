@@ -0,0 +1,105 @@
+import asyncio
+import logging
+
+from chunker_src import model as chunker_model
+from chunker_src.batching import new_batch_controller
+from chunker_src.chunk_and_vectorise import _add_file_with_langchain, chunk_and_vectorise_core
+from fake_chroma import FakeAsyncCollection
+
+logger = logging.getLogger("test")
+
+
+class InterleavingCollection(FakeAsyncCollection):
+    """Yields to the event loop before every call, so concurrent writers interleave."""
+
+    async def add(self, **kwargs):
+        await asyncio.sleep(0)
+        return await super().add(**kwargs)
+
+    async def get(self, **kwargs):
+        await asyncio.sleep(0)
+        return await super().get(**kwargs)
+
+    async def delete(self, **kwargs):
+        await asyncio.sleep(0)
+        return await super().delete(**kwargs)
+
+
+def _paths(collection) -> list[str]:
+    return sorted(meta["path"] for meta in collection.metadatas.values())
+
+
+def test_thousands_of_files_are_written_concurrently(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    names = [f"pkg{idx % 20}/mod_{idx}.py" for idx in range(2000)]
+    for name in names:
+        path = project_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"def f_{name.rsplit('_', 1)[-1][:-3]}():\n    return 1\n")
+    fake_client.collections["test"] = InterleavingCollection("test")
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        max_file_concurrency=32,
+    )
+    progress = []
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project_dir,
+            "pkg*/*.py",
+            config,
+            logger,
+            progress=lambda done, total: progress.append(done),
+        )
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    assert _paths(collection) == sorted(names)
+    assert progress == list(range(len(names) + 1))
+
+    assert asyncio.run(run()) is None
+    assert _paths(collection) == sorted(names)
+
+
+def test_concurrent_writes_of_one_path_replace_its_chunks_once(tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    source = "def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+    (project_dir / "a.py").write_text(source)
+    collection = InterleavingCollection("test")
+    stats = {"add": 0, "update": 0, "removed": 0, "skipped": 0}
+    sequencer = chunker_model.PathSequencer()
+
+    async def write():
+        await _add_file_with_langchain(
+            file_path=str(project_dir / "a.py"),
+            logger=logger,
+            collection=collection,
+            stats=stats,
+            batch_controller=new_batch_controller(
+                initial_batch_size=1,
+                server_max_batch_size=None,
+                max_concurrency=1,
+                target_latency=1.0,
+                adaptive=False,
+            ),
+            semaphore=asyncio.Semaphore(4),
+            project_dir=project_dir,
+            sequencer=sequencer,
+        )
+
+    async def run():
+        await write()
+        expected = sorted(collection.documents.values())
+        await asyncio.gather(*[write() for _ in range(20)])
+        return expected
+
+    expected = asyncio.run(run())
+    assert sorted(collection.documents.values()) == expected
+    assert stats == {"add": 1, "update": 20, "removed": 0, "skipped": 0}
+    assert not sequencer.tails
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import logging
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.dedup import (
+    chunk_fingerprint,
+    estimate_similarity,
+    find_canonical,
+    open_dedup_index,
+    register_canonical,
+)
+
+FUNCTION = '''def load_user_session(database, token):
+    """Load the session of a user from the database."""
+    session = database.sessions.find_one({"token": token})
+    if session is None:
+        raise KeyError(token)
+    return session
+'''
+
+
+def test_fingerprint_ignores_whitespace_and_detects_near_duplicates():
+    exact, signature = chunk_fingerprint(FUNCTION)
+    respaced, _ = chunk_fingerprint(FUNCTION.replace("    ", "  "))
+    _, renamed = chunk_fingerprint(FUNCTION.replace("KeyError", "LookupError"))
+    _, unrelated = chunk_fingerprint("class Parser:\n    def parse(self, text):\n        return text.split()\n")
+    assert exact == respaced
+    assert estimate_similarity(signature, renamed) > 0.6
+    assert estimate_similarity(signature, unrelated) < 0.2
+
+
+def test_find_canonical(tmp_path):
+    index = open_dedup_index(tmp_path, threshold=0.6, min_chars=10)
+    exact, signature = chunk_fingerprint(FUNCTION)
+    register_canonical(index, "c1", "a.py", 0, 5, exact, signature)
+    assert find_canonical(index, exact, signature) == "c1"
+    near_exact, near = chunk_fingerprint(FUNCTION.replace("KeyError", "LookupError"))
+    assert find_canonical(index, near_exact, near) == "c1"
+    other_exact, other = chunk_fingerprint("print('hello world, this is unrelated')")
+    assert find_canonical(index, other_exact, other) is None
+
+
+def test_chunk_and_vectorise_core_stores_duplicates_as_aliases(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for name in ["a", "b", "c"]:
+        (project_dir / f"{name}.py").write_text(FUNCTION)
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        dedup=True,
+    )
+    logger = logging.getLogger("test")
+
+    async def run():
+        return await chunk_and_vectorise_core(project_dir, "*.py", config, logger)
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    assert len(collection.ids) == 1
+    meta = collection.metadatas[collection.ids[0]]
+    canonical = meta["path"]
+    aliases = [alias.split(":")[0] for alias in json.loads(meta["aliases"])]
+    assert sorted([canonical, *aliases]) == ["a.py", "b.py", "c.py"]
+
+    (project_dir / canonical).write_text("def other():\n    return 'something else entirely'\n")
+    assert asyncio.run(run()) is None
+    metas = [collection.metadatas[i] for i in collection.ids]
+    promoted = [m for m in metas if "aliases" in m]
+    assert len(collection.ids) == 2
+    assert len(promoted) == 1
+    assert promoted[0]["path"] in aliases
+    remaining = [alias.split(":")[0] for alias in json.loads(promoted[0]["aliases"])]
+    assert sorted([promoted[0]["path"], *remaining]) == sorted(aliases)
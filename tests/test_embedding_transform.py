@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import (
+    chunk_and_vectorise_core,
+    fit_embedding_transform_core,
+)
+from chunker_src.embedding_transform import (
+    decode_embeddings,
+    encode_embeddings,
+    fit_embedding_transform,
+    load_embedding_transform,
+    project_embeddings,
+    save_embedding_transform,
+)
+from chunker_src.query_chunks import query_chunks_core
+from fake_chroma import fake_embed
+
+
+@pytest.fixture
+def sample():
+    rng = np.random.default_rng(0)
+    basis = rng.normal(size=(8, 32))
+    return (rng.normal(size=(200, 8)) @ basis + 0.01 * rng.normal(size=(200, 32))).astype(
+        np.float32
+    )
+
+
+def test_fit_reduces_dimensions_and_keeps_neighbours(sample):
+    transform = fit_embedding_transform(sample=sample, dim=8, quantization="int8")
+    codes = encode_embeddings(transform, sample)
+    assert codes.shape == (200, 8)
+    assert codes.dtype == np.int8
+    decoded = decode_embeddings(transform, codes)
+    projected = project_embeddings(transform, sample)
+    assert np.allclose(decoded, projected, atol=0.05)
+    assert (np.argmax(projected[:10] @ decoded.T, axis=1) == np.arange(10)).all()
+
+
+def test_fit_full_dim_is_identity(sample):
+    transform = fit_embedding_transform(sample=sample, dim=None, quantization="float16")
+    codes = encode_embeddings(transform, sample)
+    assert codes.dtype == np.float16
+    norms = np.linalg.norm(sample, axis=1, keepdims=True)
+    assert np.allclose(decode_embeddings(transform, codes), sample / norms, atol=1e-3)
+
+
+def test_fit_rejects_bad_arguments(sample):
+    with pytest.raises(ValueError):
+        fit_embedding_transform(sample=sample, dim=8, quantization="int4")
+    with pytest.raises(ValueError):
+        fit_embedding_transform(sample=sample, dim=64, quantization="none")
+
+
+def test_save_and_load_roundtrip(sample, tmp_path):
+    for quantization in ["none", "int8"]:
+        transform = fit_embedding_transform(sample=sample, dim=4, quantization=quantization)
+        path = tmp_path / f"{quantization}.npz"
+        save_embedding_transform(transform, path)
+        loaded = load_embedding_transform(path)
+        assert loaded.quantization == quantization
+        assert np.array_equal(
+            encode_embeddings(loaded, sample), encode_embeddings(transform, sample)
+        )
+
+
+def test_index_and_query_with_transform(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for idx in range(6):
+        (project_dir / f"module_{idx}.py").write_text(
+            f"def handler_{idx}(request):\n    return render_page_{idx}(request.user)\n"
+        )
+    (project_dir / "auth.py").write_text(
+        "def login(user, password):\n    return check_password(user, password)\n"
+    )
+    transform_path = tmp_path / "transform.npz"
+    logger = logging.getLogger("test")
+
+    async def run():
+        with mock.patch("chunker_src.embeddings.embed_texts", fake_embed):
+            fit_error = await fit_embedding_transform_core(
+                project_dir=project_dir,
+                pattern="*.py",
+                language="python",
+                output=transform_path,
+                dim=4,
+                quantization="int8",
+                sample_size=100,
+                logger_instance=logger,
+            )
+            index_error = await chunk_and_vectorise_core(
+                project_dir,
+                "*.py",
+                chunker_model.ChunkAndVectoriseConfig(
+                    chroma_host="fake",
+                    chroma_port=0,
+                    collection_name="test",
+                    max_batch_size=64,
+                    language="python",
+                    state_dir=tmp_path / "state",
+                    embedding_transform=transform_path,
+                ),
+                logger,
+            )
+            results = await query_chunks_core(
+                "login check_password",
+                chunker_model.QueryChunksConfig(
+                    chroma_host="fake",
+                    chroma_port=0,
+                    collection_name="test",
+                    embedding_transform=transform_path,
+                ),
+                logger,
+                n_results=3,
+            )
+            return fit_error, index_error, results
+
+    fit_error, index_error, results = asyncio.run(run())
+    assert fit_error is None
+    assert index_error is None
+    collection = fake_client.collections["test"]
+    assert {vector.shape for vector in collection.embeddings.values()} == {(4,)}
+    assert len(results) == 3
+    assert results[0].path == "auth.py"
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.expansion import expand_query_results
+from chunker_src.query_chunks import query_chunks_core
+from chunker_src.symbols import line_offsets
+
+SOURCE = """import os
+
+
+class Server:
+    def start(self):
+        self.running = True
+        self.port = 80
+        return self
+
+    def stop(self):
+        self.running = False
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _hit(start: int, end: int) -> chunker_model.QueryResult:
+    lines = SOURCE.splitlines()[start : end + 1]
+    return chunker_model.QueryResult(
+        chunk="\n".join(lines), path="server.py", start=start, end=end, distance=0.1
+    )
+
+
+def _ingest(tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "server.py").write_text(SOURCE)
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        symbols=True,
+    )
+
+    async def run():
+        return await chunk_and_vectorise_core(project_dir, "*.py", config, logger)
+
+    assert asyncio.run(run()) is None
+    return project_dir
+
+
+def test_line_offsets():
+    assert line_offsets(b"").tolist() == [0]
+    assert line_offsets(b"a\nbc\n").tolist() == [0, 2, 5]
+    assert line_offsets(b"a\n\nbc").tolist() == [0, 2, 3, 5]
+
+
+def test_expand_by_lines_and_to_definition(tmp_path, fake_client):
+    _ingest(tmp_path)
+    state_dir = tmp_path / "state"
+
+    [[by_lines]] = expand_query_results(
+        [[_hit(5, 6)]], "test", state_dir, context_lines=1
+    )
+    assert (by_lines.start, by_lines.end) == (4, 7)
+    assert by_lines.chunk == "\n".join(SOURCE.splitlines()[4:8])
+    assert by_lines.distance == 0.1
+
+    [[definition, clipped]] = expand_query_results(
+        [[_hit(5, 6), _hit(10, 10)]], "test", state_dir, to_definition=True
+    )
+    assert (definition.start, definition.end) == (4, 7)
+    assert definition.chunk.startswith("    def start(self):")
+    assert (clipped.start, clipped.end) == (9, 10)
+
+    [[clipped]] = expand_query_results(
+        [[_hit(0, 1)]], "test", state_dir, context_lines=50
+    )
+    assert (clipped.start, clipped.end) == (0, 10)
+    assert clipped.chunk == SOURCE.removesuffix("\n")
+
+
+def test_changed_file_is_not_expanded(tmp_path, fake_client):
+    project_dir = _ingest(tmp_path)
+    path = project_dir / "server.py"
+    path.write_text("# edited\n" + SOURCE)
+    os.utime(path, ns=(1, 1))
+
+    hit = _hit(5, 6)
+    assert expand_query_results([[hit]], "test", tmp_path / "state", 3) == [[hit]]
+
+
+def test_expand_without_index(tmp_path):
+    result = expand_query_results([[_hit(5, 6)]], "test", tmp_path / "missing", 3)
+    assert isinstance(result, chunker_model.SymbolIndexError)
+
+
+def test_query_chunks_expands_hits(tmp_path, fake_client, fake_embedding):
+    _ingest(tmp_path)
+    config = chunker_model.QueryChunksConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        expand_to_definition=True,
+        state_dir=tmp_path / "state",
+    )
+
+    async def run():
+        return await query_chunks_core("start the server", config, logger)
+
+    results = asyncio.run(run())
+    assert results
+    lines = SOURCE.splitlines()
+    for result in results:
+        assert result.chunk == "\n".join(lines[result.start : result.end + 1])
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.file_reader import (
+    _compute_line_offsets,
+    read_file_range,
+    read_line_range,
+    resolve_project_file,
+)
+from chunker_src.query_chunks import query_chunks_core
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    path = tmp_path / "sample.py"
+    path.write_text("l0\nl1\nl2\nl3\n")
+    return path
+
+
+@pytest.mark.parametrize(
+    "data,expected",
+    [(b"", []), (b"a", [0]), (b"a\n", [0]), (b"a\nb", [0, 2]), (b"a\n\nb\n", [0, 2, 3])],
+    ids=["empty", "no_newline", "trailing_newline", "two_lines", "blank_line"],
+)
+def test__compute_line_offsets(data, expected):
+    assert _compute_line_offsets(buffer=data, size=len(data)) == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected",
+    [
+        ({}, "l0\nl1\nl2\nl3\n"),
+        ({"start_line": 1, "end_line": 2}, "l1\nl2\n"),
+        ({"start_line": 3, "end_line": 99}, "l3\n"),
+        ({"start_byte": 3, "end_byte": 5}, "l1"),
+    ],
+    ids=["whole", "lines", "clamped_lines", "bytes"],
+)
+@pytest.mark.parametrize("max_content_bytes", [1024, 0], ids=["cached", "mmap"])
+def test_read_file_range(sample_file, kwargs, expected, max_content_bytes):
+    cache = chunker_model.FileCache(max_content_bytes=max_content_bytes)
+    assert read_file_range(file_path=sample_file, cache=cache, **kwargs) == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"start_line": 0, "start_byte": 0},
+        {"start_line": 2, "end_line": 1},
+        {"start_line": 10},
+        {"start_byte": -1},
+    ],
+    ids=["lines_and_bytes", "reversed", "past_end", "negative"],
+)
+def test_read_file_range_errors(sample_file, kwargs):
+    cache = chunker_model.FileCache()
+    result = read_file_range(file_path=sample_file, cache=cache, **kwargs)
+    assert isinstance(result, chunker_model.FileReadError)
+
+
+def test_read_file_range_reads_whole_files_as_text(tmp_path):
+    crlf = tmp_path / "crlf.py"
+    crlf.write_bytes(b"a\r\nb\r\n")
+    binary = tmp_path / "blob.bin"
+    binary.write_bytes(b"\xff\xfe\x00")
+    cache = chunker_model.FileCache()
+
+    assert read_file_range(file_path=crlf, cache=cache) == "a\nb\n"
+    assert isinstance(
+        read_file_range(file_path=binary, cache=cache), chunker_model.FileReadError
+    )
+    assert not cache.entries
+
+
+def test_read_file_range_cache_lru_and_mtime(tmp_path, sample_file):
+    other = tmp_path / "other.py"
+    other.write_text("x\n")
+    cache = chunker_model.FileCache(max_entries=1)
+
+    read_file_range(file_path=sample_file, cache=cache, start_line=0)
+    read_file_range(file_path=other, cache=cache, start_line=0)
+    assert list(cache.entries) == [str(other)]
+
+    other.write_text("y\nz\n")
+    stat = other.stat()
+    os.utime(other, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert read_file_range(file_path=other, cache=cache, start_line=1) == "z\n"
+
+
+def test_resolve_project_file(tmp_path, sample_file, tmp_path_factory):
+    assert resolve_project_file(tmp_path, "sample.py") == sample_file.resolve()
+    outside = tmp_path_factory.mktemp("outside") / "x.py"
+    outside.write_text("x")
+    for relative_path in ["missing.py", str(outside), "."]:
+        result = resolve_project_file(tmp_path, relative_path)
+        assert isinstance(result, chunker_model.FileReadError)
+
+
+def test_read_line_range_of_query_hits_returns_their_chunks(
+    tmp_path, fake_client, fake_embedding
+):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "module.py").write_text(
+        "\n\n".join(
+            f"class Handler{idx}:\n"
+            + "".join(f"    def on_{n}(self):\n        return {n}\n" for n in range(30))
+            for idx in range(10)
+        )
+    )
+
+    async def run():
+        await chunk_and_vectorise_core(
+            project_dir,
+            "*.py",
+            chunker_model.ChunkAndVectoriseConfig(
+                chroma_host="fake",
+                chroma_port=0,
+                collection_name="test",
+                max_batch_size=64,
+                language="python",
+                state_dir=tmp_path / "state",
+            ),
+            logging.getLogger("test"),
+        )
+        return await query_chunks_core(
+            "class Handler7 on_12",
+            chunker_model.QueryChunksConfig(
+                chroma_host="fake", chroma_port=0, collection_name="test"
+            ),
+            logging.getLogger("test"),
+            n_results=5,
+        )
+
+    results = asyncio.run(run())
+    assert len(results) > 1
+    cache = chunker_model.FileCache()
+    for result in results:
+        text = read_line_range(
+            project_dir / result.path,
+            cache,
+            start_line=result.start,
+            end_line=result.end,
+        )
+        assert text.strip() == result.chunk
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+from unittest import mock
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import _walk_project_dir, chunk_and_vectorise_core
+from chunker_src.file_selection import compile_file_selector, walk_selected_files
+
+FILES = [
+    "setup.py",
+    "README.md",
+    ".hidden.py",
+    "src/app.py",
+    "src/pkg/core.py",
+    "src/pkg/data.json",
+    "src/vendor/lib.py",
+    "src/vendor/deep/more.py",
+    "tests/test_app.py",
+    "tests/unit/test_core.py",
+    "tools/build.py",
+    "build/out.py",
+    ".git/hooks/pre-commit.py",
+]
+
+
+@pytest.fixture
+def project(tmp_path):
+    for name in FILES:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+    (tmp_path / ".gitignore").write_text("build/\n")
+    return tmp_path
+
+
+def _names(files, project_dir) -> list[str]:
+    return sorted(f.relative_to(project_dir).as_posix() for f in files)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["*.py", "src/*.py", "src/**/*.py", "tests/*/test_?ore.py", "src/[ap]*.py"],
+)
+def test_single_pattern_matches_glob(project, pattern):
+    expected = [
+        f
+        for f in project.glob(pattern)
+        if f.is_file() and ".git" not in f.parts and "build" not in f.parts
+    ]
+    assert _names(_walk_project_dir(project, [pattern]), project) == _names(
+        expected, project
+    )
+
+
+def test_patterns_and_excludes_in_one_walk(project):
+    files = _walk_project_dir(
+        project,
+        ["src/**/*.py", "tests/*.py", "tools/*.py", "*.md"],
+        ["**/vendor/**", "README.md"],
+    )
+    assert _names(files, project) == [
+        "src/app.py",
+        "src/pkg/core.py",
+        "tests/test_app.py",
+        "tools/build.py",
+    ]
+
+
+def test_walk_skips_unreachable_and_excluded_directories(project):
+    selector = compile_file_selector(["src/**/*.py", "tests/*.py"], ["src/vendor/**"])
+    entered = []
+    walk = os.walk
+
+    def recording_walk(top):
+        for entry in walk(top):
+            entered.append(os.path.relpath(entry[0], project))
+            yield entry
+
+    with mock.patch("chunker_src.file_selection.os.walk", recording_walk):
+        files = walk_selected_files(project, selector)
+    assert sorted(entered) == [".", "src", "src/pkg", "tests"]
+    assert _names(files, project) == [
+        "src/app.py",
+        "src/pkg/core.py",
+        "tests/test_app.py",
+    ]
+
+
+def test_chunk_and_vectorise_with_several_patterns(project, fake_client):
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=project / ".state",
+        exclude_patterns=["**/vendor/**"],
+    )
+
+    async def run(patterns):
+        return await chunk_and_vectorise_core(
+            project, patterns, config, logging.getLogger("test")
+        )
+
+    assert asyncio.run(run(["src/**/*.py", "tests/*.py"])) is None
+    stored = asyncio.run(fake_client.collections["test"].get(include=["metadatas"]))
+    assert sorted({m["path"] for m in stored["metadatas"]}) == [
+        "src/app.py",
+        "src/pkg/core.py",
+        "tests/test_app.py",
+    ]
+    assert isinstance(
+        asyncio.run(run(["src/*.py", "**/*.py"])), chunker_model.InvalidPatternError
+    )
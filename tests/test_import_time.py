@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["chromadb", "langchain_text_splitters", "fastmcp", "pydantic"]
+
+
+@pytest.mark.parametrize("module", ["chunker_src", "chunker_src.cli"])
+def test_import_does_not_load_heavy_dependencies(module):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == ""
+
+
+def test_package_exposes_app_lazily():
+    completed = subprocess.run(
+        [sys.executable, "-c", "import chunker_src; print(type(chunker_src.app).__name__)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == "Typer"
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.jobs import cancel_job, get_job, job_status, start_job
+
+
+def test_job_completes_and_reports_progress(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for name in ["a", "b", "c"]:
+        (project_dir / f"{name}.py").write_text(f"def {name}():\n    return '{name}'\n")
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+    )
+    registry = chunker_model.JobRegistry()
+    progress_seen = []
+
+    async def run(job):
+        def progress(files_done, files_total):
+            job.files_done, job.files_total = files_done, files_total
+            progress_seen.append(files_done)
+
+        job.state = "running"
+        result = await chunk_and_vectorise_core(
+            project_dir,
+            "*.py",
+            config,
+            logger_instance=logging.getLogger("test"),
+            progress=progress,
+        )
+        return None if result is None else result.message
+
+    async def main():
+        job = start_job(registry, "test", "*.py", "python", run)
+        await job.task
+        return job
+
+    job = asyncio.run(main())
+    status = job_status(job)
+    assert status.state == "completed"
+    assert (status.files_done, status.files_total) == (3, 3)
+    assert progress_seen == [0, 1, 2, 3]
+
+
+def test_job_failure_and_cancellation():
+    registry = chunker_model.JobRegistry()
+
+    async def fail(job):
+        return "No files found"
+
+    async def hang(job):
+        job.state = "running"
+        await asyncio.sleep(60)
+
+    async def main():
+        failed = start_job(registry, "p", "*.py", "python", fail)
+        hanging = start_job(registry, "p", "*.py", "python", hang)
+        await asyncio.sleep(0)
+        cancel_job(registry, hanging.job_id)
+        await asyncio.gather(failed.task, hanging.task, return_exceptions=True)
+        return failed, hanging
+
+    failed, hanging = asyncio.run(main())
+    assert (failed.state, failed.error) == ("failed", "No files found")
+    assert hanging.state == "cancelled"
+    assert isinstance(get_job(registry, "missing"), chunker_model.JobNotFoundError)
+
+
+def test_finished_jobs_are_pruned():
+    registry = chunker_model.JobRegistry(max_finished=2)
+
+    async def done(job):
+        return None
+
+    async def main():
+        for _ in range(4):
+            job = start_job(registry, "p", "*.py", "python", done)
+            await job.task
+
+    asyncio.run(main())
+    assert len(registry.jobs) == 3
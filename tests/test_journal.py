@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from unittest import mock
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.journal import (
+    close_run_journal,
+    is_file_completed,
+    open_run_journal,
+    record_journal_event,
+)
+
+
+def test_journal_replay_after_abort(tmp_path):
+    journal = open_run_journal(tmp_path, "run", resume=True)
+    record_journal_event(journal, "begin", "a.py", 1)
+    record_journal_event(journal, "done", "a.py", 1)
+    record_journal_event(journal, "begin", "b.py", 2)
+    close_run_journal(journal, finished=False)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "do')
+
+    resumed = open_run_journal(tmp_path, "run", resume=True)
+    assert resumed.completed == {"a.py": 1}
+    assert resumed.in_flight == {"b.py"}
+    assert is_file_completed(resumed, "a.py", 1)
+    assert not is_file_completed(resumed, "a.py", 3)
+    close_run_journal(resumed, finished=True)
+    assert not journal.path.exists()
+
+
+def test_journal_discarded_without_resume(tmp_path):
+    journal = open_run_journal(tmp_path, "run", resume=True)
+    record_journal_event(journal, "done", "a.py", 1)
+    close_run_journal(journal, finished=False)
+    fresh = open_run_journal(tmp_path, "run", resume=False)
+    assert fresh.completed == {}
+    close_run_journal(fresh, finished=True)
+
+
+class FailingAdds:
+    def __init__(self, collection, fail_on_call):
+        self.collection = collection
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+        self.original_add = collection.add
+
+    async def add(self, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise ConnectionError("chroma restarted")
+        await self.original_add(**kwargs)
+
+
+@pytest.fixture
+def project(tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for name in ["a", "b", "c"]:
+        (project_dir / f"{name}.py").write_text(f"def {name}():\n    return '{name}'\n")
+    return project_dir
+
+
+def test_chunk_and_vectorise_core_resumes_without_losing_chunks(
+    project, tmp_path, fake_client
+):
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        max_retries=1,
+        retry_base_delay=0.0,
+        max_file_concurrency=1,
+    )
+    logger = logging.getLogger("test")
+
+    async def run():
+        return await chunk_and_vectorise_core(project, "*.py", config, logger)
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    paths = sorted(m["path"] for m in collection.metadatas.values())
+    assert paths == ["a.py", "b.py", "c.py"]
+
+    failing = FailingAdds(collection, fail_on_call=2)
+    collection.add = failing.add
+    result = asyncio.run(run())
+    assert isinstance(result, chunker_model.ChromaDBError)
+    paths = sorted(m["path"] for m in collection.metadatas.values())
+    assert paths == ["a.py", "b.py", "c.py"]
+
+    calls_before_resume = failing.calls
+    assert asyncio.run(run()) is None
+    assert failing.calls - calls_before_resume == 2
+    paths = sorted(m["path"] for m in collection.metadatas.values())
+    assert paths == ["a.py", "b.py", "c.py"]
+    assert list((tmp_path / "state").glob("journal-*")) == []
+
+
+def test_chunk_and_vectorise_core_retries_transient_failures(
+    project, tmp_path, fake_client
+):
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        max_retries=3,
+        retry_base_delay=0.0,
+    )
+
+    async def run():
+        collection = await fake_client.get_or_create_collection("test")
+        collection.add = FailingAdds(collection, fail_on_call=1).add
+        return await chunk_and_vectorise_core(
+            project, "*.py", config, logging.getLogger("test")
+        )
+
+    assert asyncio.run(run()) is None
+    assert len(fake_client.collections["test"].ids) == 3
+
+
+def test_chunk_and_vectorise_core_reports_errors_outside_chroma(
+    project, tmp_path, fake_client
+):
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+    )
+
+    def progress(files_done, files_total):
+        if files_done:
+            raise RuntimeError("progress sink closed")
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project, "*.py", config, logging.getLogger("test"), progress=progress
+        )
+
+    result = asyncio.run(run())
+    assert isinstance(result, chunker_model.IngestionError)
+    assert result.message.startswith("Run aborted: progress sink closed.")
+
+
+def test_chunk_and_vectorise_core_skips_removed_files(project, tmp_path, fake_client):
+    from chunker_src import chunk_and_vectorise
+
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+    )
+    walk = chunk_and_vectorise._walk_project_dir
+
+    def walk_then_remove(*args):
+        files = walk(*args)
+        (project / "b.py").unlink()
+        return files
+
+    with mock.patch.object(chunk_and_vectorise, "_walk_project_dir", walk_then_remove):
+        result = asyncio.run(
+            chunk_and_vectorise_core(project, "*.py", config, logging.getLogger("test"))
+        )
+    assert result is None
+    paths = sorted(m["path"] for m in fake_client.collections["test"].metadatas.values())
+    assert paths == ["a.py", "c.py"]
+
+
+def test_delete_collection_removes_its_local_state(project, tmp_path, fake_client):
+    from chunker_src.crud import delete_all_records_in_collection
+
+    state_dir = tmp_path / "state"
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=state_dir,
+        dedup=True,
+    )
+    journal = open_run_journal(state_dir, "aborted", resume=True)
+    record_journal_event(journal, "done", "a.py", 1)
+    close_run_journal(journal, finished=False)
+
+    async def run():
+        result = await chunk_and_vectorise_core(
+            project, "*.py", config, logging.getLogger("test")
+        )
+        await delete_all_records_in_collection(
+            chroma_host="fake", chroma_port=0, collection_name="test", state_dir=state_dir
+        )
+        return result
+
+    assert asyncio.run(run()) is None
+    assert fake_client.collections["test"].ids == []
+    assert list(state_dir.iterdir()) == []
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+
+import numpy as np
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.local_store import LocalClient, _where_sql
+from chunker_src.query_chunks import query_chunks_core
+from chunker_src.vector_search import squared_norms, top_k
+
+
+def _vectors(count, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def test_top_k_matches_brute_force():
+    matrix = _vectors(50)
+    queries = _vectors(3, seed=1)
+    indices, distances = top_k(matrix, squared_norms(matrix), queries, k=5)
+    expected = ((queries[:, None, :] - matrix[None, :, :]) ** 2).sum(axis=2)
+    assert (indices == np.argsort(expected, axis=1)[:, :5]).all()
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :5], atol=1e-4)
+
+
+def test_top_k_skips_invalid_rows():
+    matrix = _vectors(10)
+    valid = np.zeros(10, dtype=bool)
+    valid[[2, 7]] = True
+    indices, _ = top_k(matrix, squared_norms(matrix), matrix[:1], k=5, valid=valid)
+    assert sorted(indices[0].tolist()) == [2, 7]
+
+
+def test_where_sql_rejects_unknown_operator():
+    with pytest.raises(ValueError):
+        _where_sql({"path": {"$gt": 1}})
+
+
+def test_add_get_update_delete(tmp_path):
+    vectors = _vectors(4)
+
+    async def run():
+        client = LocalClient(tmp_path)
+        collection = await client.get_or_create_collection("test")
+        await collection.add(
+            ids=["a", "b", "c", "d"],
+            documents=["one", "two", "three", "four"],
+            metadatas=[
+                {"path": "x.py", "start_line": 1},
+                {"path": "x.py", "start_line": 5},
+                {"path": "y.py", "start_line": 1},
+                {"path": "z.py", "start_line": 1},
+            ],
+            embeddings=vectors,
+        )
+        by_path = await collection.get(where={"path": "x.py"})
+        by_or = await collection.get(
+            where={"$or": [{"path": "y.py"}, {"start_line": 5}]}, include=[]
+        )
+        await collection.update(ids=["c"], metadatas=[{"path": "x.py", "start_line": 9}])
+        moved = await collection.get(where={"path": {"$in": ["x.py"]}}, include=[])
+        await collection.delete(where={"path": "x.py"})
+        remaining = await collection.get(include=["embeddings"])
+        return by_path, by_or, moved, remaining, await collection.count()
+
+    by_path, by_or, moved, remaining, count = asyncio.run(run())
+    assert by_path["ids"] == ["a", "b"]
+    assert by_path["documents"] == ["one", "two"]
+    assert sorted(by_or["ids"]) == ["b", "c"]
+    assert moved["ids"] == ["a", "b", "c"]
+    assert remaining["ids"] == ["d"]
+    assert np.array_equal(remaining["embeddings"], vectors[3:])
+    assert count == 1
+
+
+def test_deleted_slots_are_reused_and_persisted(tmp_path):
+    vectors = _vectors(6)
+
+    async def write():
+        collection = await LocalClient(tmp_path).get_or_create_collection("test")
+        await collection.add(ids=["a", "b", "c"], embeddings=vectors[:3])
+        await collection.delete(ids=["b"])
+        await collection.add(ids=["d"], documents=["dee"], embeddings=vectors[3:4])
+        slots = collection._slots_of(["a", "c", "d"])
+        collection.close()
+        return slots
+
+    async def read():
+        collection = await LocalClient(tmp_path).get_collection("test")
+        result = await collection.query(query_embeddings=vectors[3:4], n_results=2)
+        return result, await collection.count()
+
+    slots = asyncio.run(write())
+    result, count = asyncio.run(read())
+    assert slots == {"a": 0, "c": 2, "d": 1}
+    assert count == 3
+    assert result["ids"][0][0] == "d"
+    assert result["documents"][0][0] == "dee"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-4)
+
+
+def test_query_respects_where(tmp_path):
+    vectors = _vectors(20)
+
+    async def run():
+        collection = await LocalClient(tmp_path).get_or_create_collection("test")
+        await collection.add(
+            ids=[str(i) for i in range(20)],
+            metadatas=[{"path": f"{i % 2}.py"} for i in range(20)],
+            embeddings=vectors,
+        )
+        return await collection.query(
+            query_embeddings=vectors[:2], n_results=3, where={"path": "1.py"}
+        )
+
+    result = asyncio.run(run())
+    assert len(result["ids"]) == 2
+    for ids, metadatas in zip(result["ids"], result["metadatas"]):
+        assert len(ids) == 3
+        assert {metadata["path"] for metadata in metadatas} == {"1.py"}
+
+
+def test_get_collection_missing(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(LocalClient(tmp_path).get_collection("missing"))
+
+
+def test_index_and_query_with_local_store(tmp_path, fake_embedding):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for idx in range(5):
+        (project_dir / f"module_{idx}.py").write_text(
+            f"def handler_{idx}(request):\n    return render_page_{idx}(request.user)\n"
+        )
+    (project_dir / "auth.py").write_text(
+        "def login(user, password):\n    return check_password(user, password)\n"
+    )
+    store = tmp_path / "store"
+    logger = logging.getLogger("test")
+
+    async def run():
+        error = await chunk_and_vectorise_core(
+            project_dir,
+            "*.py",
+            chunker_model.ChunkAndVectoriseConfig(
+                chroma_host="unused",
+                chroma_port=0,
+                collection_name="test",
+                max_batch_size=64,
+                language="python",
+                state_dir=tmp_path / "state",
+                local_store=store,
+            ),
+            logger,
+        )
+        results = await query_chunks_core(
+            "login check_password",
+            chunker_model.QueryChunksConfig(
+                chroma_host="unused",
+                chroma_port=0,
+                collection_name="test",
+                local_store=store,
+            ),
+            logger,
+            n_results=3,
+        )
+        return error, results
+
+    error, results = asyncio.run(run())
+    assert error is None
+    assert (store / "test" / "vectors.f32").exists()
+    assert len(results) == 3
+    assert results[0].path == "auth.py"
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.merge_results import merge_query_results, _estimate_tokens
+
+
+def _result(path, start, text, distance):
+    return chunker_model.QueryResult(
+        chunk=text,
+        path=path,
+        start=start,
+        end=start + text.count("\n"),
+        distance=distance,
+    )
+
+
+def test_merge_query_results_adjacent_and_overlapping():
+    results = [
+        _result("a.py", 3, "l3\nl4", 0.1),
+        _result("a.py", 0, "l0\nl1\nl2", 0.2),
+        _result("a.py", 4, "l4\nl5", 0.3),
+    ]
+    merged = merge_query_results(results=results)
+    assert len(merged) == 1
+    assert merged[0].path == "a.py"
+    assert merged[0].start == 0
+    assert merged[0].end == 5
+    assert merged[0].chunk == "l0\nl1\nl2\nl3\nl4\nl5"
+    assert merged[0].distance == 0.1
+
+
+def test_merge_query_results_keeps_separate_regions_and_files():
+    results = [
+        _result("a.py", 0, "a0", 0.5),
+        _result("b.py", 0, "b0", 0.1),
+        _result("a.py", 10, "a10", 0.2),
+    ]
+    merged = merge_query_results(results=results)
+    assert [(m.path, m.start) for m in merged] == [
+        ("b.py", 0),
+        ("a.py", 10),
+        ("a.py", 0),
+    ]
+
+
+def test_merge_query_results_drops_identical_content():
+    results = [
+        _result("a.py", 0, "same", 0.1),
+        _result("b.py", 0, "same", 0.2),
+    ]
+    merged = merge_query_results(results=results)
+    assert len(merged) == 1
+    assert merged[0].path == "a.py"
+
+
+@pytest.mark.parametrize(
+    "token_budget,expected_lines",
+    [(None, 4), (4, 2), (0, 0)],
+    ids=["no_budget", "truncated", "empty"],
+)
+def test_merge_query_results_token_budget(token_budget, expected_lines):
+    results = [_result("a.py", 0, "abcd\nefgh\nijkl\nmnop", 0.1)]
+    merged = merge_query_results(results=results, token_budget=token_budget)
+    lines = sum(m.end - m.start + 1 for m in merged)
+    assert lines == expected_lines
+    if merged:
+        assert merged[0].chunk.count("\n") + 1 == expected_lines
+
+
+def test__estimate_tokens():
+    assert _estimate_tokens("") == 0
+    assert _estimate_tokens("abcd") == 1
+    assert _estimate_tokens("abcde") == 2
+
+
+def test_merge_query_results_orders_reranked_windows_by_score():
+    results = [
+        _result("a.py", 0, "a0", 0.1).model_copy(update={"score": 0.2}),
+        _result("b.py", 0, "b0", 0.3).model_copy(update={"score": 0.9}),
+        _result("a.py", 1, "a1", 0.2).model_copy(update={"score": 0.5}),
+    ]
+    merged = merge_query_results(results=results)
+    assert [(m.path, m.score) for m in merged] == [("b.py", 0.9), ("a.py", 0.5)]
+
+
+def test_merge_query_results_of_ingested_chunks_matches_the_file(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    source = "\n".join(
+        f"def f{idx}(value):\n"
+        + "".join(f"    value = value * {n} + {idx}\n" for n in range(idx % 5 + 1))
+        + "    return value"
+        for idx in range(200)
+    )
+    (project_dir / "module.py").write_text(source)
+    lines = source.splitlines()
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+    )
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project_dir, "*.py", config, logging.getLogger("test")
+        )
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    results = [
+        chunker_model.QueryResult(
+            chunk=collection.documents[i],
+            path=collection.metadatas[i]["path"],
+            start=collection.metadatas[i]["start"],
+            end=collection.metadatas[i]["end"],
+            distance=float(idx),
+        )
+        for idx, i in enumerate(collection.ids)
+    ]
+    merged = merge_query_results(results=results)
+    assert len(results) > 2
+    assert len(merged) == 1
+    assert (merged[0].start, merged[0].end) == (0, len(lines) - 1)
+    assert merged[0].chunk.split("\n") == lines
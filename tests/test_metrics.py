@@ -0,0 +1,74 @@
+import urllib.request
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.metrics import (
+    _histogram_quantile,
+    build_run_report,
+    inc_counter,
+    observe,
+    render_prometheus,
+    set_gauge,
+    start_metrics_server,
+    time_chroma_call,
+)
+
+
+@pytest.fixture
+def registry():
+    return chunker_model.MetricsRegistry()
+
+
+def test_render_prometheus(registry):
+    inc_counter("chunker_files_total", labels={"result": "add"}, registry=registry)
+    inc_counter("chunker_files_total", labels={"result": "add"}, registry=registry)
+    set_gauge("chunker_files_pending", 3, registry=registry)
+    observe("chunker_stage_seconds", 0.02, labels={"stage": "read"}, registry=registry)
+
+    text = render_prometheus(registry)
+    assert "# TYPE chunker_files_total counter" in text
+    assert 'chunker_files_total{result="add"} 2' in text
+    assert "chunker_files_pending 3" in text
+    assert 'chunker_stage_seconds_bucket{stage="read",le="0.01"} 0' in text
+    assert 'chunker_stage_seconds_bucket{stage="read",le="0.025"} 1' in text
+    assert 'chunker_stage_seconds_count{stage="read"} 1' in text
+
+
+def test_time_chroma_call_counts_errors(registry):
+    with pytest.raises(RuntimeError):
+        with time_chroma_call("add", registry=registry):
+            raise RuntimeError("boom")
+    assert registry.counters[("chunker_chroma_errors_total", (("operation", "add"),))] == 1
+    assert registry.histograms[
+        ("chunker_chroma_call_seconds", (("operation", "add"),))
+    ].count == 1
+
+
+def test__histogram_quantile(registry):
+    for value in [0.002] * 50 + [0.2] * 50:
+        observe("h", value, registry=registry)
+    histogram = registry.histograms[("h", ())]
+    assert 0.001 <= _histogram_quantile(histogram, 0.5) <= 0.005
+    assert 0.1 <= _histogram_quantile(histogram, 0.99) <= 0.25
+
+
+def test_build_run_report(registry):
+    inc_counter("chunker_chunks_total", value=10, registry=registry)
+    inc_counter("chunker_files_total", labels={"result": "add"}, registry=registry)
+    inc_counter("chunker_files_total", labels={"result": "update"}, registry=registry)
+    report = build_run_report(elapsed_seconds=2.0, registry=registry)
+    assert report["rates"]["chunks_per_second"] == 5.0
+    assert report["rates"]["files_per_second"] == 1.0
+    assert report["counters"]['chunker_files_total{result="add"}'] == 1
+
+
+def test_start_metrics_server(registry):
+    inc_counter("chunker_queries_total", registry=registry)
+    server = start_metrics_server(host="127.0.0.1", port=0, registry=registry)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert "chunker_queries_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
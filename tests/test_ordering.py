@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import subprocess
+from unittest import mock
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.ordering import file_sizes, order_files
+
+
+def _write(project_dir, files: dict[str, str]) -> list:
+    paths = []
+    for name, text in files.items():
+        path = project_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        paths.append(path)
+    return paths
+
+
+def _names(files, project_dir) -> list[str]:
+    return [f.relative_to(project_dir).as_posix() for f in files]
+
+
+def test_order_by_size_with_priority(tmp_path):
+    files = _write(
+        tmp_path,
+        {
+            "big.py": "x = 1\n" * 50,
+            "small.py": "x = 1\n",
+            "core/medium.py": "x = 1\n" * 10,
+            "core/tiny.py": "",
+        },
+    )
+    sizes = file_sizes(files)
+    assert _names(order_files(files, tmp_path, "size", [], sizes), tmp_path) == [
+        "core/tiny.py",
+        "small.py",
+        "core/medium.py",
+        "big.py",
+    ]
+    ordered = order_files(files, tmp_path, "glob", ["big.py", "core/"], sizes)
+    assert _names(ordered, tmp_path) == [
+        "big.py",
+        "core/medium.py",
+        "core/tiny.py",
+        "small.py",
+    ]
+
+
+def test_order_by_git_recency(tmp_path):
+    def git(*args, date):
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_DATE=date,
+            GIT_COMMITTER_DATE=date,
+            GIT_AUTHOR_NAME="test",
+            GIT_AUTHOR_EMAIL="test@example.com",
+            GIT_COMMITTER_NAME="test",
+            GIT_COMMITTER_EMAIL="test@example.com",
+        )
+        subprocess.run(
+            ["git", *args], cwd=tmp_path, env=env, check=True, capture_output=True
+        )
+
+    project_dir = tmp_path / "project"
+    files = _write(project_dir, {"old.py": "a\n", "hot.py": "b\n", "mid.py": "c\n"})
+    git("init", "-q", date="2020-01-01T00:00:00")
+    git("add", ".", date="2020-01-01T00:00:00")
+    git("commit", "-qm", "initial", date="2020-01-01T00:00:00")
+    for name, date in [
+        ("mid.py", "2021-01-01T00:00:00"),
+        ("hot.py", "2022-01-01T00:00:00"),
+    ]:
+        (project_dir / name).write_text("changed\n")
+        git("commit", "-qam", f"change {name}", date=date)
+    files += _write(project_dir, {"untracked.py": "d\n"})
+    os.utime(project_dir / "untracked.py", (0, 0))
+
+    ordered = order_files(files, project_dir, "recent", [], file_sizes(files))
+    assert _names(ordered, project_dir) == ["hot.py", "mid.py", "old.py", "untracked.py"]
+
+
+def test_order_outside_git_uses_mtime(tmp_path):
+    files = _write(tmp_path, {"a.py": "a\n", "b.py": "b\n"})
+    os.utime(tmp_path / "a.py", (1000, 1000))
+    os.utime(tmp_path / "b.py", (2000, 2000))
+    with mock.patch("subprocess.Popen", side_effect=FileNotFoundError("git")):
+        ordered = order_files(files, tmp_path, "recent", [], file_sizes(files))
+    assert _names(ordered, tmp_path) == ["b.py", "a.py"]
+
+
+def test_chunk_and_vectorise_reports_coverage_in_order(tmp_path, caplog, fake_client):
+    project_dir = tmp_path / "project"
+    _write(
+        project_dir,
+        {"a.py": "def a():\n    pass\n" * 20, "b.py": "def b():\n    pass\n"},
+    )
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        file_order="size",
+        max_file_concurrency=1,
+    )
+
+    async def run(config):
+        return await chunk_and_vectorise_core(
+            project_dir, "*.py", config, logging.getLogger("test")
+        )
+
+    with caplog.at_level(logging.INFO, logger="test"):
+        assert asyncio.run(run(config)) is None
+    finished = [r.message for r in caplog.records if r.message.startswith("Finished")]
+    assert [m.rsplit("/", 1)[-1] for m in finished] == ["b.py", "a.py"]
+    coverage = [r.message for r in caplog.records if r.message.startswith("Coverage")]
+    assert coverage == ["Coverage: 2/2 files, 100% of bytes."]
+
+    config.file_order = "newest"
+    assert isinstance(asyncio.run(run(config)), chunker_model.InvalidFileOrderError)
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+import re
+import time
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.profiling import (
+    build_profile_report,
+    profile_frame,
+    profile_run,
+    render_collapsed_stacks,
+    write_profile,
+)
+
+
+def test_profile_frames_nest_into_stacks():
+    with profile_frame("ignored"):
+        pass
+
+    with profile_run("run") as profiler:
+        for name in ("a.py", "b.py"):
+            with profile_frame(f"file:{name}"):
+                with profile_frame("split"):
+                    time.sleep(0.02 if name == "b.py" else 0.001)
+                    block = bytearray(4_000_000)
+                del block
+
+    assert set(profiler.stacks) == {
+        ("run",),
+        ("run", "file:a.py"),
+        ("run", "file:a.py", "split"),
+        ("run", "file:b.py"),
+        ("run", "file:b.py", "split"),
+    }
+    split = profiler.stacks[("run", "file:b.py", "split")]
+    assert split.calls == 1
+    assert split.wall >= 0.02
+    assert split.peak_bytes >= 4_000_000
+    assert profiler.stacks[("run", "file:b.py")].peak_bytes >= 4_000_000
+
+    lines = render_collapsed_stacks(profiler).splitlines()
+    assert all(re.fullmatch(r"run(;[^;]+)* \d+", line) for line in lines)
+    folded = dict(line.rsplit(" ", 1) for line in lines)
+    assert int(folded["run;file:b.py;split"]) >= 20_000
+
+    report = build_profile_report(profiler, top_n=1)
+    assert report["files_profiled"] == 2
+    assert report["stages"]["split"]["calls"] == 2
+    [slowest] = report["slowest_files"]
+    assert slowest["path"] == "b.py"
+    assert slowest["stages"]["split"]["wall_seconds"] >= 0.02
+
+
+def test_profile_chunk_and_vectorise_run(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for idx in range(3):
+        (project_dir / f"mod_{idx}.py").write_text(
+            "".join(f"def f_{n}():\n    return {n}\n\n\n" for n in range(10 * idx + 1))
+        )
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        symbols=True,
+    )
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project_dir, "*.py", config, logging.getLogger("test")
+        )
+
+    with profile_run("chunk-and-vectorise") as profiler:
+        assert asyncio.run(run()) is None
+
+    folded, report_path = write_profile(profiler, tmp_path / "profile", top_n=2)
+    stacks = folded.read_text().splitlines()
+    assert any(
+        line.startswith("chunk-and-vectorise;file:mod_2.py;write;chroma:add ")
+        for line in stacks
+    )
+    report = json.loads(report_path.read_text())
+    assert report["files_profiled"] == 3
+    assert {"walk", "read", "split", "symbols", "write", "chroma:add"} <= set(
+        report["stages"]
+    )
+    assert len(report["slowest_files"]) == 2
+    assert all(
+        {"read", "split", "write"} <= set(entry["stages"])
+        for entry in report["slowest_files"]
+    )
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from unittest import mock
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.query_cache import (
+    cache_generation,
+    invalidate_query_cache,
+    lookup_exact,
+    lookup_similar,
+    store_query_results,
+)
+from chunker_src.query_chunks import query_chunks_batch_core, query_chunks_core
+from chunker_src.sharding import ShardedCollection
+from fake_chroma import FakeAsyncCollection
+
+logger = logging.getLogger(__name__)
+
+
+def _result(path: str) -> chunker_model.QueryResult:
+    return chunker_model.QueryResult(chunk="x", path=path, start=0, end=1, distance=0.1)
+
+
+def _store(cache, text, vector, path, collection_name="test", scope="s"):
+    store_query_results(
+        cache,
+        collection_name=collection_name,
+        scope=scope,
+        text=text,
+        vector=vector,
+        results=[_result(path)],
+        generation=cache_generation(cache, collection_name),
+    )
+
+
+def test_query_cache_lookups_ttl_eviction_and_invalidation():
+    cache = chunker_model.QueryCache(max_entries=2, threshold=0.9)
+    _store(cache, "Open  the Database", [1.0, 0.0, 0.0], "db.py")
+
+    assert [r.path for r in lookup_exact(cache, "s", "open the database")] == ["db.py"]
+    assert lookup_exact(cache, "other", "open the database") is None
+    assert [r.path for r in lookup_similar(cache, "s", [0.95, 0.1, 0.0])] == ["db.py"]
+    assert lookup_similar(cache, "s", [0.5, 0.8, 0.0]) is None
+
+    _store(cache, "login", [0.0, 1.0, 0.0], "auth.py")
+    lookup_exact(cache, "s", "open the database")
+    _store(cache, "render", [0.0, 0.0, 1.0], "view.py")
+    assert lookup_exact(cache, "s", "login") is None
+    assert lookup_exact(cache, "s", "open the database") is not None
+
+    generation = cache_generation(cache, "test")
+    invalidate_query_cache(cache, "test")
+    assert not cache.entries and not cache.exact and not cache.scopes
+    store_query_results(
+        cache, "test", "s", "login", [0.0, 1.0, 0.0], [_result("a.py")], generation
+    )
+    assert lookup_exact(cache, "s", "login") is None
+
+    cache.ttl = 0.0
+    _store(cache, "login", [0.0, 1.0, 0.0], "auth.py")
+    assert lookup_similar(cache, "s", [0.0, 1.0, 0.0]) is None
+    assert not cache.entries
+
+
+def test_query_chunks_reuses_results_of_paraphrased_queries(
+    fake_client, fake_embedding
+):
+    config = chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test"
+    )
+    cache = chunker_model.QueryCache()
+
+    async def run():
+        collection = await fake_client.get_or_create_collection("test")
+        await collection.add(
+            ids=["a", "b"],
+            documents=["def login(user, password): ...", "def connect(url): ..."],
+            metadatas=[{"path": "auth.py"}, {"path": "db.py"}],
+        )
+        with mock.patch.object(
+            type(collection),
+            "query",
+            autospec=True,
+            side_effect=type(collection).query,
+        ) as query:
+            first = await query_chunks_core(
+                "check the password", config, logger, n_results=1, query_cache=cache
+            )
+            repeated = await query_chunks_batch_core(
+                ["Check the  password", "the password check"],
+                config,
+                logger,
+                n_results=1,
+                query_cache=cache,
+            )
+            other_count = await query_chunks_core(
+                "check the password", config, logger, n_results=2, query_cache=cache
+            )
+            invalidate_query_cache(cache, "test")
+            after_reindex = await query_chunks_core(
+                "check the password", config, logger, n_results=1, query_cache=cache
+            )
+            return first, repeated, other_count, after_reindex, query.call_count
+
+    first, repeated, other_count, after_reindex, calls = asyncio.run(run())
+    assert [r.path for r in first] == ["auth.py"]
+    assert repeated == [first, first]
+    assert len(other_count) == 2
+    assert after_reindex == first
+    assert calls == 3
+
+
+def test_query_cache_drops_results_of_collections_reindexed_elsewhere(
+    tmp_path, fake_client, fake_embedding
+):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "auth.py").write_text("def login(user, password):\n    pass\n")
+    state_dir = tmp_path / "state"
+    query_config = chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test", state_dir=state_dir
+    )
+    ingest_config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=state_dir,
+    )
+    cache = chunker_model.QueryCache()
+
+    async def query():
+        return await query_chunks_core(
+            "check the password", query_config, logger, n_results=1, query_cache=cache
+        )
+
+    async def run():
+        await chunk_and_vectorise_core(project_dir, "*.py", ingest_config, logger)
+        before = await query()
+        (project_dir / "auth.py").write_text("def check_password(pw):\n    pass\n")
+        await chunk_and_vectorise_core(project_dir, "*.py", ingest_config, logger)
+        return before, await query()
+
+    before, after = asyncio.run(run())
+    assert [r.chunk for r in before] == ["def login(user, password):\n    pass"]
+    assert [r.chunk for r in after] == ["def check_password(pw):\n    pass"]
+
+
+def test_query_cache_skips_results_missing_a_shard(tmp_path, fake_embedding):
+    class FailingCollection(FakeAsyncCollection):
+        async def query(self, **kwargs):
+            raise ConnectionError("shard down")
+
+    shards = [FakeAsyncCollection("test"), FailingCollection("test")]
+    collection = ShardedCollection(
+        shards=shards, endpoints=["up:1", "down:2"], timeout=1.0
+    )
+    config = chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test", state_dir=tmp_path
+    )
+    cache = chunker_model.QueryCache()
+
+    async def get_collection(*args):
+        return collection
+
+    async def run():
+        await shards[0].add(
+            ids=["a"], documents=["def login(): ..."], metadatas=[{"path": "auth.py"}]
+        )
+        with mock.patch(
+            "chunker_src.query_chunks._get_query_collection", get_collection
+        ):
+            return await query_chunks_core(
+                "login", config, logger, n_results=1, query_cache=cache
+            )
+
+    assert [r.path for r in asyncio.run(run())] == ["auth.py"]
+    assert not cache.entries
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.query_chunks import build_query_response, query_collections_core
+
+
+@pytest.fixture
+def results():
+    return [
+        chunker_model.QueryResult(chunk="a", path="x.py", start=0, end=1, distance=0.1),
+        chunker_model.QueryResult(chunk="b", path="y.py", start=4, end=9, distance=0.2),
+        chunker_model.QueryResult(chunk="c", path="x.py", start=7, end=8, distance=0.3),
+    ]
+
+
+def test_build_query_response(results):
+    response = build_query_response(results)
+    assert response.paths == ["x.py", "y.py"]
+    assert response.path_index == [0, 1, 0]
+    assert response.start == [0, 4, 7]
+    assert response.end == [1, 9, 8]
+    assert response.distances == [0.1, 0.2, 0.3]
+    assert response.chunks == ["a", "b", "c"]
+
+
+def test_build_query_response_elides_text(results):
+    response = build_query_response(results, include_text=False)
+    encoded = json.loads(response.model_dump_json(exclude_none=True))
+    assert "chunks" not in encoded
+    assert encoded["paths"] == ["x.py", "y.py"]
+
+
+def test_build_query_response_empty():
+    encoded = json.loads(build_query_response([]).model_dump_json(exclude_none=True))
+    assert encoded == {
+        "paths": [],
+        "path_index": [],
+        "start": [],
+        "end": [],
+        "distances": [],
+        "chunks": [],
+    }
+
+
+def test_build_query_response_with_collections():
+    results = [
+        chunker_model.QueryResult(
+            chunk="a", path="x.py", start=0, end=1, distance=0.1, collection="api"
+        ),
+        chunker_model.QueryResult(
+            chunk="b", path="x.py", start=2, end=3, distance=0.2, collection="web"
+        ),
+    ]
+    response = build_query_response(results)
+    assert response.paths == ["x.py"]
+    assert response.collections == ["api", "web"]
+    assert response.collection_index == [0, 1]
+
+
+def test_query_collections_core_merges_by_distance(fake_client):
+    async def run():
+        api = await fake_client.get_or_create_collection("api")
+        web = await fake_client.get_or_create_collection("web")
+        await api.add(
+            ids=["a"], documents=["user session"], metadatas=[{"path": "a.py"}]
+        )
+        await web.add(
+            ids=["b", "c"],
+            documents=["database connection", "cache config"],
+            metadatas=[{"path": "b.py"}, {"path": "c.py"}],
+        )
+        config = chunker_model.QueryChunksConfig(
+            chroma_host="fake", chroma_port=0, collection_name="api"
+        )
+        return await query_collections_core(
+            query_text="database connection",
+            config=config,
+            collection_names=["api", "web"],
+            logger=logging.getLogger(__name__),
+            n_results=2,
+            client_pool=chunker_model.ClientPool(),
+        )
+
+    results = asyncio.run(run())
+    assert [(r.collection, r.path) for r in results][0] == ("web", "b.py")
+    assert len(results) == 2
+    assert results[0].distance <= results[1].distance
+
+
+def test_build_query_response_with_aliases():
+    results = [
+        chunker_model.QueryResult(chunk="a", path="x.py", start=0, end=1, distance=0.1),
+        chunker_model.QueryResult(
+            chunk="b", path="y.py", start=2, end=3, distance=0.2, aliases=["z.py:2-3"]
+        ),
+    ]
+    encoded = json.loads(build_query_response(results).model_dump_json(exclude_none=True))
+    assert encoded["aliases"] == {"1": ["z.py:2-3"]}
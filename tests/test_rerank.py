@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from chunker_src import model as chunker_model
+from chunker_src.query_chunks import query_chunks_core
+from chunker_src.rerank import (
+    cross_encoder_scores,
+    lexical_scores,
+    rerank_results,
+    rerank_with_deadline,
+)
+
+LOGGER = logging.getLogger("test")
+
+
+def _config(**kwargs):
+    return chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test", rerank=True, **kwargs
+    )
+
+
+def _result(chunk, distance):
+    return chunker_model.QueryResult(
+        chunk=chunk, path=f"{chunk[:8]}.py", start=0, end=0, distance=distance
+    )
+
+
+def test_lexical_scores_match_identifier_parts():
+    scores = lexical_scores(
+        "load user session",
+        [
+            "def loadUserSession(token):",
+            "def load_config(path):",
+            "class Parser:",
+        ],
+    )
+    assert scores[0] == 1.0
+    assert scores[0] > scores[1] > scores[2] == 0.0
+
+
+def test_rerank_results_reorders_and_truncates():
+    results = [
+        _result("class Parser: pass", 0.1),
+        _result("def render_page(): pass", 0.2),
+        _result("def load_user_session(token): pass", 0.3),
+    ]
+    reranked = rerank_results(
+        "load_user_session", results, 2, _config(), time.monotonic() + 1, LOGGER
+    )
+    assert [r.chunk for r in reranked][0] == "def load_user_session(token): pass"
+    assert len(reranked) == 2
+    assert reranked[0].score > reranked[1].score
+
+
+def test_rerank_falls_back_to_vector_order_after_timeout():
+    results = [_result("a", 0.1), _result("b", 0.2), _result("c", 0.3)]
+
+    def slow_rerank(*args):
+        time.sleep(0.2)
+        return list(reversed(results))
+
+    with mock.patch("chunker_src.rerank.rerank_results", slow_rerank):
+        reranked = asyncio.run(
+            rerank_with_deadline(
+                "a", results, 2, _config(rerank_timeout=0.02), LOGGER
+            )
+        )
+    assert [r.chunk for r in reranked] == ["a", "b"]
+    assert all(r.score is None for r in reranked)
+
+
+def test_cross_encoder_scores_in_batches_until_deadline():
+    calls = []
+
+    def encode_batch(pairs):
+        return [
+            SimpleNamespace(ids=[1, 2], attention_mask=[1, 1], type_ids=[0, 1])
+            for _ in pairs
+        ]
+
+    def run(outputs, inputs):
+        calls.append(len(inputs["input_ids"]))
+        return [np.arange(len(inputs["input_ids"]), dtype=np.float32)[:, None]]
+
+    cross_encoder = chunker_model.CrossEncoder(
+        session=SimpleNamespace(run=run),
+        tokenizer=SimpleNamespace(encode_batch=encode_batch),
+        input_names=["input_ids", "attention_mask"],
+    )
+    chunks = ["a", "b", "c", "d", "e"]
+    scores = cross_encoder_scores(
+        cross_encoder, "q", chunks, batch_size=2, deadline=time.monotonic() + 10
+    )
+    assert scores == [0.0, 1.0, 0.0, 1.0, 0.0]
+    assert calls == [2, 2, 1]
+    assert cross_encoder_scores(cross_encoder, "q", chunks, 2, time.monotonic()) is None
+
+
+def test_query_chunks_core_overfetches_and_reranks(tmp_path, fake_client):
+    async def run():
+        collection = await fake_client.get_or_create_collection("test")
+        await collection.add(
+            ids=[str(idx) for idx in range(20)],
+            documents=[f"def handler_{idx}(request): return request" for idx in range(20)],
+            metadatas=[{"path": f"m{idx}.py", "start": 0, "end": 0} for idx in range(20)],
+        )
+        return await query_chunks_core(
+            "handler_13 request", _config(rerank_factor=5), LOGGER, n_results=3
+        )
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert results[0].path == "m13.py"
+    assert all(r.score is not None for r in results)
@@ -0,0 +1,98 @@
+import asyncio
+
+from chunker_src import model as chunker_model
+from chunker_src.scheduling import fair_slot, path_turn
+
+
+def test_fair_slot_alternates_between_projects():
+    scheduler = chunker_model.FairScheduler(slots=1)
+    order = []
+
+    async def work(project, idx):
+        async with fair_slot(scheduler, project):
+            order.append(f"{project}{idx}")
+            await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(
+            work("a", 1), work("a", 2), work("a", 3), work("b", 1), work("b", 2)
+        )
+
+    asyncio.run(run())
+    assert order == ["a1", "a2", "b1", "a3", "b2"]
+    assert scheduler.active == 0
+    assert not scheduler.waiters
+
+
+def test_fair_slot_cancelled_waiter_does_not_block():
+    scheduler = chunker_model.FairScheduler(slots=1)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with fair_slot(scheduler, "a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        async with fair_slot(scheduler, "b"):
+            pass
+
+    asyncio.run(asyncio.wait_for(run(), timeout=1))
+    assert scheduler.active == 0
+
+
+def test_path_turn_orders_writers_of_a_path():
+    sequencer = chunker_model.PathSequencer()
+    order = []
+
+    async def write(path, idx, steps):
+        async with path_turn(sequencer, ("test", path)):
+            order.append(f"{path}{idx}+")
+            for _ in range(steps):
+                await asyncio.sleep(0)
+            order.append(f"{path}{idx}-")
+
+    async def run():
+        await asyncio.gather(write("a", 1, 3), write("a", 2, 0), write("b", 1, 1))
+
+    asyncio.run(run())
+    assert order.index("a1-") < order.index("a2+")
+    assert order.index("b1+") < order.index("a1-")
+    assert not sequencer.tails
+
+
+def test_path_turn_cancelled_waiter_keeps_order():
+    sequencer = chunker_model.PathSequencer()
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def write(idx, wait):
+            async with path_turn(sequencer, ("test", "a")):
+                order.append(idx)
+                if wait:
+                    await release.wait()
+
+        first = asyncio.create_task(write(1, True))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(write(2, False))
+        third = asyncio.create_task(write(3, False))
+        await asyncio.sleep(0)
+        second.cancel()
+        await asyncio.sleep(0)
+        assert order == [1]
+        release.set()
+        await asyncio.gather(first, third, return_exceptions=True)
+
+    asyncio.run(asyncio.wait_for(run(), timeout=1))
+    assert order == [1, 3]
+    assert not sequencer.tails
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from chunker_src.sharding import (
+    ShardedCollection,
+    _merge_query_results,
+    parse_endpoint,
+    shard_for_path,
+)
+from fake_chroma import FakeAsyncCollection
+
+
+class SlowCollection(FakeAsyncCollection):
+    async def query(self, **kwargs):
+        await asyncio.sleep(1)
+        return await super().query(**kwargs)
+
+
+def _sharded(shards, timeout=1.0):
+    return ShardedCollection(
+        shards=shards,
+        endpoints=[f"shard:{idx}" for idx in range(len(shards))],
+        timeout=timeout,
+    )
+
+
+def test_parse_endpoint():
+    assert parse_endpoint("localhost:8001") == ("localhost", 8001)
+    with pytest.raises(ValueError):
+        parse_endpoint("localhost")
+
+
+def test_shard_for_path_is_stable():
+    shards = [shard_for_path(f"src/file_{idx}.py", 3) for idx in range(30)]
+    assert shards == [shard_for_path(f"src/file_{idx}.py", 3) for idx in range(30)]
+    assert set(shards) == {0, 1, 2}
+
+
+def test_sharded_collection_routes_by_path():
+    shards = [FakeAsyncCollection(f"s{idx}") for idx in range(3)]
+    collection = _sharded(shards)
+    paths = [f"src/file_{idx}.py" for idx in range(12)]
+
+    async def run():
+        await collection.add(
+            ids=[f"id{idx}" for idx in range(12)],
+            documents=[f"chunk about {path}" for path in paths],
+            metadatas=[{"path": path} for path in paths],
+        )
+        pinned = await collection.get(where={"path": paths[0]})
+        everything = await collection.get()
+        await collection.delete(where={"path": paths[0]})
+        return pinned, everything, await collection.count()
+
+    pinned, everything, count = asyncio.run(run())
+    for idx, path in enumerate(paths[1:], start=1):
+        owner = shards[shard_for_path(path, 3)]
+        assert f"id{idx}" in owner.documents
+    assert pinned["ids"] == ["id0"]
+    assert sorted(everything["ids"]) == sorted(f"id{idx}" for idx in range(12))
+    assert count == 11
+
+
+def test_sharded_query_merges_by_distance_and_skips_slow_shards():
+    shards = [FakeAsyncCollection("fast"), SlowCollection("slow")]
+    collection = _sharded(shards, timeout=0.05)
+
+    async def run():
+        await shards[0].add(
+            ids=["a", "b"],
+            documents=["database connection", "user session"],
+            metadatas=[{"path": "a.py"}, {"path": "b.py"}],
+        )
+        await shards[1].add(
+            ids=["c"], documents=["database connection"], metadatas=[{"path": "c.py"}]
+        )
+        return await collection.query(query_texts=["database connection"], n_results=2)
+
+    result = asyncio.run(run())
+    assert result["ids"] == [["a", "b"]]
+    assert result["distances"][0] == sorted(result["distances"][0])
+    assert result["failed_shards"] == ["shard:1"]
+
+
+def test_sharded_query_fails_when_every_shard_fails():
+    collection = _sharded([SlowCollection("slow")], timeout=0.01)
+    with pytest.raises(RuntimeError):
+        asyncio.run(collection.query(query_texts=["x"], n_results=1))
+
+
+def test_sharded_query_ranks_by_distance_even_when_not_included():
+    shards = [FakeAsyncCollection("a"), FakeAsyncCollection("b")]
+    collection = _sharded(shards)
+
+    async def run():
+        await shards[0].add(
+            ids=["far"], documents=["user session"], metadatas=[{"path": "a.py"}]
+        )
+        await shards[1].add(
+            ids=["near"], documents=["database connection"], metadatas=[{"path": "b.py"}]
+        )
+        return await collection.query(
+            query_texts=["database connection"], n_results=1, include=["documents"]
+        )
+
+    assert asyncio.run(run())["ids"] == [["near"]]
+    with pytest.raises(ValueError):
+        _merge_query_results([{"ids": [["x"]], "documents": [["x"]]}], n_results=1)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from unittest import mock
+
+import numpy as np
+
+from chunker_src import model as chunker_model
+from chunker_src.query_chunks import query_chunks_batch_core, query_chunks_core
+from chunker_src.snapshot import drop_snapshot, open_snapshot, refresh_snapshot
+from fake_chroma import FakeAsyncClient, fake_embed
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS = [
+    "def connect(url):\n    return Database(url)",
+    "def login(user, password):\n    return check_password(user, password)",
+    "def render(template):\n    return Template(template).render()",
+    "class Cache:\n    def get(self, key): ...",
+    "def parse_args(argv):\n    return parser.parse(argv)",
+]
+
+
+async def _fill(client: FakeAsyncClient):
+    collection = await client.get_or_create_collection("test")
+    await collection.add(
+        ids=[f"id{idx}" for idx in range(len(DOCUMENTS))],
+        documents=DOCUMENTS,
+        metadatas=[{"path": f"m{idx}.py", "start": 0, "end": 1} for idx in range(5)],
+    )
+    return collection
+
+
+def test_refresh_snapshot_is_incremental(tmp_path):
+    client = FakeAsyncClient()
+
+    async def run():
+        collection = await _fill(client)
+        snapshot = await refresh_snapshot(collection, tmp_path, "test", logger)
+        first = sorted((await snapshot.get(include=[]))["ids"])
+        await collection.delete(ids=["id0", "id1"])
+        await collection.add(
+            ids=["id9"], documents=["def new(): ..."], metadatas=[{"path": "n.py"}]
+        )
+        with mock.patch.object(collection, "get", wraps=collection.get) as get:
+            snapshot = await refresh_snapshot(collection, tmp_path, "test", logger)
+            fetched = [call.kwargs.get("ids") for call in get.call_args_list]
+        records = await snapshot.get(ids=["id9"], include=["documents", "embeddings"])
+        return first, sorted((await snapshot.get(include=[]))["ids"]), fetched, records
+
+    first, second, fetched, records = asyncio.run(run())
+    assert first == [f"id{idx}" for idx in range(5)]
+    assert second == ["id2", "id3", "id4", "id9"]
+    assert fetched == [None, ["id9"]]
+    assert records["documents"] == ["def new(): ..."]
+    assert np.allclose(records["embeddings"][0], fake_embed(["def new(): ..."])[0])
+
+
+def test_query_from_snapshot_matches_collection(tmp_path, fake_client, fake_embedding):
+    direct = chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test"
+    )
+    snapshotted = chunker_model.QueryChunksConfig(
+        chroma_host="fake", chroma_port=0, collection_name="test", snapshot_dir=tmp_path
+    )
+    queries = ["database connection", "check the password"]
+
+    async def run():
+        await _fill(fake_client)
+        expected = [
+            await query_chunks_core(query, direct, logger, n_results=3)
+            for query in queries
+        ]
+        built = await query_chunks_core(queries[0], snapshotted, logger, n_results=3)
+        fake_client.collections.clear()
+        batched = await query_chunks_batch_core(queries, snapshotted, logger, n_results=3)
+        return expected, built, batched
+
+    expected, built, batched = asyncio.run(run())
+    assert [r.path for r in built] == [r.path for r in expected[0]]
+    assert len(batched) == 2
+    for results, reference in zip(batched, expected):
+        assert [r.path for r in results] == [r.path for r in reference]
+        assert [r.chunk for r in results] == [r.chunk for r in reference]
+
+
+def test_drop_snapshot(tmp_path):
+    client = FakeAsyncClient()
+
+    async def run():
+        collection = await _fill(client)
+        await refresh_snapshot(collection, tmp_path, "test", logger)
+        opened = await open_snapshot(tmp_path, "test")
+        await drop_snapshot(tmp_path, "test")
+        return opened, await open_snapshot(tmp_path, "test")
+
+    opened, dropped = asyncio.run(run())
+    assert opened is not None
+    assert dropped is None
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import sqlite3
+from unittest import mock
+
+import pytest
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import chunk_and_vectorise_core
+from chunker_src.symbols import (
+    close_symbol_index,
+    extract_symbols,
+    find_symbol_core,
+    find_symbols,
+    open_symbol_index,
+    replace_symbols,
+)
+
+PYTHON_SOURCE = '''import os
+
+
+@cached
+def load_config(path):
+    return path
+
+
+class ConfigServer:
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+'''
+
+JS_SOURCE = '''export class Store {
+  constructor(url) {
+    this.url = url;
+  }
+  async load(id) {
+    if (id) {
+      return 1;
+    }
+  }
+}
+
+export function helper(x) {
+  return x;
+}
+const add = (a, b) => a + b;
+'''
+
+GO_SOURCE = '''package main
+
+type Server struct {
+\taddr string
+}
+
+func (s *Server) Start() error {
+\treturn nil
+}
+'''
+
+
+def _summary(symbols):
+    return [(s.qualified_name, s.kind, s.start, s.end) for s in symbols]
+
+
+def test_extract_python_symbols():
+    assert _summary(extract_symbols(PYTHON_SOURCE, "a.py", "python")) == [
+        ("load_config", "function", 3, 5),
+        ("ConfigServer", "class", 8, 13),
+        ("ConfigServer.start", "method", 9, 10),
+        ("ConfigServer.stop", "method", 12, 13),
+    ]
+
+
+def test_extract_python_symbols_with_syntax_error():
+    symbols = extract_symbols("def ok():\n    pass\ndef broken(:\n", "a.py", "python")
+    assert [s.name for s in symbols] == ["ok", "broken"]
+
+
+def test_extract_js_symbols():
+    assert _summary(extract_symbols(JS_SOURCE, "a.js", "js")) == [
+        ("Store", "class", 0, 9),
+        ("Store.constructor", "method", 1, 3),
+        ("Store.load", "method", 4, 8),
+        ("helper", "function", 11, 13),
+        ("add", "function", 14, 14),
+    ]
+
+
+def test_extract_go_symbols():
+    assert _summary(extract_symbols(GO_SOURCE, "a.go", "go")) == [
+        ("Server", "class", 2, 4),
+        ("Server.Start", "method", 6, 8),
+    ]
+
+
+def test_extract_unsupported_language():
+    assert extract_symbols("# Title\n", "a.md", "markdown") == []
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = open_symbol_index(tmp_path)
+    replace_symbols(index, "a.py", extract_symbols(PYTHON_SOURCE, "a.py", "python"))
+    replace_symbols(index, "b.js", extract_symbols(JS_SOURCE, "b.js", "js"))
+    yield index
+    index.connection.close()
+
+
+def test_find_exact_prefix_and_fuzzy(index):
+    exact = find_symbols(index, "LOAD_CONFIG")
+    assert [(s.path, s.start, s.match) for s in exact] == [("a.py", 3, "exact")]
+
+    prefix = find_symbols(index, "config", fuzzy=False)
+    assert [(s.name, s.match) for s in prefix] == [("ConfigServer", "prefix")]
+
+    fuzzy = find_symbols(index, "lod_config")
+    assert [(s.name, s.match) for s in fuzzy] == [("load_config", "fuzzy")]
+
+
+def test_find_qualified_and_kind(index):
+    assert _summary(find_symbols(index, "Store.load")) == [("Store.load", "method", 4, 8)]
+    methods = find_symbols(index, "st", kind="method", fuzzy=False)
+    assert [s.qualified_name for s in methods] == ["ConfigServer.stop", "ConfigServer.start"]
+    assert find_symbols(index, "start", kind="class", fuzzy=False) == []
+
+
+def test_replace_symbols_is_incremental(index):
+    renamed = extract_symbols("def renamed():\n    pass\n", "a.py", "python")
+    replace_symbols(index, "a.py", renamed)
+    assert find_symbols(index, "load_config") == []
+    assert [s.name for s in find_symbols(index, "renamed")] == ["renamed"]
+    assert [s.path for s in find_symbols(index, "helper")] == ["b.js"]
+    grams = index.connection.execute(
+        "SELECT COUNT(*) FROM trigram WHERE folded = 'load_config'"
+    ).fetchone()[0]
+    assert grams == 0
+
+
+def test_find_symbol_core_without_index(tmp_path):
+    result = find_symbol_core("test", "x", state_dir=tmp_path / "missing")
+    assert isinstance(result, chunker_model.SymbolIndexError)
+
+
+def test_chunk_and_vectorise_records_symbols(tmp_path, fake_client, fake_embedding):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "server.py").write_text(PYTHON_SOURCE)
+    state_dir = tmp_path / "state"
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=state_dir,
+        symbols=True,
+        resume=False,
+    )
+
+    async def run():
+        return await chunk_and_vectorise_core(
+            project_dir, "*.py", config, logging.getLogger("test")
+        )
+
+    assert asyncio.run(run()) is None
+    found = find_symbol_core("test", "ConfigServer.stop", state_dir=state_dir)
+    assert _summary(found) == [("ConfigServer.stop", "method", 12, 13)]
+
+    (project_dir / "server.py").write_text("def serve():\n    pass\n")
+    assert asyncio.run(run()) is None
+    assert find_symbol_core("test", "ConfigServer", state_dir=state_dir, fuzzy=False) == []
+    assert [s.path for s in find_symbol_core("test", "serve", state_dir=state_dir)] == [
+        "server.py"
+    ]
+
+
+def test_replace_symbols_commits_in_batches_from_threads(tmp_path):
+    index = open_symbol_index(tmp_path)
+    index.commit_every = 2
+    reader = sqlite3.connect(index.path)
+
+    def committed():
+        return reader.execute("SELECT COUNT(DISTINCT path) FROM symbol").fetchone()[0]
+
+    symbols = extract_symbols(PYTHON_SOURCE, "a.py", "python")
+    asyncio.run(asyncio.to_thread(replace_symbols, index, "a.py", symbols))
+    assert committed() == 0
+    asyncio.run(asyncio.to_thread(replace_symbols, index, "b.py", symbols))
+    assert committed() == 2
+    replace_symbols(index, "c.py", symbols)
+    close_symbol_index(index)
+    assert committed() == 3
+    reader.close()
+
+
+def test_chunk_and_vectorise_reads_each_file_once(
+    tmp_path, fake_client, fake_embedding
+):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    source = project_dir / "server.py"
+    source.write_text(PYTHON_SOURCE)
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        symbols=True,
+    )
+    opened = []
+    real_open = open
+
+    def counting_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return real_open(file, *args, **kwargs)
+
+    async def run():
+        with mock.patch("builtins.open", counting_open):
+            return await chunk_and_vectorise_core(
+                project_dir, "*.py", config, logging.getLogger("test")
+            )
+
+    assert asyncio.run(run()) is None
+    assert opened.count(str(source)) == 1
+    found = find_symbol_core("test", "ConfigServer.stop", state_dir=tmp_path / "state")
+    assert [s.path for s in found] == ["server.py"]
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+from unittest import mock
+
+from chunker_src import model as chunker_model
+from chunker_src.chunk_and_vectorise import _read_and_split, chunk_and_vectorise_core
+from chunker_src.tokens import count_tokens, token_length_function
+
+
+class WhitespaceTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, add_special_tokens=True):
+        self.calls += 1
+        return SimpleNamespace(ids=text.split())
+
+    def encode_batch(self, texts, add_special_tokens=True):
+        return [self.encode(text) for text in texts]
+
+
+SOURCE = "\n\n".join(
+    f"def function_{idx}(a, b):\n    total = a + b + {idx}\n    return total * {idx}\n"
+    for idx in range(20)
+)
+
+
+def test_token_length_function_memoizes():
+    tokenizer = WhitespaceTokenizer()
+    length = token_length_function(tokenizer)
+    assert length("a b c") == 3
+    assert length("a b c") == 3
+    assert tokenizer.calls == 1
+    assert count_tokens(tokenizer, ["a b", "c"]) == [2, 1]
+
+
+def test_read_and_split_respects_token_budget(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(SOURCE)
+    tokenizer = WhitespaceTokenizer()
+    chunks = _read_and_split(
+        str(path),
+        "python",
+        chunker_model.TokenSplitter(tokenizer=tokenizer, chunk_tokens=30),
+    )
+    counts = count_tokens(tokenizer, chunks)
+    assert len(chunks) > 1
+    assert max(counts) <= 30
+    assert sum(counts) == len(SOURCE.split())
+
+
+def test_chunk_and_vectorise_core_stores_token_counts(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "module.py").write_text(SOURCE)
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        chunk_tokens=30,
+        max_batch_tokens=60,
+    )
+    added = []
+
+    async def run():
+        collection = await fake_client.get_or_create_collection("test")
+        original_add = collection.add
+
+        async def add(**kwargs):
+            added.append(sum(meta["tokens"] for meta in kwargs["metadatas"]))
+            await original_add(**kwargs)
+
+        with (
+            mock.patch(
+                "chunker_src.chunk_and_vectorise.load_tokenizer",
+                lambda path: WhitespaceTokenizer(),
+            ),
+            mock.patch.object(collection, "add", add),
+        ):
+            return await chunk_and_vectorise_core(
+                project_dir, "*.py", config, logging.getLogger("test")
+            )
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    tokens = [collection.metadatas[i]["tokens"] for i in collection.ids]
+    assert max(tokens) <= 30
+    assert sum(tokens) == len(SOURCE.split())
+    assert len(added) > 1
+    assert max(added) <= 60
+
+
+def test_overlapping_token_chunks_have_their_file_lines(tmp_path, fake_client):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "module.py").write_text(SOURCE)
+    lines = SOURCE.splitlines()
+    config = chunker_model.ChunkAndVectoriseConfig(
+        chroma_host="fake",
+        chroma_port=0,
+        collection_name="test",
+        max_batch_size=64,
+        language="python",
+        state_dir=tmp_path / "state",
+        chunk_tokens=30,
+        chunk_overlap_tokens=15,
+    )
+
+    async def run():
+        with mock.patch(
+            "chunker_src.chunk_and_vectorise.load_tokenizer",
+            lambda path: WhitespaceTokenizer(),
+        ):
+            return await chunk_and_vectorise_core(
+                project_dir, "*.py", config, logging.getLogger("test")
+            )
+
+    assert asyncio.run(run()) is None
+    collection = fake_client.collections["test"]
+    metas = sorted(
+        (
+            {**collection.metadatas[i], "chunk": collection.documents[i]}
+            for i in collection.ids
+        ),
+        key=lambda meta: (meta["start"], meta["end"]),
+    )
+    assert any(
+        later["start"] <= earlier["end"] for earlier, later in zip(metas, metas[1:])
+    )
+    for meta in metas:
+        text = "\n".join(lines[meta["start"] : meta["end"] + 1])
+        assert text.strip() == meta["chunk"]